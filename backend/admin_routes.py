@@ -1,12 +1,52 @@
 """
 SKL Admin Dashboard API Routes
 """
-from flask import jsonify, request
+from flask import current_app, jsonify, request
 from functools import wraps
+import os
 import sqlite3
 from datetime import datetime
 import json
 import uuid
+import requests
+from urllib.request import pathname2url
+from sleeper_client import get_sleeper_client
+from cache_versions import get_cache_version, league_cache_key
+from matchups import StandingsCache, apply_standings
+from bracket_sync import fetch_league_brackets, get_sync_job, start_bracket_sync_job, write_league_brackets
+from league_summary import DEFAULT_PAGE_SIZE, list_league_summaries, refresh_league_summary
+from flow_tx_tracker import list_flow_transactions, tracker_table_exists
+from analytics_replica import connect_analytics
+from db_backup import list_backups, read_manifest, verify_backup
+from db_maintenance import storage_report
+from league_refresh import refresh_plan
+from league_shards import connect_core, connect_league_db
+from season_archive import run_season_rollover
+from vault_poller import get_last_poll_time, get_vault_history, history_table_exists
+
+# Seconds of lag each analytics screen accepts; within it the screen reads the analytics replica
+ANALYTICS_MAX_STALENESS = {
+    'dashboard': 300,
+    'leagues': 600,
+    'fees': 600,
+    'payouts': 300,
+    'vaults': 300,
+}
+
+# Standings computed from stored matchups, shared by the standings and payout screens
+_standings_cache = StandingsCache()
+
+
+def _league_standings(cursor, league_id):
+    """Cached matchup-based standings for a league, keyed by its data version."""
+    return _standings_cache.get_standings(cursor, league_id, get_cache_version(cursor, league_cache_key(league_id)))
+
+
+def _session_wallet(token):
+    """Wallet of an unexpired session token, or None. Slides the session's expiry like the app's own routes."""
+    resources = current_app.extensions['skl_resources']
+    return resources.get_session_store().get_wallet(resources.get_db().cursor(), token)
+
 
 def admin_required(f):
     """Decorator to require admin authentication"""
@@ -22,14 +62,7 @@ def admin_required(f):
                 # Handle both "Bearer <token>" and direct token formats
                 token = auth_header.split(' ', 1)[1] if auth_header.startswith('Bearer ') else auth_header
                 try:
-                    conn = sqlite3.connect('keeper.db')
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT wallet_address FROM sessions WHERE session_token = ?", (token,))
-                    session_data = cursor.fetchone()
-                    if session_data:
-                        wallet_address = session_data['wallet_address']
-                    conn.close()
+                    wallet_address = _session_wallet(token)
                 except Exception as e:
                     print(f"Error getting wallet from session in decorator: {e}")
 
@@ -38,7 +71,7 @@ def admin_required(f):
 
         # Check if user is admin
         try:
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core(current_app.config['DATABASE_URL'])
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT role FROM AdminUsers WHERE wallet_address = ?", (wallet_address,))
@@ -61,6 +94,17 @@ def admin_required(f):
 def register_admin_routes(app):
     """Register all admin API routes"""
 
+    def analytics_connection(screen):
+        """
+        Connection for an analytics screen, from the replica when it is recent enough for the screen.
+
+        ?fresh=true reads the live database. Returns the connection and the data's source, as_of and staleness_seconds.
+        """
+        max_staleness = 0 if request.args.get('fresh', 'false').lower() == 'true' else ANALYTICS_MAX_STALENESS[screen]
+        conn, freshness = connect_analytics(app.config['DATABASE_URL'], app.extensions['skl_resources'].replica_path(), max_staleness)
+        conn.row_factory = sqlite3.Row
+        return conn, freshness
+
     @app.route('/admin/verify', methods=['GET'])
     def admin_verify():
         """Check if current user is admin"""
@@ -74,14 +118,7 @@ def register_admin_routes(app):
                 # Handle both "Bearer <token>" and direct token formats
                 token = auth_header.split(' ', 1)[1] if auth_header.startswith('Bearer ') else auth_header
                 try:
-                    conn = sqlite3.connect('keeper.db')
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT wallet_address FROM sessions WHERE session_token = ?", (token,))
-                    session_data = cursor.fetchone()
-                    if session_data:
-                        wallet_address = session_data['wallet_address']
-                    conn.close()
+                    wallet_address = _session_wallet(token)
                 except Exception as e:
                     print(f"Error getting wallet from session: {e}")
 
@@ -89,7 +126,7 @@ def register_admin_routes(app):
             return jsonify({'is_admin': False, 'wallet_address': None})
 
         try:
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core(app.config['DATABASE_URL'])
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute("SELECT role FROM AdminUsers WHERE wallet_address = ?", (wallet_address,))
@@ -108,8 +145,7 @@ def register_admin_routes(app):
     def admin_dashboard_stats():
         """Get high-level dashboard statistics"""
         try:
-            conn = sqlite3.connect('keeper.db')
-            conn.row_factory = sqlite3.Row
+            conn, freshness = analytics_connection('dashboard')
             cursor = conn.cursor()
 
             # Total leagues
@@ -127,21 +163,22 @@ def register_admin_routes(app):
             fees = cursor.fetchone()
 
             # Active agents
-            cursor.execute("SELECT COUNT(*) as count FROM AgentExecutions WHERE status IN ('scheduled', 'running')")
+            cursor.execute("SELECT COUNT(*) as count FROM AgentExecutions WHERE status IN ('scheduled', 'running', 'submitted')")
             active_agents = cursor.fetchone()['count']
 
             # Pending payouts
             cursor.execute("SELECT COUNT(*) as count FROM PayoutSchedules WHERE payout_status = 'pending'")
             pending_payouts = cursor.fetchone()['count']
 
-            # Total yield earned
-            cursor.execute("SELECT SUM(yield_earned) as total_yield FROM YieldVaults WHERE status = 'active'")
-            total_yield_row = cursor.fetchone()
-            total_yield = total_yield_row['total_yield'] if total_yield_row['total_yield'] else 0.0
-
-            # Active vaults
-            cursor.execute("SELECT COUNT(*) as count FROM YieldVaults WHERE status = 'active'")
-            active_vaults = cursor.fetchone()['count']
+            # Active vaults with the yield and value cached by the vault poller
+            cursor.execute("""
+                SELECT COUNT(*) as count, SUM(yield_earned) as total_yield, SUM(current_value) as total_value
+                FROM YieldVaults WHERE status = 'active'
+            """)
+            vault_totals = cursor.fetchone()
+            active_vaults = vault_totals['count']
+            total_yield = vault_totals['total_yield'] or 0.0
+            vaults_last_polled_at = get_last_poll_time(cursor)
 
             conn.close()
 
@@ -154,8 +191,11 @@ def register_admin_routes(app):
                     'active_agents': active_agents,
                     'pending_payouts': pending_payouts,
                     'total_yield_earned': total_yield,
-                    'active_vaults': active_vaults
-                }
+                    'total_vault_value': vault_totals['total_value'] or 0.0,
+                    'active_vaults': active_vaults,
+                    'vaults_last_polled_at': vaults_last_polled_at
+                },
+                'data_freshness': freshness
             })
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -163,43 +203,40 @@ def register_admin_routes(app):
     @app.route('/admin/leagues', methods=['GET'])
     @admin_required
     def admin_get_all_leagues():
-        """Get all SKL leagues with fee status"""
-        try:
-            conn = sqlite3.connect('keeper.db')
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        """
+        Get one page of SKL leagues with fee status.
 
-            cursor.execute("""
-                SELECT
-                    lm.sleeper_league_id,
-                    lm.name,
-                    lm.season,
-                    lm.status,
-                    lf.fee_amount,
-                    lf.fee_currency,
-                    lf.fee_due_date,
-                    lf.collection_deadline,
-                    lf.yield_vault_id,
-                    lf.automated,
-                    fs.collection_status,
-                    fs.total_collected,
-                    (SELECT COUNT(DISTINCT sleeper_roster_id) FROM rosters WHERE sleeper_league_id = lm.sleeper_league_id) as total_teams,
-                    (SELECT COUNT(DISTINCT wallet_address) FROM LeaguePayments WHERE sleeper_league_id = lm.sleeper_league_id AND season_year = lm.season) as teams_paid
-                FROM LeagueMetadata lm
-                LEFT JOIN LeagueFees lf ON lm.sleeper_league_id = lf.sleeper_league_id
-                LEFT JOIN FeeSchedules fs ON lm.sleeper_league_id = fs.sleeper_league_id
-                WHERE lm.name LIKE 'SKL%'
-                ORDER BY lm.season DESC, lm.name
-            """)
-
-            leagues = []
-            for row in cursor.fetchall():
-                leagues.append(dict(row))
+        Query params: season, status, collection_status (filters), limit (default 50, max 200)
+        and cursor (next_cursor of the previous page).
+        """
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
 
+        conn = None
+        try:
+            conn, freshness = analytics_connection('leagues')
+            cursor = conn.cursor()
+            leagues, next_cursor = list_league_summaries(
+                cursor,
+                season=request.args.get('season'),
+                status=request.args.get('status'),
+                collection_status=request.args.get('collection_status'),
+                after=request.args.get('cursor'),
+                limit=limit
+            )
             conn.close()
 
-            return jsonify({'success': True, 'leagues': leagues})
+            return jsonify({'success': True, 'leagues': leagues, 'next_cursor': next_cursor, 'has_more': next_cursor is not None,
+                            'data_freshness': freshness})
+        except ValueError as e:
+            if conn:
+                conn.close()
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
+            if conn:
+                conn.close()
             return jsonify({'success': False, 'error': str(e)}), 500
 
     @app.route('/admin/league/<league_id>/fees', methods=['GET', 'POST'])
@@ -207,7 +244,7 @@ def register_admin_routes(app):
     def admin_manage_league_fees(league_id):
         """View/update fee schedules for a league"""
         try:
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core(app.config['DATABASE_URL'])
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -246,24 +283,32 @@ def register_admin_routes(app):
                 collection_deadline = data.get('collection_deadline')
                 automated = data.get('automated', 0)
 
-                # Update LeagueFees
-                cursor.execute("""
-                    INSERT INTO LeagueFees (sleeper_league_id, season_year, fee_amount, fee_due_date, collection_deadline, automated, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(sleeper_league_id, season_year)
-                    DO UPDATE SET fee_amount=?, fee_due_date=?, collection_deadline=?, automated=?, updated_at=?
-                """, (league_id, season_year, fee_amount, fee_due_date, collection_deadline, automated, datetime.now().isoformat(),
-                      fee_amount, fee_due_date, collection_deadline, automated, datetime.now().isoformat()))
-
-                # Create FeeSchedule if automated
-                if automated and collection_deadline:
-                    schedule_id = str(uuid.uuid4())
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO FeeSchedules (schedule_id, sleeper_league_id, season_year, due_date, total_expected, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (schedule_id, league_id, season_year, collection_deadline, fee_amount, datetime.now().isoformat()))
-
-                conn.commit()
+                def store_fee_schedule(write_cursor):
+                    # Update LeagueFees
+                    write_cursor.execute("""
+                        INSERT INTO LeagueFees (sleeper_league_id, season_year, fee_amount, fee_due_date, collection_deadline, automated, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(sleeper_league_id, season_year)
+                        DO UPDATE SET fee_amount=?, fee_due_date=?, collection_deadline=?, automated=?, updated_at=?
+                    """, (league_id, season_year, fee_amount, fee_due_date, collection_deadline, automated, datetime.now().isoformat(),
+                          fee_amount, fee_due_date, collection_deadline, automated, datetime.now().isoformat()))
+
+                    # Create FeeSchedule if automated
+                    if automated and collection_deadline:
+                        schedule_id = str(uuid.uuid4())
+                        write_cursor.execute("""
+                            INSERT OR IGNORE INTO FeeSchedules (schedule_id, sleeper_league_id, season_year, due_date, total_expected, created_at)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        """, (schedule_id, league_id, season_year, collection_deadline, fee_amount, datetime.now().isoformat()))
+
+                    refresh_league_summary(write_cursor, league_id)
+
+                writer = app.extensions['skl_resources'].get_db_writer()
+                if writer is not None:
+                    writer.execute(store_fee_schedule)
+                else:
+                    store_fee_schedule(cursor)
+                    conn.commit()
                 conn.close()
 
                 return jsonify({'success': True, 'message': 'Fee schedule updated'})
@@ -278,8 +323,7 @@ def register_admin_routes(app):
     def admin_fees_overview():
         """Overview of all fee collection across leagues"""
         try:
-            conn = sqlite3.connect('keeper.db')
-            conn.row_factory = sqlite3.Row
+            conn, freshness = analytics_connection('fees')
             cursor = conn.cursor()
 
             # By league
@@ -328,7 +372,8 @@ def register_admin_routes(app):
                     'by_league': by_league,
                     'by_status': by_status,
                     'upcoming_deadlines': upcoming_deadlines
-                }
+                },
+                'data_freshness': freshness
             })
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -338,7 +383,7 @@ def register_admin_routes(app):
     def admin_list_agents():
         """List all active agents with status"""
         try:
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -384,8 +429,7 @@ def register_admin_routes(app):
     def admin_list_vaults():
         """List all active yield vaults"""
         try:
-            conn = sqlite3.connect('keeper.db')
-            conn.row_factory = sqlite3.Row
+            conn, freshness = analytics_connection('vaults')
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -402,6 +446,8 @@ def register_admin_routes(app):
             # Calculate totals
             total_deposited = sum(v['principal_amount'] for v in vaults if v['status'] == 'active')
             total_yield = sum(v['yield_earned'] or 0.0 for v in vaults if v['status'] == 'active')
+            total_value = sum(v['current_value'] or 0.0 for v in vaults if v['status'] == 'active')
+            last_polled_at = get_last_poll_time(cursor)
 
             # Group by protocol
             by_protocol = {}
@@ -419,19 +465,151 @@ def register_admin_routes(app):
                     'active_vaults': vaults,
                     'total_deposited': total_deposited,
                     'total_yield': total_yield,
-                    'by_protocol': by_protocol
-                }
+                    'total_value': total_value,
+                    'by_protocol': by_protocol,
+                    'last_polled_at': last_polled_at
+                },
+                'data_freshness': freshness
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/admin/flow-transactions', methods=['GET'])
+    @admin_required
+    def admin_list_flow_transactions():
+        """Flow transactions followed by the sealing tracker, optionally filtered by status"""
+        try:
+            status = request.args.get('status')
+            if status and status not in ('submitted', 'sealed', 'failed'):
+                return jsonify({'success': False, 'error': 'status must be submitted, sealed or failed'}), 400
+            limit = request.args.get('limit', 100, type=int)
+            if not limit or limit < 1:
+                return jsonify({'success': False, 'error': 'limit must be a positive integer'}), 400
+
+            conn = connect_core(app.config['DATABASE_URL'])
+            cursor = conn.cursor()
+            if not tracker_table_exists(cursor):
+                conn.close()
+                return jsonify({'success': False, 'error': 'Transaction tracking not available (run migration 006)'}), 404
+            transactions = list_flow_transactions(cursor, status=status, limit=min(limit, 1000))
+            conn.close()
+
+            return jsonify({'success': True, 'transactions': transactions})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/admin/vaults/<vault_id>/history', methods=['GET'])
+    @admin_required
+    def admin_vault_history(vault_id):
+        """Value history of one vault recorded by the vault poller"""
+        try:
+            limit = request.args.get('limit', 500, type=int)
+            if not limit or limit < 1:
+                return jsonify({'success': False, 'error': 'limit must be a positive integer'}), 400
+
+            conn = connect_core(app.config['DATABASE_URL'])
+            cursor = conn.cursor()
+            if not history_table_exists(cursor):
+                conn.close()
+                return jsonify({'success': False, 'error': 'Vault history not available (run migration 005)'}), 404
+            history = get_vault_history(cursor, vault_id, since=request.args.get('since'), limit=min(limit, 5000))
+            conn.close()
+
+            return jsonify({
+                'success': True,
+                'vault_id': vault_id,
+                'history': history
             })
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
 
+    @app.route('/admin/archive/rollover', methods=['POST'])
+    @admin_required
+    def admin_season_rollover():
+        """Move closed seasons' contracts, transactions, drafts and trades into the archive database"""
+        try:
+            # The same database and archive file the app's connection attaches for the all_<table> views
+            archive_path = app.extensions['skl_resources'].archive_path()
+            if archive_path is None:
+                return jsonify({'success': False, 'error': 'Season archive is disabled (ARCHIVE_DATABASE_URL is empty)'}), 409
+            conn = connect_core(app.config['DATABASE_URL'])
+            result = run_season_rollover(conn, archive_path)
+            conn.close()
+            if result['current_season'] is None:
+                return jsonify({'success': False, 'error': 'Current season is not set'}), 409
+
+            return jsonify({
+                'success': True,
+                'current_season': result['current_season'],
+                'archived': {str(season): moved for season, moved in result['seasons'].items()}
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/admin/storage', methods=['GET'])
+    @admin_required
+    def admin_storage():
+        """Database pages, free pages, WAL size and checkpoint lag, row counts per table, the last maintenance runs and this worker's replica refreshes"""
+        try:
+            # Read-only connection: the report never writes or checkpoints
+            db_path = app.config['DATABASE_URL']
+            conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+            report = storage_report(conn, db_path)
+            conn.close()
+            report['analytics_replica_metrics'] = app.extensions['skl_resources'].replica_metrics()
+
+            return jsonify({'success': True, 'storage': report})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/admin/backups', methods=['GET'])
+    @admin_required
+    def admin_backups():
+        """Backup generations with their manifests, this worker's backup metrics; ?verify=true re-verifies each generation"""
+        try:
+            resources = app.extensions['skl_resources']
+            verify = request.args.get('verify', 'false').lower() == 'true'
+            generations = []
+            for backup_path in list_backups(resources.backup_dir(), app.config['DATABASE_URL']):
+                generation = read_manifest(backup_path)
+                if verify:
+                    generation['verification'] = verify_backup(backup_path)
+                generations.append(generation)
+
+            return jsonify({'success': True, 'generations': generations, 'metrics': resources.backup_metrics()})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/admin/refresh/plan', methods=['GET'])
+    @admin_required
+    def admin_refresh_plan():
+        """
+        Next runs of the scheduled league refreshes, the call budget and this worker's refresh metrics.
+
+        Query params: limit (planned refreshes returned, default 100, max 1000).
+        """
+        try:
+            limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+        try:
+            conn = connect_core(app.config['DATABASE_URL'])
+            plan = refresh_plan(conn, app.config['LEAGUE_REFRESH_CALL_BUDGET'], limit=limit)
+            conn.close()
+
+            plan['enabled'] = bool(app.config.get('LEAGUE_REFRESH_INTERVAL'))
+            plan['metrics'] = app.extensions['skl_resources'].refresh_metrics()
+            return jsonify({'success': True, 'plan': plan})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
     @app.route('/admin/payouts', methods=['GET'])
     @admin_required
     def admin_list_payouts():
         """List all scheduled/completed payouts"""
         try:
-            conn = sqlite3.connect('keeper.db')
-            conn.row_factory = sqlite3.Row
+            conn, freshness = analytics_connection('payouts')
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -458,174 +636,92 @@ def register_admin_routes(app):
                     'pending': pending,
                     'upcoming': upcoming,
                     'completed': completed
-                }
+                },
+                'data_freshness': freshness
             })
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
 
+    @app.route('/admin/sleeper/metrics', methods=['GET'])
+    @admin_required
+    def get_sleeper_client_metrics():
+        """Outbound Sleeper traffic: request counters, circuit breaker state and rate limiter waits for this process"""
+        return jsonify({'success': True, 'metrics': get_sleeper_client().metrics()})
+
     @app.route('/admin/league/<league_id>/playoff-bracket/sync', methods=['POST'])
     @admin_required
     def sync_playoff_bracket(league_id):
         """Fetch playoff bracket from Sleeper API and store in database"""
         try:
-            import requests
-
             data = request.json
             season_year = data.get('season_year', 2025)
 
-            # Fetch winners bracket from Sleeper API
-            winners_url = f"https://api.sleeper.app/v1/league/{league_id}/winners_bracket"
-            losers_url = f"https://api.sleeper.app/v1/league/{league_id}/losers_bracket"
+            # Fetch brackets through the shared Sleeper client (timeouts, rate limit, circuit breaker)
+            try:
+                winners_bracket, losers_bracket = fetch_league_brackets(get_sleeper_client(), league_id)
+            except requests.exceptions.RequestException as e:
+                return jsonify({'success': False, 'error': f'Failed to fetch winners bracket: {e}'}), 500
 
-            winners_response = requests.get(winners_url)
-            losers_response = requests.get(losers_url)
-
-            if winners_response.status_code != 200:
-                return jsonify({'success': False, 'error': f'Failed to fetch winners bracket: {winners_response.status_code}'}), 500
-
-            winners_bracket = winners_response.json()
-            losers_bracket = losers_response.json() if losers_response.status_code == 200 else []
-
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_league_db(app.config['DATABASE_URL'], league_id)
             conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            # Store raw bracket data
-            winners_bracket_id = f"{league_id}_{season_year}_winners"
-            cursor.execute("""
-                INSERT OR REPLACE INTO PlayoffBrackets (bracket_id, sleeper_league_id, season_year, bracket_type, bracket_data, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (winners_bracket_id, league_id, season_year, 'winners_bracket', json.dumps(winners_bracket), datetime.now().isoformat()))
-
-            if losers_bracket:
-                losers_bracket_id = f"{league_id}_{season_year}_losers"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO PlayoffBrackets (bracket_id, sleeper_league_id, season_year, bracket_type, bracket_data, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (losers_bracket_id, league_id, season_year, 'losers_bracket', json.dumps(losers_bracket), datetime.now().isoformat()))
-
-            # Parse and store individual matchups
-            for matchup in winners_bracket:
-                matchup_id = f"{league_id}_{season_year}_W_R{matchup.get('r')}_M{matchup.get('m')}"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO PlayoffMatchups (
-                        matchup_id, sleeper_league_id, season_year, bracket_type, round_number, match_number,
-                        team1_roster_id, team2_roster_id, winner_roster_id, loser_roster_id,
-                        team1_from_match, team2_from_match, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    matchup_id, league_id, season_year, 'winners_bracket',
-                    matchup.get('r'), matchup.get('m'),
-                    str(matchup.get('t1')) if matchup.get('t1') else None,
-                    str(matchup.get('t2')) if matchup.get('t2') else None,
-                    str(matchup.get('w')) if matchup.get('w') else None,
-                    str(matchup.get('l')) if matchup.get('l') else None,
-                    json.dumps(matchup.get('t1_from')) if matchup.get('t1_from') else None,
-                    json.dumps(matchup.get('t2_from')) if matchup.get('t2_from') else None,
-                    datetime.now().isoformat()
-                ))
-
-            for matchup in losers_bracket:
-                matchup_id = f"{league_id}_{season_year}_L_R{matchup.get('r')}_M{matchup.get('m')}"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO PlayoffMatchups (
-                        matchup_id, sleeper_league_id, season_year, bracket_type, round_number, match_number,
-                        team1_roster_id, team2_roster_id, winner_roster_id, loser_roster_id,
-                        team1_from_match, team2_from_match, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    matchup_id, league_id, season_year, 'losers_bracket',
-                    matchup.get('r'), matchup.get('m'),
-                    str(matchup.get('t1')) if matchup.get('t1') else None,
-                    str(matchup.get('t2')) if matchup.get('t2') else None,
-                    str(matchup.get('w')) if matchup.get('w') else None,
-                    str(matchup.get('l')) if matchup.get('l') else None,
-                    json.dumps(matchup.get('t1_from')) if matchup.get('t1_from') else None,
-                    json.dumps(matchup.get('t2_from')) if matchup.get('t2_from') else None,
-                    datetime.now().isoformat()
-                ))
+            # Brackets, matchups and placements are written in one transaction
+            summary = write_league_brackets(conn, league_id, season_year, winners_bracket, losers_bracket)
+            conn.close()
 
-            # Determine final placements from bracket
-            # Find championship match (highest round in winners bracket)
-            cursor.execute("""
-                SELECT * FROM PlayoffMatchups
-                WHERE sleeper_league_id = ? AND season_year = ? AND bracket_type = 'winners_bracket'
-                ORDER BY round_number DESC
-                LIMIT 1
-            """, (league_id, season_year))
-            championship = cursor.fetchone()
+            return jsonify({
+                'success': True,
+                'message': f'Playoff bracket synced for league {league_id}',
+                'winners_bracket_matches': summary['winners_bracket_matches'],
+                'losers_bracket_matches': summary['losers_bracket_matches']
+            })
 
-            if championship and championship['winner_roster_id']:
-                # 1st place: Championship winner
-                placement_id = f"{league_id}_{season_year}_{championship['winner_roster_id']}"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO LeaguePlacements (
-                        placement_id, sleeper_league_id, season_year, roster_id,
-                        placement_type, final_rank, determined_by, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (placement_id, league_id, season_year, championship['winner_roster_id'],
-                      '1st_place', 1, 'playoff_bracket', datetime.now().isoformat()))
-
-                # 2nd place: Championship loser
-                placement_id = f"{league_id}_{season_year}_{championship['loser_roster_id']}"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO LeaguePlacements (
-                        placement_id, sleeper_league_id, season_year, roster_id,
-                        placement_type, final_rank, determined_by, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (placement_id, league_id, season_year, championship['loser_roster_id'],
-                      '2nd_place', 2, 'playoff_bracket', datetime.now().isoformat()))
-
-            # Find 3rd place match (consolation bracket or losers bracket final)
-            cursor.execute("""
-                SELECT * FROM PlayoffMatchups
-                WHERE sleeper_league_id = ? AND season_year = ?
-                    AND bracket_type = 'losers_bracket'
-                    AND winner_roster_id IS NOT NULL
-                ORDER BY round_number DESC
-                LIMIT 1
-            """, (league_id, season_year))
-            third_place_match = cursor.fetchone()
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
 
-            if third_place_match and third_place_match['winner_roster_id']:
-                placement_id = f"{league_id}_{season_year}_{third_place_match['winner_roster_id']}"
-                cursor.execute("""
-                    INSERT OR REPLACE INTO LeaguePlacements (
-                        placement_id, sleeper_league_id, season_year, roster_id,
-                        placement_type, final_rank, determined_by, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (placement_id, league_id, season_year, third_place_match['winner_roster_id'],
-                      '3rd_place', 3, 'consolation_match', datetime.now().isoformat()))
-
-            # Get regular season winner (most wins)
-            cursor.execute("""
-                SELECT sleeper_roster_id FROM rosters
-                WHERE sleeper_league_id = ?
-                ORDER BY wins DESC, points_for DESC
-                LIMIT 1
-            """, (league_id,))
-            reg_season_winner = cursor.fetchone()
+    @app.route('/admin/playoff-brackets/sync', methods=['POST'])
+    @admin_required
+    def sync_all_playoff_brackets():
+        """Start a background job that syncs playoff brackets for every SKL league of a season"""
+        try:
+            data = request.json or {}
+            season_year = data.get('season_year', 2025)
+            league_ids = data.get('league_ids')
 
-            if reg_season_winner:
-                placement_id = f"{league_id}_{season_year}_{reg_season_winner['sleeper_roster_id']}_rs"
+            conn = connect_core(app.config['DATABASE_URL'])
+            cursor = conn.cursor()
+            if not league_ids:
                 cursor.execute("""
-                    INSERT OR REPLACE INTO LeaguePlacements (
-                        placement_id, sleeper_league_id, season_year, roster_id,
-                        placement_type, final_rank, determined_by, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (placement_id, league_id, season_year, reg_season_winner['sleeper_roster_id'],
-                      'regular_season_winner', 0, 'regular_season', datetime.now().isoformat()))
-
-            conn.commit()
+                    SELECT sleeper_league_id FROM LeagueMetadata
+                    WHERE name LIKE 'SKL%' AND season = ?
+                    ORDER BY sleeper_league_id
+                """, (str(season_year),))
+                league_ids = [row[0] for row in cursor.fetchall()]
             conn.close()
 
+            if not league_ids:
+                return jsonify({'success': False, 'error': f'No SKL leagues found for season {season_year}'}), 404
+
+            job_id = start_bracket_sync_job(app.config['DATABASE_URL'], league_ids, season_year, created_by=request.admin_wallet)
             return jsonify({
                 'success': True,
-                'message': f'Playoff bracket synced for league {league_id}',
-                'winners_bracket_matches': len(winners_bracket),
-                'losers_bracket_matches': len(losers_bracket)
-            })
+                'job_id': job_id,
+                'total_leagues': len(league_ids),
+                'status_url': f'/admin/sync-jobs/{job_id}'
+            }), 202
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
 
+    @app.route('/admin/sync-jobs/<job_id>', methods=['GET'])
+    @admin_required
+    def get_sync_job_status(job_id):
+        """Progress and per-league results of a background sync job"""
+        try:
+            conn = connect_core(app.config['DATABASE_URL'])
+            job = get_sync_job(conn, job_id)
+            conn.close()
+            if not job:
+                return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jsonify({'success': True, 'job': job})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -634,7 +730,7 @@ def register_admin_routes(app):
     def get_league_standings_for_payouts(league_id):
         """Get league standings sorted by wins for payout calculation"""
         try:
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -656,6 +752,7 @@ def register_admin_routes(app):
             ''', (league_id,))
 
             standings = [dict(row) for row in cursor.fetchall()]
+            apply_standings(standings, _league_standings(cursor, league_id), roster_key='sleeper_roster_id')
             conn.close()
 
             return jsonify({
@@ -678,7 +775,7 @@ def register_admin_routes(app):
             if not prize_pool or prize_pool <= 0:
                 return jsonify({'success': False, 'error': 'Valid prize_pool amount required'}), 400
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -782,10 +879,11 @@ def register_admin_routes(app):
                         AND r.sleeper_league_id = ull.sleeper_league_id
                     WHERE r.sleeper_league_id = ?
                     ORDER BY r.wins DESC, r.points_for DESC
-                    LIMIT 4
                 ''', (league_id,))
 
-                top_teams = cursor.fetchall()
+                # Head-to-head and points tiebreaks from stored matchups when available
+                top_teams = apply_standings([dict(row) for row in cursor.fetchall()],
+                                            _league_standings(cursor, league_id), roster_key='sleeper_roster_id')[:4]
                 conn.close()
 
                 if len(top_teams) < 4:
@@ -867,7 +965,7 @@ def register_admin_routes(app):
             if not deposit_tx_id:
                 return jsonify({'success': False, 'error': 'Transaction ID required'}), 400
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -910,7 +1008,7 @@ def register_admin_routes(app):
             if not vault_id or not withdrawal_tx_id:
                 return jsonify({'success': False, 'error': 'vault_id and withdrawal_tx_id required'}), 400
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -948,12 +1046,12 @@ def register_admin_routes(app):
     @app.route('/admin/league/<league_id>/vault/balance', methods=['GET'])
     @admin_required
     def get_vault_balance(league_id):
-        """Get current vault balance from database"""
+        """Get the vault balance cached by the vault poller"""
         try:
             season_year = request.args.get('season_year', 2025)
             vault_id = f"vault_{league_id}_{season_year}"
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -962,6 +1060,7 @@ def register_admin_routes(app):
             """, (vault_id,))
 
             vault = cursor.fetchone()
+            last_polled_at = get_last_poll_time(cursor)
             conn.close()
 
             if not vault:
@@ -969,7 +1068,8 @@ def register_admin_routes(app):
 
             return jsonify({
                 'success': True,
-                'vault': dict(vault)
+                'vault': dict(vault),
+                'last_polled_at': last_polled_at
             })
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -989,7 +1089,7 @@ def register_admin_routes(app):
             if not prize_pool or not distributions or not transaction_id:
                 return jsonify({'success': False, 'error': 'prize_pool, distributions, and transaction_id required'}), 400
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -1049,7 +1149,7 @@ def register_admin_routes(app):
             if execution_delay_seconds > 604800:  # 7 days
                 return jsonify({'success': False, 'error': 'Execution delay cannot exceed 7 days (604800 seconds)'}), 400
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -1084,7 +1184,7 @@ def register_admin_routes(app):
         try:
             season_year = request.args.get('season_year', 2025)
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core('keeper.db')
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -1142,14 +1242,13 @@ def register_admin_routes(app):
             season_year = data.get('season_year', 2025)
             pool_id = data.get('pool_id', 198)  # Default FLOW pool on IncrementFi
 
-            conn = sqlite3.connect('keeper.db')
+            conn = connect_core(app.config['DATABASE_URL'])
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
-            # Execute staking
+            # Execute staking; it commits its execution record through the app's writer
             result = execute_staking_transaction(league_id, season_year, pool_id, cursor)
 
-            conn.commit()
             conn.close()
 
             if result['success']:
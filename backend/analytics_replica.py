@@ -0,0 +1,266 @@
+"""
+Snapshot replica of the keeper database for the admin analytics screens.
+
+The admin dashboard, league list, fee overview, payouts and vaults screens run wide
+aggregates. Against the live file those reads compete with user requests for the
+page cache and hold WAL read marks that keep checkpoints from resetting the WAL.
+
+refresh_replica() copies the live database into keeper_analytics.db with SQLite's
+backup API, a few hundred pages per step inside one read transaction (the same
+pinned snapshot create_backup() takes), records the snapshot's time in the copy and
+renames it over the previous replica. connect_replica() opens the replica read-only
+and immutable: no locks, no WAL, and a connection opened before a refresh keeps
+reading the file it opened, so a long aggregate sees one snapshot throughout.
+
+Each admin endpoint declares how stale its data may be. connect_analytics() returns
+a replica connection when the replica is at most that old and falls back to the live
+database otherwise, along with where the data came from and as of when.
+ReplicaScheduler refreshes the replica on a daemon thread; a worker claims the
+'replica' task in db_maintenance, so the file is refreshed once per interval however
+many workers there are.
+
+Only the core file is copied. The tables behind the admin screens (LeagueMetadata,
+fees, payouts, vaults, LeagueAdminSummary) are core tables; in a sharded database
+the league tables of the replica are the core file's empty templates.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.request import pathname2url
+
+from db_maintenance import claim_task, record_task_result
+from league_shards import connect_core
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLICA_INTERVAL = 120  # Seconds between refreshes
+DEFAULT_REPLICA_PAGES = 256  # Pages copied per step
+DEFAULT_REPLICA_PAUSE = 0.01  # Seconds between steps
+PARTIAL_SUFFIX = '.partial'
+
+REPLICA_INFO_DDL = '''CREATE TABLE analytics_replica (
+                          id INTEGER PRIMARY KEY CHECK (id = 1),
+                          refreshed_at TEXT NOT NULL, -- UTC time of the snapshot
+                          source TEXT NOT NULL -- Live database file it was copied from
+                      )'''
+
+
+def replica_path_for(db_path: str) -> str:
+    """Default replica file next to the database: keeper.db -> keeper_analytics.db."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_analytics{ext or '.db'}"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def refresh_replica(db_path: str, replica_path: str, pages: int = DEFAULT_REPLICA_PAGES,
+                    pause: float = DEFAULT_REPLICA_PAUSE, busy_timeout: float = 30.0,
+                    now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Copy the live database into a new replica and rename it over the old one.
+
+    Args:
+        db_path (str): Live keeper database file.
+        replica_path (str): Replica file, replaced when the copy is complete.
+        pages (int): Pages copied per step.
+        pause (float): Seconds slept between steps.
+        busy_timeout (float): Seconds to wait on locks.
+        now (Optional[datetime]): UTC time recorded as the snapshot's, for tests.
+
+    Returns:
+        Dict[str, Any]: path, refreshed_at, bytes, page_count, seconds, steps and max_step_ms.
+    """
+    partial_path = replica_path + PARTIAL_SUFFIX
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    steps: List[float] = []
+    started = time.monotonic()
+    step_started = [started]
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        steps.append(time.monotonic() - step_started[0])
+        if remaining and pause:
+            time.sleep(pause)
+        step_started[0] = time.monotonic()
+
+    source = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None)
+    target = sqlite3.connect(partial_path)
+    try:
+        # The replica is stamped with this read transaction's snapshot; commits during the
+        # copy are neither included nor restart it
+        source.execute("BEGIN")
+        refreshed_at = now or _utcnow()
+        page_count = source.execute("PRAGMA page_count").fetchone()[0]
+        source.backup(target, pages=pages, progress=progress)
+        source.execute("ROLLBACK")
+        target.execute("DROP TABLE IF EXISTS analytics_replica")
+        target.execute(REPLICA_INFO_DDL)
+        target.execute("INSERT INTO analytics_replica (id, refreshed_at, source) VALUES (1, ?, ?)",
+                       (refreshed_at.isoformat(timespec='seconds'), os.path.abspath(db_path)))
+        target.commit()
+        # Immutable readers need a standalone file: no -wal/-shm next to it
+        target.execute("PRAGMA journal_mode=DELETE")
+    except Exception:
+        target.close()
+        os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+
+    result = {
+        'path': replica_path,
+        'refreshed_at': refreshed_at.isoformat(timespec='seconds'),
+        'bytes': os.path.getsize(partial_path),
+        'page_count': page_count,
+        'seconds': round(time.monotonic() - started, 3),
+        'steps': len(steps),
+        'max_step_ms': round(max(steps, default=0) * 1000, 2),
+    }
+    # Readers of the old replica keep its inode and their snapshot; new connections open the new file
+    os.replace(partial_path, replica_path)
+    return result
+
+
+def connect_replica(replica_path: str) -> sqlite3.Connection:
+    """
+    Read-only connection to the replica.
+
+    immutable=1 skips locking and change detection, which holds because a refresh
+    replaces the file instead of writing into it.
+    """
+    return sqlite3.connect(f"file:{pathname2url(os.path.abspath(replica_path))}?mode=ro&immutable=1",
+                           uri=True, check_same_thread=False)
+
+
+def replica_refreshed_at(conn: sqlite3.Connection) -> Optional[datetime]:
+    """UTC time of the snapshot on a replica connection, None if it is not a replica."""
+    try:
+        row = conn.execute("SELECT refreshed_at FROM analytics_replica WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return datetime.fromisoformat(row[0]) if row else None
+
+
+def connect_analytics(db_path: str, replica_path: Optional[str], max_staleness: float,
+                      now: Optional[datetime] = None) -> Tuple[sqlite3.Connection, Dict[str, Any]]:
+    """
+    Connection for an analytics read that accepts data up to max_staleness seconds old.
+
+    Args:
+        db_path (str): Live keeper database file, read when the replica is missing or too old.
+        replica_path (Optional[str]): Replica file; None reads the live database.
+        max_staleness (float): Seconds the caller's data may lag the live database.
+        now (Optional[datetime]): Current UTC time, for tests.
+
+    Returns:
+        Tuple[sqlite3.Connection, Dict[str, Any]]: The connection (the caller closes it) and
+            source ('replica' or 'live'), as_of and staleness_seconds of its data.
+    """
+    now = now or _utcnow()
+    if replica_path and os.path.exists(replica_path):
+        conn = None
+        try:
+            conn = connect_replica(replica_path)
+            refreshed_at = replica_refreshed_at(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"analytics_replica: Cannot read {replica_path}: {e}")
+            refreshed_at = None
+        if refreshed_at is not None:
+            staleness = max((now - refreshed_at).total_seconds(), 0.0)
+            if staleness <= max_staleness:
+                return conn, {'source': 'replica', 'as_of': refreshed_at.isoformat(timespec='seconds'),
+                              'staleness_seconds': round(staleness, 1)}
+        if conn is not None:
+            conn.close()
+    return connect_core(db_path), {'source': 'live', 'as_of': now.isoformat(timespec='seconds'), 'staleness_seconds': 0.0}
+
+
+class ReplicaScheduler:
+    """
+    Refreshes the analytics replica every interval seconds on a daemon thread.
+
+    Args:
+        db_path (str): Live keeper database file.
+        replica_path (str): Replica file.
+        interval (float): Seconds between refreshes.
+        pages (int): Pages copied per step.
+        pause (float): Seconds between steps.
+        busy_timeout (float): Seconds to wait on locks.
+    """
+
+    def __init__(self, db_path: str, replica_path: str, interval: float = DEFAULT_REPLICA_INTERVAL,
+                 pages: int = DEFAULT_REPLICA_PAGES, pause: float = DEFAULT_REPLICA_PAUSE, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.replica_path = replica_path
+        self.interval = interval
+        self.pages = pages
+        self.pause = pause
+        self.busy_timeout = busy_timeout
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'refreshes': 0, 'failed': 0, 'seconds_total': 0.0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Refresh the replica unless another worker refreshed it within the interval.
+        Errors are logged and returned, never raised.
+
+        Returns:
+            Optional[Dict[str, Any]]: The refresh's result, or None when not due.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+        try:
+            if not claim_task(conn, 'replica', timedelta(0) if force else timedelta(seconds=self.interval * 0.9)):
+                return None
+            result = refresh_replica(self.db_path, self.replica_path, self.pages, self.pause, self.busy_timeout)
+            record_task_result(conn, 'replica', result)
+            with self._stats_lock:
+                self._stats['refreshes'] += 1
+                self._stats['seconds_total'] += result['seconds']
+        except Exception as e:
+            logger.error(f"analytics_replica: Refresh failed: {e}")
+            result = {'status': 'failed', 'error': str(e)}
+            with self._stats_lock:
+                self._stats['failed'] += 1
+        finally:
+            conn.close()
+        self.last_result = result
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters of this process's refreshes and the last result."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['seconds_total'] = round(stats['seconds_total'], 3)
+        stats['last_result'] = self.last_result
+        return stats
+
+    def start(self) -> None:
+        """Start refreshing in the background (first check immediately)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='analytics-replica', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current refresh."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        check_every = min(self.interval, 60)
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(check_every)
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, flash, redirect, url_for, session, jsonify
+from flask import Flask, Blueprint, current_app, has_app_context, render_template, request, flash, redirect, url_for, session, jsonify
 import sqlite3, math
 import os
 import secrets
@@ -6,82 +6,789 @@ import requests # Added import for requests
 from sleeper_service import SleeperService
 import json
 import time # Added for potential sleep, though might not be used in final global conn version
+import threading
 from functools import wraps # Import wraps
 import logging # Add logging import
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 from utils import get_escalated_contract_costs # Changed to direct import
-from datetime import datetime
-
-# Load environment variables
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    print("Environment variables loaded from .env file")
-except ImportError:
-    print("python-dotenv not installed. Using system environment variables only.")
+from draft_picks import DRAFT_PICKS_DDL, DRAFT_PICKS_INDEXES, backfill_draft_picks, get_auction_acquisitions
+from matchups import MATCHUPS_DDL, StandingsCache, apply_standings
+from player_catalog import PlayerCatalogCache, get_catalog_version, get_players_since
+from cache_versions import CACHE_VERSIONS_DDL, CacheVersionTracker, bump_cache_version, league_cache_key
+from team_snapshots import TEAM_PAGE_SNAPSHOTS_DDL, get_team_snapshot, rebuild_team_snapshots
+from league_home import get_user_leagues_with_teams
+from league_summary import create_summary_table, refresh_league_summary
+from season_archive import archive_path_for, attach_archive
+from league_shards import attach_core, attach_shards, connect_league_db, ensure_shard_schemas, get_shard_count, shard_index, shard_path
+from db_writer import DatabaseWriter
+from session_store import DEFAULT_SWEEP_INTERVAL, SessionStore, create_session, create_sessions_table
+from sleeper_transactions import compact_transactions, create_transaction_tables, transaction_details
+from flow_tx_tracker import FlowAccessClient, TransactionTracker, parse_transaction_id, record_submission
+from payload_archive import PayloadArchive, payload_archive_path_for
+from db_backup import (DEFAULT_BACKUP_GENERATIONS, DEFAULT_BACKUP_INTERVAL, DEFAULT_BACKUP_PAGES, DEFAULT_BACKUP_PAUSE,
+                       BackupScheduler, backup_dir_for)
+from analytics_replica import DEFAULT_REPLICA_INTERVAL, DEFAULT_REPLICA_PAGES, ReplicaScheduler, replica_path_for
+from db_maintenance import (DEFAULT_ANALYZE_CHANGES, DEFAULT_MAINTENANCE_INTERVAL, DEFAULT_VACUUM_FREE_RATIO,
+                            DEFAULT_WAL_TRUNCATE_BYTES, MaintenanceScheduler, create_maintenance_table, parse_quiet_hours)
+from league_refresh import (DEFAULT_CALL_BUDGET, DEFAULT_MAX_TASKS, DEFAULT_REFRESH_INTERVAL, LeagueRefreshScheduler,
+                            create_refresh_table)
+from payment_verifier import DEFAULT_RECIPIENT_ADDRESS, PAYMENT_PENDING, PaymentVerifier
+from vault_poller import DEFAULT_ACCOUNT_ADDRESS, DEFAULT_POLL_INTERVAL, FlowCliScriptRunner, VaultPoller
+from datetime import datetime, timedelta
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Create Flask app instance at the top
-app = Flask(__name__)
+# All routes live on this blueprint; create_app() builds a Flask app around it.
+# Nothing here touches the database at import time, so scripts and tests import in milliseconds.
+bp = Blueprint('skl', __name__)
+
+
+def _load_environment():
+    """Load variables from .env if python-dotenv is available."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+        print("Environment variables loaded from .env file")
+    except ImportError:
+        print("python-dotenv not installed. Using system environment variables only.")
+
+
+def _default_config() -> Dict[str, Any]:
+    """Build the default app configuration from environment variables."""
+    return {
+        'DEBUG': os.getenv('FLASK_DEBUG', 'False').lower() == 'true',
+        'ENV': os.getenv('FLASK_ENV', 'production'),
+        'SECRET_KEY': os.getenv('FLASK_SECRET_KEY', 'a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6'),
+        'DATABASE_URL': os.getenv('DATABASE_URL', '/var/data/keeper.db'),
+        'ARCHIVE_DATABASE_URL': os.getenv('ARCHIVE_DATABASE_URL'),  # Closed-season archive; defaults next to DATABASE_URL, '' disables
+        'SLEEPER_PAYLOAD_ARCHIVE': os.getenv('SLEEPER_PAYLOAD_ARCHIVE'),  # Raw Sleeper responses for rebuilds; defaults next to DATABASE_URL, '' disables
+        'DB_BUSY_TIMEOUT': float(os.getenv('DB_BUSY_TIMEOUT', '30')),  # Seconds to wait on a write lock held by another worker
+        'INIT_DB': True,  # Run init_db() against the connection the first time it is opened
+        'DB_WRITER': os.getenv('DB_WRITER', 'true').lower() == 'true',  # Route sync writes through one group-committing writer
+        'DB_WRITER_MAX_BATCH': int(os.getenv('DB_WRITER_MAX_BATCH', '64')),
+        'DB_WRITER_GROUP_COMMIT_WINDOW': float(os.getenv('DB_WRITER_GROUP_COMMIT_WINDOW', '0')),  # Seconds to wait for more units
+        'STORAGE_LAYER': os.getenv('STORAGE_LAYER', 'sqlite3'),  # 'sqlalchemy' writes the player catalog refresh through storage.py
+        'VAULT_POLL_INTERVAL': float(os.getenv('VAULT_POLL_INTERVAL', str(DEFAULT_POLL_INTERVAL))),  # Seconds; 0 disables the vault poller
+        'VAULT_ACCOUNT_ADDRESS': os.getenv('VAULT_ACCOUNT_ADDRESS', DEFAULT_ACCOUNT_ADDRESS),
+        'FLOW_NETWORK': os.getenv('FLOW_NETWORK', 'testnet'),  # 'emulator' to poll a local Flow emulator
+        'FLOW_ACCESS_API': os.getenv('FLOW_ACCESS_API'),  # REST access node override; defaults by FLOW_NETWORK
+        'TX_TRACKER_INTERVAL': float(os.getenv('TX_TRACKER_INTERVAL', '5')),  # Seconds; 0 disables the transaction tracker
+        'SESSION_TTL_DAYS': float(os.getenv('SESSION_TTL_DAYS', '30')),  # Idle days before a login session expires
+        'SESSION_SWEEP_INTERVAL': float(os.getenv('SESSION_SWEEP_INTERVAL', '3600')),  # Seconds; 0 disables the session sweeper
+        'PAYMENT_VERIFY_INTERVAL': float(os.getenv('PAYMENT_VERIFY_INTERVAL', '10')),  # Seconds; 0 disables the payment verifier
+        'PAYMENT_RECIPIENT_ADDRESS': os.getenv('PAYMENT_RECIPIENT_ADDRESS', DEFAULT_RECIPIENT_ADDRESS),  # Wallet league fees are paid to
+        'MAINTENANCE_INTERVAL': float(os.getenv('MAINTENANCE_INTERVAL', str(DEFAULT_MAINTENANCE_INTERVAL))),  # Seconds; 0 disables checkpoints, ANALYZE and VACUUM
+        'MAINTENANCE_WAL_TRUNCATE_BYTES': int(os.getenv('MAINTENANCE_WAL_TRUNCATE_BYTES', str(DEFAULT_WAL_TRUNCATE_BYTES))),
+        'MAINTENANCE_ANALYZE_CHANGES': int(os.getenv('MAINTENANCE_ANALYZE_CHANGES', str(DEFAULT_ANALYZE_CHANGES))),  # Sync rows written before ANALYZE
+        'MAINTENANCE_VACUUM_FREE_RATIO': float(os.getenv('MAINTENANCE_VACUUM_FREE_RATIO', str(DEFAULT_VACUUM_FREE_RATIO))),
+        'MAINTENANCE_QUIET_HOURS': os.getenv('MAINTENANCE_QUIET_HOURS', '3-5'),  # Local hours VACUUM may run in; '' disables VACUUM
+        'BACKUP_INTERVAL': float(os.getenv('BACKUP_INTERVAL', str(DEFAULT_BACKUP_INTERVAL))),  # Seconds; 0 disables scheduled backups
+        'BACKUP_DIR': os.getenv('BACKUP_DIR'),  # Defaults to backups/ next to DATABASE_URL
+        'BACKUP_GENERATIONS': int(os.getenv('BACKUP_GENERATIONS', str(DEFAULT_BACKUP_GENERATIONS))),
+        'BACKUP_PAGES_PER_STEP': int(os.getenv('BACKUP_PAGES_PER_STEP', str(DEFAULT_BACKUP_PAGES))),
+        'BACKUP_STEP_PAUSE': float(os.getenv('BACKUP_STEP_PAUSE', str(DEFAULT_BACKUP_PAUSE))),  # Seconds between backup steps
+        'ANALYTICS_REPLICA_INTERVAL': float(os.getenv('ANALYTICS_REPLICA_INTERVAL', str(DEFAULT_REPLICA_INTERVAL))),  # Seconds; 0 makes admin screens read the live database
+        'ANALYTICS_REPLICA_PATH': os.getenv('ANALYTICS_REPLICA_PATH'),  # Defaults to keeper_analytics.db next to DATABASE_URL
+        'ANALYTICS_REPLICA_PAGES_PER_STEP': int(os.getenv('ANALYTICS_REPLICA_PAGES_PER_STEP', str(DEFAULT_REPLICA_PAGES))),
+        'LEAGUE_REFRESH_INTERVAL': float(os.getenv('LEAGUE_REFRESH_INTERVAL', str(DEFAULT_REFRESH_INTERVAL))),  # Seconds; 0 disables scheduled league refreshes
+        'LEAGUE_REFRESH_CALL_BUDGET': float(os.getenv('LEAGUE_REFRESH_CALL_BUDGET', str(DEFAULT_CALL_BUDGET))),  # Sleeper calls per hour
+        'LEAGUE_REFRESH_MAX_TASKS': int(os.getenv('LEAGUE_REFRESH_MAX_TASKS', str(DEFAULT_MAX_TASKS))),  # League refreshes per cycle
+    }
+
+
+class AppResources:
+    """
+    Per-app resources that are created on first use rather than at import.
+
+    Holds the SQLite connection, the single database writer, the SleeperService bound to
+    them and in-process caches.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self._db_conn: Optional[sqlite3.Connection] = None
+        self._db_writer: Optional[DatabaseWriter] = None
+        self._sleeper_service: Optional[SleeperService] = None
+        self._player_catalog_cache: Optional[PlayerCatalogCache] = None
+        self._cache_versions: Optional[CacheVersionTracker] = None
+        self._standings_cache: Optional[StandingsCache] = None
+        self._vault_poller: Optional[VaultPoller] = None
+        self._transaction_tracker: Optional[TransactionTracker] = None
+        self._payment_verifier: Optional[PaymentVerifier] = None
+        self._session_store: Optional[SessionStore] = None
+        self._maintenance_scheduler: Optional[MaintenanceScheduler] = None
+        self._backup_scheduler: Optional[BackupScheduler] = None
+        self._replica_scheduler: Optional[ReplicaScheduler] = None
+        self._refresh_scheduler: Optional[LeagueRefreshScheduler] = None
+        self._payload_archive: Optional[PayloadArchive] = None
+        self._keeper_store: Optional[Any] = None  # storage.KeeperStore, imported only when STORAGE_LAYER asks for it
+        self._league_dbs: Dict[int, sqlite3.Connection] = {}
+        self._league_writers: Dict[int, DatabaseWriter] = {}
+        self._shard_schedulers: List[Any] = []  # Maintenance and backup schedulers of the shard files
+        self.archive_attached = False  # Closed seasons readable through the all_<table> views
+        self.shard_count = 0  # League shard files of the database (see league_shards.py), 0 for one file
+        self._lock = threading.RLock()
+
+    def get_db(self) -> sqlite3.Connection:
+        """Open (once) and return the app's database connection, initializing the schema if configured."""
+        if self._db_conn is not None:
+            return self._db_conn
+        with self._lock:
+            if self._db_conn is None:
+                db_path = self.app.config['DATABASE_URL']
+                print(f"DEBUG_GLOBAL_CONN: Connecting to database at: {db_path}")
+                conn = sqlite3.connect(db_path, check_same_thread=False, timeout=self.app.config['DB_BUSY_TIMEOUT'])
+                try:
+                    conn.row_factory = sqlite3.Row
+                    cursor = conn.cursor()
+                    cursor.execute("PRAGMA journal_mode=WAL;")
+                    current_journal_mode = cursor.execute("PRAGMA journal_mode;").fetchone()
+                    print(f"DEBUG_GLOBAL_CONN: Journal mode set to: {current_journal_mode[0] if current_journal_mode else 'Unknown'}")
+                    cursor.execute("PRAGMA foreign_keys = ON;") # Enforce foreign key constraints
+                    conn.commit() # Commit pragma changes
+                    if self.app.config.get('INIT_DB', True):
+                        init_db(conn)
+                    self.shard_count = get_shard_count(conn) if db_path != ':memory:' else 0
+                    if self.shard_count:
+                        # League tables live in the shard files: migrate them like init_db did the
+                        # templates, and read them through views; the season archive is not sharded yet
+                        ensure_shard_schemas(conn, db_path, self.shard_count)
+                        attach_shards(conn, db_path, self.shard_count)
+                    archive_path = self.archive_path()
+                    if archive_path and not self.shard_count:
+                        attach_archive(conn, archive_path)
+                        self.archive_attached = True
+                except sqlite3.Error as e:
+                    print(f"DEBUG_GLOBAL_CONN: Failed to initialize database connection: {e}")
+                    conn.close()
+                    raise
+                self._db_conn = conn
+                print("DEBUG_GLOBAL_CONN: Database connection initialized successfully.")
+        return self._db_conn
+
+    def archive_path(self) -> Optional[str]:
+        """Closed-season archive file attached to the app's connection, or None when archiving is off."""
+        config = self.app.config
+        if config['DATABASE_URL'] == ':memory:' or config.get('ARCHIVE_DATABASE_URL') == '':
+            return None
+        return config.get('ARCHIVE_DATABASE_URL') or archive_path_for(config['DATABASE_URL'])
+
+    def get_db_writer(self) -> Optional[DatabaseWriter]:
+        """
+        Return the app's single database writer, started on first use.
+
+        None when DB_WRITER is off or the database is in memory (a second connection
+        would open a different, empty database).
+        """
+        config = self.app.config
+        if not config.get('DB_WRITER') or config['DATABASE_URL'] == ':memory:':
+            return None
+        if self._db_writer is None:
+            with self._lock:
+                if self._db_writer is None:
+                    self.get_db()  # Schema first
+                    db_path, shard_count = config['DATABASE_URL'], self.shard_count
+                    self._db_writer = DatabaseWriter(
+                        db_path,
+                        busy_timeout=config['DB_BUSY_TIMEOUT'],
+                        max_batch=config['DB_WRITER_MAX_BATCH'],
+                        group_commit_window=config['DB_WRITER_GROUP_COMMIT_WINDOW'],
+                        # Core units read league tables (e.g. the admin summary) through the shard views
+                        on_connect=(lambda conn: attach_shards(conn, db_path, shard_count)) if shard_count else None
+                    )
+        return self._db_writer
+
+    def shard_paths(self) -> List[str]:
+        """Shard files of the database, empty for a single-file database."""
+        self.get_db()
+        return [shard_path(self.app.config['DATABASE_URL'], index) for index in range(self.shard_count)]
+
+    def get_league_db(self, league_id: str) -> sqlite3.Connection:
+        """
+        Connection for reading and writing one league's rows.
+
+        The app's connection for a single-file database; otherwise a shared connection to the
+        league's shard with the core attached (see league_shards.py).
+        """
+        conn = self.get_db()
+        if not self.shard_count:
+            return conn
+        index = shard_index(league_id, self.shard_count)
+        if index not in self._league_dbs:
+            with self._lock:
+                if index not in self._league_dbs:
+                    league_conn = connect_league_db(self.app.config['DATABASE_URL'], league_id,
+                                                    timeout=self.app.config['DB_BUSY_TIMEOUT'],
+                                                    shard_count=self.shard_count, check_same_thread=False)
+                    league_conn.row_factory = sqlite3.Row
+                    self._league_dbs[index] = league_conn
+        return self._league_dbs[index]
+
+    def get_league_writer(self, league_id: str) -> Optional[DatabaseWriter]:
+        """
+        Writer of the league's shard, started on first use; None for a single-file database.
+
+        A sharded database always writes league rows through these writers (DB_WRITER only
+        controls the core writer). The core is attached read-only, so a shard's transactions
+        never wait for the core or for other shards.
+        """
+        self.get_db()
+        if not self.shard_count:
+            return None
+        index = shard_index(league_id, self.shard_count)
+        if index not in self._league_writers:
+            with self._lock:
+                if index not in self._league_writers:
+                    config = self.app.config
+                    db_path = config['DATABASE_URL']
+                    self._league_writers[index] = DatabaseWriter(
+                        shard_path(db_path, index),
+                        busy_timeout=config['DB_BUSY_TIMEOUT'],
+                        max_batch=config['DB_WRITER_MAX_BATCH'],
+                        group_commit_window=config['DB_WRITER_GROUP_COMMIT_WINDOW'],
+                        on_connect=lambda conn: attach_core(conn, db_path, read_only=True),
+                        name=f'db-writer-shard{index}'
+                    )
+        return self._league_writers[index]
+
+    def get_keeper_store(self) -> Optional[Any]:
+        """
+        Return the SQLAlchemy Core store (storage.KeeperStore) over the app's database, built on first use.
+
+        None unless STORAGE_LAYER is 'sqlalchemy', and for an in-memory database (the engine's
+        connection would open a different, empty database).
+        """
+        config = self.app.config
+        if config.get('STORAGE_LAYER') != 'sqlalchemy' or config['DATABASE_URL'] == ':memory:':
+            return None
+        if self._keeper_store is None:
+            with self._lock:
+                if self._keeper_store is None:
+                    from storage import KeeperStore, create_storage_engine, storage_url_for
+                    self.get_db()  # Schema first
+                    engine = create_storage_engine(storage_url_for(config['DATABASE_URL']),
+                                                   busy_timeout=config['DB_BUSY_TIMEOUT'])
+                    self._keeper_store = KeeperStore(engine)
+        return self._keeper_store
+
+    def get_sleeper_service(self) -> SleeperService:
+        """Return the SleeperService bound to this app's connection and writer."""
+        if self._sleeper_service is None:
+            with self._lock:
+                if self._sleeper_service is None:
+                    self._sleeper_service = SleeperService(db_connection=self.get_db(), writer=self.get_db_writer(),
+                                                           payload_archive=self.get_payload_archive(),
+                                                           league_writer=self.get_league_writer,
+                                                           store=self.get_keeper_store())
+        return self._sleeper_service
+
+    def get_payload_archive(self) -> Optional[PayloadArchive]:
+        """Archive of raw Sleeper responses, or None when disabled (and for an in-memory database)."""
+        config = self.app.config
+        if config['DATABASE_URL'] == ':memory:' or config.get('SLEEPER_PAYLOAD_ARCHIVE') == '':
+            return None
+        if self._payload_archive is None:
+            with self._lock:
+                if self._payload_archive is None:
+                    self._payload_archive = PayloadArchive(config.get('SLEEPER_PAYLOAD_ARCHIVE')
+                                                           or payload_archive_path_for(config['DATABASE_URL']))
+        return self._payload_archive
+
+    def get_player_catalog_cache(self) -> PlayerCatalogCache:
+        """Return the in-memory /players snapshot cache."""
+        if self._player_catalog_cache is None:
+            with self._lock:
+                if self._player_catalog_cache is None:
+                    self._player_catalog_cache = PlayerCatalogCache()
+        return self._player_catalog_cache
+
+    def get_cache_versions(self) -> CacheVersionTracker:
+        """Return the tracker used to validate caches against versions bumped by any worker process."""
+        if self._cache_versions is None:
+            with self._lock:
+                if self._cache_versions is None:
+                    self._cache_versions = CacheVersionTracker(self.get_db())
+        return self._cache_versions
+
+    def get_standings_cache(self) -> StandingsCache:
+        """Return the in-memory per-league standings cache."""
+        if self._standings_cache is None:
+            with self._lock:
+                if self._standings_cache is None:
+                    self._standings_cache = StandingsCache()
+        return self._standings_cache
+
+    def get_session_store(self) -> SessionStore:
+        """Return the login session store, whose queued last-seen writes the sweeper thread flushes."""
+        if self._session_store is None:
+            with self._lock:
+                if self._session_store is None:
+                    config = self.app.config
+                    self._session_store = SessionStore(
+                        config['DATABASE_URL'],
+                        ttl=timedelta(days=config['SESSION_TTL_DAYS']),
+                        sweep_interval=config['SESSION_SWEEP_INTERVAL'] or DEFAULT_SWEEP_INTERVAL,
+                        busy_timeout=config['DB_BUSY_TIMEOUT']
+                    )
+        return self._session_store
+
+    def start_session_sweeper(self) -> Optional[SessionStore]:
+        """
+        Start flushing session last-seen times and purging expired sessions once per process.
+
+        None when SESSION_SWEEP_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('SESSION_SWEEP_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        store = self.get_session_store()
+        store.start()
+        return store
+
+    def start_vault_poller(self) -> Optional[VaultPoller]:
+        """
+        Start the background yield vault poller once per process.
+
+        None when VAULT_POLL_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('VAULT_POLL_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        with self._lock:
+            if self._vault_poller is None:
+                self._vault_poller = VaultPoller(
+                    config['DATABASE_URL'],
+                    FlowCliScriptRunner(network=config['FLOW_NETWORK']),
+                    interval=config['VAULT_POLL_INTERVAL'],
+                    account_address=config['VAULT_ACCOUNT_ADDRESS'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT']
+                )
+                self._vault_poller.start()
+        return self._vault_poller
+
+    def start_transaction_tracker(self) -> Optional[TransactionTracker]:
+        """
+        Start the background Flow transaction sealing tracker once per process.
+
+        None when TX_TRACKER_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('TX_TRACKER_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        with self._lock:
+            if self._transaction_tracker is None:
+                self._transaction_tracker = TransactionTracker(
+                    config['DATABASE_URL'],
+                    FlowAccessClient(network=config['FLOW_NETWORK'], base_url=config.get('FLOW_ACCESS_API')),
+                    interval=config['TX_TRACKER_INTERVAL'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT']
+                )
+                self._transaction_tracker.start()
+        return self._transaction_tracker
+
+    def start_payment_verifier(self) -> Optional[PaymentVerifier]:
+        """
+        Start the background fee payment verifier once per process.
+
+        None when PAYMENT_VERIFY_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('PAYMENT_VERIFY_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        with self._lock:
+            if self._payment_verifier is None:
+                self._payment_verifier = PaymentVerifier(
+                    config['DATABASE_URL'],
+                    FlowAccessClient(network=config['FLOW_NETWORK'], base_url=config.get('FLOW_ACCESS_API')),
+                    recipient_address=config['PAYMENT_RECIPIENT_ADDRESS'],
+                    interval=config['PAYMENT_VERIFY_INTERVAL'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT'],
+                    on_fees_collected=self._stake_collected_fees
+                )
+                self._payment_verifier.start()
+        return self._payment_verifier
+
+    def start_maintenance_scheduler(self) -> Optional[MaintenanceScheduler]:
+        """
+        Start WAL checkpoints, ANALYZE after large syncs and quiet-hours VACUUM once per process.
+
+        None when MAINTENANCE_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('MAINTENANCE_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        with self._lock:
+            if self._maintenance_scheduler is None:
+                settings = dict(
+                    interval=config['MAINTENANCE_INTERVAL'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT'],
+                    wal_truncate_bytes=config['MAINTENANCE_WAL_TRUNCATE_BYTES'],
+                    analyze_changes=config['MAINTENANCE_ANALYZE_CHANGES'],
+                    vacuum_free_ratio=config['MAINTENANCE_VACUUM_FREE_RATIO'],
+                    quiet_hours=parse_quiet_hours(config['MAINTENANCE_QUIET_HOURS'])
+                )
+                self._maintenance_scheduler = MaintenanceScheduler(config['DATABASE_URL'], **settings)
+                self._maintenance_scheduler.start()
+                # Every shard file has its own WAL and its own db_maintenance table
+                for path in self.shard_paths():
+                    scheduler = MaintenanceScheduler(path, **settings)
+                    scheduler.start()
+                    self._shard_schedulers.append(scheduler)
+        return self._maintenance_scheduler
+
+    def backup_dir(self) -> str:
+        """Directory of the database's backup generations."""
+        return self.app.config.get('BACKUP_DIR') or backup_dir_for(self.app.config['DATABASE_URL'])
+
+    def _writer_metrics(self) -> Optional[Dict[str, Any]]:
+        return self._db_writer.metrics() if self._db_writer is not None else None
+
+    def start_backup_scheduler(self) -> Optional[BackupScheduler]:
+        """
+        Start scheduled online backups once per process.
+
+        None when BACKUP_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('BACKUP_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        with self._lock:
+            if self._backup_scheduler is None:
+                settings = dict(
+                    interval=config['BACKUP_INTERVAL'],
+                    generations=config['BACKUP_GENERATIONS'],
+                    pages=config['BACKUP_PAGES_PER_STEP'],
+                    pause=config['BACKUP_STEP_PAUSE'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT']
+                )
+                self._backup_scheduler = BackupScheduler(config['DATABASE_URL'], self.backup_dir(),
+                                                         writer_metrics=self._writer_metrics, **settings)
+                self._backup_scheduler.start()
+                # Shard files are backed up on the same schedule, each with its own generations
+                for path in self.shard_paths():
+                    scheduler = BackupScheduler(path, self.backup_dir(), **settings)
+                    scheduler.start()
+                    self._shard_schedulers.append(scheduler)
+        return self._backup_scheduler
+
+    def backup_metrics(self) -> Optional[Dict[str, Any]]:
+        """This process's backup counters and last result, or None when it runs no backups."""
+        return self._backup_scheduler.metrics() if self._backup_scheduler is not None else None
+
+    def replica_path(self) -> Optional[str]:
+        """Analytics replica file the admin screens read, None when the replica is disabled."""
+        config = self.app.config
+        if not config.get('ANALYTICS_REPLICA_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        return config.get('ANALYTICS_REPLICA_PATH') or replica_path_for(config['DATABASE_URL'])
+
+    def start_replica_scheduler(self) -> Optional[ReplicaScheduler]:
+        """
+        Start refreshing the analytics replica once per process.
+
+        None when ANALYTICS_REPLICA_INTERVAL is 0 or the database is in memory.
+        """
+        replica_path = self.replica_path()
+        if replica_path is None:
+            return None
+        config = self.app.config
+        with self._lock:
+            if self._replica_scheduler is None:
+                self._replica_scheduler = ReplicaScheduler(
+                    config['DATABASE_URL'],
+                    replica_path,
+                    interval=config['ANALYTICS_REPLICA_INTERVAL'],
+                    pages=config['ANALYTICS_REPLICA_PAGES_PER_STEP'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT']
+                )
+                self._replica_scheduler.start()
+        return self._replica_scheduler
+
+    def replica_metrics(self) -> Optional[Dict[str, Any]]:
+        """This process's replica refresh counters and last result, or None when it refreshes no replica."""
+        return self._replica_scheduler.metrics() if self._replica_scheduler is not None else None
+
+    def start_refresh_scheduler(self) -> Optional[LeagueRefreshScheduler]:
+        """
+        Start the activity-aware league refresh scheduler once per process.
 
-# Production configuration
-app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
-app.config['ENV'] = os.getenv('FLASK_ENV', 'production')
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6')
+        None when LEAGUE_REFRESH_INTERVAL is 0 or the database is in memory.
+        """
+        config = self.app.config
+        if not config.get('LEAGUE_REFRESH_INTERVAL') or config['DATABASE_URL'] == ':memory:':
+            return None
+        with self._lock:
+            if self._refresh_scheduler is None:
+                def service_factory(http_client: Any) -> SleeperService:
+                    # Each cycle's service counts its calls through its own client wrapper
+                    return SleeperService(db_connection=self.get_db(), http_client=http_client, writer=self.get_db_writer(),
+                                          payload_archive=self.get_payload_archive(), league_writer=self.get_league_writer,
+                                          store=self.get_keeper_store())
+
+                self._refresh_scheduler = LeagueRefreshScheduler(
+                    config['DATABASE_URL'],
+                    service_factory,
+                    interval=config['LEAGUE_REFRESH_INTERVAL'],
+                    call_budget=config['LEAGUE_REFRESH_CALL_BUDGET'],
+                    max_tasks=config['LEAGUE_REFRESH_MAX_TASKS'],
+                    busy_timeout=config['DB_BUSY_TIMEOUT']
+                )
+                self._refresh_scheduler.start()
+        return self._refresh_scheduler
+
+    def refresh_metrics(self) -> Optional[Dict[str, Any]]:
+        """This process's league refresh counters and last cycle, or None when it runs no refreshes."""
+        return self._refresh_scheduler.metrics() if self._refresh_scheduler is not None else None
+
+    def start_background_jobs(self) -> None:
+        """
+        Start every background job of a serving process: the vault poller, the Flow
+        transaction tracker, the fee payment verifier, the session sweeper, database
+        maintenance, backups, the analytics replica and league refreshes.
 
-print(f"Flask configured - Environment: {app.config['ENV']}, Debug: {app.config['DEBUG']}")
+        Each job is off when its interval is 0. Every worker process starts them: the poller
+        skips a cycle another worker already ran, the tracker and verifier lease what they
+        check, and the scheduled tasks are claimed through db_maintenance.
+        """
+        self.start_vault_poller()
+        self.start_transaction_tracker()
+        self.start_payment_verifier()
+        self.start_session_sweeper()
+        self.start_maintenance_scheduler()
+        self.start_backup_scheduler()
+        self.start_replica_scheduler()
+        self.start_refresh_scheduler()
+
+    def wake_payment_verifier(self) -> None:
+        """Have this process's verifier (if running) check pending payments now."""
+        if self._payment_verifier is not None:
+            self._payment_verifier.wake()
+
+    def _stake_collected_fees(self, league_id: str, season_year: int) -> None:
+        with self.app.app_context():
+            stake_collected_fees(league_id, season_year)
+
+    def close(self) -> None:
+        """Stop the background threads and the writer (after it commits what is queued), then close the database connection."""
+        with self._lock:
+            if self._session_store is not None:
+                # An in-memory database is only reachable through the app's own connection
+                self._session_store.stop(conn=self._db_conn if self.app.config['DATABASE_URL'] == ':memory:' else None)
+                self._session_store = None
+            if self._backup_scheduler is not None:
+                self._backup_scheduler.stop()
+                self._backup_scheduler = None
+            if self._replica_scheduler is not None:
+                self._replica_scheduler.stop()
+                self._replica_scheduler = None
+            if self._refresh_scheduler is not None:
+                self._refresh_scheduler.stop()
+                self._refresh_scheduler = None
+            if self._maintenance_scheduler is not None:
+                self._maintenance_scheduler.stop()
+                self._maintenance_scheduler = None
+            for scheduler in self._shard_schedulers:
+                scheduler.stop()
+            self._shard_schedulers = []
+            if self._payment_verifier is not None:
+                self._payment_verifier.stop()
+                self._payment_verifier = None
+            if self._transaction_tracker is not None:
+                self._transaction_tracker.stop()
+                self._transaction_tracker = None
+            if self._vault_poller is not None:
+                self._vault_poller.stop()
+                self._vault_poller = None
+            for league_writer in self._league_writers.values():
+                league_writer.close()
+            self._league_writers = {}
+            if self._db_writer is not None:
+                self._db_writer.close()
+                self._db_writer = None
+            for league_conn in self._league_dbs.values():
+                league_conn.close()
+            self._league_dbs = {}
+            if self._payload_archive is not None:
+                self._payload_archive.close()
+                self._payload_archive = None
+            if self._keeper_store is not None:
+                self._keeper_store.engine.dispose()
+                self._keeper_store = None
+            if self._db_conn is not None:
+                self._db_conn.close()
+                self._db_conn = None
+                self.archive_attached = False
+                self.shard_count = 0
+                self._sleeper_service = None
+                self._cache_versions = None
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Application factory.
+
+    Args:
+        config (Optional[Dict[str, Any]]): Overrides for the default configuration. When omitted,
+            .env is loaded and the configuration comes from the environment. Pass
+            {'DATABASE_URL': ':memory:'} for tests.
+
+    Returns:
+        Flask: Configured app. The database, SleeperService and caches are created on first use.
+    """
+    if config is None:
+        _load_environment()
+    new_app = Flask(__name__)
+    new_app.config.update(_default_config())
+    if config:
+        new_app.config.update(config)
+    new_app.secret_key = new_app.config['SECRET_KEY']
+    new_app.extensions['skl_resources'] = AppResources(new_app)
+
+    new_app.register_blueprint(bp)
+    # Import and register admin routes
+    from admin_routes import register_admin_routes
+    register_admin_routes(new_app)
+
+    print(f"Flask configured - Environment: {new_app.config['ENV']}, Debug: {new_app.config['DEBUG']}")
+    return new_app
+
+
+_default_app: Optional[Flask] = None
+_default_app_lock = threading.Lock()
+
+
+def _get_default_app() -> Flask:
+    """Return the process-wide app used by `from app import app` and by helpers called outside a request."""
+    global _default_app
+    if _default_app is None:
+        with _default_app_lock:
+            if _default_app is None:
+                _default_app = create_app()
+    return _default_app
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from app import app` working for waitress and existing scripts without
+    # building the app (and reading .env) on every import of this module
+    if name == 'app':
+        return _get_default_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_resources() -> AppResources:
+    """Resources of the app handling the current request, or of the default app outside a request."""
+    target_app = current_app._get_current_object() if has_app_context() else _get_default_app()
+    return target_app.extensions['skl_resources']
+
+
+def get_session(cursor, session_token):
+    """Unexpired session row for a token (wallet_address first), or None. Refreshes its expiry in the background."""
+    return _get_resources().get_session_store().get_session(cursor, session_token)
 
-# --- TEMPORARY DEBUGGING: Global DB Connection ---
-# DO NOT USE IN PRODUCTION
-_global_db_conn = None
 
 def get_global_db_connection():
-    global _global_db_conn
-    if _global_db_conn is None:
-        print("DEBUG_GLOBAL_CONN: Initializing global database connection...")
-        try:
-            # Use environment variable for database path
-            db_path = os.getenv('DATABASE_URL', '/var/data/keeper.db')
-            print(f"DEBUG_GLOBAL_CONN: Connecting to database at: {db_path}")
-            _global_db_conn = sqlite3.connect(db_path, check_same_thread=False)
-            _global_db_conn.row_factory = sqlite3.Row
-            # Attempt to set WAL mode on this global connection too
-            cursor = _global_db_conn.cursor()
-            cursor.execute("PRAGMA journal_mode=WAL;")
-            current_journal_mode = cursor.execute("PRAGMA journal_mode;").fetchone()
-            print(f"DEBUG_GLOBAL_CONN: Journal mode set to: {current_journal_mode[0] if current_journal_mode else 'Unknown'}")
-            cursor.execute("PRAGMA foreign_keys = ON;") # Enforce foreign key constraints
-            print("DEBUG_GLOBAL_CONN: Foreign keys ON.")
-            _global_db_conn.commit() # Commit pragma changes
-            print("DEBUG_GLOBAL_CONN: Global database connection initialized successfully.")
-        except sqlite3.Error as e:
-            print(f"DEBUG_GLOBAL_CONN: Failed to initialize global connection or set WAL mode: {e}")
-            # If connection failed, _global_db_conn will remain None or be a broken object.
-            # Handle this gracefully or let it raise further up.
-            raise
-    return _global_db_conn
-# --- END TEMPORARY DEBUGGING ---
-
-# Initialize SleeperService
-# sleeper_service = SleeperService() # Old instantiation
-db_conn = get_global_db_connection()  # Get the global connection
-# NOTE: SleeperService class will need significant updates to align with the new database schema 
-# (LeagueMetadata, UserLeagueLinks, rosters.sleeper_league_id, etc.) for data insertion and querying.
-sleeper_service = SleeperService(db_connection=db_conn) # Pass it to the service
-
-@app.route('/')
+    """Return the current app's shared SQLite connection, opening it on first use."""
+    return _get_resources().get_db()
+
+
+def get_league_db_connection(league_id: str) -> sqlite3.Connection:
+    """Return the connection that reads and writes a league's rows (the shared one unless the database is sharded)."""
+    conn = get_global_db_connection()
+    resources = _get_resources()
+    return resources.get_league_db(league_id) if resources.shard_count else conn
+
+
+def history_table(table: str) -> str:
+    """Table or view to read a table's full history from, including archived seasons when attached."""
+    return f'all_{table}' if _get_resources().archive_attached else table
+
+
+T = TypeVar('T')
+
+
+class WriteAborted(Exception):
+    """Raised by a write unit to roll back its own changes; the handler answers with the message."""
+
+
+def run_write(unit: Callable[[sqlite3.Cursor], T], league_id: Optional[str] = None) -> T:
+    """
+    Run a unit of writes for a request handler or background job and return its result once committed.
+
+    The unit takes a cursor and must not commit or roll back. It goes through the app's
+    DatabaseWriter, or the league's shard writer for league_id's rows in a sharded
+    database, where it is group-committed in its own savepoint (see db_writer.py).
+    Without a writer (DB_WRITER off, in-memory database) it runs on the shared connection,
+    which is committed, or rolled back when the unit raises.
+    """
+    resources = _get_resources()
+    writer = resources.get_league_writer(league_id) if league_id is not None else None
+    writer = writer or resources.get_db_writer()
+    if writer is not None:
+        return writer.execute(unit)
+    conn = resources.get_league_db(league_id) if league_id is not None else resources.get_db()
+    try:
+        result = unit(conn.cursor())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return result
+
+
+def run_team_change(unit: Callable[[sqlite3.Cursor], List[str]], league_id: str,
+                    current_processing_year: int, is_offseason: bool) -> List[str]:
+    """
+    Run a unit that changes some teams' league rows and returns their IDs, then bump the
+    league's cache version and rebuild those teams' page snapshots.
+
+    Snapshots are keyed by the league version, so the rebuild runs after the bump. In a
+    single-file database the change, bump and rebuild are one unit. In a sharded database
+    the change commits on the league's shard, then the bump on the core writer, then the
+    rebuild on the shard; no worker caches the league under the new version before its
+    rows have committed.
+    """
+    def rebuild(write_cursor: sqlite3.Cursor, team_ids: List[str]) -> None:
+        rebuild_team_snapshots(write_cursor.connection, league_id, team_ids, current_processing_year, is_offseason)
+
+    if _get_resources().get_league_writer(league_id) is None:
+        def change_and_rebuild(write_cursor: sqlite3.Cursor) -> List[str]:
+            team_ids = unit(write_cursor)
+            if team_ids:
+                bump_cache_version(write_cursor, league_cache_key(league_id))
+                rebuild(write_cursor, team_ids)
+            return team_ids
+        return run_write(change_and_rebuild)
+
+    team_ids = run_write(unit, league_id=league_id)
+    if team_ids:
+        run_write(lambda write_cursor: bump_cache_version(write_cursor, league_cache_key(league_id)))
+        run_write(lambda write_cursor: rebuild(write_cursor, team_ids), league_id=league_id)
+    return team_ids
+
+
+def get_sleeper_service() -> SleeperService:
+    """Return the current app's SleeperService, creating it on first use."""
+    return _get_resources().get_sleeper_service()
+
+
+def get_league_standings(cursor: sqlite3.Cursor, league_id: str) -> list:
+    """Matchup-based standings for a league, cached until the league's data version changes."""
+    resources = _get_resources()
+    version = resources.get_cache_versions().get(league_cache_key(league_id))
+    return resources.get_standings_cache().get_standings(cursor, league_id, version)
+
+@bp.route('/')
 def root():
     """Root endpoint for health checks."""
     return jsonify({'status': 'ok', 'message': 'Supreme Keeper League Backend is running'}), 200
 
-@app.before_request
+@bp.before_app_request
 def log_cors_headers():
     print(f"Request method: {request.method}, URL: {request.url}")
     if request.method == "OPTIONS":
         print("Handling OPTIONS preflight request")
-        response = app.make_response('')
+        response = current_app.make_response('')
         # Allow both development and production origins
         origin = request.headers.get('Origin', '')
         if origin in ['http://localhost:5173', 'https://supremekeeperleague.com']:
@@ -90,7 +797,7 @@ def log_cors_headers():
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Wallet-Address'
         return response, 200
 
-@app.errorhandler(Exception)
+@bp.app_errorhandler(Exception)
 def handle_exception(e):
     print(f"Unhandled exception: {str(e)}")
     import traceback
@@ -105,7 +812,7 @@ def handle_exception(e):
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Wallet-Address'
     return response
 
-@app.after_request
+@bp.after_app_request
 def add_cors_headers(response):
     # Allow both development and production origins
     origin = request.headers.get('Origin', '')
@@ -117,9 +824,10 @@ def add_cors_headers(response):
     return response
 
 # Initialize the database
-def init_db():
+def init_db(conn: Optional[sqlite3.Connection] = None):
     try:
-        conn = get_global_db_connection() # Use global connection
+        if conn is None:
+            conn = get_global_db_connection() # Use global connection
         cursor = conn.cursor()
         
         # TEMPORARY: Force drop all tables and views to reset database
@@ -152,8 +860,17 @@ def init_db():
         # Check if tables exist and create them if they don't
         print("Checking existing tables and creating missing ones...")
         
-        cursor.execute('''CREATE TABLE IF NOT EXISTS sessions
-                          (wallet_address TEXT PRIMARY KEY, session_token TEXT)''')
+        # Sessions keyed by token hash, with sliding expiry (converts the old wallet-keyed table)
+        create_sessions_table(cursor)
+        # Last run of each maintenance task and the sync changes pending ANALYZE (see db_maintenance.py)
+        create_maintenance_table(cursor)
+        # When each SKL league's scopes were last refreshed by the scheduler (see league_refresh.py)
+        create_refresh_table(cursor)
+
+        # Version rows used to invalidate in-memory caches across worker processes
+        cursor.execute(CACHE_VERSIONS_DDL)
+        # Precomputed /team/<team_id> payloads, rebuilt per league after each sync
+        cursor.execute(TEAM_PAGE_SNAPSHOTS_DDL)
         
         # Create LeagueMetadata first as UserLeagueLinks will reference it
         cursor.execute('''CREATE TABLE IF NOT EXISTS LeagueMetadata (
@@ -171,8 +888,13 @@ def init_db():
                             bracket_id TEXT,
                             avatar TEXT, -- URL to league avatar
                             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                            updated_at DATETIME
+                            updated_at DATETIME,
+                            total_rosters INTEGER -- settings.total_rosters, copied out at sync time for list views
                             )''')
+        existing_league_columns = {row[1] for row in cursor.execute("PRAGMA table_info(LeagueMetadata)").fetchall()}
+        if 'total_rosters' not in existing_league_columns:
+            cursor.execute("ALTER TABLE LeagueMetadata ADD COLUMN total_rosters INTEGER")
+            cursor.execute("UPDATE LeagueMetadata SET total_rosters = json_extract(settings, '$.total_rosters') WHERE json_valid(settings)")
 
         cursor.execute('''CREATE TABLE IF NOT EXISTS LeagueFees (
                             sleeper_league_id TEXT NOT NULL,
@@ -207,9 +929,25 @@ def init_db():
                             transaction_id TEXT UNIQUE NOT NULL, -- Each payment has a unique Flow transaction ID
                             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP, -- To determine most recent
+                            verification_status TEXT DEFAULT 'verified', -- 'pending', 'verified' or 'rejected'; see payment_verifier
+                            verification_attempts INTEGER DEFAULT 0,
+                            next_verification_at DATETIME,
+                            verified_at DATETIME,
+                            rejection_reason TEXT,
                             FOREIGN KEY (sleeper_league_id) REFERENCES LeagueMetadata(sleeper_league_id) ON DELETE CASCADE,
                             FOREIGN KEY (wallet_address) REFERENCES Users(wallet_address) ON DELETE CASCADE
                             )''')
+        # Payments recorded before on-chain verification were already counted as paid, so
+        # existing rows (and inserts that do not ask for verification) default to 'verified'
+        existing_payment_columns = {row[1] for row in cursor.execute("PRAGMA table_info(LeaguePayments)").fetchall()}
+        for column, definition in (('verification_status', "TEXT DEFAULT 'verified'"),
+                                   ('verification_attempts', 'INTEGER DEFAULT 0'),
+                                   ('next_verification_at', 'DATETIME'),
+                                   ('verified_at', 'DATETIME'),
+                                   ('rejection_reason', 'TEXT')):
+            if column not in existing_payment_columns:
+                cursor.execute(f"ALTER TABLE LeaguePayments ADD COLUMN {column} {definition}")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_league_payments_verification ON LeaguePayments(verification_status, next_verification_at)")
 
         cursor.execute('''CREATE TABLE IF NOT EXISTS Users (
                             wallet_address TEXT PRIMARY KEY,
@@ -227,7 +965,14 @@ def init_db():
                            position TEXT,
                            team TEXT,
                            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                           updated_at DATETIME)''')
+                           updated_at DATETIME,
+                           catalog_version INTEGER DEFAULT 0 -- Player catalog refresh that last changed this row
+                           )''')
+        # Databases created before catalog versioning need the column added in place
+        existing_player_columns = {row[1] for row in cursor.execute("PRAGMA table_info(players)").fetchall()}
+        if 'catalog_version' not in existing_player_columns:
+            cursor.execute("ALTER TABLE players ADD COLUMN catalog_version INTEGER DEFAULT 0")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_players_catalog_version ON players(catalog_version)")
         cursor.execute('''CREATE TABLE IF NOT EXISTS rosters
                           (sleeper_roster_id TEXT,
                            sleeper_league_id TEXT,
@@ -242,9 +987,14 @@ def init_db():
                            points_for REAL DEFAULT 0.0,
                            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                            updated_at DATETIME,
+                           payload_hash TEXT, -- Hash of the synced values; the sync skips rosters whose hash is unchanged
                            PRIMARY KEY (sleeper_roster_id, sleeper_league_id),
                            FOREIGN KEY (sleeper_league_id) REFERENCES LeagueMetadata(sleeper_league_id) ON DELETE CASCADE
                            )''')
+        existing_roster_columns = {row[1] for row in cursor.execute("PRAGMA table_info(rosters)").fetchall()}
+        if 'payload_hash' not in existing_roster_columns:
+            cursor.execute("ALTER TABLE rosters ADD COLUMN payload_hash TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rosters_league ON rosters(sleeper_league_id)")
         cursor.execute('''CREATE TABLE IF NOT EXISTS contracts
                           (rowid INTEGER PRIMARY KEY AUTOINCREMENT,
                            player_id TEXT,
@@ -275,7 +1025,19 @@ def init_db():
                            status TEXT,
                            data TEXT,
                            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                           updated_at DATETIME)''')
+                           updated_at DATETIME,
+                           payload_hash TEXT -- Hash of the Sleeper transaction object
+                           )''')
+        existing_transaction_columns = {row[1] for row in cursor.execute("PRAGMA table_info(transactions)").fetchall()}
+        if 'payload_hash' not in existing_transaction_columns:
+            cursor.execute("ALTER TABLE transactions ADD COLUMN payload_hash TEXT")
+        # Typed columns and adds/drops/roster_ids rows; the raw Sleeper object is kept zlib-compressed
+        create_transaction_tables(cursor)
+        compacted = compact_transactions(cursor)
+        if compacted['rows']:
+            print(f"Compacted {compacted['rows']} transactions: {compacted['json_bytes']} bytes of JSON -> "
+                  f"{compacted['compressed_bytes']} compressed")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_league ON transactions(league_id)")
 
         cursor.execute('''CREATE TABLE IF NOT EXISTS drafts
                           (sleeper_draft_id TEXT UNIQUE,
@@ -286,6 +1048,17 @@ def init_db():
                            data TEXT,
                            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                            updated_at DATETIME)''')
+
+        # Per-week scores from Sleeper, used for standings extras
+        cursor.execute(MATCHUPS_DDL)
+
+        # One row per auction pick; drafts.data keeps the raw pick list
+        cursor.execute(DRAFT_PICKS_DDL)
+        for index_sql in DRAFT_PICKS_INDEXES:
+            cursor.execute(index_sql)
+        backfilled_drafts = backfill_draft_picks(cursor)
+        if backfilled_drafts:
+            print(f"Backfilled draft_picks for {backfilled_drafts} drafts")
         
         cursor.execute('''CREATE TABLE IF NOT EXISTS season_curr
                           (current_year TEXT,
@@ -334,6 +1107,11 @@ def init_db():
                             FOREIGN KEY (trade_id) REFERENCES trades(trade_id) ON DELETE CASCADE
                             )''')
 
+        # One row per SKL league behind the paginated /admin/leagues index
+        backfilled_summaries = create_summary_table(cursor)
+        if backfilled_summaries:
+            print(f"Backfilled LeagueAdminSummary for {backfilled_summaries} leagues")
+
         # Create the vw_contractByYear view
         # This view calculates the escalated cost for each year of every contract
         cursor.execute('''
@@ -401,22 +1179,9 @@ def init_db():
         print("Database initialized successfully via global connection")
     except Exception as e:
         print(f"Failed to initialize database (global conn): {str(e)}")
-        # Potentially close and None out _global_db_conn if init fails badly
-        global _global_db_conn
-        if _global_db_conn:
-            try:
-                _global_db_conn.close()
-            except: # nosec
-                pass
-        _global_db_conn = None
+        # AppResources.get_db() closes the connection if initialization fails
         raise
 
-print("DEBUG: Database initialization skipped. Proceeding to define routes and helpers...")
-
-# Import and register admin routes
-from admin_routes import register_admin_routes
-register_admin_routes(app)
-
 def get_current_season():
     """Fetches the current season year and off-season status from the local season_curr table."""
     try:
@@ -429,17 +1194,17 @@ def get_current_season():
         if season_info_db and season_info_db["current_year"] is not None and season_info_db["IsOffSeason"] is not None:
             year_db = int(season_info_db["current_year"])
             is_offseason_db = bool(season_info_db["IsOffSeason"])
-            app.logger.info(f"get_current_season: Retrieved season info from DB: Year={year_db}, IsOffseason={is_offseason_db}")
+            current_app.logger.info(f"get_current_season: Retrieved season info from DB: Year={year_db}, IsOffseason={is_offseason_db}")
             return {"current_year": year_db, "is_offseason": is_offseason_db}
         else:
-            app.logger.error("get_current_season: CRITICAL - No valid season information found in season_curr table. Using hardcoded defaults.")
+            current_app.logger.error("get_current_season: CRITICAL - No valid season information found in season_curr table. Using hardcoded defaults.")
             return {"current_year": 2025, "is_offseason": True} # Fallback to hardcoded defaults
 
     except sqlite3.Error as e:
-        app.logger.error(f"get_current_season: Database error when fetching from season_curr: {e}. Using hardcoded defaults.")
+        current_app.logger.error(f"get_current_season: Database error when fetching from season_curr: {e}. Using hardcoded defaults.")
         return {"current_year": 2025, "is_offseason": True} # Fallback for DB errors
     except Exception as e:
-        app.logger.error(f"get_current_season: Unexpected error: {e}. Using hardcoded defaults.")
+        current_app.logger.error(f"get_current_season: Unexpected error: {e}. Using hardcoded defaults.")
         return {"current_year": 2025, "is_offseason": True} # General fallback
 
 
@@ -467,8 +1232,7 @@ def get_current_user():
                 print(f"DEBUG: get_current_user - Found token in Authorization header: {session_token_from_header[:10]}...")
                 conn_header_check = get_global_db_connection()
                 cursor_header_check = conn_header_check.cursor()
-                cursor_header_check.execute("SELECT wallet_address FROM sessions WHERE session_token = ?", (session_token_from_header,))
-                session_db_data = cursor_header_check.fetchone()
+                session_db_data = get_session(cursor_header_check, session_token_from_header)
                 if session_db_data:
                     wallet_address = session_db_data['wallet_address']
                     print(f"DEBUG: get_current_user - Wallet address from DB via header token: {wallet_address}")
@@ -512,7 +1276,7 @@ def get_current_user():
     return None
 
 
-@app.route('/auth/login', methods=['POST', 'OPTIONS'])
+@bp.route('/auth/login', methods=['POST', 'OPTIONS'])
 def login():
     if request.method == 'OPTIONS':
         response = jsonify({'status': 'OK'})
@@ -537,9 +1301,6 @@ def login():
             print("Missing walletAddress")
             return jsonify({'success': False, 'error': 'Missing walletAddress'}), 400
 
-        session_token = secrets.token_urlsafe(32)
-        print(f"Generated session token: {session_token}")
-
         conn = get_global_db_connection() # Use global connection
         cursor = conn.cursor()
         
@@ -564,16 +1325,11 @@ def login():
                 is_new_user = True
                 user = None
 
-        # Always create or update session
-        cursor.execute('''
-            INSERT OR REPLACE INTO sessions (
-                wallet_address,
-                session_token
-            ) VALUES (?, ?)''',
-            (wallet_address, session_token)
-        )
+        # Always start a new session; only the token's hash is stored
+        session_ttl = _get_resources().get_session_store().ttl
+        session_token = run_write(lambda write_cursor: create_session(write_cursor, wallet_address, session_ttl))
+        print(f"Issued session token for wallet: {wallet_address}")
         
-        conn.commit()
         session['wallet_address'] = wallet_address # Set Flask session
         print(f"DEBUG: Flask session set for wallet: {wallet_address}")
 
@@ -583,7 +1339,7 @@ def login():
         # If has Sleeper ID, trigger data fetch
         if has_sleeper_id:
             print(f"Existing user with Sleeper ID detected, triggering full Sleeper data pull via /auth/login path")
-            full_data_response = sleeper_service.fetch_all_data(wallet_address)
+            full_data_response = get_sleeper_service().fetch_all_data(wallet_address)
             if not full_data_response['success']:
                 print(f"Failed to fetch full Sleeper data in /auth/login: {full_data_response.get('error', 'Unknown error')}")
                 # Don't return error here, just log it. The user can still log in
@@ -610,7 +1366,7 @@ def login():
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # Auth verify route
-@app.route('/auth/verify', methods=['GET'])
+@bp.route('/auth/verify', methods=['GET'])
 def verify():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -618,14 +1374,14 @@ def verify():
 
     conn = get_global_db_connection() # Use global connection
     cursor = conn.cursor()
-    session_data = cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,)).fetchone()
+    session_data = get_session(cursor, session_token)
     if not session_data:
         return jsonify({'success': False, 'error': 'Invalid session'}), 401
 
     return jsonify({'success': True, 'walletAddress': session_data['wallet_address']})
 
 # Leagues route
-@app.route('/leagues', methods=['GET'])
+@bp.route('/leagues', methods=['GET'])
 def get_leagues():
     """Fetches all leagues present in the LeagueMetadata table."""
     # This endpoint is public and shows all leagues in the system.
@@ -636,7 +1392,7 @@ def get_leagues():
         
         # Fetch all leagues from LeagueMetadata
         cursor.execute('''
-            SELECT sleeper_league_id, name, season, status, avatar, settings
+            SELECT sleeper_league_id, name, season, status, avatar, total_rosters
             FROM LeagueMetadata 
             ORDER BY name, season DESC
         ''')
@@ -644,14 +1400,13 @@ def get_leagues():
         
         leagues_list = []
         for row in leagues_data:
-            settings_json = json.loads(row['settings']) if row['settings'] else {}
             leagues_list.append({
                 'league_id': row['sleeper_league_id'],
                 'name': row['name'],
                 'season': row['season'],
                 'status': row['status'],
                 'avatar': row['avatar'],
-                'total_rosters': settings_json.get('total_rosters'),
+                'total_rosters': row['total_rosters'],
                 # Add other publicly relevant league details here
             })
             
@@ -668,7 +1423,7 @@ def get_leagues():
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
 # Logout route
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.pop('wallet_address', None)
     flash('You have been logged out.', 'success')
@@ -686,7 +1441,7 @@ def login_required(f):
     return wrap
 
 # League page route
-@app.route('/league/local')
+@bp.route('/league/local')
 def get_league_data_local():
     """Fetches league data for the authenticated user from the local database."""
     user = get_current_user()
@@ -714,60 +1469,9 @@ def get_league_data_local():
 
         print(f"DEBUG: /league/local - User info: sleeper_user_id={sleeper_user_id}, display_name={display_name}")
 
-        # Fetch leagues associated with the user through UserLeagueLinks and join with LeagueMetadata
-        cursor.execute('''
-            SELECT lm.sleeper_league_id, lm.name, lm.season, lm.status, lm.settings, lm.avatar
-            FROM UserLeagueLinks ull
-            JOIN LeagueMetadata lm ON ull.sleeper_league_id = lm.sleeper_league_id
-            WHERE ull.wallet_address = ?
-        ''', (wallet_address,))
-        leagues_data = cursor.fetchall()
-
-        leagues_list = []
-        if leagues_data:
-            for row in leagues_data:
-                league_id = row['sleeper_league_id']
-                
-                # Fetch teams for this league
-                cursor.execute('''
-                    SELECT 
-                        r.sleeper_roster_id,
-                        r.team_name,
-                        u.display_name as manager_name,
-                        u.username,
-                        u.sleeper_user_id,
-                        r.wins,
-                        r.losses,
-                        r.ties
-                    FROM rosters r
-                    LEFT JOIN users u ON r.owner_id = u.sleeper_user_id
-                    WHERE r.sleeper_league_id = ?
-                    ORDER BY 
-                        CASE WHEN u.sleeper_user_id = ? THEN 0 ELSE 1 END,
-                        r.team_name
-                ''', (league_id, sleeper_user_id))
-                
-                teams_data = cursor.fetchall()
-                teams_list = []
-                for team_row in teams_data:
-                    teams_list.append({
-                        'roster_id': team_row['sleeper_roster_id'],
-                        'team_name': team_row['team_name'] or 'Unknown Team',
-                        'manager_name': team_row['manager_name'] or team_row['username'] or 'Unknown Manager',
-                        'username': team_row['username'],
-                        'sleeper_user_id': team_row['sleeper_user_id'],
-                        'record': f"{team_row['wins']}-{team_row['losses']}-{team_row['ties']}"
-                    })
-                
-                leagues_list.append({
-                    'league_id': league_id,
-                    'name': row['name'],
-                    'season': row['season'],
-                    'status': row['status'],
-                    'avatar': row['avatar'],
-                    'total_rosters': json.loads(row['settings']).get('total_rosters') if row['settings'] else None,
-                    'teams': teams_list
-                })
+        # Leagues and their teams in one query, grouped per league
+        leagues_list = get_user_leagues_with_teams(cursor, wallet_address, sleeper_user_id)
+        if leagues_list:
             print(f"DEBUG: /league/local - Found {len(leagues_list)} leagues for wallet_address {wallet_address}.")
         else:
             print(f"DEBUG: /league/local - No leagues found for wallet_address {wallet_address} in UserLeagueLinks.")
@@ -794,7 +1498,7 @@ def get_league_data_local():
 # Waive player route
 
 # League connection route
-@app.route('/league/connect', methods=['POST'])
+@bp.route('/league/connect', methods=['POST'])
 def connect_league():
     # NOTE: This function appears to use an undefined KeeperDB class and logic 
     # that needs to be updated to align with the new database schema (LeagueMetadata, UserLeagueLinks)
@@ -811,14 +1515,14 @@ def connect_league():
     db.connect_league(wallet_address, league_id)
     
     # Trigger full data pull for the league
-    sleeper_service.fetch_all_data(wallet_address)
+    get_sleeper_service().fetch_all_data(wallet_address)
     
     return jsonify({'message': 'League connected successfully'}), 200
 
 # Sleeper integration routes
 
 # League teams route
-@app.route('/league/teams')
+@bp.route('/league/teams')
 def get_league_teams():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -830,8 +1534,7 @@ def get_league_teams():
             cursor = conn.cursor()
             
             # Get user from session
-            cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-            session_data = cursor.fetchone()
+            session_data = get_session(cursor, session_token)
             if not session_data:
                 return jsonify({'success': False, 'error': 'Invalid session'}), 401
             
@@ -848,7 +1551,7 @@ def get_league_teams():
         print(f"Error in /league/teams: {str(e)}")
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
-@app.route('/sleeper/import', methods=['POST'])
+@bp.route('/sleeper/import', methods=['POST'])
 def import_sleeper_data():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -860,8 +1563,7 @@ def import_sleeper_data():
             cursor = conn.cursor()
             
             # Get user from session
-            cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-            session_data = cursor.fetchone()
+            session_data = get_session(cursor, session_token)
             if not session_data:
                 return jsonify({'success': False, 'error': 'Invalid session'}), 401
             
@@ -874,14 +1576,14 @@ def import_sleeper_data():
                 return jsonify({'success': True, 'message': 'Local data already exists', 'league': league_data})
             
             # If no local data, trigger full data pull
-            sleeper_service.fetch_all_data(wallet_address)
+            get_sleeper_service().fetch_all_data(wallet_address)
             
             return jsonify({'success': True, 'message': 'Data imported successfully'})
     except Exception as e:
         print(f"Error in /sleeper/import: {str(e)}")
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
-@app.route('/sleeper/fetchAll', methods=['POST'])
+@bp.route('/sleeper/fetchAll', methods=['POST'])
 def fetch_all_data_route():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -889,15 +1591,14 @@ def fetch_all_data_route():
     
     try:
         # REMOVE THIS LOGGING LINE
-        # app.logger.info(f"Accessed /sleeper/fetchAll route. Method: {request.method}")
+        # current_app.logger.info(f"Accessed /sleeper/fetchAll route. Method: {request.method}")
         print(f"DEBUG: /sleeper/fetchAll called, method: {request.method}")
         print(f"DEBUG: Headers: {request.headers}")
         
         conn = get_global_db_connection() # Use global connection
         cursor = conn.cursor()
             
-        cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-        session_data = cursor.fetchone()
+        session_data = get_session(cursor, session_token)
         if not session_data:
             print("DEBUG: Invalid session token in /sleeper/fetchAll")
             return jsonify({'success': False, 'error': 'Invalid session'}), 401
@@ -911,7 +1612,7 @@ def fetch_all_data_route():
         print(f"DEBUG: Pre-service call user check in /sleeper/fetchAll for {wallet_address}: {dict(user_check) if user_check else 'No user found'}")
 
         print("DEBUG: Calling sleeper_service.fetch_all_data() in /sleeper/fetchAll")
-        result = sleeper_service.fetch_all_data(wallet_address)
+        result = get_sleeper_service().fetch_all_data(wallet_address)
         print(f"DEBUG: Result from fetch_all_data in /sleeper/fetchAll: {result}")
             
         if not result.get('success'):
@@ -923,7 +1624,7 @@ def fetch_all_data_route():
             return jsonify({'success': False, 'error': error_message}), status_code
             
         print("DEBUG: /sleeper/fetchAll successful")
-        conn.commit() # Commit changes if fetch_all_data was successful
+        conn.commit() # Without DB_WRITER fetch_all_data leaves its writes on this connection
         return jsonify({'success': True, 'message': 'Full data pull triggered successfully'})
     except Exception as e:
         print(f"ERROR in /sleeper/fetchAll: {str(e)}")
@@ -932,7 +1633,7 @@ def fetch_all_data_route():
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # League local data route
-@app.route('/league/standings/local', methods=['GET'])
+@bp.route('/league/standings/local', methods=['GET'])
 @login_required
 def get_league_standings_local():
     """Fetches league standings for a specific league_id, ensuring the user is part of it."""
@@ -1026,6 +1727,8 @@ def get_league_standings_local():
         
         # Sort standings by wins (descending) first, then by points_for (descending) as tiebreaker
         simplified_roster_info.sort(key=lambda x: (-x['wins'], -x['points_for']))
+        # With stored matchups: add points against, streaks, median records and head-to-head tiebreaks
+        apply_standings(simplified_roster_info, get_league_standings(cursor, league_id_from_request))
 
         print(f"DEBUG: /league/standings/local - Successfully fetched {len(simplified_roster_info)} simplified roster details for league {league_id_from_request}.")
         return jsonify({
@@ -1046,7 +1749,7 @@ def get_league_standings_local():
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
 # Sleeper user search endpoint
-@app.route('/sleeper/search', methods=['GET'])
+@bp.route('/sleeper/search', methods=['GET'])
 def search_sleeper_user():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -1057,8 +1760,7 @@ def search_sleeper_user():
         with get_global_db_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-            session_data = cursor.fetchone()
+            session_data = get_session(cursor, session_token)
             
             if not session_data:
                 return jsonify({'success': False, 'error': 'Invalid session'}), 401
@@ -1069,12 +1771,12 @@ def search_sleeper_user():
             return jsonify({'success': False, 'error': 'No username provided'}), 400
         
         # Search for user
-        user = sleeper_service.get_user(username)
+        user = get_sleeper_service().get_user(username)
         if not user:
             return jsonify({'success': False, 'error': f'User "{username}" not found'}), 404
         
         # Get user's leagues
-        leagues = sleeper_service.get_user_leagues(user['user_id'])
+        leagues = get_sleeper_service().get_user_leagues(user['user_id'])
         
         # Return user and leagues
         return jsonify({
@@ -1089,7 +1791,7 @@ def search_sleeper_user():
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # Check if wallet address needs association with Sleeper
-@app.route('/auth/check_association', methods=['GET'])
+@bp.route('/auth/check_association', methods=['GET'])
 def check_association():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -1099,8 +1801,7 @@ def check_association():
         # Verify session and get wallet address
         conn = get_global_db_connection() # Use global connection
         cursor = conn.cursor()
-        cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-        session_data = cursor.fetchone()
+        session_data = get_session(cursor, session_token)
         
         if not session_data:
             return jsonify({'success': False, 'error': 'Invalid session'}), 401
@@ -1126,7 +1827,7 @@ def check_association():
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # Complete Sleeper association
-@app.route('/auth/complete_association', methods=['POST'])
+@bp.route('/auth/complete_association', methods=['POST'])
 def complete_sleeper_association():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -1138,8 +1839,7 @@ def complete_sleeper_association():
         cursor = conn.cursor()
 
         # Verify session and get wallet_address
-        cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-        session_data = cursor.fetchone()
+        session_data = get_session(cursor, session_token)
         if not session_data:
             print("DEBUG: Invalid session token in /auth/complete_association")
             return jsonify({'success': False, 'error': 'Invalid session token'}), 401
@@ -1165,7 +1865,7 @@ def complete_sleeper_association():
         
         # If we don't have sleeper_user_id, get it from the username
         if not sleeper_user_id and sleeper_username:
-            sleeper_user_data = sleeper_service.get_user(sleeper_username)  # Change self to sleeper_service
+            sleeper_user_data = get_sleeper_service().get_user(sleeper_username)  # Change self to sleeper_service
             print(f"DEBUG: sleeper_user_data from service: {sleeper_user_data}")
             if not sleeper_user_data:
                 print(f"DEBUG: Sleeper username '{sleeper_username}' not found by service")
@@ -1202,6 +1902,7 @@ def complete_sleeper_association():
                 cursor.execute('SELECT sleeper_user_id FROM Users WHERE wallet_address = ?', (wallet_address,))
                 duplicate_wallet_row = cursor.fetchone()
 
+                merged_rows = None
                 if duplicate_wallet_row:
                     # A record already exists for this wallet. We will consolidate data into that record
                     # (it should be the wallet-only stub) and then delete the sleeper stub to prevent duplicates.
@@ -1216,16 +1917,16 @@ def complete_sleeper_association():
 
                 else:
                     # Safe to simply update the stub row with the wallet address.
-                    cursor.execute('''
+                    merged_rows = run_write(lambda write_cursor: write_cursor.execute('''
                         UPDATE Users 
                         SET wallet_address = ?, updated_at = datetime('now')
                         WHERE sleeper_user_id = ? AND wallet_address IS NULL
-                    ''', (wallet_address, sleeper_user_id))
+                    ''', (wallet_address, sleeper_user_id)).rowcount)
 
-                print(f"DEBUG: Merge/Consolidation operations affected wallet-row update with rowcount: {cursor.rowcount}")
+                print(f"DEBUG: Merge/Consolidation operations affected wallet-row update with rowcount: {merged_rows}")
 
                 # Ensure at least one row was updated overall.
-                if cursor.rowcount == 0:
+                if merged_rows == 0:
                     print(f"DEBUG: No rows updated during merge for sleeper_user_id {sleeper_user_id}")
                     return jsonify({'success': False, 'error': 'Failed to associate: merge operation affected no rows'}), 500
 
@@ -1241,13 +1942,11 @@ def complete_sleeper_association():
             
                 # Create new user record with both wallet and sleeper data
             print(f"DEBUG: Creating new user record for wallet {wallet_address} and sleeper_user_id {sleeper_user_id}")
-            cursor.execute('''
+            inserted_rows = run_write(lambda write_cursor: write_cursor.execute('''
                 INSERT INTO Users (wallet_address, sleeper_user_id, username, display_name, avatar, created_at, updated_at)
                 VALUES (?, ?, ?, ?, ?, datetime('now'), datetime('now'))
-                ''', (wallet_address, sleeper_user_id, sleeper_username, display_name, avatar))
-            print(f"DEBUG: Insert new user rowcount: {cursor.rowcount}")
-        
-        conn.commit()
+                ''', (wallet_address, sleeper_user_id, sleeper_username, display_name, avatar)).rowcount)
+            print(f"DEBUG: Insert new user rowcount: {inserted_rows}")
         
         
         # Re-query to verify after commit
@@ -1266,9 +1965,10 @@ def complete_sleeper_association():
         
         # Trigger fetch_all_data
         print(f"DEBUG: Triggering fetch_all_data for wallet {wallet_address}")
-        fetch_result = sleeper_service.fetch_all_data(wallet_address)
+        fetch_result = get_sleeper_service().fetch_all_data(wallet_address)
         print(f"DEBUG: fetch_all_data result: {fetch_result}")
         
+        commissioner_updates = []
         if fetch_result.get('success'):
             # Set commissioner status for all leagues this user is part of
             cursor.execute("SELECT sleeper_league_id FROM UserLeagueLinks WHERE wallet_address = ?", (wallet_address,))
@@ -1285,18 +1985,13 @@ def complete_sleeper_association():
                     sleeper_user_id = user_data['sleeper_user_id']
                     print(f"DEBUG: Checking commissioner status for sleeper_user_id {sleeper_user_id} in league {current_league_id}")
                     
-                    league_users = sleeper_service.get_league_users(current_league_id)
+                    league_users = get_sleeper_service().get_league_users(current_league_id)
                     if league_users:
                         sleeper_user = next((u for u in league_users if u.get('user_id') == sleeper_user_id), None)
                         is_owner = sleeper_user.get('is_owner', False) if sleeper_user else False
                         print(f"DEBUG: User {sleeper_user_id} is_owner: {is_owner} in league {current_league_id}")
                         
-                        cursor.execute("""
-                            UPDATE UserLeagueLinks 
-                            SET is_commissioner = ?, updated_at = datetime('now')
-                            WHERE wallet_address = ? AND sleeper_league_id = ?
-                        """, (1 if is_owner else 0, wallet_address, current_league_id))
-                        print(f"DEBUG: Updated commissioner status for league {current_league_id} with rowcount: {cursor.rowcount}")
+                        commissioner_updates.append((1 if is_owner else 0, wallet_address, current_league_id))
                     else:
                         print(f"DEBUG: No league users found for league {current_league_id}")
                 else:
@@ -1304,7 +1999,14 @@ def complete_sleeper_association():
         else:
             print(f"DEBUG: fetch_all_data failed, skipping commissioner status updates")
         
-        conn.commit()
+        conn.commit() # Without DB_WRITER fetch_all_data leaves its writes on this connection
+        if commissioner_updates:
+            run_write(lambda write_cursor: write_cursor.executemany("""
+                UPDATE UserLeagueLinks 
+                SET is_commissioner = ?, updated_at = datetime('now')
+                WHERE wallet_address = ? AND sleeper_league_id = ?
+            """, commissioner_updates))
+            print(f"DEBUG: Updated commissioner status for {len(commissioner_updates)} leagues")
         print(f"DEBUG: Final commit completed for association")
         
         # Final verification AFTER everything
@@ -1327,7 +2029,7 @@ def complete_sleeper_association():
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # Get users in a specific league
-@app.route('/sleeper/league/<league_id>/users', methods=['GET'])
+@bp.route('/sleeper/league/<league_id>/users', methods=['GET'])
 def get_league_users(league_id):
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -1338,14 +2040,13 @@ def get_league_users(league_id):
         with get_global_db_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-            session_data = cursor.fetchone()
+            session_data = get_session(cursor, session_token)
             
             if not session_data:
                 return jsonify({'success': False, 'error': 'Invalid session'}), 401
         
         # Get users from the Sleeper API
-        users = sleeper_service.get_league_users(league_id)
+        users = get_sleeper_service().get_league_users(league_id)
         
         if not users:
             return jsonify({'success': False, 'error': f'No users found for league {league_id}'}), 404
@@ -1364,7 +2065,7 @@ def get_league_users(league_id):
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # Season settings endpoints
-@app.route('/season/settings', methods=['GET'])
+@bp.route('/season/settings', methods=['GET'])
 def get_season_settings():
     session_token = request.headers.get('Authorization')
     if not session_token:
@@ -1375,8 +2076,7 @@ def get_season_settings():
         with get_global_db_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT wallet_address FROM sessions WHERE session_token = ?', (session_token,))
-            session_data = cursor.fetchone()
+            session_data = get_session(cursor, session_token)
             
             if not session_data:
                 return jsonify({'success': False, 'error': 'Invalid session'}), 401
@@ -1406,7 +2106,7 @@ def get_season_settings():
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 
-@app.route('/api/user/roster', methods=['GET'])
+@bp.route('/api/user/roster', methods=['GET'])
 @login_required
 def get_user_roster_for_league():
     """Fetches the roster_id for the authenticated user in a specific league."""
@@ -1459,58 +2159,12 @@ def get_user_roster_for_league():
         traceback.print_exc()
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-def _get_player_current_year_cost(player_id: str, team_id: str, sleeper_league_id: str, current_season_year: int, db_conn: sqlite3.Connection) -> float:
-    """
-    Determines the current season's contract cost for a player on a specific team in a specific league.
-    Uses vw_contractByYear first, then falls back to the contracts table for Year 1 costs.
-    """
-    cursor = db_conn.cursor()
-    cost = 0.0
-
-    # Attempt 1: Check vw_contractByYear
-    try:
-        cursor.execute("""
-            SELECT cost_for_season
-            FROM vw_contractByYear
-            WHERE player_id = ? 
-              AND team_id = ? 
-              AND sleeper_league_id = ? 
-              AND (contract_start_season + year_number_in_contract - 1) = ?
-        """, (player_id, team_id, sleeper_league_id, current_season_year))
-        row = cursor.fetchone()
-        if row and row['cost_for_season'] is not None:
-            cost = float(row['cost_for_season'])
-            return cost
-    except Exception as e:
-        # Log this error, as an issue with the view or query would be problematic
-        app.logger.error(f"Error querying vw_contractByYear for player {player_id}, team {team_id}, year {current_season_year}: {e}")
-
-    # Attempt 2: Check contracts table directly (primarily for Year 1 costs if not caught by view, or for 1-year contracts)
-    # This is important for players newly drafted and assigned a 1-year default contract by SleeperService.
-    try:
-        cursor.execute("""
-            SELECT draft_amount
-            FROM contracts
-            WHERE player_id = ?
-              AND team_id = ?
-              AND sleeper_league_id = ? 
-              AND contract_year = ? 
-              AND is_active = 1
-        """, (player_id, team_id, sleeper_league_id, current_season_year))
-        row = cursor.fetchone()
-        if row and row['draft_amount'] is not None:
-            cost = float(row['draft_amount'])
-            return cost
-    except Exception as e:
-        app.logger.error(f"Error querying contracts table for player {player_id}, team {team_id}, year {current_season_year}: {e}")
-        
-    return cost # Defaults to 0.0 if no cost found
-
-@app.route('/team/<team_id>', methods=['GET'])
+@bp.route('/team/<team_id>', methods=['GET'])
 @login_required
 def get_team_details(team_id):
     """Fetches detailed information for a specific team (roster).
        Expects league_id as a query parameter.
+       The page is served from the league's precomputed snapshot (see team_snapshots.py).
     """
     current_user_details = get_current_user()
     if not current_user_details:
@@ -1522,551 +2176,44 @@ def get_team_details(team_id):
 
     # team_id is the sleeper_roster_id
     try:
-        conn = get_global_db_connection()
+        conn = get_league_db_connection(league_id_from_query)
         cursor = conn.cursor()
 
-        # 1. Fetch basic roster details (including owner_id and league_id)
         cursor.execute("""
-            SELECT r.sleeper_roster_id, r.sleeper_league_id, r.owner_id, r.players as player_ids_json, 
-                   r.reserve as reserve_ids_json, 
-                   r.team_name as roster_db_team_name, -- Select the new team_name column
-                   COALESCE(u.display_name, u.username) as manager_name, u.username as sleeper_username
-            FROM rosters r
-            LEFT JOIN Users u ON r.owner_id = u.sleeper_user_id
-            WHERE r.sleeper_roster_id = ? AND r.sleeper_league_id = ?
+            SELECT sleeper_roster_id, sleeper_league_id
+            FROM rosters
+            WHERE sleeper_roster_id = ? AND sleeper_league_id = ?
         """, (team_id, league_id_from_query))
         roster_info = cursor.fetchone()
 
         if not roster_info:
             return jsonify({'success': False, 'error': 'Team (roster) not found'}), 404
 
-        # Fetch League Name for league_context
-        cursor.execute("SELECT name FROM LeagueMetadata WHERE sleeper_league_id = ?", (roster_info['sleeper_league_id'],))
-        league_metadata_row = cursor.fetchone()
-        league_name_for_context = league_metadata_row['name'] if league_metadata_row else 'Unknown League'
-
         # Verify that the current user is part of the league this team belongs to.
         cursor.execute("""SELECT 1 FROM UserLeagueLinks WHERE wallet_address = ? AND sleeper_league_id = ?""",
                        (current_user_details['wallet_address'], roster_info['sleeper_league_id']))
         if not cursor.fetchone():
             return jsonify({'success': False, 'error': 'User not authorized to view this team (not part of the league)'}), 403
 
-        # Prioritize the team_name from the rosters table. Fallback to manager's name.
-        team_name_to_display = roster_info['roster_db_team_name'] if roster_info['roster_db_team_name'] else roster_info['manager_name']
-
-        # <<< CORRECTED LOGIC FOR all_player_ids_on_roster >>>
-        main_player_ids = json.loads(roster_info['player_ids_json']) if roster_info['player_ids_json'] else []
-        reserve_player_ids = json.loads(roster_info['reserve_ids_json']) if roster_info['reserve_ids_json'] else []
-        # MODIFICATION: Use only main_player_ids as per user request for this view
-        all_player_ids_on_roster = main_player_ids
-        app.logger.info(f"DEBUG_TEAM_DETAILS: Using main_player_ids for all_player_ids_on_roster: {all_player_ids_on_roster}")
-
         current_season_data = get_current_season()
         current_processing_year = int(current_season_data['current_year']) if current_season_data and current_season_data.get('current_year') else 0
         is_offseason = current_season_data['is_offseason']
-        
-        # print(f"DEBUG_TEAM_DETAILS_FULL: current_season_data = {current_season_data}")
-        # print(f"DEBUG_TEAM_DETAILS_FULL: current_processing_year = {current_processing_year}")
-        # print(f"DEBUG_TEAM_DETAILS_FULL: is_offseason = {is_offseason}")
-        # print(f"DEBUG_TEAM_DETAILS_FULL: Roster's league_id = {roster_info['sleeper_league_id']}")
-
-        # Determine if the contract setting period is active for this league
-        is_contract_setting_period_active = False
-        auction_acquisitions = {} 
-        
-        # print(f"DEBUG_TEAM_DETAILS: Initial is_contract_setting_period_active: {is_contract_setting_period_active}")
-        # print(f"DEBUG_TEAM_DETAILS: Initial auction_acquisitions: {auction_acquisitions}")
-
-        if is_offseason and current_processing_year > 0:
-            cursor.execute("""
-                SELECT data 
-                FROM drafts 
-                WHERE league_id = ? AND season = ? AND status = ? 
-                ORDER BY start_time DESC LIMIT 1
-            """, (roster_info['sleeper_league_id'], str(current_processing_year), "complete"))
-            draft_record = cursor.fetchone()
-            # print(f"DEBUG_TEAM_DETAILS: Draft record for league {roster_info['sleeper_league_id']} season {current_processing_year}: {draft_record}")
-            
-            if draft_record and draft_record['data']:
-                try:
-                    draft_picks_data = json.loads(draft_record['data'])
-                    # print(f"DEBUG_TEAM_DETAILS: Parsed draft_picks_data: {draft_picks_data}")
-                    if isinstance(draft_picks_data, list):
-                        is_contract_setting_period_active = True 
-                        for pick in draft_picks_data:
-                            player_id = pick.get('player_id')
-                            metadata = pick.get('metadata', {})
-                            amount_str = metadata.get('amount')
-                            # print(f"DEBUG_TEAM_DETAILS: Draft pick processing - player_id: {player_id}, amount_str: {amount_str}")
-                            if player_id and amount_str is not None:
-                                try:
-                                    auction_acquisitions[str(player_id)] = int(amount_str)
-                                except ValueError:
-                                    app.logger.warning(f"DEBUG_TEAM_DETAILS_FULL: Warning: Could not convert auction amount '{amount_str}' to int for player {player_id}")
-                    else:
-                        # print(f"DEBUG_TEAM_DETAILS: draft_picks_data is not a list. Type: {type(draft_picks_data)}")
-                        pass # draft_picks_data is not a list, no action needed here
-                except json.JSONDecodeError:
-                    app.logger.warning(f"DEBUG_TEAM_DETAILS_FULL: Warning: Could not parse draft data JSON for league {roster_info['sleeper_league_id']} season {current_processing_year}")
-        
-        # print(f"DEBUG_TEAM_DETAILS: Final is_contract_setting_period_active: {is_contract_setting_period_active}")
-        # print(f"DEBUG_TEAM_DETAILS: Final auction_acquisitions: {auction_acquisitions}")
-
-        # <<< START NEW LOGIC FOR LEAGUE SPENDING RANKS >>>
-        team_position_spending_ranks = {}
-        current_league_id_for_ranks = roster_info['sleeper_league_id']
-
-        if current_league_id_for_ranks and current_processing_year > 0:
-            try:
-                # 1. Get all rosters for the current league
-                cursor.execute("SELECT sleeper_roster_id, players FROM rosters WHERE sleeper_league_id = ?", (current_league_id_for_ranks,))
-                all_league_rosters_raw = cursor.fetchall()
-
-                if not all_league_rosters_raw:
-                    app.logger.warning(f"No rosters found for league {current_league_id_for_ranks} when calculating spending ranks.")
-                else:
-                    # Collect all unique player IDs from all rosters in the league first
-                    all_player_ids_in_league_set = set()
-                    for r_raw_temp in all_league_rosters_raw:
-                        p_ids_temp = json.loads(r_raw_temp['players']) if r_raw_temp['players'] else []
-                        for p_id_item in p_ids_temp:
-                            all_player_ids_in_league_set.add(p_id_item)
-                    
-                    player_positions_map = {}
-                    if all_player_ids_in_league_set:
-                        placeholders_for_player_pos = ', '.join('?' * len(all_player_ids_in_league_set))
-                        cursor.execute(f"SELECT sleeper_player_id, position FROM players WHERE sleeper_player_id IN ({placeholders_for_player_pos})", tuple(all_player_ids_in_league_set))
-                        for row_pos_map in cursor.fetchall():
-                            player_positions_map[row_pos_map['sleeper_player_id']] = row_pos_map['position']
-
-                    league_spending_by_pos_for_ranking = {} 
-                    
-                    for roster_raw_in_league in all_league_rosters_raw:
-                        current_roster_id_in_league = roster_raw_in_league['sleeper_roster_id']
-                        player_ids_json_in_league = roster_raw_in_league['players']
-                        player_ids_in_league = json.loads(player_ids_json_in_league) if player_ids_json_in_league else []
-                        
-                        team_spending_this_iteration = {}
-
-                        for p_id_str in player_ids_in_league:
-                            position = player_positions_map.get(p_id_str)
-                            
-                            if not position:
-                                app.logger.debug(f"Skipping player {p_id_str} on roster {current_roster_id_in_league}: no position found in pre-fetched map.")
-                                continue 
-                            
-                            if position not in team_spending_this_iteration:
-                                 team_spending_this_iteration[position] = 0.0
-
-                            cost = _get_player_current_year_cost(p_id_str, current_roster_id_in_league, current_league_id_for_ranks, current_processing_year, conn)
-                            if cost > 0:
-                                team_spending_this_iteration[position] += cost
-                        
-                        for pos, total_amount in team_spending_this_iteration.items():
-                            if pos not in league_spending_by_pos_for_ranking:
-                                league_spending_by_pos_for_ranking[pos] = []
-                            league_spending_by_pos_for_ranking[pos].append({'team_id': current_roster_id_in_league, 'amount': total_amount})
-
-                    # 3. Rank teams within each position
-                    for position, spending_list_for_pos in league_spending_by_pos_for_ranking.items():
-                        sorted_spending = sorted(spending_list_for_pos, key=lambda x: x['amount'], reverse=True)
-                        
-                        rank_for_viewed_team = -1 
-                        # Find the rank of the team whose page is being viewed (team_id)
-                        for i, team_spend_info in enumerate(sorted_spending):
-                            if team_spend_info['team_id'] == team_id: # team_id is the sleeper_roster_id of the team page being viewed
-                                rank_for_viewed_team = i + 1
-                                break
-                        
-                        # Only include rank if the viewed team has spending (and thus a rank) in this position
-                        if rank_for_viewed_team != -1:
-                            team_position_spending_ranks[position] = {
-                                'rank': rank_for_viewed_team,
-                                'total_teams': len(sorted_spending) 
-                            }
-            except Exception as e:
-                app.logger.error(f"Error calculating league spending ranks for team {team_id}, league {current_league_id_for_ranks}: {e}")
-                # team_position_spending_ranks will remain empty or partially filled; frontend should handle this
-        # <<< END NEW LOGIC FOR LEAGUE SPENDING RANKS >>>
-
-        # Calculate Future Yearly Total Ranks
-        future_yearly_total_ranks = {}
-        if current_league_id_for_ranks and current_processing_year > 0:
-            try:
-                # Get all rosters for the current league (re-fetch or reuse if already fetched and suitable)
-                cursor.execute("SELECT sleeper_roster_id FROM rosters WHERE sleeper_league_id = ?", (current_league_id_for_ranks,))
-                all_roster_ids_in_league = [row['sleeper_roster_id'] for row in cursor.fetchall()]
-
-                if all_roster_ids_in_league:
-                    seasons_to_rank = [current_processing_year + i for i in range(1, 4)] # For next 3 future years
-
-                    # Dictionary to store total spending for each team for each future year
-                    # { year1: [{\'team_id\': X, \'total_cost\': Y}, ...], year2: [...] }
-                    league_spending_by_future_year = {year: [] for year in seasons_to_rank}
-
-                    for r_id_in_league in all_roster_ids_in_league:
-                        for year_to_rank in seasons_to_rank:
-                            # Sum contract costs for this team for this specific future year from vw_contractByYear
-                            cursor.execute("""
-                                SELECT SUM(v.cost_for_season) as total_future_cost
-                                FROM vw_contractByYear v
-                                JOIN contracts c ON v.original_contract_rowid = c.rowid 
-                                WHERE v.team_id = ? AND v.sleeper_league_id = ? AND v.contract_start_season + v.year_number_in_contract -1 = ? AND c.is_active = 1
-                            """, (r_id_in_league, current_league_id_for_ranks, year_to_rank))
-                            result = cursor.fetchone()
-                            contract_cost_for_year = result['total_future_cost'] if result and result['total_future_cost'] is not None else 0.0
-                            
-                            # Sum penalty amounts for this team for this specific future year
-                            cursor.execute("""
-                                SELECT COALESCE(SUM(p.penalty_amount), 0) as total_penalty
-                                FROM penalties p
-                                JOIN contracts c ON p.contract_id = c.rowid
-                                WHERE c.team_id = ? AND c.sleeper_league_id = ? AND p.penalty_year = ?
-                            """, (r_id_in_league, current_league_id_for_ranks, year_to_rank))
-                            result = cursor.fetchone()
-                            penalty_cost_for_year = result['total_penalty'] if result and result['total_penalty'] is not None else 0.0
-                            
-                            # Sum trade amounts for this team for this specific future year
-                            cursor.execute("""
-                                SELECT 
-                                    COALESCE(SUM(CASE WHEN t.initiator_team_id = ? THEN ti.budget_amount ELSE 0 END), 0) as sent,
-                                    COALESCE(SUM(CASE WHEN t.recipient_team_id = ? THEN ti.budget_amount ELSE 0 END), 0) as received
-                                FROM trade_items ti
-                                JOIN trades t ON ti.trade_id = t.trade_id
-                                WHERE t.sleeper_league_id = ? AND t.trade_status = 'completed' AND ti.season_year = ?
-                            """, (r_id_in_league, r_id_in_league, current_league_id_for_ranks, year_to_rank))
-                            result = cursor.fetchone()
-                            # Positive value means money SENT (reduces remaining budget)
-                            trade_impact = (result['sent'] if result and result['sent'] is not None else 0.0) - (result['received'] if result and result['received'] is not None else 0.0)
-                            
-                            # Total cost includes contracts, penalties, and trade impact
-                            total_cost_for_year = contract_cost_for_year + penalty_cost_for_year + trade_impact
-                            remaining_budget = 200 - total_cost_for_year
-                            league_spending_by_future_year[year_to_rank].append({'team_id': r_id_in_league, 'total_cost': total_cost_for_year, 'remaining_budget': remaining_budget})
-                    
-                    # Rank teams for each future year based on remaining budget (higher remaining budget = better rank)
-                    for year_val, spending_data_for_year in league_spending_by_future_year.items():
-                        sorted_teams_for_year = sorted(spending_data_for_year, key=lambda x: x['remaining_budget'], reverse=True)
-                        
-                        rank_for_viewed_team_future = -1
-                        # Find the rank of the team whose page is being viewed (team_id)
-                        for i, team_spend_future_info in enumerate(sorted_teams_for_year):
-                            if team_spend_future_info['team_id'] == team_id:
-                                rank_for_viewed_team_future = i + 1
-                                break
-                        
-                        # Store the rank if the viewed team has spending (and thus a rank) for this future year
-                        if rank_for_viewed_team_future != -1:
-                             future_yearly_total_ranks[str(year_val)] = {
-                                 'rank': rank_for_viewed_team_future,
-                                 'total_teams': len(sorted_teams_for_year)
-                             }
-
-            except Exception as e:
-                 app.logger.error(f"Error calculating future yearly total ranks for team {team_id}, league {current_league_id_for_ranks}: {e}")
-
-        # Initialize grouped_players once, correctly, before it might be used or populated.
-        grouped_players = {pos: [] for pos in ['QB', 'RB', 'WR', 'TE', 'K', 'DEF', 'Unknown']}
-
-        # Initialize team_yearly_totals. This should be done regardless of player count initially.
-        team_yearly_totals = {year: 0.0 for year in range(current_processing_year, current_processing_year + 4)}
-
-        # The if block that previously redefined all_player_ids_on_roster is now removed.
-        # We proceed directly to processing if all_player_ids_on_roster (which now correctly includes reserve) has players.
-        
-        # player_details = [] # This seems unused, consider removing if truly not needed later.
-        if all_player_ids_on_roster: # This check now uses the comprehensive list of players
-            placeholders = ', '.join('?' * len(all_player_ids_on_roster))
-            # Query players table for names, positions, teams
-            app.logger.info(f"DEBUG_TEAM_DETAILS: Querying players table for IDs: {all_player_ids_on_roster}")
-            cursor.execute(f"""
-                SELECT p.sleeper_player_id, p.name, p.position, p.team
-                FROM players p
-                WHERE p.sleeper_player_id IN ({placeholders})
-            """, tuple(all_player_ids_on_roster))
-            team_players_details_list = cursor.fetchall()
-            team_players_details = {row['sleeper_player_id']: dict(row) for row in team_players_details_list}
-            app.logger.info(f"DEBUG_TEAM_DETAILS: Fetched team_players_details map: {team_players_details}")
-
-            # Prepare a dictionary to hold contract details for each player for faster lookup
-            contracts_info = {}
-            if all_player_ids_on_roster: # Ensure there are players before querying contracts
-                cursor.execute(f"""
-                        SELECT player_id, draft_amount, contract_year, duration, is_active, rowid as contract_rowid
-                        FROM contracts 
-                        WHERE player_id IN ({placeholders}) 
-                        AND team_id = ? 
-                        AND sleeper_league_id = ?
-                """, tuple(all_player_ids_on_roster) + (team_id, roster_info['sleeper_league_id']))
-                
-                for contract_row in cursor.fetchall():
-                        contracts_info[contract_row['player_id']] = dict(contract_row)
-            
-            # DO NOT RE-INITIALIZE grouped_players here. It's done above.
-            # grouped_players = {'QB': [], 'RB': [], 'WR': [], 'TE': [], 'K': [], 'DEF': [], 'Unknown': []} 
-            
-            # team_yearly_totals is already initialized before this block based on players or lack thereof.
-            # However, it's populated inside the loop if players exist and have contracts.
-            # Let's ensure it's initialized if not already done in the 'else' for no players.
-            if not team_yearly_totals: # Should have been caught by the else, but as a safeguard
-                 team_yearly_totals = {year: 0.0 for year in range(current_processing_year, current_processing_year + 4)}
-
-            for p_id in all_player_ids_on_roster: # Iterate in a defined order if necessary, or use original list order
-                p_data = team_players_details.get(p_id)
-                if not p_data:
-                    app.logger.warning(f"DEBUG_TEAM_DETAILS_LOOP: Player data for ID {p_id} not found in team_players_details map. SKIPPING THIS PLAYER.")
-                    continue
-
-                player_contract_info = contracts_info.get(p_id)
-                app.logger.info(f"DEBUG_TEAM_DETAILS_LOOP Player ID: {p_id} ({p_data.get('name', 'N/A')})")
-                app.logger.info(f"  Raw player_contract_info from DB: {player_contract_info}")
-
-                # Default values
-                draft_amount_for_calc = 0
-                contract_duration_for_calc = 0
-                contract_start_year_for_calc = 0
-                is_active_for_calc = False
-                contract_status = "Free Agent" # Default status
-                years_remaining_display = "N/A"
-                projected_costs = [] # Default empty list
-
-                if player_contract_info:
-                    draft_amount_for_calc = player_contract_info.get('draft_amount', 0)
-                    # Ensure duration and contract_year are treated as int, defaulting to 0 if None/missing
-                    db_duration = player_contract_info.get('duration')
-                    contract_duration_for_calc = int(db_duration) if db_duration is not None else 0
-                    
-                    db_contract_year = player_contract_info.get('contract_year')
-                    contract_start_year_for_calc = int(db_contract_year) if db_contract_year is not None else 0
-                    
-                    is_active_for_calc = bool(player_contract_info.get('is_active', False))
-                    app.logger.info(f"  Derived from contract_info: is_active_for_calc={is_active_for_calc}, duration_for_calc={contract_duration_for_calc}, start_year_for_calc={contract_start_year_for_calc}, draft_amount_for_calc={draft_amount_for_calc}")
-
-
-                    if is_active_for_calc:
-                        contract_status = "Active Contract"
-                        
-                        # CRITICAL: Ensure contract_duration_for_calc and contract_start_year_for_calc are positive for calculations
-                        if contract_duration_for_calc > 0 and contract_start_year_for_calc > 0:
-                            contract_end_year = contract_start_year_for_calc + contract_duration_for_calc - 1
-                            years_left = contract_end_year - current_processing_year + 1
-                            
-                            if years_left <= 0: 
-                                years_remaining_display = "Expires " + str(contract_end_year) if contract_end_year >= current_processing_year else "Expired"
-                            else: 
-                                years_remaining_display = str(years_left)
-                            
-                            # Also ensure draft_amount is floatable for get_escalated_contract_costs
-                            current_draft_amount = float(draft_amount_for_calc if draft_amount_for_calc is not None else 0.0)
-
-                            projected_costs = get_escalated_contract_costs(
-                                draft_amount=current_draft_amount, 
-                                duration=int(contract_duration_for_calc), 
-                                contract_start_year=int(contract_start_year_for_calc)
-                            )
-                            app.logger.info(f"  Player {p_id} calculated projected_costs: {projected_costs}")
-                            
-                            for cost_info in projected_costs:
-                                cost_year = cost_info['year']
-                                cost_value = cost_info['cost']
-                                if current_processing_year <= cost_year < current_processing_year + 4:
-                                    team_yearly_totals[cost_year] += cost_value
-                        else:
-                            app.logger.warning(f"  Player {p_id} has active contract but duration ({contract_duration_for_calc}) or start_year ({contract_start_year_for_calc}) is invalid (zero or None). Costs/Years not calculated.")
-                            years_remaining_display = "Error" # Indicate data issue for frontend
-                            projected_costs = [] # Ensure it's empty
-                    else: 
-                        contract_status = "Inactive Contract" # Contract exists but is_active = 0
-                        years_remaining_display = "N/A" # Inactive contracts don't have remaining years in this context
-                        projected_costs = []
-                else: # No player_contract_info at all
-                    app.logger.info(f"  No player_contract_info found for player {p_id}. Defaulting to Free Agent status.")
-                    # contract_status remains "Free Agent", years_remaining_display "N/A", projected_costs empty
-
-                app.logger.info(f"  Before auction override: status='{contract_status}', yrs_rem='{years_remaining_display}', projected_costs_count={len(projected_costs)}")
-                
-                # Override status for auction acquisitions during contract setting period
-                is_auction_acquisition = p_id in auction_acquisitions
-                # Refined logic: Only set to "Pending Contract Setting" if it's an auction acquisition,
-                # contract setting period is active, AND (no contract exists OR the existing one is specifically the 1-year default that needs setting)
-                # A player with an already set multi-year contract (even if is_active=0 briefly before season start) should not revert to pending.
-                # The key is often that a 1-year, $X contract is created by sleeper_service for new draftees.
-                
-                # If it's an auction acquisition, and the period is active...
-                if is_auction_acquisition and is_contract_setting_period_active:
-                    # Check if the existing contract (if any) looks like the default 1-year placeholder
-                    # OR if no contract exists yet for this player on this team for this year.
-                    is_default_placeholder = False
-                    if player_contract_info:
-                        # A common placeholder is duration=1 and contract_year = current_processing_year
-                        if contract_duration_for_calc == 1 and contract_start_year_for_calc == current_processing_year:
-                           is_default_placeholder = True 
-                    
-                    if not player_contract_info or is_default_placeholder:
-                        contract_status = "Pending Contract Setting"
-                        # Only use auction amount if player has an active contract
-                        if player_contract_info and is_active_for_calc:
-                            draft_amount_for_calc = auction_acquisitions.get(p_id, 0)
-                        else:
-                            draft_amount_for_calc = 0  # Free agents show $0 regardless of auction history
-                        years_remaining_display = "Set Duration" 
-                        projected_costs = [] # Clear any prior projected costs
-                        app.logger.info(f"  Player {p_id} is an auction acquisition in setting period. Status OVERRIDDEN to 'Pending Contract Setting'. Placeholder contract was: {is_default_placeholder}")
-                    # else:
-                        # It's an auction acquisition in setting period, but already has a non-placeholder contract (e.g., user set it, then page reloaded)
-                        # In this case, we want to keep showing the set contract details but still allow edits.
-                        # The contract_status will be "Active Contract" (if is_active_for_calc was true)
-                        # The frontend handles editability based on 'Pending Contract Setting' OR (is_contract_setting_period_active AND is_auction_acquisition)
-                        # So, the main loop's 'Active Contract' status is fine, frontend can still show dropdowns.
-                        # We might need to explicitly set 'years_remaining_display' to 'Set Duration' if we want the dropdown visible.
-                        # For now, let existing calculated years_remaining_display and projected_costs stand if a contract has been set.
-                        # The key is the frontend check: player.contract_status === 'Pending Contract Setting' || (teamData.is_contract_setting_period_active && teamData.auction_acquisitions_for_team && teamData.auction_acquisitions_for_team[player.id] !== undefined)
-
-                # Ensure free agents always show $0 regardless of auction history
-                if not player_contract_info:
-                    draft_amount_for_calc = 0
-                    contract_status = "Free Agent"
-
-                app.logger.info(f"  FINAL for player {p_id} ({p_data.get('name', 'N/A')}):")
-                app.logger.info(f"    contract_status: '{contract_status}'")
-                app.logger.info(f"    years_remaining_display: '{years_remaining_display}'")
-                app.logger.info(f"    draft_amount_for_calc: {draft_amount_for_calc}")
-                app.logger.info(f"    projected_costs: {projected_costs}")
-                app.logger.info(f"    is_on_reserve: {p_id in reserve_player_ids}")
-                app.logger.info(f"    contract_rowid: {player_contract_info.get('contract_rowid') if player_contract_info else None}")
-                app.logger.info(f"    contract_duration_db: {int(contract_duration_for_calc) if player_contract_info and contract_duration_for_calc else None}")
-                app.logger.info(f"    contract_start_year_db: {int(contract_start_year_for_calc) if player_contract_info and contract_start_year_for_calc else None}")
-
-                # MODIFICATION for UI: If contract setting period is active and it's an auction acquisition,
-                # ensure status is 'Pending Contract Setting' for UI editability,
-                # and years_remaining is 'Set Duration'. Projected costs should still reflect the saved value.
-                if is_contract_setting_period_active and is_auction_acquisition:
-                    contract_status_for_frontend = "Pending Contract Setting"
-                    years_remaining_display_for_frontend = "Set Duration"
-                    # The draft_amount_for_calc and projected_costs should reflect the current DB state for information,
-                    # but the status and years_remaining text will control editability.
-                    app.logger.info(f"  UI OVERRIDE for auction player {p_id}: contract_status to 'Pending Contract Setting', years_remaining_display to 'Set Duration'")
-                else:
-                    contract_status_for_frontend = contract_status
-                    years_remaining_display_for_frontend = years_remaining_display
-
-                player_data_for_frontend = {
-                    'id': p_id,
-                    'name': p_data.get('name', 'N/A'),
-                    'position': p_data.get('position', 'N/A'),
-                    'team_nfl': p_data.get('team', 'N/A'),
-                    'draft_amount': draft_amount_for_calc, 
-                    'contract_status': contract_status_for_frontend, # Use the potentially overridden status for UI
-                    'years_remaining': years_remaining_display_for_frontend, # Use the potentially overridden display for UI
-                    'projected_costs': projected_costs, # Always show actual projected costs based on DB
-                    'is_on_reserve': p_id in reserve_player_ids,
-                    'contract_rowid': player_contract_info.get('contract_rowid') if player_contract_info else None,
-                    'contract_duration_db': int(contract_duration_for_calc) if player_contract_info and contract_duration_for_calc else None,
-                    'contract_start_year_db': int(contract_start_year_for_calc) if player_contract_info and contract_start_year_for_calc else None,
-                }
-                
-                position_group = p_data.get('position', 'Unknown')
-                if position_group not in grouped_players:
-                    position_group = 'Unknown' # Fallback for unexpected positions
-                grouped_players[position_group].append(player_data_for_frontend)
-
-        # Sort players within each position group by draft_amount (descending) or name (ascending)
-        for position in grouped_players:
-            grouped_players[position].sort(key=lambda x: (-x.get('draft_amount', 0), x.get('name', '')))
 
-        # print(f"DEBUG_TEAM_DETAILS_FULL: Final team_position_spending_ranks: {team_position_spending_ranks}")
-        # print(f"DEBUG_TEAM_DETAILS_FULL: Final future_yearly_total_ranks: {future_yearly_total_ranks}")
-
-        # Calculate team_yearly_penalty_totals
-        team_yearly_penalty_totals = {}
-        try:
-            # Get all contract_ids for the current team and league that are NOT active
-            # (penalties are typically associated with inactive/dropped contracts)
-            # However, penalties are directly linked to contracts.id (rowid), and penalties.contract_id points to contracts.rowid
-            # We need to sum penalties for this team based on contracts associated with this team.
-            # The `penalties` table itself doesn't directly link to team_id, but `contracts` does.
-            # So, we join penalties with contracts where contracts.team_id matches.
-            cursor.execute("""
-                SELECT p.penalty_year, SUM(p.penalty_amount) as total_penalty_for_year
-                FROM penalties p
-                JOIN contracts c ON p.contract_id = c.rowid
-                WHERE c.team_id = ? AND c.sleeper_league_id = ?
-                GROUP BY p.penalty_year
-            """, (team_id, roster_info['sleeper_league_id']))
-            
-            penalty_rows = cursor.fetchall()
-            for row in penalty_rows:
-                team_yearly_penalty_totals[str(row['penalty_year'])] = row['total_penalty_for_year']
-            app.logger.info(f"DEBUG_TEAM_DETAILS: Calculated team_yearly_penalty_totals: {team_yearly_penalty_totals}")
-
-        except Exception as e:
-            app.logger.error(f"Error calculating team_yearly_penalty_totals for team {team_id}, league {roster_info['sleeper_league_id']}: {e}")
-            # Initialize to empty if error, so frontend doesn't break
-            team_yearly_penalty_totals = {}
-
-        # Calculate team_yearly_trade_amounts from completed budget trades
-        team_yearly_trade_amounts = {}
-        try:
-            # Get all completed trades where this team is either initiator or recipient
-            # For initiator: positive amounts (sending money out)
-            # For recipient: negative amounts (receiving money in)
-            cursor.execute("""
-                SELECT 
-                    ti.season_year,
-                    ti.budget_amount,
-                    CASE 
-                        WHEN t.initiator_team_id = ? THEN ti.budget_amount  -- Sending money out (positive)
-                        WHEN t.recipient_team_id = ? THEN -ti.budget_amount  -- Receiving money in (negative)
-                        ELSE 0
-                    END as net_amount
-                FROM trade_items ti
-                JOIN trades t ON ti.trade_id = t.trade_id
-                WHERE t.trade_status = 'completed' 
-                AND t.sleeper_league_id = ?
-                AND (t.initiator_team_id = ? OR t.recipient_team_id = ?)
-                AND ti.season_year >= ?
-            """, (team_id, team_id, roster_info['sleeper_league_id'], team_id, team_id, current_processing_year))
-            
-            trade_rows = cursor.fetchall()
-            for row in trade_rows:
-                year = str(row['season_year'])
-                net_amount = row['net_amount']
-                if year not in team_yearly_trade_amounts:
-                    team_yearly_trade_amounts[year] = 0
-                team_yearly_trade_amounts[year] += net_amount
-
-        except Exception as e:
-            app.logger.error(f"Error calculating team_yearly_trade_amounts for team {team_id}, league {roster_info['sleeper_league_id']}: {e}")
-            # Initialize to empty if error, so frontend doesn't break
-            team_yearly_trade_amounts = {}
+        snapshot_league_id = roster_info['sleeper_league_id']
+        team_payload = get_team_snapshot(conn, snapshot_league_id, team_id, current_processing_year, is_offseason,
+                                         write=lambda unit: run_write(unit, league_id=snapshot_league_id))
+        if team_payload is None:
+            return jsonify({'success': False, 'error': 'Team (roster) not found'}), 404
 
-        return jsonify({
-            'success': True,
-            'team_id': team_id,
-            'team_name': team_name_to_display, # Use the determined team name
-            'manager_name': roster_info['manager_name'],
-            'sleeper_username': roster_info['sleeper_username'],
-            'league_id': roster_info['sleeper_league_id'],
-            'league_name': league_name_for_context,
-            'players_by_position': grouped_players,
-            'is_contract_setting_period_active': is_contract_setting_period_active,
-            'is_offseason': is_offseason,  # Added this line
-            'current_processing_year': current_processing_year,
-            'auction_acquisitions_for_team': {p:a for p,a in auction_acquisitions.items() if p in all_player_ids_on_roster}, # Only those on this team
-            'team_yearly_totals': team_yearly_totals,
-            'team_yearly_penalty_totals': team_yearly_penalty_totals, # Added this line
-            'team_position_spending_ranks': team_position_spending_ranks,
-            'future_yearly_total_ranks': future_yearly_total_ranks,
-            'team_yearly_trade_amounts': team_yearly_trade_amounts
-        })
+        return jsonify({'success': True, **team_payload})
 
     except Exception as e:
-        app.logger.error(f"Error fetching details for team {team_id}, league {league_id_from_query}: {e}")
+        current_app.logger.error(f"Error fetching details for team {team_id}, league {league_id_from_query}: {e}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-@app.route('/api/team/<team_id>/contracts/durations', methods=['POST'])
+@bp.route('/api/team/<team_id>/contracts/durations', methods=['POST'])
 @login_required
 def update_contract_durations(team_id):
     """Updates the contract durations for specified players on a team."""
@@ -2087,7 +2234,7 @@ def update_contract_durations(team_id):
     
     conn = None # Initialize conn to None for broader scope
     try:
-        conn = get_global_db_connection()
+        conn = get_league_db_connection(request_league_id)
         cursor = conn.cursor()
 
         # 1. Validate team_id and user authorization for this team's league
@@ -2120,35 +2267,13 @@ def update_contract_durations(team_id):
         auction_acquisitions = {} # {player_id: auction_price}
 
         if is_offseason and current_processing_year > 0:
-            cursor.execute("""
-                SELECT data 
-                FROM drafts 
-                WHERE league_id = ? AND season = ? AND status = ? 
-                ORDER BY start_time DESC LIMIT 1
-            """, (db_league_id, str(current_processing_year), "complete"))
-            draft_record = cursor.fetchone()
-            if draft_record and draft_record['data']:
-                try:
-                    draft_picks_data = json.loads(draft_record['data'])
-                    if isinstance(draft_picks_data, list):
-                        is_contract_setting_period_active = True 
-                        for pick in draft_picks_data:
-                            player_id = pick.get('player_id')
-                            metadata = pick.get('metadata', {})
-                            amount_str = metadata.get('amount')
-                            if player_id and amount_str is not None:
-                                try: # Ensure conversion for auction_acquisitions values
-                                    auction_acquisitions[str(player_id)] = int(amount_str)
-                                except ValueError:
-                                    pass # Log or handle if needed
-                except json.JSONDecodeError:
-                    print(f"Warning: Could not parse draft data JSON for league {db_league_id} season {current_processing_year} in update_contract_durations.")
+            is_contract_setting_period_active, auction_acquisitions = get_auction_acquisitions(cursor, db_league_id, current_processing_year)
         
         if not is_contract_setting_period_active:
             return jsonify({'success': False, 'error': 'Contract setting period is not active for this league/season.'}), 403
 
-        # 3. Process updates
-        updated_count = 0
+        # 3. Check every update before writing any
+        updates = [] # (duration, player_id)
         errors = []
         warnings = [] # New: To store messages for skipped players
 
@@ -2169,39 +2294,46 @@ def update_contract_durations(team_id):
             if not contract_check:
                 warnings.append(f"No existing default contract found for player {player_id_str} on team {team_id} for season {current_processing_year} to update. Skipped.")
                 continue
-            
-            # Perform the update for this eligible player
-            cursor.execute("""UPDATE contracts SET duration = ?, updated_at = datetime('now')
-                              WHERE player_id = ? AND team_id = ? AND contract_year = ? AND sleeper_league_id = ?""",
-                           (duration, player_id_str, team_id, current_processing_year, db_league_id))
-            if cursor.rowcount > 0:
-                updated_count += 1
-            else:
-                # This would be an unexpected failure if previous checks passed
-                errors.append(f"Failed to update duration for player {player_id_str} on team {team_id} for season {current_processing_year}. No row affected despite passing checks.")
+            updates.append((duration, player_id_str))
 
-        if errors: # If there were any critical errors during individual updates
-            conn.rollback() 
+        if errors: # If there were any critical errors, nothing is written
             return jsonify({'success': False, 'error': "; ".join(errors), 'warnings': warnings}), 400
-        
-        conn.commit()
+
+        # 4. Apply the updates in one unit through the writer
+        def update_durations(write_cursor):
+            failed = []
+            for duration, player_id_str in updates:
+                write_cursor.execute("""UPDATE contracts SET duration = ?, updated_at = datetime('now')
+                                        WHERE player_id = ? AND team_id = ? AND contract_year = ? AND sleeper_league_id = ?""",
+                                     (duration, player_id_str, team_id, current_processing_year, db_league_id))
+                if write_cursor.rowcount == 0:
+                    # This would be an unexpected failure if previous checks passed
+                    failed.append(f"Failed to update duration for player {player_id_str} on team {team_id} for season {current_processing_year}. No row affected despite passing checks.")
+            if failed:
+                raise WriteAborted("; ".join(failed))
+            # Only this team's contracts changed: rebuild its page and refresh the league ranks
+            return [team_id] if updates else []
+
+        try:
+            run_team_change(update_durations, db_league_id, current_processing_year, is_offseason)
+        except WriteAborted as e:
+            return jsonify({'success': False, 'error': str(e), 'warnings': warnings}), 400
+        updated_count = len(updates)
         response_message = f'{updated_count} contract durations updated successfully.'
         if warnings:
             response_message += " Some players were skipped."
         return jsonify({'success': True, 'message': response_message, 'warnings': warnings}), 200
 
     except sqlite3.Error as e:
-        if conn: conn.rollback()
         print(f"ERROR: /api/team/{team_id}/contracts/durations - Database error: {str(e)}")
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
     except Exception as e:
-        if conn: conn.rollback()
         print(f"ERROR: /api/team/{team_id}/contracts/durations - Unexpected error: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-@app.route('/league/<league_id>/fees', methods=['GET'])
+@bp.route('/league/<league_id>/fees', methods=['GET'])
 @login_required
 def get_league_fees(league_id):
     """Fetches league fee information and payment status for all rosters in a league for a given season."""
@@ -2217,12 +2349,12 @@ def get_league_fees(league_id):
             year_val = int(requested_season_year_str)
             target_season_year = str(year_val) 
         except ValueError:
-            app.logger.warning(f"Invalid season_year format received: {requested_season_year_str}")
+            current_app.logger.warning(f"Invalid season_year format received: {requested_season_year_str}")
             return jsonify({'success': False, 'error': 'Invalid season_year format. Must be a number.'}), 400
     else:
         target_season_year = str(current_season_details['current_year'])
 
-    app.logger.info(f"Fetching fees for league {league_id}, wallet {wallet_address}, target_season_year: {target_season_year}")
+    current_app.logger.info(f"Fetching fees for league {league_id}, wallet {wallet_address}, target_season_year: {target_season_year}")
 
     try:
         conn = get_global_db_connection()
@@ -2231,13 +2363,13 @@ def get_league_fees(league_id):
         cursor.execute("SELECT 1 FROM UserLeagueLinks WHERE wallet_address = ? AND sleeper_league_id = ?", 
                        (wallet_address, league_id))
         if not cursor.fetchone():
-            app.logger.warning(f"User {wallet_address} tried to access fees for league {league_id} they are not part of.")
+            current_app.logger.warning(f"User {wallet_address} tried to access fees for league {league_id} they are not part of.")
             return jsonify({'success': False, 'error': 'User not authorized for this league or league link does not exist.'}), 403
 
         cursor.execute("SELECT name FROM LeagueMetadata WHERE sleeper_league_id = ?", (league_id,))
         league_meta = cursor.fetchone()
         if not league_meta:
-            app.logger.error(f"LeagueMetadata not found for {league_id} in get_league_fees.")
+            current_app.logger.error(f"LeagueMetadata not found for {league_id} in get_league_fees.")
             return jsonify({'success': False, 'error': f'League metadata not found for ID {league_id}.'}), 404
         league_name = league_meta['name']
 
@@ -2319,15 +2451,15 @@ def get_league_fees(league_id):
         }), 200
 
     except sqlite3.Error as e:
-        app.logger.error(f"Database error in /league/{league_id}/fees GET: {str(e)}")
+        current_app.logger.error(f"Database error in /league/{league_id}/fees GET: {str(e)}")
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in /league/{league_id}/fees GET: {str(e)}")
+        current_app.logger.error(f"Unexpected error in /league/{league_id}/fees GET: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-@app.route('/league/<league_id>/fees', methods=['POST'])
+@bp.route('/league/<league_id>/fees', methods=['POST'])
 @login_required
 def set_league_fees(league_id):
     """Sets or updates the league fee details for a specific league and season. Only accessible by the commissioner."""
@@ -2352,7 +2484,7 @@ def set_league_fees(league_id):
     else:
         target_season_year = str(current_season_details['current_year'])
 
-    app.logger.info(f"Setting fees for league {league_id}, wallet {wallet_address}, target_season_year: {target_season_year}")
+    current_app.logger.info(f"Setting fees for league {league_id}, wallet {wallet_address}, target_season_year: {target_season_year}")
 
     try:
         conn = get_global_db_connection()
@@ -2366,7 +2498,7 @@ def set_league_fees(league_id):
         commish_status = cursor.fetchone()
 
         if not commish_status or not commish_status['is_commissioner']:
-            app.logger.warning(f"User {wallet_address} (not commish) tried to set fees for league {league_id}.")
+            current_app.logger.warning(f"User {wallet_address} (not commish) tried to set fees for league {league_id}.")
             return jsonify({'success': False, 'error': 'User is not authorized to set fees for this league.'}), 403
 
         # Data for fees is already in 'data' variable from above
@@ -2393,24 +2525,25 @@ def set_league_fees(league_id):
             notes = str(notes) 
 
         # Insert or replace fee details for the target season
-        cursor.execute("""INSERT OR REPLACE INTO LeagueFees 
-                            (sleeper_league_id, season_year, fee_amount, fee_currency, notes, updated_at) 
-                            VALUES (?, ?, ?, ?, ?, datetime('now'))
-                       """, (league_id, target_season_year, fee_amount_float, fee_currency, notes))
-        conn.commit()
+        def store_fees(write_cursor):
+            write_cursor.execute("""INSERT OR REPLACE INTO LeagueFees 
+                                    (sleeper_league_id, season_year, fee_amount, fee_currency, notes, updated_at) 
+                                    VALUES (?, ?, ?, ?, ?, datetime('now'))
+                                 """, (league_id, target_season_year, fee_amount_float, fee_currency, notes))
+            refresh_league_summary(write_cursor, league_id)
+
+        run_write(store_fees)
 
-        app.logger.info(f"Commissioner {wallet_address} updated fees for league {league_id} season {target_season_year}: Amount={fee_amount_float}, Currency={fee_currency}")
+        current_app.logger.info(f"Commissioner {wallet_address} updated fees for league {league_id} season {target_season_year}: Amount={fee_amount_float}, Currency={fee_currency}")
         return jsonify({'success': True, 'message': f'League fees for season {target_season_year} updated successfully.'}), 200
 
     except sqlite3.Error as e:
-        app.logger.error(f"Database error in POST /league/{league_id}/fees (season {target_season_year}): {str(e)}")
-        if conn: conn.rollback()
+        current_app.logger.error(f"Database error in POST /league/{league_id}/fees (season {target_season_year}): {str(e)}")
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in POST /league/{league_id}/fees (season {target_season_year}): {str(e)}")
-        if conn: conn.rollback()
+        current_app.logger.error(f"Unexpected error in POST /league/{league_id}/fees (season {target_season_year}): {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
 def check_all_fees_paid(league_id, season_year, cursor):
@@ -2432,11 +2565,11 @@ def check_all_fees_paid(league_id, season_year, cursor):
         """, (league_id,))
         paid_teams = cursor.fetchone()['paid_teams']
 
-        app.logger.info(f"League {league_id}: {paid_teams}/{total_teams} teams have paid")
+        current_app.logger.info(f"League {league_id}: {paid_teams}/{total_teams} teams have paid")
 
         return total_teams > 0 and paid_teams == total_teams
     except Exception as e:
-        app.logger.error(f"Error checking fees paid status for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error checking fees paid status for league {league_id}: {str(e)}")
         return False
 
 def execute_vault_deposit_transaction(amount, league_id):
@@ -2444,7 +2577,7 @@ def execute_vault_deposit_transaction(amount, league_id):
     import subprocess
 
     try:
-        app.logger.info(f"💎 Executing vault deposit transaction: {amount} FLOW for league {league_id}")
+        current_app.logger.info(f"💎 Executing vault deposit transaction: {amount} FLOW for league {league_id}")
 
         # Path to the Cadence transaction script
         script_path = os.path.join(os.path.dirname(__file__), 'scripts', 'deposit_to_incrementfi.cdc')
@@ -2469,7 +2602,7 @@ def execute_vault_deposit_transaction(amount, league_id):
             '--yes'
         ]
 
-        app.logger.info(f"🔧 Flow CLI command: {' '.join(cmd)}")
+        current_app.logger.info(f"🔧 Flow CLI command: {' '.join(cmd)}")
 
         # Execute the transaction
         result = subprocess.run(
@@ -2481,15 +2614,11 @@ def execute_vault_deposit_transaction(amount, league_id):
         )
 
         if result.returncode == 0:
-            app.logger.info(f"✅ Vault deposit transaction succeeded!")
-            app.logger.info(f"Transaction output: {result.stdout}")
+            current_app.logger.info(f"✅ Vault deposit transaction succeeded!")
+            current_app.logger.info(f"Transaction output: {result.stdout}")
 
             # Parse transaction ID from output
-            tx_id = None
-            for line in result.stdout.split('\n'):
-                if 'Transaction ID' in line or 'ID:' in line:
-                    tx_id = line.split(':')[-1].strip()
-                    break
+            tx_id = parse_transaction_id(result.stdout)
 
             return {
                 'success': True,
@@ -2499,8 +2628,8 @@ def execute_vault_deposit_transaction(amount, league_id):
                 'output': result.stdout
             }
         else:
-            app.logger.error(f"❌ Vault deposit transaction failed!")
-            app.logger.error(f"Error output: {result.stderr}")
+            current_app.logger.error(f"❌ Vault deposit transaction failed!")
+            current_app.logger.error(f"Error output: {result.stderr}")
             return {
                 'success': False,
                 'error': result.stderr,
@@ -2508,12 +2637,12 @@ def execute_vault_deposit_transaction(amount, league_id):
             }
 
     except subprocess.TimeoutExpired:
-        app.logger.error(f"⏱️ Vault deposit transaction timed out after 60 seconds")
+        current_app.logger.error(f"⏱️ Vault deposit transaction timed out after 60 seconds")
         return {'success': False, 'error': 'Transaction timed out'}
     except Exception as e:
-        app.logger.error(f"💥 Error executing vault deposit transaction: {str(e)}")
+        current_app.logger.error(f"💥 Error executing vault deposit transaction: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return {'success': False, 'error': str(e)}
 
 def execute_vault_deposit(league_id, season_year, cursor):
@@ -2529,11 +2658,11 @@ def execute_vault_deposit(league_id, season_year, cursor):
         total_amount = result['total_collected'] if result and result['total_collected'] else 0.0
 
         if total_amount <= 0:
-            app.logger.error(f"Cannot execute vault deposit: No funds collected for league {league_id}")
+            current_app.logger.error(f"Cannot execute vault deposit: No funds collected for league {league_id}")
             return {'success': False, 'error': 'No funds collected'}
 
-        app.logger.info(f"🎯 All fees paid for league {league_id}! Total collected: {total_amount} FLOW")
-        app.logger.info(f"🔄 Triggering automatic vault deposit to IncrementFi...")
+        current_app.logger.info(f"🎯 All fees paid for league {league_id}! Total collected: {total_amount} FLOW")
+        current_app.logger.info(f"🔄 Triggering automatic vault deposit to IncrementFi...")
 
         # Create agent execution record
         execution_id = f"vault_deposit_{league_id}_{season_year}_{int(time.time())}"
@@ -2564,33 +2693,36 @@ def execute_vault_deposit(league_id, season_year, cursor):
 
         # Update agent execution record with result
         if tx_result['success']:
+            # 'submitted' until the transaction tracker sees it sealed
+            execution_status = record_submission(cursor, tx_result.get('transaction_id'), 'vault_deposit', execution_id=execution_id)
             cursor.execute("""
                 UPDATE AgentExecutions
-                SET status = 'completed',
+                SET status = ?,
                     result_data = ?,
                     updated_at = datetime('now')
                 WHERE execution_id = ?
-            """, (json.dumps({
+            """, (execution_status, json.dumps({
                 'amount': total_amount,
                 'currency': 'FLOW',
                 'vault_address': '0x8aaca41f09eb1e3d',
                 'vault_protocol': 'increment_fi',
                 'trigger_reason': 'all_fees_collected',
                 'transaction_id': tx_result.get('transaction_id'),
-                'completed_at': datetime.now().isoformat()
+                'submitted_at': datetime.now().isoformat()
             }), execution_id))
 
-            app.logger.info(f"✅ Vault deposit completed successfully: {execution_id}")
-            app.logger.info(f"💰 {total_amount} FLOW deposited to IncrementFi Money Market")
+            current_app.logger.info(f"✅ Vault deposit {execution_status}: {execution_id}")
+            current_app.logger.info(f"💰 {total_amount} FLOW deposited to IncrementFi Money Market")
             if tx_result.get('transaction_id'):
-                app.logger.info(f"🔗 Transaction ID: {tx_result['transaction_id']}")
+                current_app.logger.info(f"🔗 Transaction ID: {tx_result['transaction_id']}")
 
             return {
                 'success': True,
                 'execution_id': execution_id,
+                'status': execution_status,
                 'amount': total_amount,
                 'transaction_id': tx_result.get('transaction_id'),
-                'message': f'Vault deposit completed: {total_amount} FLOW to IncrementFi'
+                'message': f'Vault deposit {execution_status}: {total_amount} FLOW to IncrementFi'
             }
         else:
             cursor.execute("""
@@ -2609,8 +2741,8 @@ def execute_vault_deposit(league_id, season_year, cursor):
                 'failed_at': datetime.now().isoformat()
             }), execution_id))
 
-            app.logger.error(f"❌ Vault deposit failed: {execution_id}")
-            app.logger.error(f"Error: {tx_result.get('error')}")
+            current_app.logger.error(f"❌ Vault deposit failed: {execution_id}")
+            current_app.logger.error(f"Error: {tx_result.get('error')}")
 
             return {
                 'success': False,
@@ -2620,9 +2752,9 @@ def execute_vault_deposit(league_id, season_year, cursor):
             }
 
     except Exception as e:
-        app.logger.error(f"Error executing vault deposit for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error executing vault deposit for league {league_id}: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return {'success': False, 'error': str(e)}
 
 def execute_staking_transaction(league_id, season_year, pool_id, cursor):
@@ -2630,6 +2762,9 @@ def execute_staking_transaction(league_id, season_year, pool_id, cursor):
 
     Uses Flow Actions to stake league fees directly to IncrementFi pool.
     Source (fee collection) → Sink (staking) in single atomic transaction.
+
+    The cursor is only read. The execution record is committed through run_write before
+    the Flow CLI runs and its outcome after, so no write transaction is open during the call.
     """
     import subprocess
 
@@ -2659,17 +2794,17 @@ def execute_staking_transaction(league_id, season_year, pool_id, cursor):
         paid_teams = cursor.fetchone()['paid_teams']
 
         if total_amount <= 0:
-            app.logger.error(f"Cannot stake: No funds collected for league {league_id}")
+            current_app.logger.error(f"Cannot stake: No funds collected for league {league_id}")
             return {'success': False, 'error': 'No funds collected'}
 
-        app.logger.info(f"🎯 Staking league fees to IncrementFi for {league_id}")
-        app.logger.info(f"💰 Total to stake: {total_amount} FLOW from {paid_teams}/{total_teams} teams")
-        app.logger.info(f"🏦 Pool ID: {pool_id}")
+        current_app.logger.info(f"🎯 Staking league fees to IncrementFi for {league_id}")
+        current_app.logger.info(f"💰 Total to stake: {total_amount} FLOW from {paid_teams}/{total_teams} teams")
+        current_app.logger.info(f"🏦 Pool ID: {pool_id}")
 
         # Create execution record
         execution_id = f"staking_{league_id}_{season_year}_{int(time.time())}"
 
-        cursor.execute("""
+        run_write(lambda write_cursor: write_cursor.execute("""
             INSERT INTO AgentExecutions (
                 execution_id, agent_type, sleeper_league_id, season_year,
                 status, trigger_time, result_data, created_at, updated_at
@@ -2690,7 +2825,7 @@ def execute_staking_transaction(league_id, season_year, pool_id, cursor):
                 'staking_protocol': 'increment_fi',
                 'trigger_reason': 'all_fees_collected'
             })
-        ))
+        )))
 
         # Path to the Cadence staking transaction (relative to project root)
         # Using native Flow staking (bypasses IncrementFi epoch sync issues)
@@ -2727,59 +2862,55 @@ def execute_staking_transaction(league_id, season_year, pool_id, cursor):
         )
 
         if result.returncode == 0:
-            app.logger.info(f"✅ Staking transaction successful!")
-            app.logger.info(f"Transaction output: {result.stdout}")
+            current_app.logger.info(f"✅ Staking transaction successful!")
+            current_app.logger.info(f"Transaction output: {result.stdout}")
 
             # Parse transaction ID
-            tx_id = None
-            for line in result.stdout.split('\n'):
-                if 'Transaction ID' in line or 'ID:' in line:
-                    tx_id = line.split(':')[-1].strip()
-                    break
+            tx_id = parse_transaction_id(result.stdout)
 
             # Update execution record
-            cursor.execute("""
-                UPDATE AgentExecutions
-                SET status = 'completed',
-                    result_data = ?,
-                    execution_time = ?,
-                    updated_at = datetime('now')
-                WHERE execution_id = ?
-            """, (json.dumps({
-                'amount': total_amount,
-                'total_teams': total_teams,
-                'paid_teams': paid_teams,
-                'currency': 'FLOW',
-                'pool_id': pool_id,
-                'staking_protocol': 'increment_fi',
-                'transaction_id': tx_id,
-                'completed_at': datetime.now().isoformat()
-            }), datetime.now().isoformat(), execution_id))
+            def record_staking(write_cursor):
+                status = record_submission(write_cursor, tx_id, 'staking', execution_id=execution_id)
+                write_cursor.execute("""
+                    UPDATE AgentExecutions
+                    SET status = ?,
+                        result_data = ?,
+                        execution_time = ?,
+                        updated_at = datetime('now')
+                    WHERE execution_id = ?
+                """, (status, json.dumps({
+                    'amount': total_amount,
+                    'total_teams': total_teams,
+                    'paid_teams': paid_teams,
+                    'currency': 'FLOW',
+                    'pool_id': pool_id,
+                    'staking_protocol': 'increment_fi',
+                    'transaction_id': tx_id,
+                    'submitted_at': datetime.now().isoformat()
+                }), datetime.now().isoformat(), execution_id))
+                return status
+
+            execution_status = run_write(record_staking)
 
-            app.logger.info(f"✅ Staking completed: {execution_id}")
-            app.logger.info(f"💰 {total_amount} FLOW staked to IncrementFi pool {pool_id}")
+            current_app.logger.info(f"✅ Staking {execution_status}: {execution_id}")
+            current_app.logger.info(f"💰 {total_amount} FLOW staked to IncrementFi pool {pool_id}")
             if tx_id:
-                app.logger.info(f"🔗 Transaction ID: {tx_id}")
+                current_app.logger.info(f"🔗 Transaction ID: {tx_id}")
 
             return {
                 'success': True,
                 'execution_id': execution_id,
+                'status': execution_status,
                 'amount': total_amount,
                 'transaction_id': tx_id,
                 'pool_id': pool_id,
                 'message': f'Staked {total_amount} FLOW to IncrementFi pool {pool_id}'
             }
         else:
-            app.logger.error(f"❌ Staking transaction failed!")
-            app.logger.error(f"Error: {result.stderr}")
+            current_app.logger.error(f"❌ Staking transaction failed!")
+            current_app.logger.error(f"Error: {result.stderr}")
 
-            cursor.execute("""
-                UPDATE AgentExecutions
-                SET status = 'failed',
-                    error_message = ?,
-                    updated_at = datetime('now')
-                WHERE execution_id = ?
-            """, (result.stderr, execution_id))
+            _fail_staking_execution(execution_id, result.stderr)
 
             return {
                 'success': False,
@@ -2788,20 +2919,31 @@ def execute_staking_transaction(league_id, season_year, pool_id, cursor):
             }
 
     except subprocess.TimeoutExpired:
-        app.logger.error(f"⏱️ Staking transaction timed out after 60 seconds")
+        current_app.logger.error(f"⏱️ Staking transaction timed out after 60 seconds")
+        _fail_staking_execution(execution_id, 'Transaction timed out')
         return {'success': False, 'error': 'Transaction timed out'}
     except Exception as e:
-        app.logger.error(f"💥 Error executing staking: {str(e)}")
+        current_app.logger.error(f"💥 Error executing staking: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return {'success': False, 'error': str(e)}
 
+def _fail_staking_execution(execution_id, error_message):
+    """Mark a staking execution record failed."""
+    run_write(lambda write_cursor: write_cursor.execute("""
+        UPDATE AgentExecutions
+        SET status = 'failed',
+            error_message = ?,
+            updated_at = datetime('now')
+        WHERE execution_id = ?
+    """, (error_message, execution_id)))
+
 def execute_vault_withdrawal_transaction(amount, league_id):
     """Execute the Cadence transaction to withdraw FLOW from IncrementFi vault."""
     import subprocess
 
     try:
-        app.logger.info(f"💎 Executing vault withdrawal transaction: {amount} FLOW for league {league_id}")
+        current_app.logger.info(f"💎 Executing vault withdrawal transaction: {amount} FLOW for league {league_id}")
 
         # Path to the Cadence transaction script
         script_path = os.path.join(os.path.dirname(__file__), 'scripts', 'withdraw_from_incrementfi.cdc')
@@ -2826,7 +2968,7 @@ def execute_vault_withdrawal_transaction(amount, league_id):
             '--yes'
         ]
 
-        app.logger.info(f"🔧 Flow CLI command: {' '.join(cmd)}")
+        current_app.logger.info(f"🔧 Flow CLI command: {' '.join(cmd)}")
 
         # Execute the transaction
         result = subprocess.run(
@@ -2838,15 +2980,11 @@ def execute_vault_withdrawal_transaction(amount, league_id):
         )
 
         if result.returncode == 0:
-            app.logger.info(f"✅ Vault withdrawal transaction succeeded!")
-            app.logger.info(f"Transaction output: {result.stdout}")
+            current_app.logger.info(f"✅ Vault withdrawal transaction succeeded!")
+            current_app.logger.info(f"Transaction output: {result.stdout}")
 
             # Parse transaction ID from output
-            tx_id = None
-            for line in result.stdout.split('\n'):
-                if 'Transaction ID' in line or 'ID:' in line:
-                    tx_id = line.split(':')[-1].strip()
-                    break
+            tx_id = parse_transaction_id(result.stdout)
 
             return {
                 'success': True,
@@ -2856,8 +2994,8 @@ def execute_vault_withdrawal_transaction(amount, league_id):
                 'output': result.stdout
             }
         else:
-            app.logger.error(f"❌ Vault withdrawal transaction failed!")
-            app.logger.error(f"Error output: {result.stderr}")
+            current_app.logger.error(f"❌ Vault withdrawal transaction failed!")
+            current_app.logger.error(f"Error output: {result.stderr}")
             return {
                 'success': False,
                 'error': result.stderr,
@@ -2865,12 +3003,12 @@ def execute_vault_withdrawal_transaction(amount, league_id):
             }
 
     except subprocess.TimeoutExpired:
-        app.logger.error(f"⏱️ Vault withdrawal transaction timed out after 60 seconds")
+        current_app.logger.error(f"⏱️ Vault withdrawal transaction timed out after 60 seconds")
         return {'success': False, 'error': 'Transaction timed out'}
     except Exception as e:
-        app.logger.error(f"💥 Error executing vault withdrawal transaction: {str(e)}")
+        current_app.logger.error(f"💥 Error executing vault withdrawal transaction: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return {'success': False, 'error': str(e)}
 
 def execute_prize_distribution_transaction(recipients, amounts, league_id):
@@ -2878,8 +3016,8 @@ def execute_prize_distribution_transaction(recipients, amounts, league_id):
     import subprocess
 
     try:
-        app.logger.info(f"🏆 Executing prize distribution transaction for league {league_id}")
-        app.logger.info(f"   Recipients: {len(recipients)}, Total: {sum(amounts)} FLOW")
+        current_app.logger.info(f"🏆 Executing prize distribution transaction for league {league_id}")
+        current_app.logger.info(f"   Recipients: {len(recipients)}, Total: {sum(amounts)} FLOW")
 
         # Path to the Cadence transaction script
         script_path = os.path.join(os.path.dirname(__file__), 'scripts', 'distribute_prizes.cdc')
@@ -2901,7 +3039,7 @@ def execute_prize_distribution_transaction(recipients, amounts, league_id):
             '--yes'
         ]
 
-        app.logger.info(f"🔧 Flow CLI command: {' '.join(cmd)}")
+        current_app.logger.info(f"🔧 Flow CLI command: {' '.join(cmd)}")
 
         # Execute the transaction
         result = subprocess.run(
@@ -2913,15 +3051,11 @@ def execute_prize_distribution_transaction(recipients, amounts, league_id):
         )
 
         if result.returncode == 0:
-            app.logger.info(f"✅ Prize distribution transaction succeeded!")
-            app.logger.info(f"Transaction output: {result.stdout}")
+            current_app.logger.info(f"✅ Prize distribution transaction succeeded!")
+            current_app.logger.info(f"Transaction output: {result.stdout}")
 
             # Parse transaction ID from output
-            tx_id = None
-            for line in result.stdout.split('\n'):
-                if 'Transaction ID' in line or 'ID:' in line:
-                    tx_id = line.split(':')[-1].strip()
-                    break
+            tx_id = parse_transaction_id(result.stdout)
 
             return {
                 'success': True,
@@ -2931,8 +3065,8 @@ def execute_prize_distribution_transaction(recipients, amounts, league_id):
                 'output': result.stdout
             }
         else:
-            app.logger.error(f"❌ Prize distribution transaction failed!")
-            app.logger.error(f"Error output: {result.stderr}")
+            current_app.logger.error(f"❌ Prize distribution transaction failed!")
+            current_app.logger.error(f"Error output: {result.stderr}")
             return {
                 'success': False,
                 'error': result.stderr,
@@ -2940,15 +3074,15 @@ def execute_prize_distribution_transaction(recipients, amounts, league_id):
             }
 
     except subprocess.TimeoutExpired:
-        app.logger.error(f"⏱️ Prize distribution transaction timed out after 60 seconds")
+        current_app.logger.error(f"⏱️ Prize distribution transaction timed out after 60 seconds")
         return {'success': False, 'error': 'Transaction timed out'}
     except Exception as e:
-        app.logger.error(f"💥 Error executing prize distribution transaction: {str(e)}")
+        current_app.logger.error(f"💥 Error executing prize distribution transaction: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return {'success': False, 'error': str(e)}
 
-@app.route('/admin/league/<league_id>/vault/withdraw', methods=['POST'])
+@bp.route('/admin/league/<league_id>/vault/withdraw', methods=['POST'])
 @login_required
 def withdraw_from_vault(league_id):
     """Manually trigger vault withdrawal from IncrementFi."""
@@ -2981,16 +3115,18 @@ def withdraw_from_vault(league_id):
         if not vault_deposit:
             return jsonify({'success': False, 'error': 'No completed vault deposit found for this league'}), 400
 
-        # Check if already withdrawn
+        # Check if already withdrawn (or a withdrawal is waiting to seal)
         cursor.execute("""
-            SELECT execution_id FROM AgentExecutions
+            SELECT execution_id, status FROM AgentExecutions
             WHERE agent_type = 'vault_withdrawal'
             AND execution_id LIKE ?
-            AND status = 'completed'
+            AND status IN ('submitted', 'completed')
         """, (f'vault_withdrawal_{league_id}%',))
 
         existing_withdrawal = cursor.fetchone()
         if existing_withdrawal:
+            if existing_withdrawal['status'] == 'submitted':
+                return jsonify({'success': False, 'error': 'Vault withdrawal already submitted and waiting to seal'}), 409
             return jsonify({'success': False, 'error': 'Vault already withdrawn for this league'}), 400
 
         # Get deposit amount from result_data
@@ -2998,8 +3134,8 @@ def withdraw_from_vault(league_id):
         deposit_data = json_module.loads(vault_deposit['result_data'])
         deposit_amount = deposit_data.get('amount', 0)
 
-        app.logger.info(f"🔄 Triggering vault withdrawal for league {league_id}")
-        app.logger.info(f"   Deposit amount: {deposit_amount} FLOW")
+        current_app.logger.info(f"🔄 Triggering vault withdrawal for league {league_id}")
+        current_app.logger.info(f"   Deposit amount: {deposit_amount} FLOW")
 
         # For now, withdraw the exact deposit amount (in production, query actual balance)
         withdrawal_amount = deposit_amount
@@ -3034,28 +3170,30 @@ def withdraw_from_vault(league_id):
 
         # Update execution record with result
         if tx_result['success']:
+            withdrawal_status = record_submission(cursor, tx_result.get('transaction_id'), 'vault_withdrawal', execution_id=withdrawal_id)
             cursor.execute("""
                 UPDATE AgentExecutions
-                SET status = 'completed',
+                SET status = ?,
                     result_data = ?,
                     updated_at = datetime('now')
                 WHERE execution_id = ?
-            """, (json_module.dumps({
+            """, (withdrawal_status, json_module.dumps({
                 'league_id': league_id,
                 'season_year': season_year,
                 'withdrawal_amount': withdrawal_amount,
                 'currency': 'FLOW',
                 'vault_address': '0x8aaca41f09eb1e3d',
                 'transaction_id': tx_result.get('transaction_id'),
-                'completed_at': datetime.now().isoformat()
+                'submitted_at': datetime.now().isoformat()
             }), withdrawal_id))
             conn.commit()
 
-            app.logger.info(f"✅ Vault withdrawal completed: {withdrawal_id}")
-            app.logger.info(f"🔗 Transaction ID: {tx_result.get('transaction_id')}")
+            current_app.logger.info(f"✅ Vault withdrawal {withdrawal_status}: {withdrawal_id}")
+            current_app.logger.info(f"🔗 Transaction ID: {tx_result.get('transaction_id')}")
 
             return jsonify({
                 'success': True,
+                'status': withdrawal_status,
                 'withdrawal_amount': withdrawal_amount,
                 'transaction_id': tx_result.get('transaction_id'),
                 'execution_id': withdrawal_id
@@ -3074,17 +3212,17 @@ def withdraw_from_vault(league_id):
             }), withdrawal_id))
             conn.commit()
 
-            app.logger.error(f"❌ Vault withdrawal failed: {withdrawal_id}")
+            current_app.logger.error(f"❌ Vault withdrawal failed: {withdrawal_id}")
             return jsonify({'success': False, 'error': tx_result.get('error')}), 500
 
     except Exception as e:
-        app.logger.error(f"Error withdrawing from vault for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error withdrawing from vault for league {league_id}: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
     # Note: Using global connection, do not close it
 
-@app.route('/admin/league/<league_id>/payouts/preview', methods=['GET'])
+@bp.route('/admin/league/<league_id>/payouts/preview', methods=['GET'])
 @login_required
 def preview_payouts(league_id):
     """Preview prize distribution without executing."""
@@ -3169,13 +3307,13 @@ def preview_payouts(league_id):
         })
 
     except Exception as e:
-        app.logger.error(f"Error previewing payouts for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error previewing payouts for league {league_id}: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
     # Note: Using global connection, do not close it
 
-@app.route('/admin/league/<league_id>/payouts/execute', methods=['POST'])
+@bp.route('/admin/league/<league_id>/payouts/execute', methods=['POST'])
 @login_required
 def execute_payouts(league_id):
     """Execute prize distribution to winners."""
@@ -3198,7 +3336,7 @@ def execute_payouts(league_id):
             SELECT payout_id FROM PayoutSchedules
             WHERE sleeper_league_id = ?
             AND season_year = ?
-            AND payout_status = 'completed'
+            AND payout_status IN ('submitted', 'completed')
         """, (league_id, season_year))
 
         existing_payout = cursor.fetchone()
@@ -3270,9 +3408,9 @@ def execute_payouts(league_id):
                 'percentage': percentage
             })
 
-        app.logger.info(f"🏆 Executing prize distribution for league {league_id}")
-        app.logger.info(f"   Total pool: {total_prize_pool} FLOW")
-        app.logger.info(f"   Recipients: {len(recipients)}")
+        current_app.logger.info(f"🏆 Executing prize distribution for league {league_id}")
+        current_app.logger.info(f"   Total pool: {total_prize_pool} FLOW")
+        current_app.logger.info(f"   Recipients: {len(recipients)}")
 
         # Create payout schedule record
         payout_id = f"payout_{league_id}_{season_year}_{int(time.time())}"
@@ -3321,30 +3459,32 @@ def execute_payouts(league_id):
         # Update records with result
         if tx_result['success']:
             # Update payout schedule
+            payout_status = record_submission(cursor, tx_result.get('transaction_id'), 'prize_distribution', payout_id=payout_id)
             cursor.execute("""
                 UPDATE PayoutSchedules
-                SET payout_status = 'completed',
+                SET payout_status = ?,
                     execution_date = ?,
                     updated_at = datetime('now')
                 WHERE payout_id = ?
-            """, (datetime.now().isoformat(), payout_id))
+            """, (payout_status, datetime.now().isoformat(), payout_id))
 
             # Update all distributions with transaction ID
             cursor.execute("""
                 UPDATE PayoutDistributions
-                SET status = 'completed',
+                SET status = ?,
                     transaction_id = ?,
                     updated_at = datetime('now')
                 WHERE payout_id = ?
-            """, (tx_result.get('transaction_id'), payout_id))
+            """, (payout_status, tx_result.get('transaction_id'), payout_id))
 
             conn.commit()
 
-            app.logger.info(f"✅ Prize distribution completed: {payout_id}")
-            app.logger.info(f"🔗 Transaction ID: {tx_result.get('transaction_id')}")
+            current_app.logger.info(f"✅ Prize distribution {payout_status}: {payout_id}")
+            current_app.logger.info(f"🔗 Transaction ID: {tx_result.get('transaction_id')}")
 
             return jsonify({
                 'success': True,
+                'status': payout_status,
                 'transaction_id': tx_result.get('transaction_id'),
                 'total_distributed': total_prize_pool,
                 'distributions': distributions_data,
@@ -3369,17 +3509,17 @@ def execute_payouts(league_id):
 
             conn.commit()
 
-            app.logger.error(f"❌ Prize distribution failed: {payout_id}")
+            current_app.logger.error(f"❌ Prize distribution failed: {payout_id}")
             return jsonify({'success': False, 'error': tx_result.get('error')}), 500
 
     except Exception as e:
-        app.logger.error(f"Error executing payouts for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error executing payouts for league {league_id}: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
     # Note: Using global connection, do not close it
 
-@app.route('/admin/league/<league_id>/end-season', methods=['POST'])
+@bp.route('/admin/league/<league_id>/end-season', methods=['POST'])
 @login_required
 def end_season_and_distribute(league_id):
     """End season: withdraw from vault and distribute prizes to winners."""
@@ -3397,7 +3537,7 @@ def end_season_and_distribute(league_id):
         # Get current season
         season_year = get_current_season()['current_year']
 
-        app.logger.info(f"🏁 Starting end-of-season process for league {league_id}")
+        current_app.logger.info(f"🏁 Starting end-of-season process for league {league_id}")
 
         # Step 1: Check for vault deposit
         cursor.execute("""
@@ -3414,31 +3554,35 @@ def end_season_and_distribute(league_id):
         if not vault_deposit:
             return jsonify({'success': False, 'error': 'No completed vault deposit found for this league'}), 400
 
-        # Step 2: Check if already withdrawn
+        # Step 2: Check if already withdrawn (or a withdrawal is waiting to seal)
         cursor.execute("""
-            SELECT execution_id FROM AgentExecutions
+            SELECT execution_id, status, result_data FROM AgentExecutions
             WHERE agent_type = 'vault_withdrawal'
             AND execution_id LIKE ?
-            AND status = 'completed'
+            AND status IN ('submitted', 'completed')
         """, (f'vault_withdrawal_{league_id}%',))
 
         existing_withdrawal = cursor.fetchone()
         withdrawal_tx_id = None
+        import json as json_module  # Also used by Step 4 when the vault was already withdrawn
 
-        if existing_withdrawal:
-            app.logger.info(f"   Vault already withdrawn for this league")
+        if existing_withdrawal and existing_withdrawal['status'] == 'submitted':
+            # Prizes are paid from the withdrawn funds, so wait for the tracker to see it sealed
+            return jsonify({
+                'success': True,
+                'status': 'withdrawal_submitted',
+                'withdrawal_transaction_id': json_module.loads(existing_withdrawal['result_data'] or '{}').get('transaction_id'),
+                'message': 'Vault withdrawal is waiting to seal; call end-season again to distribute prizes'
+            }), 202
+        elif existing_withdrawal:
+            current_app.logger.info(f"   Vault already withdrawn for this league")
             # Get the transaction ID from existing withdrawal
-            cursor.execute("""
-                SELECT result_data FROM AgentExecutions
-                WHERE execution_id = ?
-            """, (existing_withdrawal['execution_id'],))
-            withdrawal_data = json.loads(cursor.fetchone()['result_data'])
+            withdrawal_data = json_module.loads(existing_withdrawal['result_data'] or '{}')
             withdrawal_tx_id = withdrawal_data.get('transaction_id')
         else:
             # Execute vault withdrawal
-            app.logger.info(f"💰 Step 1/2: Withdrawing from IncrementFi vault...")
+            current_app.logger.info(f"💰 Step 1/2: Withdrawing from IncrementFi vault...")
 
-            import json as json_module
             deposit_data = json_module.loads(vault_deposit['result_data'])
             withdrawal_amount = deposit_data.get('amount', 0)
 
@@ -3484,32 +3628,41 @@ def end_season_and_distribute(league_id):
 
                 return jsonify({'success': False, 'error': f"Vault withdrawal failed: {tx_result.get('error')}"}), 500
 
+            withdrawal_tx_id = tx_result.get('transaction_id')
+            withdrawal_status = record_submission(cursor, withdrawal_tx_id, 'vault_withdrawal', execution_id=withdrawal_id)
             cursor.execute("""
                 UPDATE AgentExecutions
-                SET status = 'completed',
+                SET status = ?,
                     result_data = ?,
                     updated_at = datetime('now')
                 WHERE execution_id = ?
-            """, (json_module.dumps({
+            """, (withdrawal_status, json_module.dumps({
                 'league_id': league_id,
                 'season_year': season_year,
                 'withdrawal_amount': withdrawal_amount,
                 'currency': 'FLOW',
                 'vault_address': '0x8aaca41f09eb1e3d',
-                'transaction_id': tx_result.get('transaction_id'),
-                'completed_at': datetime.now().isoformat()
+                'transaction_id': withdrawal_tx_id,
+                'submitted_at': datetime.now().isoformat()
             }), withdrawal_id))
             conn.commit()
 
-            withdrawal_tx_id = tx_result.get('transaction_id')
-            app.logger.info(f"✅ Vault withdrawal completed: {withdrawal_tx_id}")
+            current_app.logger.info(f"✅ Vault withdrawal {withdrawal_status}: {withdrawal_tx_id}")
+            if withdrawal_status == 'submitted':
+                return jsonify({
+                    'success': True,
+                    'status': 'withdrawal_submitted',
+                    'withdrawal_transaction_id': withdrawal_tx_id,
+                    'execution_id': withdrawal_id,
+                    'message': 'Vault withdrawal submitted; call end-season again once it has sealed to distribute prizes'
+                }), 202
 
         # Step 3: Check if prizes already distributed
         cursor.execute("""
             SELECT payout_id FROM PayoutSchedules
             WHERE sleeper_league_id = ?
             AND season_year = ?
-            AND payout_status = 'completed'
+            AND payout_status IN ('submitted', 'completed')
         """, (league_id, season_year))
 
         existing_payout = cursor.fetchone()
@@ -3517,7 +3670,7 @@ def end_season_and_distribute(league_id):
             return jsonify({'success': False, 'error': 'Prizes already distributed for this league'}), 400
 
         # Step 4: Execute prize distribution
-        app.logger.info(f"🏆 Step 2/2: Distributing prizes to winners...")
+        current_app.logger.info(f"🏆 Step 2/2: Distributing prizes to winners...")
 
         # Get placements and calculate distributions
         cursor.execute("""
@@ -3626,35 +3779,37 @@ def end_season_and_distribute(league_id):
 
         # Update records with result
         if tx_result['success']:
+            payout_status = record_submission(cursor, tx_result.get('transaction_id'), 'prize_distribution', payout_id=payout_id)
             cursor.execute("""
                 UPDATE PayoutSchedules
-                SET payout_status = 'completed',
+                SET payout_status = ?,
                     execution_date = ?,
                     updated_at = datetime('now')
                 WHERE payout_id = ?
-            """, (datetime.now().isoformat(), payout_id))
+            """, (payout_status, datetime.now().isoformat(), payout_id))
 
             cursor.execute("""
                 UPDATE PayoutDistributions
-                SET status = 'completed',
+                SET status = ?,
                     transaction_id = ?,
                     updated_at = datetime('now')
                 WHERE payout_id = ?
-            """, (tx_result.get('transaction_id'), payout_id))
+            """, (payout_status, tx_result.get('transaction_id'), payout_id))
 
             conn.commit()
 
-            app.logger.info(f"✅ Prize distribution completed: {payout_id}")
-            app.logger.info(f"🔗 Distribution Transaction ID: {tx_result.get('transaction_id')}")
+            current_app.logger.info(f"✅ Prize distribution {payout_status}: {payout_id}")
+            current_app.logger.info(f"🔗 Distribution Transaction ID: {tx_result.get('transaction_id')}")
 
             return jsonify({
                 'success': True,
+                'status': payout_status,
                 'withdrawal_transaction_id': withdrawal_tx_id,
                 'distribution_transaction_id': tx_result.get('transaction_id'),
                 'total_distributed': total_prize_pool,
                 'distributions': distributions_data,
                 'payout_id': payout_id,
-                'message': 'Season ended successfully: vault withdrawn and prizes distributed'
+                'message': f'Season ended: vault withdrawn and prize distribution {payout_status}'
             })
         else:
             # Mark as failed
@@ -3678,16 +3833,37 @@ def end_season_and_distribute(league_id):
             return jsonify({'success': False, 'error': f"Prize distribution failed: {tx_result.get('error')}"}), 500
 
     except Exception as e:
-        app.logger.error(f"Error in end-season process for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error in end-season process for league {league_id}: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
     # Note: Using global connection, do not close it
 
-@app.route('/league/<league_id>/fees/record-payment', methods=['POST'])
+def stake_collected_fees(league_id, season_year):
+    """Trigger IncrementFi staking once the payment verifier has confirmed every team's fee."""
+    conn = get_global_db_connection()
+    cursor = conn.cursor()
+    if not check_all_fees_paid(league_id, season_year, cursor):
+        return None
+
+    current_app.logger.info(f"🎉 All league fees collected for {league_id}! Triggering IncrementFi staking...")
+    staking_result = execute_staking_transaction(
+        league_id,
+        season_year,
+        pool_id=198,  # IncrementFi FLOW staking pool
+        cursor=cursor
+    )
+
+    if staking_result and staking_result.get('success'):
+        current_app.logger.info(f"✅ Staking triggered successfully: {staking_result.get('message')}")
+    else:
+        current_app.logger.error(f"❌ Failed to trigger staking: {staking_result.get('error') if staking_result else 'Unknown error'}")
+    return staking_result
+
+@bp.route('/league/<league_id>/fees/record-payment', methods=['POST'])
 @login_required
 def record_payment_for_league(league_id):
-    """Records a successful payment for a league fee in the database."""
+    """Records a league fee payment; the payment verifier confirms it on chain before it counts."""
     user = get_current_user()
     payer_wallet_address = user['wallet_address'] # Authenticated user is the payer
 
@@ -3727,13 +3903,13 @@ def record_payment_for_league(league_id):
 
         if not league_fee_settings or league_fee_settings['fee_amount'] is None:
             # If fee isn't set, or fee_amount is NULL, consider it either free or an error state
-            app.logger.warning(f"Attempted to record payment for league {league_id}, season {current_season_year} but no fee amount is set.")
+            current_app.logger.warning(f"Attempted to record payment for league {league_id}, season {current_season_year} but no fee amount is set.")
             # For now, allow it to proceed and update the paid amount/status as if fee is 0
             total_required_fee = 0.0
         else:
             total_required_fee = float(league_fee_settings['fee_amount'])
             if transaction_currency != league_fee_settings['fee_currency']:
-                app.logger.warning(f"Payment currency mismatch: Transaction was {transaction_currency}, expected {league_fee_settings['fee_currency']}")
+                current_app.logger.warning(f"Payment currency mismatch: Transaction was {transaction_currency}, expected {league_fee_settings['fee_currency']}")
                 # For simplicity, we'll still record it, but in a real app, you might want to block this or do conversion
 
         # 3. Get current payment status for the user in this league
@@ -3742,79 +3918,67 @@ def record_payment_for_league(league_id):
         user_league_link = cursor.fetchone()
 
         if not user_league_link:
-            app.logger.error(f"UserLeagueLink not found for wallet {payer_wallet_address} in league {league_id}. Cannot record payment.")
+            current_app.logger.error(f"UserLeagueLink not found for wallet {payer_wallet_address} in league {league_id}. Cannot record payment.")
             return jsonify({'success': False, 'error': 'User is not linked to this league.'}), 404
-        
-        current_paid_amount = user_league_link['fee_paid_amount'] if user_league_link['fee_paid_amount'] is not None else 0.0
-        
-        # 4. Calculate new paid amount and status
-        new_paid_amount = current_paid_amount + transaction_amount
-        new_payment_status = 'unpaid'
-        if new_paid_amount >= total_required_fee and total_required_fee > 0:
-            new_payment_status = 'paid'
-        elif new_paid_amount > 0 and new_paid_amount < total_required_fee:
-            new_payment_status = 'partially_paid'
-        elif total_required_fee == 0 and new_paid_amount >= 0: # If fee is 0, any payment or no payment means 'paid'
-            new_payment_status = 'paid'
-
-        # 5. Update UserLeagueLinks table
-        cursor.execute("""UPDATE UserLeagueLinks SET fee_paid_amount = ?, fee_payment_status = ?, updated_at = datetime('now') WHERE wallet_address = ? AND sleeper_league_id = ?""",
-                       (new_paid_amount, new_payment_status, payer_wallet_address, league_id))
-
-        # 6. Insert new record into LeaguePayments table
-        cursor.execute("""INSERT INTO LeaguePayments (
-                            sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id, created_at, updated_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))""",
-                       (league_id, current_season_year, payer_wallet_address, transaction_amount, transaction_currency, transaction_id))
-        
-        conn.commit()
 
-        app.logger.info(f"Payment recorded for wallet {payer_wallet_address} in league {league_id}: Amount={transaction_amount} {transaction_currency}, TxID={transaction_id}. New status: {new_payment_status}, Total Paid: {new_paid_amount}")
+        current_paid_amount = user_league_link['fee_paid_amount'] if user_league_link['fee_paid_amount'] is not None else 0.0
 
-        # Check if all fees are now paid and trigger staking if needed
-        staking_result = None
-        if check_all_fees_paid(league_id, current_season_year, cursor):
-            app.logger.info(f"🎉 All league fees collected for {league_id}! Triggering IncrementFi staking...")
-            staking_result = execute_staking_transaction(
-                league_id,
-                current_season_year,
-                pool_id=198,  # IncrementFi FLOW staking pool
-                cursor=cursor
-            )
-            conn.commit()  # Commit the agent execution record
+        # 4. Record the payment as pending. The payment verifier checks the transaction on chain
+        # and only then updates fee_paid_amount, fee_payment_status and FeeSchedules.total_collected.
+        run_write(lambda write_cursor: write_cursor.execute("""INSERT INTO LeaguePayments (
+                            sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id,
+                            verification_status, created_at, updated_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))""",
+                       (league_id, current_season_year, payer_wallet_address, transaction_amount, transaction_currency,
+                        transaction_id, PAYMENT_PENDING)))
+        _get_resources().wake_payment_verifier()
 
-            if staking_result and staking_result.get('success'):
-                app.logger.info(f"✅ Staking triggered successfully: {staking_result.get('message')}")
-            else:
-                app.logger.error(f"❌ Failed to trigger staking: {staking_result.get('error') if staking_result else 'Unknown error'}")
+        current_app.logger.info(f"Payment recorded for wallet {payer_wallet_address} in league {league_id}: Amount={transaction_amount} {transaction_currency}, TxID={transaction_id}. Pending on-chain verification (required fee: {total_required_fee})")
 
-        response_data = {
+        return jsonify({
             'success': True,
-            'message': 'Payment recorded successfully',
-            'new_payment_status': new_payment_status,
-            'new_paid_amount': new_paid_amount
-        }
-
-        # Include vault deposit info if it was triggered
-        if vault_deposit_result:
-            response_data['vault_deposit_triggered'] = vault_deposit_result.get('success', False)
-            response_data['vault_deposit_message'] = vault_deposit_result.get('message', '')
-            response_data['vault_deposit_amount'] = vault_deposit_result.get('amount', 0)
-
-        return jsonify(response_data), 200
+            'message': 'Payment recorded; it counts toward the league fee once verified on chain',
+            'verification_status': PAYMENT_PENDING,
+            'new_payment_status': user_league_link['fee_payment_status'] or 'unpaid',
+            'new_paid_amount': current_paid_amount
+        }), 202
 
     except sqlite3.Error as e:
-        if conn: conn.rollback()
-        app.logger.error(f"Database error in POST /league/{league_id}/fees/record-payment: {str(e)}")
+        current_app.logger.error(f"Database error in POST /league/{league_id}/fees/record-payment: {str(e)}")
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
     except Exception as e:
-        if conn: conn.rollback()
-        app.logger.error(f"Unexpected error in POST /league/{league_id}/fees/record-payment: {str(e)}")
+        current_app.logger.error(f"Unexpected error in POST /league/{league_id}/fees/record-payment: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-@app.route('/league/<league_id>/transactions/recent', methods=['GET'])
+def _transaction_name_maps(cursor: sqlite3.Cursor, league_id: str, details: Any) -> tuple:
+    """Player names for the players in these transaction details and team names of the league, keyed by id string."""
+    player_ids = sorted({pid for d in details for moves in (d.get('adds'), d.get('drops')) if moves for pid in moves})
+    player_map = {}
+    for start in range(0, len(player_ids), 500):
+        chunk = player_ids[start:start + 500]
+        cursor.execute(f"SELECT sleeper_player_id, name FROM players WHERE sleeper_player_id IN ({','.join('?' * len(chunk))})", chunk)
+        player_map.update({row['sleeper_player_id']: row['name'] for row in cursor.fetchall()})
+
+    cursor.execute("""
+        SELECT sleeper_roster_id, team_name 
+        FROM rosters 
+        WHERE sleeper_league_id = ?
+    """, (league_id,))
+    team_map = {str(row['sleeper_roster_id']): row['team_name'] for row in cursor.fetchall()}
+    return player_map, team_map
+
+
+def _add_transaction_names(details: Dict[str, Any], player_map: Dict[str, str], team_map: Dict[str, str]) -> None:
+    """Add player_names and team_names for the adds and drops of one transaction, falling back to the ids."""
+    adds = details.get('adds') or {}
+    drops = details.get('drops') or {}
+    details['player_names'] = {pid: player_map.get(pid, pid) for pid in set(adds) | set(drops)}
+    details['team_names'] = {rid: team_map.get(str(rid), rid) for rid in set(adds.values()) | set(drops.values())}
+
+
+@bp.route('/league/<league_id>/transactions/recent', methods=['GET'])
 @login_required
 def get_recent_transactions(league_id):
     """Get recent transactions for a league."""
@@ -3845,10 +4009,10 @@ def get_recent_transactions(league_id):
         
         league_name = league_data['name']
         
-        # 3. Get recent transactions (limit to 15 most recent)
-        cursor.execute("""
-            SELECT sleeper_transaction_id, type, status, data, created_at
-            FROM transactions 
+        # 3. Get recent transactions (limit to 15 most recent); past seasons are read from the archive
+        cursor.execute(f"""
+            SELECT sleeper_transaction_id, type, status, week, creator, status_updated, waiver_bid, data, created_at
+            FROM {history_table('transactions')}
             WHERE league_id = ? 
             ORDER BY created_at DESC 
             LIMIT 15
@@ -3860,40 +4024,14 @@ def get_recent_transactions(league_id):
         # Debug logging
         print(f"DEBUG: Found {len(raw_transactions)} raw transactions for league {league_id}")
 
-        # Fetch all player names (global)
-        cursor.execute("SELECT sleeper_player_id, name FROM players")
-        player_map = {row['sleeper_player_id']: row['name'] for row in cursor.fetchall()}
-
-        # Fetch team names for this league
-        cursor.execute("""
-            SELECT sleeper_roster_id, team_name 
-            FROM rosters 
-            WHERE sleeper_league_id = ?
-        """, (league_id,))
-        team_map = {str(row['sleeper_roster_id']): row['team_name'] for row in cursor.fetchall()}
+        details_by_id = transaction_details(cursor, raw_transactions, history_table('transaction_players'),
+                                            history_table('transaction_rosters'))
+        player_map, team_map = _transaction_name_maps(cursor, league_id, details_by_id.values())
 
         for row in raw_transactions:
-            try:
-                details = json.loads(row['data']) if row['data'] else {}
-                print(f"DEBUG: Transaction {row['sleeper_transaction_id']}: type={row['type']}, status={row['status']}, details_keys={list(details.keys()) if details else 'None'}")
-                
-                # Resolve player names and team names
-                player_names = {}
-                adds = details.get('adds') or {}
-                drops = details.get('drops') or {}
-                player_ids = list(adds.keys()) + list(drops.keys())
-                for pid in set(player_ids):
-                    player_names[pid] = player_map.get(pid, pid)  # Fallback to ID if not found
-                
-                team_names = {rid: team_map.get(rid, rid) for rid in set(list(adds.values()) + list(drops.values()))}
-                
-                # Add to details
-                details['player_names'] = player_names
-                details['team_names'] = team_names
-                
-            except json.JSONDecodeError:
-                details = {"error": "Could not parse transaction data"}
-                print(f"DEBUG: Failed to parse JSON for transaction {row['sleeper_transaction_id']}")
+            details = details_by_id[row['sleeper_transaction_id']]
+            if 'error' not in details:
+                _add_transaction_names(details, player_map, team_map)
             
             transactions.append({
                 'transaction_id': row['sleeper_transaction_id'],
@@ -3913,20 +4051,20 @@ def get_recent_transactions(league_id):
         }), 200
         
     except sqlite3.Error as e:
-        app.logger.error(f"Database error in GET /league/{league_id}/transactions/recent: {str(e)}")
+        current_app.logger.error(f"Database error in GET /league/{league_id}/transactions/recent: {str(e)}")
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in GET /league/{league_id}/transactions/recent: {str(e)}")
+        current_app.logger.error(f"Unexpected error in GET /league/{league_id}/transactions/recent: {str(e)}")
         import traceback
-        app.logger.error(traceback.format_exc())
+        current_app.logger.error(traceback.format_exc())
         return jsonify({'success': False, 'error': f'An unexpected error occurred: {str(e)}'}), 500
 
-@app.route('/nfl/current-week', methods=['GET'])
+@bp.route('/nfl/current-week', methods=['GET'])
 def get_current_nfl_week():
     """Get the current NFL week and season information."""
     try:
         # Use the SleeperService to get NFL state
-        nfl_state = sleeper_service.get_nfl_state()
+        nfl_state = get_sleeper_service().get_nfl_state()
         
         if not nfl_state:
             return jsonify({'success': False, 'error': 'Unable to fetch NFL state'}), 500
@@ -3940,10 +4078,10 @@ def get_current_nfl_week():
         }), 200
         
     except Exception as e:
-        app.logger.error(f"Error in GET /nfl/current-week: {str(e)}")
+        current_app.logger.error(f"Error in GET /nfl/current-week: {str(e)}")
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
-@app.route('/league/<league_id>/transactions/week/<int:week>', methods=['GET'])
+@bp.route('/league/<league_id>/transactions/week/<int:week>', methods=['GET'])
 @login_required
 def get_league_transactions_by_week(league_id, week):
     """Get transactions for a specific week in a league."""
@@ -3974,15 +4112,14 @@ def get_league_transactions_by_week(league_id, week):
         
         league_name = league_data['name']
         
-        # 3. Get transactions for the specific week
-        # Note: We'll need to parse the data field to check if it contains week information
-        # For now, we'll return all transactions and let the frontend filter by week
-        cursor.execute("""
-            SELECT sleeper_transaction_id, type, status, data, created_at
-            FROM transactions 
-            WHERE league_id = ?
+        # 3. Get transactions for the specific week; rows stored before the week column
+        # existed have week NULL and are filtered on their JSON below
+        cursor.execute(f"""
+            SELECT sleeper_transaction_id, type, status, week, creator, status_updated, waiver_bid, data, created_at
+            FROM {history_table('transactions')}
+            WHERE league_id = ? AND (week = ? OR week IS NULL)
             ORDER BY created_at DESC
-        """, (league_id,))
+        """, (league_id, week))
 
         transactions = []
         raw_transactions = cursor.fetchall()
@@ -3990,61 +4127,36 @@ def get_league_transactions_by_week(league_id, week):
         # Debug logging
         print(f"DEBUG: Found {len(raw_transactions)} raw transactions for league {league_id}, week {week}")
 
-        # Fetch all player names (global)
-        cursor.execute("SELECT sleeper_player_id, name FROM players")
-        player_map = {row['sleeper_player_id']: row['name'] for row in cursor.fetchall()}
-
-        # Fetch team names for this league
-        cursor.execute("""
-            SELECT sleeper_roster_id, team_name 
-            FROM rosters 
-            WHERE sleeper_league_id = ?
-        """, (league_id,))
-        team_map = {str(row['sleeper_roster_id']): row['team_name'] for row in cursor.fetchall()}
+        details_by_id = transaction_details(cursor, raw_transactions, history_table('transaction_players'),
+                                            history_table('transaction_rosters'))
+        player_map, team_map = _transaction_name_maps(cursor, league_id, details_by_id.values())
 
         for row in raw_transactions:
-            try:
-                details = json.loads(row['data']) if row['data'] else {}
-                
-                # Check if this transaction is for the specified week
-                # Sleeper API includes week info in transaction data
-                transaction_week = details.get('week') or details.get('leg') or None
-                
-                print(f"DEBUG: Transaction {row['sleeper_transaction_id']}: type={row['type']}, week={transaction_week}, details_keys={list(details.keys()) if details else 'None'}")
-                
-                if transaction_week is None or int(transaction_week) == week:
-                    # Resolve player names and team names
-                    player_names = {}
-                    adds = details.get('adds') or {}
-                    drops = details.get('drops') or {}
-                    player_ids = list(adds.keys()) + list(drops.keys())
-                    for pid in set(player_ids):
-                        player_names[pid] = player_map.get(pid, pid)
-                    
-                    team_names = {rid: team_map.get(rid, rid) for rid in set(list(adds.values()) + list(drops.values()))}
-                    
-                    # Add to details
-                    details['player_names'] = player_names
-                    details['team_names'] = team_names
-                    
-                    transactions.append({
-                        'transaction_id': row['sleeper_transaction_id'],
-                        'type': row['type'],
-                        'status': row['status'],
-                        'details': details,
-                        'created_at': row['created_at'],
-                        'week': transaction_week
-                    })
-            except json.JSONDecodeError:
+            details = details_by_id[row['sleeper_transaction_id']]
+            if 'error' in details:
                 print(f"DEBUG: Failed to parse JSON for transaction {row['sleeper_transaction_id']}")
                 transactions.append({
                     'transaction_id': row['sleeper_transaction_id'],
                     'type': row['type'],
                     'status': row['status'],
-                    'details': {"error": "Could not parse transaction data"},
+                    'details': details,
                     'created_at': row['created_at'],
                     'week': None
                 })
+                continue
+
+            # Sleeper calls the week 'leg'
+            transaction_week = details.get('week') or details.get('leg') or None
+            if transaction_week is None or int(transaction_week) == week:
+                _add_transaction_names(details, player_map, team_map)
+                transactions.append({
+                    'transaction_id': row['sleeper_transaction_id'],
+                    'type': row['type'],
+                    'status': row['status'],
+                    'details': details,
+                    'created_at': row['created_at'],
+                    'week': transaction_week
+                })
 
         print(f"DEBUG: Returning {len(transactions)} transactions for week {week}")
 
@@ -4057,31 +4169,63 @@ def get_league_transactions_by_week(league_id, week):
         }), 200
         
     except sqlite3.Error as e:
-        app.logger.error(f"Database error in GET /league/{league_id}/transactions/week/{week}: {str(e)}")
+        current_app.logger.error(f"Database error in GET /league/{league_id}/transactions/week/{week}: {str(e)}")
         return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
 
 # New endpoints for the transactions.jsx component
 
-@app.route('/players', methods=['GET'])
+@bp.route('/players', methods=['GET'])
 @login_required
 def get_all_players():
-    """Get all players mapping."""
+    """Get all players mapping.
+
+    Without query args the full mapping is served from a precompressed in-memory
+    snapshot with a strong ETag (304 on If-None-Match). With ?since=<version> only
+    players added or changed after that catalog version are returned.
+    """
     try:
         conn = get_global_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT sleeper_player_id, name FROM players")
-        players = {}
-        for row in cursor.fetchall():
-            players[row['sleeper_player_id']] = row['name']
-
-        return jsonify({'success': True, 'players': players}), 200
+        since_param = request.args.get('since')
+        if since_param is not None:
+            try:
+                since_version = int(since_param)
+            except ValueError:
+                return jsonify({'success': False, 'error': 'since must be an integer catalog version'}), 400
+            if since_version < 0:
+                return jsonify({'success': False, 'error': 'since must be an integer catalog version'}), 400
+
+            current_version = get_catalog_version(cursor)
+            if since_version > current_version:
+                # Client holds a version this catalog never issued (e.g. DB restored) - make it refetch everything
+                return jsonify({'success': False, 'error': 'Unknown catalog version, fetch the full snapshot',
+                                'version': current_version}), 409
+            players = get_players_since(cursor, since_version)
+            return jsonify({'success': True, 'delta': True, 'since': since_version,
+                            'version': current_version, 'players': players}), 200
+
+        snapshot = _get_resources().get_player_catalog_cache().get_snapshot(cursor)
+        if snapshot.etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = current_app.response_class(status=304)
+        else:
+            encoding = snapshot.select_encoding(request.headers.get('Accept-Encoding'))
+            body = snapshot.encoded[encoding] if encoding else snapshot.body
+            response = current_app.response_class(body, status=200, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = snapshot.etag
+        response.headers['Vary'] = 'Accept-Encoding, Authorization'
+        # no-cache lets clients store the payload but makes them revalidate the ETag before each
+        # reuse; an unchanged catalog answers 304 without a body
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
 
     except Exception as e:
-        app.logger.error(f"Error fetching players: {str(e)}")
+        current_app.logger.error(f"Error fetching players: {str(e)}")
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
-@app.route('/league/<league_id>/penalties', methods=['GET'])
+@bp.route('/league/<league_id>/penalties', methods=['GET'])
 @login_required
 def get_league_penalties(league_id):
     """Get penalties for a league."""
@@ -4141,7 +4285,7 @@ def get_league_penalties(league_id):
         return jsonify({'success': True, 'penalties': penalties}), 200
 
     except Exception as e:
-        app.logger.error(f"Error fetching penalties for league {league_id}: {str(e)}")
+        current_app.logger.error(f"Error fetching penalties for league {league_id}: {str(e)}")
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
 # ============================================================================
@@ -4154,14 +4298,13 @@ def get_wallet_from_token(token):
         return None
     try:
         cursor = get_global_db_connection().cursor()
-        cursor.execute("SELECT wallet_address FROM sessions WHERE session_token = ?", (token,))
-        result = cursor.fetchone()
+        result = get_session(cursor, token)
         return result['wallet_address'] if result else None
     except Exception as e:
-        app.logger.error(f"Error in get_wallet_from_token: {str(e)}")
+        current_app.logger.error(f"Error in get_wallet_from_token: {str(e)}")
         return None
 
-@app.route('/api/league/<league_id>/commissioner-status', methods=['GET'])
+@bp.route('/api/league/<league_id>/commissioner-status', methods=['GET'])
 @login_required
 def get_commissioner_status(league_id):
     """Check if the current user is a commissioner for this league."""
@@ -4183,10 +4326,10 @@ def get_commissioner_status(league_id):
         return jsonify({'success': True, 'is_commissioner': is_commissioner})
         
     except Exception as e:
-        app.logger.error(f"Error checking commissioner status: {str(e)}")
+        current_app.logger.error(f"Error checking commissioner status: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/trades/budget/create', methods=['POST'])
+@bp.route('/api/trades/budget/create', methods=['POST'])
 @login_required
 def create_budget_trade():
     """Create a new budget trade between teams."""
@@ -4207,31 +4350,33 @@ def create_budget_trade():
         if initiator_team_id == recipient_team_id:
             return jsonify({'success': False, 'error': 'Cannot trade with yourself'}), 400
         
-        cursor = get_global_db_connection().cursor()
-        
-        # Create trade record
-        cursor.execute('''
-            INSERT INTO trades (sleeper_league_id, initiator_team_id, recipient_team_id, 
-                              trade_status, created_at, updated_at)
-            VALUES (?, ?, ?, 'pending', datetime('now'), datetime('now'))
-        ''', (league_id, initiator_team_id, recipient_team_id))
-        
-        trade_id = cursor.lastrowid
-        
-        # Create trade items
+        valid_items = []
         for item in budget_items:
             if not item.get('year') or not item.get('amount') or item.get('amount', 0) <= 0:
-                app.logger.warning(f"Skipping invalid trade item: {item}")
+                current_app.logger.warning(f"Skipping invalid trade item: {item}")
                 continue
-                
-            app.logger.info(f"Creating trade item: year={item['year']}, amount={item['amount']}, from_team={initiator_team_id}, to_team={recipient_team_id}")
-            cursor.execute('''
+            current_app.logger.info(f"Creating trade item: year={item['year']}, amount={item['amount']}, from_team={initiator_team_id}, to_team={recipient_team_id}")
+            valid_items.append(item)
+
+        def create_trade(write_cursor):
+            # Create trade record
+            write_cursor.execute('''
+                INSERT INTO trades (sleeper_league_id, initiator_team_id, recipient_team_id, 
+                                  trade_status, created_at, updated_at)
+                VALUES (?, ?, ?, 'pending', datetime('now'), datetime('now'))
+            ''', (league_id, initiator_team_id, recipient_team_id))
+            new_trade_id = write_cursor.lastrowid
+
+            # Create trade items
+            write_cursor.executemany('''
                 INSERT INTO trade_items (trade_id, from_team_id, to_team_id, 
                                       budget_amount, season_year, sleeper_league_id)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (trade_id, initiator_team_id, recipient_team_id, item['amount'], item['year'], league_id))
+            ''', [(new_trade_id, initiator_team_id, recipient_team_id, item['amount'], item['year'], league_id)
+                  for item in valid_items])
+            return new_trade_id
         
-        get_global_db_connection().commit()
+        trade_id = run_write(create_trade, league_id=league_id)
         
         return jsonify({
             'success': True, 
@@ -4240,10 +4385,10 @@ def create_budget_trade():
         })
         
     except Exception as e:
-        app.logger.error(f"Error creating budget trade: {str(e)}")
+        current_app.logger.error(f"Error creating budget trade: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/trades/pending/<league_id>', methods=['GET'])
+@bp.route('/api/trades/pending/<league_id>', methods=['GET'])
 @login_required
 def get_pending_trades(league_id):
     """Get all pending trades for a league."""
@@ -4294,10 +4439,10 @@ def get_pending_trades(league_id):
         return jsonify({'success': True, 'trades': trades})
         
     except Exception as e:
-        app.logger.error(f"Error fetching pending trades: {str(e)}")
+        current_app.logger.error(f"Error fetching pending trades: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/trades/<trade_id>/approve', methods=['POST'])
+@bp.route('/api/trades/<trade_id>/approve', methods=['POST'])
 @login_required
 def approve_trade(trade_id):
     """Approve a pending trade."""
@@ -4331,28 +4476,43 @@ def approve_trade(trade_id):
         if not cursor.fetchone():
             return jsonify({'success': False, 'error': 'Commissioner access required'}), 403
         
-        # Update trade status
-        cursor.execute('''
-            UPDATE trades 
-            SET trade_status = 'completed', updated_at = datetime('now')
-            WHERE trade_id = ?
-        ''', (trade_id,))
-        
-        # Create approval record
-        cursor.execute('''
-            INSERT INTO trade_approvals (trade_id, approver_type, approver_id, 
-                                      approval_status, approved_at, created_at)
-            VALUES (?, 'commissioner', ?, 'approved', datetime('now'), datetime('now'))
-        ''', (trade_id, wallet_address))
-        
-        get_global_db_connection().commit()
+        league_id = trade_info['sleeper_league_id']
+        current_season_data = get_current_season()
+
+        def complete_trade(write_cursor):
+            # Update trade status; another approval or rejection may have landed since the check above
+            write_cursor.execute('''
+                UPDATE trades 
+                SET trade_status = 'completed', updated_at = datetime('now')
+                WHERE trade_id = ? AND trade_status = 'pending'
+            ''', (trade_id,))
+            if write_cursor.rowcount == 0:
+                raise WriteAborted('Trade is not pending')
+            
+            # Create approval record
+            write_cursor.execute('''
+                INSERT INTO trade_approvals (trade_id, approver_type, approver_id, 
+                                          approval_status, approved_at, created_at)
+                VALUES (?, 'commissioner', ?, 'approved', datetime('now'), datetime('now'))
+            ''', (trade_id, wallet_address))
+
+            # The completed trade moves budget between its two teams: rebuild their pages
+            write_cursor.execute('SELECT initiator_team_id, recipient_team_id FROM trades WHERE trade_id = ?', (trade_id,))
+            trade_teams = write_cursor.fetchone()
+            return [trade_teams['initiator_team_id'], trade_teams['recipient_team_id']]
+
+        try:
+            run_team_change(complete_trade, league_id, int(current_season_data['current_year']),
+                            current_season_data['is_offseason'])
+        except WriteAborted as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         return jsonify({'success': True, 'message': 'Trade approved successfully'})
         
     except Exception as e:
-        app.logger.error(f"Error approving trade: {str(e)}")
+        current_app.logger.error(f"Error approving trade: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/trades/<trade_id>/reject', methods=['POST'])
+@bp.route('/api/trades/<trade_id>/reject', methods=['POST'])
 @login_required
 def reject_trade(trade_id):
     """Reject a pending trade."""
@@ -4389,28 +4549,34 @@ def reject_trade(trade_id):
         if not cursor.fetchone():
             return jsonify({'success': False, 'error': 'Commissioner access required'}), 403
         
-        # Update trade status
-        cursor.execute('''
-            UPDATE trades 
-            SET trade_status = 'rejected', updated_at = datetime('now')
-            WHERE trade_id = ?
-        ''', (trade_id,))
-        
-        # Create rejection record
-        cursor.execute('''
-            INSERT INTO trade_approvals (trade_id, approver_type, approver_id, 
-                                      approval_status, approval_notes, created_at)
-            VALUES (?, 'commissioner', ?, 'rejected', ?, datetime('now'))
-        ''', (trade_id, wallet_address, notes))
-        
-        get_global_db_connection().commit()
+        def reject(write_cursor):
+            # Update trade status; another approval or rejection may have landed since the check above
+            write_cursor.execute('''
+                UPDATE trades 
+                SET trade_status = 'rejected', updated_at = datetime('now')
+                WHERE trade_id = ? AND trade_status = 'pending'
+            ''', (trade_id,))
+            if write_cursor.rowcount == 0:
+                raise WriteAborted('Trade is not pending')
+            
+            # Create rejection record
+            write_cursor.execute('''
+                INSERT INTO trade_approvals (trade_id, approver_type, approver_id, 
+                                          approval_status, approval_notes, created_at)
+                VALUES (?, 'commissioner', ?, 'rejected', ?, datetime('now'))
+            ''', (trade_id, wallet_address, notes))
+
+        try:
+            run_write(reject, league_id=trade_info['sleeper_league_id'])
+        except WriteAborted as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         return jsonify({'success': True, 'message': 'Trade rejected successfully'})
         
     except Exception as e:
-        app.logger.error(f"Error rejecting trade: {str(e)}")
+        current_app.logger.error(f"Error rejecting trade: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/league/<league_id>/teams', methods=['GET'])
+@bp.route('/api/league/<league_id>/teams', methods=['GET'])
 @login_required
 def get_league_teams_for_trades(league_id):
     """Get all teams in a league for trade partner selection."""
@@ -4441,12 +4607,12 @@ def get_league_teams_for_trades(league_id):
         return jsonify({'success': True, 'teams': teams})
         
     except Exception as e:
-        app.logger.error(f"Error fetching league teams: {str(e)}")
+        current_app.logger.error(f"Error fetching league teams: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 
-@app.route('/api/teams/<team_id>/budget-status/<league_id>', methods=['GET'])
+@bp.route('/api/teams/<team_id>/budget-status/<league_id>', methods=['GET'])
 @login_required
 def get_team_budget_status(team_id, league_id):
     """Get team's current budget status including contracts, penalties, and trades for future years."""
@@ -4555,24 +4721,29 @@ def get_team_budget_status(team_id, league_id):
         return jsonify({'success': True, 'budget_status': budget_status})
         
     except Exception as e:
-        app.logger.error(f"Error getting team budget status: {str(e)}")
+        current_app.logger.error(f"Error getting team budget status: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
-# Database initialization skipped - tables will be created on first use if they don't exist
-print("Database initialization skipped - existing data preserved.")
-
-# Initialize database with new schema (including trade tables)
-print("Initializing database with new schema...")
-init_db()
-print("Database initialization complete.")
+@bp.route('/db/health', methods=['GET'])
+def db_health_check():
+    """Read-only database check; storage figures are on /admin/storage."""
+    try:
+        conn = get_global_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users")
+        count = cursor.fetchone()[0]
+        journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        return jsonify({'success': True, 'message': 'DB read successful', 'user_count': count, 'journal_mode': journal_mode}), 200
+    except sqlite3.Error as e:
+        return jsonify({'success': False, 'error': f'DB error: {str(e)}'}), 500
 
-print("DEBUG: All routes and helpers defined. Entering __main__ block...")
 if __name__ == '__main__':
     print("DEBUG: Inside __main__ block. About to call app.run()")
-    # Ensure global connection is initialized before app runs,
-    # especially if any routes might be hit immediately or by background tasks.
-    # However, get_global_db_connection() is designed to init on first call.
-    # init_db() call above should have initialized it.
+    # The database connection and schema (init_db) are set up lazily on first use.
+    app = _get_default_app()
+    # With the debug reloader only the child process that serves requests runs the jobs
+    if not app.config['DEBUG'] or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        app.extensions['skl_resources'].start_background_jobs()
     
     if app.config['DEBUG']:
         print("Running in DEVELOPMENT mode")
@@ -4591,14 +4762,18 @@ if __name__ == '__main__':
         
         try:
             import waitress
-            host = os.getenv('HOST', '0.0.0.0')
-            port = int(os.getenv('PORT', 5000))
+            from server_config import load_server_config, waitress_kwargs
+            server_config = load_server_config()
+            host = server_config['host']
+            port = server_config['port']
             
             print(f"Starting Waitress server on {host}:{port}")
             print("Press Ctrl+C to stop the server")
+            if server_config['workers'] > 1:
+                print("Multiple workers configured; use scripts/start_production.py to run them. Serving with one process.")
             
             # Start Waitress server
-            waitress.serve(app, host=host, port=port, threads=4)
+            waitress.serve(app, host=host, port=port, **waitress_kwargs(server_config))
             
         except ImportError:
             print("Waitress not available. Install with: pip install waitress")
@@ -4609,34 +4784,3 @@ if __name__ == '__main__':
             app.run(debug=False, host=host, port=port)
     
     print("DEBUG: app.run() has exited.")
-
-@app.route('/db/health', methods=['GET'])
-def db_health_check():
-    try:
-        conn = get_global_db_connection()
-        cursor = conn.cursor()
-        # Test read
-        cursor.execute("SELECT COUNT(*) FROM users")
-        count = cursor.fetchone()[0]
-        # Test write/commit
-        test_time = datetime.now().isoformat()
-        cursor.execute("INSERT INTO test_table (test_data) VALUES (?)", (test_time,))
-        conn.commit()
-        # Verify
-        cursor.execute("SELECT test_data FROM test_table WHERE test_data = ?", (test_time,))
-        result = cursor.fetchone()
-        if result:
-            return jsonify({'success': True, 'message': 'DB read/write/commit successful', 'user_count': count}), 200
-        else:
-            return jsonify({'success': False, 'error': 'Commit verification failed'}), 500
-    except sqlite3.Error as e:
-        return jsonify({'success': False, 'error': f'DB error: {str(e)}'}), 500
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,254 @@
+"""
+Playoff bracket sync for one league or the whole SKL fleet.
+
+Winners and losers brackets are fetched through the shared Sleeper client.
+Placements are derived in memory from the bracket structure, and each league
+is written in one transaction with executemany. The fleet job fetches leagues
+concurrently, writes them one at a time and records progress in SyncJobs
+(migrations/003_add_sync_jobs.sql), so any worker process can report status.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from league_shards import connect_league_db
+from matchups import apply_standings, compute_league_standings
+from sleeper_client import SleeperHttpClient, get_sleeper_client
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE_BRACKET_SYNC = 'playoff_bracket_sync'
+DEFAULT_FETCH_WORKERS = 8
+
+
+def fetch_league_brackets(client: SleeperHttpClient, league_id: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Fetch a league's winners and losers brackets.
+
+    Raises:
+        requests.exceptions.RequestException: If the winners bracket cannot be fetched.
+            A missing losers bracket is treated as empty.
+    """
+    winners_bracket = client.get_json(f"/league/{league_id}/winners_bracket") or []
+    try:
+        losers_bracket = client.get_json(f"/league/{league_id}/losers_bracket") or []
+    except requests.exceptions.RequestException:
+        losers_bracket = []
+    return winners_bracket, losers_bracket
+
+
+def _final_match(bracket: List[Dict[str, Any]], decided_only: bool = False,
+                 prefer_first_place: bool = False) -> Optional[Dict[str, Any]]:
+    """Match of the highest round, optionally preferring the one Sleeper marks as the 1st-place game (p == 1)."""
+    candidates = [m for m in bracket if not decided_only or m.get('w')]
+    if not candidates:
+        return None
+    last_round = max(m.get('r') or 0 for m in candidates)
+    final_round = [m for m in candidates if (m.get('r') or 0) == last_round]
+    if prefer_first_place:
+        return next((m for m in final_round if m.get('p') == 1), final_round[0])
+    return final_round[0]
+
+
+def compute_placements(winners_bracket: List[Dict[str, Any]], losers_bracket: List[Dict[str, Any]],
+                       regular_season_winner: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Derive final placements from bracket JSON.
+
+    1st/2nd are the championship winner/loser, 3rd is the winner of the last decided
+    losers-bracket match, and the regular season winner gets its own placement.
+
+    Args:
+        winners_bracket (List[Dict[str, Any]]): Sleeper winners_bracket response.
+        losers_bracket (List[Dict[str, Any]]): Sleeper losers_bracket response.
+        regular_season_winner (Optional[str]): sleeper_roster_id ranked first in the regular season.
+
+    Returns:
+        List[Dict[str, Any]]: Placements with roster_id, placement_type, final_rank, determined_by, id_suffix.
+    """
+    placements = []
+    championship = _final_match(winners_bracket, prefer_first_place=True)
+    if championship and championship.get('w'):
+        placements.append({'roster_id': str(championship['w']), 'placement_type': '1st_place', 'final_rank': 1,
+                           'determined_by': 'playoff_bracket', 'id_suffix': ''})
+        if championship.get('l'):
+            placements.append({'roster_id': str(championship['l']), 'placement_type': '2nd_place', 'final_rank': 2,
+                               'determined_by': 'playoff_bracket', 'id_suffix': ''})
+    third_place_match = _final_match(losers_bracket, decided_only=True)
+    if third_place_match:
+        placements.append({'roster_id': str(third_place_match['w']), 'placement_type': '3rd_place', 'final_rank': 3,
+                           'determined_by': 'consolation_match', 'id_suffix': ''})
+    if regular_season_winner:
+        placements.append({'roster_id': str(regular_season_winner), 'placement_type': 'regular_season_winner',
+                           'final_rank': 0, 'determined_by': 'regular_season', 'id_suffix': '_rs'})
+    return placements
+
+
+def get_regular_season_winner(cursor: sqlite3.Cursor, league_id: str) -> Optional[str]:
+    """Top roster by wins and points for, with matchup-based tiebreaks when matchups are stored."""
+    cursor.execute('''
+        SELECT sleeper_roster_id FROM rosters
+        WHERE sleeper_league_id = ?
+        ORDER BY wins DESC, points_for DESC
+    ''', (league_id,))
+    rosters = [{'sleeper_roster_id': row[0]} for row in cursor.fetchall()]
+    ranked = apply_standings(rosters, compute_league_standings(cursor, league_id), roster_key='sleeper_roster_id')
+    return ranked[0]['sleeper_roster_id'] if ranked else None
+
+
+def _matchup_rows(league_id: str, season_year: int, bracket_type: str, bracket: List[Dict[str, Any]], now: str) -> List[Tuple]:
+    prefix = 'W' if bracket_type == 'winners_bracket' else 'L'
+    return [(
+        f"{league_id}_{season_year}_{prefix}_R{m.get('r')}_M{m.get('m')}", league_id, season_year, bracket_type,
+        m.get('r'), m.get('m'),
+        str(m.get('t1')) if m.get('t1') else None,
+        str(m.get('t2')) if m.get('t2') else None,
+        str(m.get('w')) if m.get('w') else None,
+        str(m.get('l')) if m.get('l') else None,
+        json.dumps(m.get('t1_from')) if m.get('t1_from') else None,
+        json.dumps(m.get('t2_from')) if m.get('t2_from') else None,
+        now,
+    ) for m in bracket]
+
+
+def write_league_brackets(conn: sqlite3.Connection, league_id: str, season_year: int,
+                          winners_bracket: List[Dict[str, Any]], losers_bracket: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Store brackets, matchups and placements for one league in a single transaction.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        league_id (str): Sleeper league ID.
+        season_year (int): Season the brackets belong to.
+        winners_bracket (List[Dict[str, Any]]): Sleeper winners_bracket response.
+        losers_bracket (List[Dict[str, Any]]): Sleeper losers_bracket response.
+
+    Returns:
+        Dict[str, Any]: Match counts and the placements written.
+    """
+    now = datetime.now().isoformat()
+    cursor = conn.cursor()
+    placements = compute_placements(winners_bracket, losers_bracket, get_regular_season_winner(cursor, league_id))
+
+    bracket_rows = [(f"{league_id}_{season_year}_winners", league_id, season_year, 'winners_bracket', json.dumps(winners_bracket), now)]
+    if losers_bracket:
+        bracket_rows.append((f"{league_id}_{season_year}_losers", league_id, season_year, 'losers_bracket', json.dumps(losers_bracket), now))
+
+    with conn:
+        cursor.executemany("""
+            INSERT OR REPLACE INTO PlayoffBrackets (bracket_id, sleeper_league_id, season_year, bracket_type, bracket_data, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, bracket_rows)
+        cursor.executemany("""
+            INSERT OR REPLACE INTO PlayoffMatchups (
+                matchup_id, sleeper_league_id, season_year, bracket_type, round_number, match_number,
+                team1_roster_id, team2_roster_id, winner_roster_id, loser_roster_id,
+                team1_from_match, team2_from_match, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, _matchup_rows(league_id, season_year, 'winners_bracket', winners_bracket, now)
+             + _matchup_rows(league_id, season_year, 'losers_bracket', losers_bracket, now))
+        cursor.executemany("""
+            INSERT OR REPLACE INTO LeaguePlacements (
+                placement_id, sleeper_league_id, season_year, roster_id,
+                placement_type, final_rank, determined_by, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(f"{league_id}_{season_year}_{p['roster_id']}{p['id_suffix']}", league_id, season_year, p['roster_id'],
+               p['placement_type'], p['final_rank'], p['determined_by'], now) for p in placements])
+
+    return {
+        'winners_bracket_matches': len(winners_bracket),
+        'losers_bracket_matches': len(losers_bracket),
+        'placements': [{k: p[k] for k in ('roster_id', 'placement_type', 'final_rank')} for p in placements],
+    }
+
+
+def create_sync_job(conn: sqlite3.Connection, job_type: str, season_year: int, total_items: int, created_by: Optional[str]) -> str:
+    """Insert a queued SyncJobs row and return its job_id."""
+    job_id = str(uuid.uuid4())
+    with conn:
+        conn.execute("""
+            INSERT INTO SyncJobs (job_id, job_type, status, season_year, total_items, results, created_by, created_at, updated_at)
+            VALUES (?, ?, 'queued', ?, ?, '{}', ?, ?, ?)
+        """, (job_id, job_type, season_year, total_items, created_by, datetime.now().isoformat(), datetime.now().isoformat()))
+    return job_id
+
+
+def get_sync_job(conn: sqlite3.Connection, job_id: str) -> Optional[Dict[str, Any]]:
+    """Return a SyncJobs row as a dict with results decoded, or None."""
+    cursor = conn.execute("SELECT * FROM SyncJobs WHERE job_id = ?", (job_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    job = dict(zip([d[0] for d in cursor.description], row))
+    job['results'] = json.loads(job['results']) if job['results'] else {}
+    return job
+
+
+def run_bracket_sync_job(db_path: str, job_id: str, league_ids: List[str], season_year: int,
+                         client: Optional[SleeperHttpClient] = None, max_workers: int = DEFAULT_FETCH_WORKERS) -> None:
+    """
+    Sync brackets for many leagues: fetch concurrently, write one transaction per league.
+
+    Progress (completed/failed counts and a per-league result) is stored on the job row
+    after every league. Sleeper traffic is still bounded by the shared client's rate limiter.
+    """
+    client = client or get_sleeper_client()
+    conn = sqlite3.connect(db_path, timeout=30)
+    results: Dict[str, Any] = {}
+    completed = failed = 0
+
+    def update_job(status: str, finished: bool = False, error: Optional[str] = None) -> None:
+        now = datetime.now().isoformat()
+        with conn:
+            conn.execute("""
+                UPDATE SyncJobs
+                SET status = ?, completed_items = ?, failed_items = ?, results = ?, error = COALESCE(?, error),
+                    started_at = COALESCE(started_at, ?), finished_at = ?, updated_at = ?
+                WHERE job_id = ?
+            """, (status, completed, failed, json.dumps(results), error, now, now if finished else None, now, job_id))
+
+    try:
+        update_job('running')
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(league_ids) or 1))) as executor:
+            futures = {executor.submit(fetch_league_brackets, client, league_id): league_id for league_id in league_ids}
+            for future in as_completed(futures):
+                league_id = futures[future]
+                try:
+                    winners_bracket, losers_bracket = future.result()
+                    league_conn = connect_league_db(db_path, league_id, timeout=30)
+                    try:
+                        results[league_id] = {'success': True, **write_league_brackets(league_conn, league_id, season_year,
+                                                                                       winners_bracket, losers_bracket)}
+                    finally:
+                        league_conn.close()
+                    completed += 1
+                except Exception as e:
+                    logger.error(f"bracket_sync: League {league_id} failed in job {job_id}: {e}")
+                    results[league_id] = {'success': False, 'error': str(e)}
+                    failed += 1
+                update_job('running')
+        update_job('completed_with_errors' if failed else 'completed', finished=True)
+    except Exception as e:
+        logger.error(f"bracket_sync: Job {job_id} failed: {e}")
+        update_job('failed', finished=True, error=str(e))
+    finally:
+        conn.close()
+
+
+def start_bracket_sync_job(db_path: str, league_ids: List[str], season_year: int, created_by: Optional[str] = None) -> str:
+    """Create a SyncJobs row and run the fleet bracket sync in a background thread. Returns the job_id."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        job_id = create_sync_job(conn, JOB_TYPE_BRACKET_SYNC, season_year, len(league_ids), created_by)
+    finally:
+        conn.close()
+    threading.Thread(target=run_bracket_sync_job, args=(db_path, job_id, list(league_ids), season_year),
+                     name=f"bracket-sync-{job_id[:8]}", daemon=True).start()
+    return job_id
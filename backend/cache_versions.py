@@ -0,0 +1,92 @@
+"""
+Cross-process cache invalidation through version rows in the shared SQLite database.
+
+Writers bump a named version (e.g. 'players' or 'league:<id>') in the same
+transaction as the data change. Every worker process keeps its own in-memory
+caches keyed by those versions, so a cache built in one process is dropped by
+all of them once the bump commits.
+"""
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+CACHE_VERSIONS_DDL = '''CREATE TABLE IF NOT EXISTS cache_versions (
+                            cache_key TEXT PRIMARY KEY, -- e.g. 'players', 'league:<sleeper_league_id>'
+                            version INTEGER NOT NULL DEFAULT 0,
+                            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                            )'''
+
+
+def league_cache_key(league_id: str) -> str:
+    """Return the cache_versions key for one league's data."""
+    return f"league:{league_id}"
+
+
+def bump_cache_version(cursor: sqlite3.Cursor, cache_key: str) -> None:
+    """
+    Increment a cache version. Does not commit; call inside the writer's transaction.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        cache_key (str): Name of the version to bump.
+    """
+    cursor.execute('''
+        INSERT INTO cache_versions (cache_key, version, updated_at)
+        VALUES (?, 1, datetime('now'))
+        ON CONFLICT(cache_key) DO UPDATE SET
+            version = version + 1,
+            updated_at = datetime('now')
+    ''', (cache_key,))
+
+
+def get_cache_version(cursor: sqlite3.Cursor, cache_key: str) -> int:
+    """
+    Read a cache version.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        cache_key (str): Name of the version to read.
+
+    Returns:
+        int: Current version, 0 if it was never bumped.
+    """
+    cursor.execute("SELECT version FROM cache_versions WHERE cache_key = ?", (cache_key,))
+    row = cursor.fetchone()
+    return int(row[0]) if row else 0
+
+
+class CacheVersionTracker:
+    """
+    Per-process view of cache_versions that only re-reads the table when the database changed.
+
+    PRAGMA data_version changes only when another connection commits, so the common
+    "nothing changed" check is a single pragma instead of a query per cache key.
+    Writes made through this process's own connection don't move data_version, so
+    connection.total_changes is compared as well.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._versions: Dict[str, int] = {}
+        self._data_version: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _refresh_if_changed(self) -> None:
+        data_version = (self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes)
+        if data_version != self._data_version:
+            rows = self.conn.execute("SELECT cache_key, version FROM cache_versions").fetchall()
+            self._versions = {row[0]: int(row[1]) for row in rows}
+            self._data_version = data_version
+
+    def get(self, cache_key: str) -> int:
+        """Return the current version of a cache key (0 if never bumped)."""
+        with self._lock:
+            self._refresh_if_changed()
+            return self._versions.get(cache_key, 0)
+
+    def bump(self, cache_key: str) -> None:
+        """Bump a version through this process's connection. Does not commit."""
+        with self._lock:
+            bump_cache_version(self.conn.cursor(), cache_key)
+            # Own writes don't move data_version, so force a re-read on the next get()
+            self._data_version = None
@@ -0,0 +1,313 @@
+"""
+Online backups of the keeper database with SQLite's backup API.
+
+create_backup() copies the live database a few hundred pages at a time with a
+pause between steps, so the copy competes with request traffic for short
+moments only. The source connection holds one read transaction for the whole
+copy: in WAL mode that never blocks writers, and the copy is a consistent
+snapshot that does not restart when the app commits mid-backup. Row counts are
+read in the same snapshot.
+
+Each backup is written under a temporary name and renamed when complete, next
+to a JSON manifest with its SHA-256, page count, row counts and step timings.
+verify_backup() re-hashes a generation, opens it read-only, runs
+PRAGMA integrity_check and compares its row counts with the manifest; a
+generation that fails is renamed *.failed and never counts towards rotation.
+BackupScheduler runs backup, verification and rotation on a daemon thread; a
+worker claims the 'backup' task in db_maintenance, so one backup is taken per
+interval however many workers there are.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from db_maintenance import claim_task, record_task_result
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKUP_INTERVAL = 6 * 3600  # Seconds between backups
+DEFAULT_BACKUP_GENERATIONS = 7  # Verified backups kept
+DEFAULT_BACKUP_PAGES = 256  # Pages copied per step
+DEFAULT_BACKUP_PAUSE = 0.02  # Seconds between steps
+MANIFEST_SUFFIX = '.json'
+PARTIAL_SUFFIX = '.partial'
+FAILED_SUFFIX = '.failed'
+
+
+def backup_dir_for(db_path: str) -> str:
+    """Default backup directory: backups/ next to the database."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'backups')
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def table_row_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Rows of every table in the main schema."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_backups(backup_dir: str, db_path: str) -> List[str]:
+    """Completed backups of a database, newest first."""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir)
+             if name.startswith(f'{stem}-') and name.endswith('.db') and os.path.exists(os.path.join(backup_dir, name + MANIFEST_SUFFIX))]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def read_manifest(backup_path: str) -> Dict[str, Any]:
+    with open(backup_path + MANIFEST_SUFFIX, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def create_backup(db_path: str, backup_dir: str, pages: int = DEFAULT_BACKUP_PAGES, pause: float = DEFAULT_BACKUP_PAUSE,
+                  busy_timeout: float = 30.0, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Copy the database into a new generation in backup_dir.
+
+    Args:
+        db_path (str): Live keeper database file.
+        backup_dir (str): Directory of the generations, created if missing.
+        pages (int): Pages copied per step.
+        pause (float): Seconds slept between steps.
+        busy_timeout (float): Seconds to wait on locks.
+        now (Optional[datetime]): UTC time naming the generation, for tests.
+
+    Returns:
+        Dict[str, Any]: The manifest: path, sha256, bytes, page_count, row_counts, seconds, steps, max_step_ms.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    created_at = now or _utcnow()
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    backup_path = os.path.join(backup_dir, f"{stem}-{created_at.strftime('%Y%m%dT%H%M%S')}Z.db")
+    partial_path = backup_path + PARTIAL_SUFFIX
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    steps: List[float] = []
+    started = time.monotonic()
+    step_started = [started]
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        steps.append(time.monotonic() - step_started[0])
+        if remaining and pause:
+            time.sleep(pause)
+        step_started[0] = time.monotonic()
+
+    source = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None)
+    target = sqlite3.connect(partial_path)
+    try:
+        # Hold one read transaction for the whole copy: it pins a WAL snapshot, so app commits
+        # neither restart the copy nor drift from the row counts
+        source.execute("BEGIN")
+        row_counts = table_row_counts(source)
+        page_count = source.execute("PRAGMA page_count").fetchone()[0]
+        source.backup(target, pages=pages, progress=progress)
+        source.execute("ROLLBACK")
+        # A standalone file: no -wal/-shm needed to open it, read-only or elsewhere
+        target.execute("PRAGMA journal_mode=DELETE")
+    except Exception:
+        target.close()
+        os.remove(partial_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    seconds = time.monotonic() - started
+
+    manifest = {
+        'path': backup_path,
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'sha256': file_sha256(partial_path),
+        'bytes': os.path.getsize(partial_path),
+        'page_count': page_count,
+        'row_counts': row_counts,
+        'seconds': round(seconds, 3),
+        'steps': len(steps),
+        'max_step_ms': round(max(steps, default=0) * 1000, 2),
+    }
+    os.replace(partial_path, backup_path)
+    with open(backup_path + MANIFEST_SUFFIX, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def verify_backup(backup_path: str) -> Dict[str, Any]:
+    """
+    Check that a generation restores: checksum, PRAGMA integrity_check and row counts against its manifest.
+
+    Returns:
+        Dict[str, Any]: path, ok and the errors found.
+    """
+    errors = []
+    try:
+        manifest = read_manifest(backup_path)
+    except (OSError, ValueError) as e:
+        return {'path': backup_path, 'ok': False, 'errors': [f'manifest unreadable: {e}']}
+    if file_sha256(backup_path) != manifest['sha256']:
+        errors.append('checksum mismatch')
+    conn = sqlite3.connect(f'file:{backup_path}?mode=ro', uri=True)
+    try:
+        integrity = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        if integrity != ['ok']:
+            errors.append(f"integrity_check: {'; '.join(integrity[:5])}")
+        row_counts = table_row_counts(conn)
+    except sqlite3.Error as e:
+        errors.append(f'unreadable: {e}')
+        row_counts = {}
+    finally:
+        conn.close()
+    if row_counts and row_counts != manifest['row_counts']:
+        differing = sorted(table for table in set(row_counts) | set(manifest['row_counts'])
+                           if row_counts.get(table) != manifest['row_counts'].get(table))
+        errors.append(f"row counts differ: {', '.join(differing)}")
+    return {'path': backup_path, 'ok': not errors, 'errors': errors}
+
+
+def rotate_backups(backup_dir: str, db_path: str, generations: int) -> List[str]:
+    """Delete all but the newest generations; returns the deleted backup paths."""
+    removed = []
+    for backup_path in list_backups(backup_dir, db_path)[max(1, generations):]:
+        for path in (backup_path, backup_path + MANIFEST_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+        removed.append(backup_path)
+    return removed
+
+
+class BackupScheduler:
+    """
+    Takes, verifies and rotates a backup every interval seconds on a daemon thread.
+
+    Args:
+        db_path (str): Keeper database file.
+        backup_dir (str): Directory of the generations.
+        interval (float): Seconds between backups.
+        generations (int): Verified generations kept.
+        pages (int): Pages copied per step.
+        pause (float): Seconds between steps.
+        busy_timeout (float): Seconds to wait on locks.
+        writer_metrics (Optional[Callable[[], Optional[Dict[str, Any]]]]): DatabaseWriter.metrics of this process,
+            to report the average commit time during the backup against the time before it.
+    """
+
+    def __init__(self, db_path: str, backup_dir: str, interval: float = DEFAULT_BACKUP_INTERVAL,
+                 generations: int = DEFAULT_BACKUP_GENERATIONS, pages: int = DEFAULT_BACKUP_PAGES,
+                 pause: float = DEFAULT_BACKUP_PAUSE, busy_timeout: float = 30.0,
+                 writer_metrics: Optional[Callable[[], Optional[Dict[str, Any]]]] = None):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.generations = generations
+        self.pages = pages
+        self.pause = pause
+        self.busy_timeout = busy_timeout
+        self.writer_metrics = writer_metrics
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'backups': 0, 'failed': 0, 'verify_failures': 0, 'seconds_total': 0.0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _commit_ms(self) -> Optional[Dict[str, float]]:
+        if self.writer_metrics is None:
+            return None
+        metrics = self.writer_metrics()
+        if metrics is None:
+            return None
+        return {'transactions': metrics['transactions'], 'seconds': metrics['commit_seconds_total']}
+
+    def run_once(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Take, verify and rotate one backup unless another worker took one within the interval.
+        Errors are logged and returned, never raised.
+
+        Returns:
+            Optional[Dict[str, Any]]: The backup's manifest with its verification and rotation, or None when not due.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+        try:
+            if not claim_task(conn, 'backup', timedelta(0) if force else timedelta(seconds=self.interval * 0.9)):
+                return None
+            commits_before = self._commit_ms()
+            result = create_backup(self.db_path, self.backup_dir, self.pages, self.pause, self.busy_timeout)
+            commits_after = self._commit_ms()
+            if commits_before and commits_after:
+                during = commits_after['transactions'] - commits_before['transactions']
+                result['writer_commits_during'] = during
+                result['writer_avg_commit_ms_during'] = round(
+                    (commits_after['seconds'] - commits_before['seconds']) * 1000 / during, 3) if during else None
+                result['writer_avg_commit_ms_before'] = round(
+                    commits_before['seconds'] * 1000 / commits_before['transactions'], 3) if commits_before['transactions'] else None
+            result['verification'] = verify_backup(result['path'])
+            if result['verification']['ok']:
+                result['rotated'] = rotate_backups(self.backup_dir, self.db_path, self.generations)
+            else:
+                # Keep a failed backup for inspection, renamed so rotation never counts it
+                for path in (result['path'], result['path'] + MANIFEST_SUFFIX):
+                    os.replace(path, path + FAILED_SUFFIX)
+                result['rotated'] = []
+            record_task_result(conn, 'backup', result)
+            with self._stats_lock:
+                self._stats['backups'] += 1
+                self._stats['seconds_total'] += result['seconds']
+                if not result['verification']['ok']:
+                    self._stats['verify_failures'] += 1
+            if not result['verification']['ok']:
+                logger.error(f"db_backup: Backup {result['path']} failed verification: {result['verification']['errors']}")
+        except Exception as e:
+            logger.error(f"db_backup: Backup failed: {e}")
+            result = {'status': 'failed', 'error': str(e)}
+            with self._stats_lock:
+                self._stats['failed'] += 1
+        finally:
+            conn.close()
+        self.last_result = result
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters of this process's backups and the last result."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['seconds_total'] = round(stats['seconds_total'], 3)
+        stats['last_result'] = self.last_result
+        return stats
+
+    def start(self) -> None:
+        """Start backing up in the background (first check immediately)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='db-backup', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current backup."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        check_every = min(self.interval, 300)  # Lets another worker take over if the last one stopped
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(check_every)
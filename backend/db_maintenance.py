@@ -0,0 +1,297 @@
+"""
+Scheduled maintenance of the keeper database.
+
+The app writes through long-lived WAL connections that never checkpoint or
+analyze on their own. MaintenanceScheduler runs, on a daemon thread in every
+worker process:
+
+- a PASSIVE wal_checkpoint every cycle, escalated to TRUNCATE once the WAL file
+  passes a size limit, so the WAL does not grow without bound;
+- ANALYZE (bounded by analysis_limit) followed by PRAGMA optimize once syncs have
+  written enough rows since the last run; syncs count their rows with
+  note_changes() inside their own write unit;
+- VACUUM during configured quiet hours when enough of the file is free pages.
+
+The db_maintenance table holds one row per task with its last run time and
+result. A worker claims a task by updating that row under BEGIN IMMEDIATE, so
+each task runs once per interval however many workers there are, and the
+storage report can show the last checkpoint's lag without writing anything.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAINTENANCE_INTERVAL = 60  # Seconds between cycles
+DEFAULT_WAL_TRUNCATE_BYTES = 64 * 1024 * 1024  # WAL size that turns the checkpoint into TRUNCATE
+DEFAULT_ANALYZE_CHANGES = 5000  # Rows written by syncs before statistics are refreshed
+DEFAULT_VACUUM_FREE_RATIO = 0.2  # Share of free pages worth a VACUUM
+DEFAULT_QUIET_HOURS = (3, 5)  # Local hours [start, end) in which VACUUM may run
+ANALYSIS_LIMIT = 1000  # Rows sampled per index by ANALYZE; keeps it to milliseconds on large tables
+VACUUM_MIN_INTERVAL = timedelta(hours=20)  # At most one VACUUM per quiet window
+
+# 'backup' is run by db_backup.py, 'replica' by analytics_replica.py, 'league_refresh' by league_refresh.py
+TASKS = ('checkpoint', 'optimize', 'vacuum', 'backup', 'replica', 'league_refresh')
+WAL_HEADER_BYTES = 32
+WAL_FRAME_HEADER_BYTES = 24
+
+DB_MAINTENANCE_DDL = '''CREATE TABLE IF NOT EXISTS db_maintenance (
+                           task TEXT PRIMARY KEY, -- One of TASKS
+                           pending_changes INTEGER NOT NULL DEFAULT 0, -- Rows written by syncs since the last optimize
+                           last_run_at TEXT, -- UTC, when a worker last claimed the task
+                           last_result TEXT -- JSON of the last run
+                           )'''
+
+
+def create_maintenance_table(cursor: sqlite3.Cursor) -> None:
+    """Create db_maintenance with one row per task. Does not commit."""
+    cursor.execute(DB_MAINTENANCE_DDL)
+    cursor.executemany("INSERT OR IGNORE INTO db_maintenance (task) VALUES (?)", [(task,) for task in TASKS])
+
+
+def note_changes(cursor: sqlite3.Cursor, changes: int) -> None:
+    """
+    Count rows written by a sync towards the next ANALYZE. Does not commit.
+
+    Does nothing on a database whose schema predates db_maintenance.
+    """
+    if changes <= 0:
+        return
+    try:
+        cursor.execute("UPDATE db_maintenance SET pending_changes = pending_changes + ? WHERE task = 'optimize'", (changes,))
+    except sqlite3.OperationalError as e:
+        logger.warning(f"db_maintenance: Could not count {changes} sync changes: {e}")
+
+
+def parse_quiet_hours(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """'3-5' -> (3, 5); '' or None -> None (VACUUM never runs)."""
+    if not value:
+        return None
+    start, end = (int(part) for part in value.split('-', 1))
+    return start % 24, end % 24
+
+
+def in_quiet_hours(now: datetime, quiet_hours: Optional[Tuple[int, int]]) -> bool:
+    """Whether a local time falls in [start, end), which may wrap past midnight."""
+    if not quiet_hours:
+        return False
+    start, end = quiet_hours
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def wal_path(db_path: str) -> str:
+    return f"{db_path}-wal"
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec='seconds')
+
+
+def checkpoint(conn: sqlite3.Connection, mode: str = 'PASSIVE') -> Dict[str, Any]:
+    """
+    Run wal_checkpoint. PASSIVE never waits; TRUNCATE waits (busy timeout) for readers and empties the WAL file.
+
+    Returns:
+        Dict[str, Any]: mode, busy (1 if it could not finish), log (WAL frames) and checkpointed (frames copied).
+    """
+    busy, log, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return {'mode': mode, 'busy': busy, 'log': log, 'checkpointed': checkpointed}
+
+
+def optimize(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Refresh planner statistics: a sampled ANALYZE, then PRAGMA optimize.
+
+    PRAGMA optimize alone only looks at tables this (fresh) connection has queried,
+    hence the explicit ANALYZE with a bounded sample.
+    """
+    started = time.monotonic()
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    return {'seconds': round(time.monotonic() - started, 3)}
+
+
+def vacuum(conn: sqlite3.Connection, db_path: str) -> Dict[str, Any]:
+    """Rewrite the file without its free pages, then truncate the WAL the rewrite went through."""
+    size_before = _file_size(db_path)
+    started = time.monotonic()
+    conn.execute("VACUUM")
+    wal = checkpoint(conn, 'TRUNCATE')
+    return {'bytes_before': size_before, 'bytes_after': _file_size(db_path), 'wal_busy': wal['busy'],
+            'seconds': round(time.monotonic() - started, 3)}
+
+
+def claim_task(conn: sqlite3.Connection, task: str, min_interval: timedelta, min_changes: int = 0) -> bool:
+    """
+    Mark a task as run now unless another worker ran it within min_interval (or too few changes are pending).
+
+    Returns:
+        bool: True if this worker claimed the task and should run it.
+    """
+    now = _utcnow()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT last_run_at, pending_changes FROM db_maintenance WHERE task = ?", (task,)).fetchone()
+        if row is None or row[1] < min_changes or (
+                row[0] and datetime.fromisoformat(row[0]) > now - min_interval):
+            conn.rollback()
+            return False
+        conn.execute("UPDATE db_maintenance SET last_run_at = ?, pending_changes = 0 WHERE task = ?",
+                     (_timestamp(now), task))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def record_task_result(conn: sqlite3.Connection, task: str, result: Dict[str, Any]) -> None:
+    """Store a task's result as JSON and commit."""
+    conn.execute("UPDATE db_maintenance SET last_result = ? WHERE task = ?", (json.dumps(result), task))
+    conn.commit()
+
+
+def run_maintenance(conn: sqlite3.Connection, db_path: str, interval: float = DEFAULT_MAINTENANCE_INTERVAL,
+                    wal_truncate_bytes: int = DEFAULT_WAL_TRUNCATE_BYTES, analyze_changes: int = DEFAULT_ANALYZE_CHANGES,
+                    vacuum_free_ratio: float = DEFAULT_VACUUM_FREE_RATIO,
+                    quiet_hours: Optional[Tuple[int, int]] = DEFAULT_QUIET_HOURS,
+                    now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    One maintenance cycle: the checkpoint, then optimize and VACUUM when they are due.
+
+    Args:
+        conn (sqlite3.Connection): Connection with isolation_level=None, used only for maintenance.
+        db_path (str): Keeper database file, for file sizes.
+        interval (float): Seconds between cycles; another worker's checkpoint within half of it counts.
+        wal_truncate_bytes (int): WAL size from which the checkpoint is TRUNCATE.
+        analyze_changes (int): Pending sync changes that trigger ANALYZE.
+        vacuum_free_ratio (float): Free page share that makes VACUUM worthwhile.
+        quiet_hours (Optional[Tuple[int, int]]): Local hours VACUUM may run in; None disables it.
+        now (Optional[datetime]): Local time, for tests.
+
+    Returns:
+        Dict[str, Any]: Result of each task that ran this cycle.
+    """
+    results: Dict[str, Any] = {}
+    if claim_task(conn, 'checkpoint', timedelta(seconds=interval / 2)):
+        mode = 'TRUNCATE' if _file_size(wal_path(db_path)) >= wal_truncate_bytes else 'PASSIVE'
+        results['checkpoint'] = dict(checkpoint(conn, mode), at=_timestamp(_utcnow()))
+        record_task_result(conn, 'checkpoint', results['checkpoint'])
+
+    never_analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None
+    if claim_task(conn, 'optimize', timedelta(0), min_changes=0 if never_analyzed else analyze_changes):
+        results['optimize'] = dict(optimize(conn), at=_timestamp(_utcnow()))
+        record_task_result(conn, 'optimize', results['optimize'])
+
+    if in_quiet_hours(now or datetime.now(), quiet_hours):
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if page_count and freelist_count / page_count >= vacuum_free_ratio and claim_task(conn, 'vacuum', VACUUM_MIN_INTERVAL):
+            results['vacuum'] = dict(vacuum(conn, db_path), at=_timestamp(_utcnow()), freelist_count=freelist_count, page_count=page_count)
+            record_task_result(conn, 'vacuum', results['vacuum'])
+    return results
+
+
+def storage_report(conn: sqlite3.Connection, db_path: str) -> Dict[str, Any]:
+    """
+    Read-only storage figures: pages, free pages, file and WAL sizes, checkpoint lag, per-table row counts
+    and the last run of each maintenance task.
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    wal_bytes = _file_size(wal_path(db_path))
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    row_counts = {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+    maintenance = {}
+    if 'db_maintenance' in row_counts:
+        for task, pending_changes, last_run_at, last_result in conn.execute(
+                "SELECT task, pending_changes, last_run_at, last_result FROM db_maintenance ORDER BY task"):
+            maintenance[task] = {'last_run_at': last_run_at, 'last_result': json.loads(last_result) if last_result else None}
+            if task == 'optimize':
+                maintenance[task]['pending_changes'] = pending_changes
+    last_checkpoint = (maintenance.get('checkpoint') or {}).get('last_result')
+    return {
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'file_bytes': _file_size(db_path),
+        'wal_bytes': wal_bytes,
+        # Frames in the WAL file; the ones the last checkpoint could not copy are its lag
+        'wal_frames': max(0, (wal_bytes - WAL_HEADER_BYTES) // (page_size + WAL_FRAME_HEADER_BYTES)) if wal_bytes else 0,
+        'checkpoint_lag_frames': (last_checkpoint['log'] - last_checkpoint['checkpointed']) if last_checkpoint else None,
+        'row_counts': row_counts,
+        'maintenance': maintenance,
+    }
+
+
+class MaintenanceScheduler:
+    """
+    Runs run_maintenance every interval seconds on a daemon thread.
+
+    Args:
+        db_path (str): Keeper database file.
+        interval (float): Seconds between cycles.
+        busy_timeout (float): Seconds to wait for the database write lock.
+        **settings: Passed on to run_maintenance (wal_truncate_bytes, analyze_changes, vacuum_free_ratio, quiet_hours).
+    """
+
+    def __init__(self, db_path: str, interval: float = DEFAULT_MAINTENANCE_INTERVAL, busy_timeout: float = 30.0,
+                 **settings: Any):
+        self.db_path = db_path
+        self.interval = interval
+        self.busy_timeout = busy_timeout
+        self.settings = settings
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """Run one cycle on a fresh connection. Errors are logged and returned, never raised."""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+        try:
+            self.last_result = run_maintenance(conn, self.db_path, interval=self.interval, **self.settings)
+        except Exception as e:
+            logger.error(f"db_maintenance: Maintenance cycle failed: {e}")
+            self.last_result = {'status': 'failed', 'error': str(e)}
+        finally:
+            conn.close()
+        return self.last_result
+
+    def start(self) -> None:
+        """Start maintenance in the background (first cycle immediately)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current cycle."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
@@ -0,0 +1,194 @@
+"""
+Single-writer unit of work for the keeper database.
+
+Request threads and background jobs hand write units (callables that take a
+cursor) to one DatabaseWriter, which runs them in submission order on its own
+connection. Units that queue up while a transaction is being committed are
+group-committed together, so one fsync covers many of them. Each unit runs in
+its own SAVEPOINT: a failing unit rolls back only its own changes and the rest
+of the group still commits.
+
+Units must not call commit() or rollback(); the writer owns the transaction.
+"""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+WriteUnit = Callable[[sqlite3.Cursor], Any]
+
+DEFAULT_MAX_BATCH = 64
+
+
+class WriterClosedError(RuntimeError):
+    """Raised when a unit is submitted after the writer was closed."""
+
+
+class DatabaseWriter:
+    """
+    Serializes writes through one connection and one thread.
+
+    Args:
+        db_path (str): SQLite database file. Must be a file so readers on other connections see the writes.
+        busy_timeout (float): Seconds to wait for the write lock held by another process.
+        max_batch (int): Most units committed in one transaction.
+        group_commit_window (float): Seconds to wait for more units after the first one of a batch.
+            0 only groups units that queued while the previous commit was running.
+        on_connect (Optional[Callable[[sqlite3.Connection], None]]): Called with the writer's connection
+            once it is open, e.g. to attach databases the units read.
+        name (str): Name of the writer thread.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 30.0, max_batch: int = DEFAULT_MAX_BATCH,
+                 group_commit_window: float = 0.0, on_connect: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 name: str = 'db-writer'):
+        self.db_path = db_path
+        self.max_batch = max(1, max_batch)
+        self.group_commit_window = max(0.0, group_commit_window)
+        self._queue: 'queue.Queue[Optional[Tuple[WriteUnit, Future]]]' = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'units_committed': 0, 'units_failed': 0, 'transactions': 0, 'failed_transactions': 0,
+                       'max_batch_size': 0, 'commit_seconds_total': 0.0}
+
+        # isolation_level=None: no implicit transactions, BEGIN/SAVEPOINT/COMMIT below are the only boundaries
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=busy_timeout, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if on_connect:
+            on_connect(self._conn)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, unit: Callable[[sqlite3.Cursor], T]) -> 'Future[T]':
+        """
+        Queue a unit of work.
+
+        Args:
+            unit (Callable[[sqlite3.Cursor], T]): Runs the writes on the cursor it is given and returns a result.
+
+        Returns:
+            Future[T]: Resolves to the unit's result once its transaction has committed, or to its exception.
+
+        Raises:
+            WriterClosedError: If the writer was closed.
+        """
+        future: 'Future[T]' = Future()
+        with self._close_lock:
+            if self._closed:
+                raise WriterClosedError("DatabaseWriter is closed")
+            self._queue.put((unit, future))
+        return future
+
+    def execute(self, unit: Callable[[sqlite3.Cursor], T], timeout: Optional[float] = None) -> T:
+        """
+        Run a unit of work and wait until it is committed.
+
+        Called from inside another unit (on the writer thread), the unit runs inline as
+        part of the caller's savepoint instead of deadlocking on the queue.
+
+        Raises:
+            Exception: Whatever the unit raised, or the sqlite3.Error that failed its commit.
+        """
+        if threading.current_thread() is self._thread:
+            return unit(self._conn.cursor())
+        return self.submit(unit).result(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit the units already queued, then stop the writer thread and close its connection."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters for /admin and tests: committed/failed units, transactions and batch sizes."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_batch_size'] = round(stats['units_committed'] / stats['transactions'], 2) if stats['transactions'] else 0.0
+        stats['commit_seconds_total'] = round(stats['commit_seconds_total'], 4)
+        return stats
+
+    def _next_batch(self, first: Tuple[WriteUnit, Future]) -> Tuple[List[Tuple[WriteUnit, Future]], bool]:
+        """Collect units queued behind the first one. Returns the batch and whether close() was requested."""
+        batch = [first]
+        deadline = time.monotonic() + self.group_commit_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch, stopping = self._next_batch(item)
+            self._commit_batch(batch)
+        self._conn.close()
+
+    def _commit_batch(self, batch: List[Tuple[WriteUnit, Future]]) -> None:
+        control = self._conn.cursor()
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        started = time.monotonic()
+        try:
+            control.execute("BEGIN IMMEDIATE")
+            for unit, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                control.execute("SAVEPOINT write_unit")
+                try:
+                    result = unit(self._conn.cursor())
+                except Exception as e:
+                    control.execute("ROLLBACK TO write_unit")
+                    control.execute("RELEASE write_unit")
+                    outcomes.append((future, False, e))
+                    continue
+                control.execute("RELEASE write_unit")
+                outcomes.append((future, True, result))
+            control.execute("COMMIT")
+        except sqlite3.Error as e:
+            # The transaction itself failed (lock timeout, disk error, a unit that committed or
+            # rolled back on its own): nothing from this batch is kept.
+            logger.error(f"DatabaseWriter: Transaction of {len(batch)} unit(s) failed: {e}")
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            done = {id(future) for future, _, _ in outcomes}
+            outcomes = [(future, False, e if ok else result) for future, ok, result in outcomes]
+            outcomes += [(future, False, e) for _, future in batch
+                         if id(future) not in done and (future.running() or future.set_running_or_notify_cancel())]
+            with self._stats_lock:
+                self._stats['failed_transactions'] += 1
+        else:
+            with self._stats_lock:
+                self._stats['transactions'] += 1
+                self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(outcomes))
+                self._stats['commit_seconds_total'] += time.monotonic() - started
+
+        with self._stats_lock:
+            for _, ok, _ in outcomes:
+                self._stats['units_committed' if ok else 'units_failed'] += 1
+        for future, ok, result in outcomes:
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
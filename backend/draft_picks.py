@@ -0,0 +1,177 @@
+"""
+Normalized auction draft picks.
+
+Sleeper's pick list for a completed auction draft is still kept as JSON in
+drafts.data, but every pick is also written as a row of draft_picks when the
+draft is ingested. Contract creation, the team page and auction spend
+summaries query these rows instead of re-parsing the JSON.
+"""
+import json
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DRAFT_PICKS_DDL = '''CREATE TABLE IF NOT EXISTS draft_picks (
+                        draft_id TEXT NOT NULL, -- drafts.sleeper_draft_id
+                        league_id TEXT NOT NULL,
+                        season TEXT,
+                        roster_id TEXT, -- sleeper_roster_id of the drafting team
+                        player_id TEXT NOT NULL,
+                        amount INTEGER, -- Auction price; NULL if Sleeper sent none or an unparsable one
+                        pick_no INTEGER
+                        )'''
+
+DRAFT_PICKS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_draft_picks_league_season_roster ON draft_picks(league_id, season, roster_id)",
+    "CREATE INDEX IF NOT EXISTS idx_draft_picks_draft ON draft_picks(draft_id)",
+]
+
+
+def _pick_rows(draft_id: str, league_id: str, season: Optional[str], picks_data: List[Dict[str, Any]]) -> List[Tuple]:
+    rows = []
+    for pick in picks_data:
+        player_id = pick.get('player_id')
+        if not player_id:
+            continue
+        amount_str = (pick.get('metadata') or {}).get('amount')
+        amount = None
+        if amount_str is not None:
+            try:
+                amount = int(amount_str)
+            except (TypeError, ValueError):
+                logger.warning(f"draft_picks: Could not convert auction amount '{amount_str}' to int for player {player_id} in draft {draft_id}")
+        roster_id = pick.get('roster_id')
+        rows.append((draft_id, league_id, season, str(roster_id) if roster_id is not None else None,
+                     str(player_id), amount, pick.get('pick_no')))
+    return rows
+
+
+def store_draft_picks(cursor: sqlite3.Cursor, draft_id: str, league_id: str, season: Optional[str],
+                      picks_data: List[Dict[str, Any]]) -> int:
+    """
+    Replace the stored picks of one draft. Does not commit.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        draft_id (str): Sleeper draft ID.
+        league_id (str): Sleeper league ID.
+        season (Optional[str]): Draft season.
+        picks_data (List[Dict[str, Any]]): Pick objects from Sleeper's /draft/<id>/picks.
+
+    Returns:
+        int: Number of picks stored.
+    """
+    rows = _pick_rows(draft_id, league_id, season, picks_data)
+    cursor.execute("DELETE FROM draft_picks WHERE draft_id = ?", (draft_id,))
+    cursor.executemany('''
+        INSERT INTO draft_picks (draft_id, league_id, season, roster_id, player_id, amount, pick_no)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+
+def backfill_draft_picks(cursor: sqlite3.Cursor) -> int:
+    """
+    Populate draft_picks from drafts.data for drafts ingested before the table existed.
+
+    Only drafts whose data is a pick list and that have no rows yet are read.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+
+    Returns:
+        int: Number of drafts backfilled.
+    """
+    cursor.execute('''
+        SELECT d.sleeper_draft_id, d.league_id, d.season, d.data
+        FROM drafts d
+        WHERE d.status = 'complete' AND d.data LIKE '[%'
+          AND NOT EXISTS (SELECT 1 FROM draft_picks dp WHERE dp.draft_id = d.sleeper_draft_id)
+    ''')
+    backfilled = 0
+    for draft_id, league_id, season, data in cursor.fetchall():
+        try:
+            picks_data = json.loads(data)
+        except json.JSONDecodeError:
+            logger.warning(f"draft_picks: Could not parse stored pick JSON for draft {draft_id}; skipping backfill")
+            continue
+        if isinstance(picks_data, list) and picks_data:
+            store_draft_picks(cursor, draft_id, league_id, season, picks_data)
+            backfilled += 1
+    return backfilled
+
+
+def create_default_contracts(cursor: sqlite3.Cursor, draft_id: str) -> int:
+    """
+    Create a 1-year contract at the auction price for every pick without an active contract. Does not commit.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        draft_id (str): Sleeper draft ID whose picks were stored with store_draft_picks.
+
+    Returns:
+        int: Number of contracts created.
+    """
+    cursor.execute('''
+        INSERT OR IGNORE INTO contracts
+            (player_id, team_id, sleeper_league_id, draft_amount, contract_year, duration, is_active, created_at, updated_at)
+        SELECT dp.player_id, dp.roster_id, dp.league_id, dp.amount, CAST(dp.season AS INTEGER), 1, 1, datetime('now'), datetime('now')
+        FROM draft_picks dp
+        WHERE dp.draft_id = ? AND dp.amount IS NOT NULL AND dp.roster_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM contracts c
+              WHERE c.player_id = dp.player_id AND c.team_id = dp.roster_id
+                AND c.sleeper_league_id = dp.league_id AND c.is_active = 1
+          )
+    ''', (draft_id,))
+    return cursor.rowcount
+
+
+def get_auction_acquisitions(cursor: sqlite3.Cursor, league_id: str, season: int) -> Tuple[bool, Dict[str, int]]:
+    """
+    Auction prices from the league's latest completed draft of a season.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        league_id (str): Sleeper league ID.
+        season (int): Draft season.
+
+    Returns:
+        Tuple[bool, Dict[str, int]]: Whether that draft has stored picks (i.e. the contract
+        setting period is open), and {player_id: auction price}.
+    """
+    cursor.execute('''
+        SELECT player_id, amount
+        FROM draft_picks
+        WHERE draft_id = (
+            SELECT sleeper_draft_id FROM drafts
+            WHERE league_id = ? AND season = ? AND status = 'complete'
+            ORDER BY start_time DESC LIMIT 1
+        )
+        ORDER BY rowid
+    ''', (league_id, str(season)))
+    rows = cursor.fetchall()
+    return bool(rows), {row[0]: row[1] for row in rows if row[1] is not None}
+
+
+def get_auction_spend_by_team(cursor: sqlite3.Cursor, league_id: str, season: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-team auction totals for a league's drafts in one season.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        league_id (str): Sleeper league ID.
+        season (int): Draft season.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: {roster_id: {'players': count, 'total_spent': sum, 'max_price': max}}.
+    """
+    cursor.execute('''
+        SELECT roster_id, COUNT(*) as players, COALESCE(SUM(amount), 0) as total_spent, MAX(amount) as max_price
+        FROM draft_picks
+        WHERE league_id = ? AND season = ? AND roster_id IS NOT NULL
+        GROUP BY roster_id
+    ''', (league_id, str(season)))
+    return {row[0]: {'players': row[1], 'total_spent': row[2], 'max_price': row[3]} for row in cursor.fetchall()}
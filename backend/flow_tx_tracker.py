@@ -0,0 +1,403 @@
+"""
+Background sealing tracker for submitted Flow transactions.
+
+Request handlers record each transaction they submit with record_submission(),
+in the same database transaction that marks the AgentExecutions or payout rows
+'submitted'. The TransactionTracker thread then polls the Flow access node for
+every pending transaction ID in one loop. Due transactions are fetched
+concurrently in batches and rechecked with exponential backoff. Each batch is
+settled in one write transaction: FlowTransactions
+(migrations/006_add_flow_transactions.sql) and the linked AgentExecutions,
+PayoutSchedules and PayoutDistributions rows move to sealed (stored as
+'completed' on the agent and payout rows) or failed, with timestamps and the
+transaction's events.
+"""
+import base64
+import json
+import logging
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from vault_poller import decode_cadence_value
+
+logger = logging.getLogger(__name__)
+
+TX_SUBMITTED = 'submitted'
+TX_SEALED = 'sealed'
+TX_FAILED = 'failed'
+
+DEFAULT_INTERVAL = 5.0  # Seconds the tracker sleeps when nothing is due
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FETCH_WORKERS = 8
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 120.0
+CLAIM_LEASE_SECONDS = 60  # Other processes leave a claimed transaction alone this long
+SETTLE_TIMEOUT = timedelta(hours=1)  # Flow expires unsealed transactions long before this
+
+ACCESS_API_URLS = {
+    'testnet': 'https://rest-testnet.onflow.org',
+    'mainnet': 'https://rest-mainnet.onflow.org',
+    'emulator': 'http://127.0.0.1:8888',
+}
+
+_TX_ID_PATTERN = re.compile(r'\b(?:0x)?([0-9a-fA-F]{64})\b')
+
+
+def parse_transaction_id(output: str) -> Optional[str]:
+    """
+    Transaction ID from `flow transactions send` output.
+
+    Prefers a 64-hex-digit ID on a line mentioning 'ID' and falls back to the first
+    64-hex-digit token anywhere, so block IDs or other text after a colon are not recorded.
+    """
+    lines = (output or '').splitlines()
+    for candidates in ([line for line in lines if 'ID' in line], lines):
+        for line in candidates:
+            match = _TX_ID_PATTERN.search(line)
+            if match:
+                return match.group(1).lower()
+    return None
+
+
+def tracker_table_exists(cursor: sqlite3.Cursor) -> bool:
+    """True once migration 006 has been applied to this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'FlowTransactions'")
+    return cursor.fetchone() is not None
+
+
+def record_submission(cursor: sqlite3.Cursor, transaction_id: Optional[str], tx_kind: str,
+                      execution_id: Optional[str] = None, payout_id: Optional[str] = None) -> str:
+    """
+    Hand a submitted transaction to the tracker. Does not commit.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the transaction that updates the execution or payout rows.
+        transaction_id (Optional[str]): Flow transaction ID parsed from the CLI output.
+        tx_kind (str): 'vault_deposit', 'staking', 'vault_withdrawal' or 'prize_distribution'.
+        execution_id (Optional[str]): AgentExecutions row to settle.
+        payout_id (Optional[str]): PayoutSchedules row (and its distributions) to settle.
+
+    Returns:
+        str: Status the caller should store: 'submitted' when the tracker will settle the rows,
+            'completed' when the transaction cannot be tracked (no ID, or migration 006 not applied).
+    """
+    if not transaction_id or not tracker_table_exists(cursor):
+        return 'completed'
+    now = datetime.now()
+    cursor.execute("""
+        INSERT OR IGNORE INTO FlowTransactions (
+            transaction_id, tx_kind, execution_id, payout_id, status, submitted_at, next_check_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (transaction_id, tx_kind, execution_id, payout_id, TX_SUBMITTED, now.isoformat(),
+          (now + timedelta(seconds=BACKOFF_BASE_SECONDS)).isoformat()))
+    return TX_SUBMITTED
+
+
+class FlowAccessClient:
+    """
+    Reads transaction results from the Flow Access REST API.
+
+    Args:
+        network (str): 'testnet', 'mainnet' or 'emulator'. Ignored when base_url is given.
+        base_url (Optional[str]): Access node REST endpoint.
+        timeout (float): Seconds per HTTP request.
+    """
+
+    def __init__(self, network: str = 'testnet', base_url: Optional[str] = None, timeout: float = 10):
+        self.base_url = (base_url or ACCESS_API_URLS.get(network, ACCESS_API_URLS['testnet'])).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get_transaction_result(self, transaction_id: str) -> Dict[str, Any]:
+        """
+        Status, status code, error message and decoded events of one transaction.
+
+        An ID the access node does not know yet is reported as Pending.
+
+        Raises:
+            requests.exceptions.RequestException: On network errors and non-404 HTTP errors.
+        """
+        response = self.session.get(f"{self.base_url}/v1/transaction_results/{transaction_id}", timeout=self.timeout)
+        if response.status_code == 404:
+            return {'status': 'Pending', 'status_code': 0, 'error_message': '', 'events': []}
+        response.raise_for_status()
+        result = response.json()
+        return {
+            'status': result.get('status'),
+            'status_code': int(result.get('status_code') or 0),
+            'error_message': result.get('error_message') or '',
+            'events': [_decode_event(event) for event in result.get('events') or []],
+        }
+
+
+def _decode_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Event type, index and fields; the REST API sends the payload as base64 JSON-Cadence."""
+    try:
+        payload = decode_cadence_value(json.loads(base64.b64decode(event.get('payload') or '')))
+    except (ValueError, TypeError, KeyError):
+        payload = event.get('payload')
+    return {'type': event.get('type'), 'event_index': event.get('event_index'), 'payload': payload}
+
+
+def next_check_delay(attempts: int) -> float:
+    """Seconds until the next check after the given number of checks: 2, 4, 8, ... capped at 120."""
+    return min(BACKOFF_BASE_SECONDS * (2 ** attempts), BACKOFF_MAX_SECONDS)
+
+
+def claim_due_transactions(conn: sqlite3.Connection, limit: int = DEFAULT_BATCH_SIZE,
+                           now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Take up to limit pending transactions whose check is due, and lease them.
+
+    Leased rows have next_check_at pushed out before the transaction commits, so no other
+    tracker polls the same IDs.
+    """
+    now = now or datetime.now()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT transaction_id, tx_kind, execution_id, payout_id, attempts, submitted_at
+            FROM FlowTransactions
+            WHERE status = ? AND next_check_at <= ?
+            ORDER BY next_check_at
+            LIMIT ?
+        """, (TX_SUBMITTED, now.isoformat(), limit))
+        columns = [d[0] for d in cursor.description]
+        due = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.executemany("UPDATE FlowTransactions SET next_check_at = ? WHERE transaction_id = ?",
+                           [((now + timedelta(seconds=CLAIM_LEASE_SECONDS)).isoformat(), tx['transaction_id']) for tx in due])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return due
+
+
+def _outcome(tx: Dict[str, Any], result: Optional[Dict[str, Any]], error: Optional[str], now: datetime) -> Dict[str, Any]:
+    """Next state of one tracked transaction given its latest access node result (or fetch error)."""
+    outcome = {'transaction_id': tx['transaction_id'], 'status': TX_SUBMITTED, 'events': [], 'error': error,
+               'flow_status': result.get('status') if result else None}
+    if result and result.get('status') == 'Sealed':
+        failed = result['status_code'] != 0 or bool(result['error_message'])
+        outcome.update(status=TX_FAILED if failed else TX_SEALED, events=result['events'],
+                       error=result['error_message'] or None)
+    elif result and result.get('status') == 'Expired':
+        outcome.update(status=TX_FAILED, error='Transaction expired before it was sealed')
+    elif now - datetime.fromisoformat(tx['submitted_at']) > SETTLE_TIMEOUT:
+        outcome.update(status=TX_FAILED, error=f"Not sealed within {SETTLE_TIMEOUT}")
+    return outcome
+
+
+def _merge_result_data(cursor: sqlite3.Cursor, execution_id: str, extra: Dict[str, Any]) -> str:
+    cursor.execute("SELECT result_data FROM AgentExecutions WHERE execution_id = ?", (execution_id,))
+    row = cursor.fetchone()
+    try:
+        data = json.loads(row[0]) if row and row[0] else {}
+    except ValueError:
+        data = {}
+    data.update(extra)
+    return json.dumps(data)
+
+
+def settle_transactions(cursor: sqlite3.Cursor, claimed: List[Dict[str, Any]], outcomes: List[Dict[str, Any]],
+                        now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Store the outcome of one batch of checks. Does not commit.
+
+    Pending transactions get their next check scheduled with backoff. Sealed and failed ones
+    are settled together with their AgentExecutions row (status 'completed' or 'failed') and
+    payout rows, which are only moved while they are still 'submitted'.
+
+    Returns:
+        Dict[str, int]: Number of transactions sealed, failed and still pending.
+    """
+    now = now or datetime.now()
+    now_iso = now.isoformat()
+    by_id = {tx['transaction_id']: tx for tx in claimed}
+    counts = {TX_SEALED: 0, TX_FAILED: 0, TX_SUBMITTED: 0}
+    pending_rows, settled_rows, execution_rows, schedule_rows, distribution_rows = [], [], [], [], []
+
+    for outcome in outcomes:
+        tx = by_id[outcome['transaction_id']]
+        counts[outcome['status']] += 1
+        if outcome['status'] == TX_SUBMITTED:
+            attempts = tx['attempts'] + 1
+            pending_rows.append((attempts, outcome['flow_status'], outcome['error'], now_iso,
+                                 (now + timedelta(seconds=next_check_delay(attempts))).isoformat(), tx['transaction_id']))
+            continue
+
+        sealed = outcome['status'] == TX_SEALED
+        settled_rows.append((outcome['status'], outcome['flow_status'], outcome['error'], json.dumps(outcome['events']),
+                             now_iso, now_iso, tx['transaction_id']))
+        if tx['execution_id']:
+            extra = {'transaction_id': tx['transaction_id'], 'transaction_status': outcome['status'],
+                     'sealed_at' if sealed else 'failed_at': now_iso, 'events': outcome['events']}
+            if not sealed:
+                extra['error'] = outcome['error']
+            execution_rows.append(('completed' if sealed else 'failed', outcome['error'],
+                                   _merge_result_data(cursor, tx['execution_id'], extra), tx['execution_id']))
+        if tx['payout_id']:
+            schedule_rows.append(('completed' if sealed else 'failed', now_iso, tx['payout_id']))
+            distribution_rows.append(('completed' if sealed else 'failed', outcome['error'], tx['payout_id'], tx['transaction_id']))
+
+    cursor.executemany("""
+        UPDATE FlowTransactions
+        SET attempts = ?, flow_status = COALESCE(?, flow_status), error_message = ?, last_checked_at = ?, next_check_at = ?
+        WHERE transaction_id = ?
+    """, pending_rows)
+    cursor.executemany("""
+        UPDATE FlowTransactions
+        SET status = ?, flow_status = ?, error_message = ?, events = ?, last_checked_at = ?, settled_at = ?,
+            attempts = attempts + 1
+        WHERE transaction_id = ?
+    """, settled_rows)
+    cursor.executemany("""
+        UPDATE AgentExecutions
+        SET status = ?, error_message = ?, result_data = ?, updated_at = datetime('now')
+        WHERE execution_id = ? AND status = 'submitted'
+    """, execution_rows)
+    cursor.executemany("""
+        UPDATE PayoutSchedules
+        SET payout_status = ?, execution_date = ?, updated_at = datetime('now')
+        WHERE payout_id = ? AND payout_status = 'submitted'
+    """, schedule_rows)
+    cursor.executemany("""
+        UPDATE PayoutDistributions
+        SET status = ?, error_message = ?, updated_at = datetime('now')
+        WHERE payout_id = ? AND transaction_id = ? AND status = 'submitted'
+    """, distribution_rows)
+    return counts
+
+
+def run_tracker_cycle(conn: sqlite3.Connection, client: Any, batch_size: int = DEFAULT_BATCH_SIZE,
+                      max_workers: int = DEFAULT_FETCH_WORKERS) -> Dict[str, int]:
+    """
+    Check one batch of due transactions and settle the results in one write transaction.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        client (Any): Object with get_transaction_result(transaction_id), e.g. FlowAccessClient.
+        batch_size (int): Most transactions checked per cycle.
+        max_workers (int): Concurrent access node requests.
+
+    Returns:
+        Dict[str, int]: 'checked', plus the sealed/failed/submitted counts of settle_transactions.
+    """
+    if not tracker_table_exists(conn.cursor()):
+        return {'checked': 0}
+    claimed = claim_due_transactions(conn, batch_size)
+    if not claimed:
+        return {'checked': 0}
+
+    def check(tx: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return _outcome(tx, client.get_transaction_result(tx['transaction_id']), None, datetime.now())
+        except Exception as e:
+            return _outcome(tx, None, f"Status check failed: {e}", datetime.now())
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(claimed)))) as executor:
+        outcomes = list(executor.map(check, claimed))
+
+    with conn:
+        counts = settle_transactions(conn.cursor(), claimed, outcomes)
+    if counts[TX_SEALED] or counts[TX_FAILED]:
+        logger.info(f"flow_tx_tracker: {counts[TX_SEALED]} sealed, {counts[TX_FAILED]} failed, {counts[TX_SUBMITTED]} pending")
+    return {'checked': len(claimed), **counts}
+
+
+def seconds_until_next_check(conn: sqlite3.Connection) -> Optional[float]:
+    """Seconds until the earliest pending check is due (0 if overdue), or None when nothing is pending."""
+    row = conn.execute("SELECT MIN(next_check_at) FROM FlowTransactions WHERE status = ?", (TX_SUBMITTED,)).fetchone()
+    if not row or not row[0]:
+        return None
+    return max(0.0, (datetime.fromisoformat(row[0]) - datetime.now()).total_seconds())
+
+
+def list_flow_transactions(cursor: sqlite3.Cursor, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """Tracked transactions, newest first, with events decoded."""
+    where, params = ('WHERE status = ?', [status]) if status else ('', [])
+    cursor.execute(f"""
+        SELECT transaction_id, tx_kind, execution_id, payout_id, status, flow_status, error_message, events,
+               attempts, submitted_at, last_checked_at, settled_at
+        FROM FlowTransactions {where}
+        ORDER BY submitted_at DESC
+        LIMIT ?
+    """, params + [limit])
+    columns = [d[0] for d in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    for row in rows:
+        row['events'] = json.loads(row['events']) if row['events'] else []
+    return rows
+
+
+class TransactionTracker:
+    """
+    Runs run_tracker_cycle on a daemon thread until stopped.
+
+    Sleeps until the earliest pending check is due, at most interval seconds, so new
+    submissions from any process are picked up within one interval.
+
+    Args:
+        db_path (str): Keeper database file.
+        client (Any): Access node client, see run_tracker_cycle.
+        interval (float): Longest sleep between cycles.
+        batch_size (int): Most transactions checked per cycle.
+        busy_timeout (float): Seconds to wait for the database write lock.
+    """
+
+    def __init__(self, db_path: str, client: Any, interval: float = DEFAULT_INTERVAL,
+                 batch_size: int = DEFAULT_BATCH_SIZE, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def wake(self) -> None:
+        """Check due transactions now instead of after the current sleep."""
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start tracking in the background."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='flow-tx-tracker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current cycle."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            while not self._stopping:
+                delay = self.interval
+                try:
+                    result = run_tracker_cycle(conn, self.client, self.batch_size)
+                    if result['checked'] >= self.batch_size:
+                        delay = 0  # More due right away
+                    elif tracker_table_exists(conn.cursor()):
+                        next_due = seconds_until_next_check(conn)
+                        if next_due is not None:
+                            delay = min(delay, next_due)
+                except Exception as e:
+                    logger.error(f"flow_tx_tracker: Cycle failed: {e}")
+                self._wake.wait(delay)
+                self._wake.clear()
+        finally:
+            conn.close()
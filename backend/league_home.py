@@ -0,0 +1,80 @@
+"""
+Home view of the leagues a wallet belongs to, behind /league/local.
+
+One query returns every linked league together with its teams (rosters joined
+with their owners); rows are grouped into leagues in Python. total_rosters is
+read from the LeagueMetadata column the league sync fills, so no settings JSON
+is parsed per request. The query count stays the same however many leagues the
+user is in.
+"""
+import sqlite3
+from typing import Any, Dict, List
+
+# Leagues without rosters still come back once, with r.* NULL. The user's own team sorts first.
+USER_LEAGUES_WITH_TEAMS_QUERY = '''
+    SELECT
+        lm.sleeper_league_id,
+        lm.name,
+        lm.season,
+        lm.status,
+        lm.avatar,
+        lm.total_rosters,
+        r.sleeper_roster_id,
+        r.team_name,
+        u.display_name AS manager_name,
+        u.username,
+        u.sleeper_user_id,
+        r.wins,
+        r.losses,
+        r.ties
+    FROM UserLeagueLinks ull
+    JOIN LeagueMetadata lm ON lm.sleeper_league_id = ull.sleeper_league_id
+    LEFT JOIN rosters r ON r.sleeper_league_id = lm.sleeper_league_id
+    LEFT JOIN Users u ON u.sleeper_user_id = r.owner_id
+    WHERE ull.wallet_address = ?
+    ORDER BY
+        lm.sleeper_league_id,
+        CASE WHEN u.sleeper_user_id = ? THEN 0 ELSE 1 END,
+        r.team_name
+'''
+
+
+def get_user_leagues_with_teams(cursor: sqlite3.Cursor, wallet_address: str, sleeper_user_id: str) -> List[Dict[str, Any]]:
+    """
+    Leagues linked to a wallet, each with its teams, in one query.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        wallet_address (str): Wallet whose UserLeagueLinks are listed.
+        sleeper_user_id (str): The wallet's Sleeper user, whose team is listed first in each league.
+
+    Returns:
+        List[Dict[str, Any]]: league_id, name, season, status, avatar, total_rosters and teams
+            per league, in the shape /league/local returns.
+    """
+    cursor.execute(USER_LEAGUES_WITH_TEAMS_QUERY, (wallet_address, sleeper_user_id))
+    leagues: Dict[str, Dict[str, Any]] = {}
+    for (league_id, name, season, status, avatar, total_rosters, roster_id, team_name,
+         manager_name, username, owner_user_id, wins, losses, ties) in cursor.fetchall():
+        league = leagues.get(league_id)
+        if league is None:
+            league = leagues[league_id] = {
+                'league_id': league_id,
+                'name': name,
+                'season': season,
+                'status': status,
+                'avatar': avatar,
+                'total_rosters': total_rosters,
+                'teams': [],
+            }
+        if roster_id is None:
+            continue
+        league['teams'].append({
+            'roster_id': roster_id,
+            'team_name': team_name or 'Unknown Team',
+            'manager_name': manager_name or username or 'Unknown Manager',
+            'username': username,
+            'sleeper_user_id': owner_user_id,
+            'record': f"{wins}-{losses}-{ties}",
+        })
+    return list(leagues.values())
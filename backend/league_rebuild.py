@@ -0,0 +1,173 @@
+"""
+Deterministic offline rebuild of a league's derived tables from archived Sleeper payloads.
+
+A league's rosters, transactions, drafts, draft picks, contracts and penalties
+are deleted and rebuilt by replaying every archived sync of the league, oldest
+first, through SleeperService's own fetch and store code with a
+ReplayHttpClient. Each sync sees the responses as they were when it ran, so
+roster diffs (and the penalties of dropped players) come out as they did live.
+The season used for penalties is taken from the archived /state/nfl of each
+sync rather than from season_curr.
+
+Contract durations chosen by managers are not in Sleeper's data; they are read
+before the delete and put back on the rebuilt contracts after every replayed sync.
+
+Leagues are independent, so rebuild_leagues() replays them in parallel worker
+processes; each league's writes are one transaction.
+"""
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from league_shards import connect_league_db
+from payload_archive import PayloadArchive, ReplayHttpClient
+from sleeper_service import SleeperService
+from team_snapshots import rebuild_league_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Derived rows of one league, deleted children first
+_DELETE_LEAGUE_ROWS = [
+    "DELETE FROM penalties WHERE contract_id IN (SELECT rowid FROM contracts WHERE sleeper_league_id = :league)",
+    "DELETE FROM contracts WHERE sleeper_league_id = :league",
+    "DELETE FROM transaction_players WHERE sleeper_transaction_id IN (SELECT sleeper_transaction_id FROM transactions WHERE league_id = :league)",
+    "DELETE FROM transaction_rosters WHERE sleeper_transaction_id IN (SELECT sleeper_transaction_id FROM transactions WHERE league_id = :league)",
+    "DELETE FROM transactions WHERE league_id = :league",
+    "DELETE FROM draft_picks WHERE league_id = :league",
+    "DELETE FROM drafts WHERE league_id = :league",
+    "DELETE FROM rosters WHERE sleeper_league_id = :league",
+]
+
+
+def season_details_from_nfl_state(nfl_state: Optional[Dict[str, Any]], on: date) -> Optional[Dict[str, Any]]:
+    """
+    Season year and off-season flag as fetch_all_data derives them from /state/nfl, on a given day.
+
+    Returns:
+        Optional[Dict[str, Any]]: {'current_year': int, 'is_offseason': bool}, or None without a usable season.
+    """
+    try:
+        year = int((nfl_state or {}).get('season'))
+    except (TypeError, ValueError):
+        return None
+    try:
+        is_offseason = on < date.fromisoformat(nfl_state['season_start_date'])
+    except (KeyError, TypeError, ValueError):
+        is_offseason = True  # fetch_all_data's default
+    return {'current_year': year, 'is_offseason': is_offseason}
+
+
+def _replay_syncs(archive: PayloadArchive, conn: sqlite3.Connection,
+                  league_id: str) -> List[Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """(league details, league sync, season details) of every archived sync of a league, oldest first."""
+    points = archive.sync_points(league_id)
+    syncs = []
+    for index, started_at in enumerate(points):
+        before = points[index + 1] if index + 1 < len(points) else None
+        # conn is only read (stored matchup weeks); every response comes from the archive
+        service = SleeperService(db_connection=conn, http_client=ReplayHttpClient(archive, before))
+        details = service.get_league(league_id)
+        if not details:
+            continue
+        season_details = season_details_from_nfl_state(service.get_nfl_state(), date.fromisoformat(started_at[:10]))
+        fallback_season = str(season_details['current_year']) if season_details else str(details.get('season'))
+        league_sync = service._fetch_league_sync_data(league_id, details, fallback_season, season_details)
+        syncs.append((details, league_sync, season_details))
+    return syncs
+
+
+def rebuild_league(db_path: str, archive_path: str, league_id: str, busy_timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    Rebuild one league's derived tables from the archive, in one transaction.
+
+    The archived responses are decoded and assembled before the write lock is taken.
+
+    Returns:
+        Dict[str, Any]: league_id, syncs replayed and the rebuilt row counts, or 'skipped' with a reason.
+    """
+    archive = PayloadArchive(archive_path)
+    # Sharded databases: the league's shard with the core attached (see league_shards.py)
+    conn = connect_league_db(db_path, league_id, timeout=busy_timeout)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        syncs = _replay_syncs(archive, conn, league_id)
+        if not syncs:
+            return {'league_id': league_id, 'skipped': 'no archived syncs'}
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        wallet = cursor.execute("SELECT MIN(wallet_address) FROM UserLeagueLinks WHERE sleeper_league_id = ?", (league_id,)).fetchone()[0]
+        if wallet is None:
+            conn.rollback()
+            return {'league_id': league_id, 'skipped': 'no linked wallet'}
+        durations = cursor.execute("""
+            SELECT player_id, team_id, contract_year, duration FROM contracts
+            WHERE sleeper_league_id = ? AND duration IS NOT NULL AND duration != 1
+        """, (league_id,)).fetchall()
+        for statement in _DELETE_LEAGUE_ROWS:
+            cursor.execute(statement, {'league': league_id})
+
+        # Storing reads nothing from Sleeper; the replay client only keeps the service off the network
+        service = SleeperService(db_connection=conn, http_client=ReplayHttpClient(archive))
+        for details, league_sync, season_details in syncs:
+            service._store_league_sync_data(cursor, wallet, league_id, details, league_sync, season_details)
+            cursor.executemany("""
+                UPDATE contracts SET duration = ? WHERE sleeper_league_id = ? AND player_id = ? AND team_id = ? AND contract_year = ?
+            """, [(row['duration'], league_id, row['player_id'], row['team_id'], row['contract_year']) for row in durations])
+
+        season_row = cursor.execute("SELECT current_year, IsOffSeason FROM season_curr LIMIT 1").fetchone()
+        if season_row and season_row['current_year'] is not None:
+            rebuild_league_snapshots(conn, league_id, int(season_row['current_year']), bool(season_row['IsOffSeason']))
+        counts = {table: cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} = ?", (league_id,)).fetchone()[0]
+                  for table, column in (('rosters', 'sleeper_league_id'), ('transactions', 'league_id'),
+                                        ('drafts', 'league_id'), ('contracts', 'sleeper_league_id'))}
+        counts['penalties'] = cursor.execute("""
+            SELECT COUNT(*) FROM penalties WHERE contract_id IN (SELECT rowid FROM contracts WHERE sleeper_league_id = ?)
+        """, (league_id,)).fetchone()[0]
+        conn.commit()
+        return {'league_id': league_id, 'syncs': len(syncs), 'rows': counts}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        archive.close()
+
+
+def _rebuild_league_job(args: Tuple[str, str, str]) -> Dict[str, Any]:
+    db_path, archive_path, league_id = args
+    try:
+        return rebuild_league(db_path, archive_path, league_id)
+    except Exception as e:
+        logger.error(f"league_rebuild: Rebuild of league {league_id} failed: {e}")
+        return {'league_id': league_id, 'error': str(e)}
+
+
+def rebuild_leagues(db_path: str, archive_path: str, league_ids: Optional[List[str]] = None,
+                    workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    Rebuild many leagues in parallel worker processes.
+
+    Args:
+        db_path (str): Keeper database file.
+        archive_path (str): Payload archive file.
+        league_ids (Optional[List[str]]): Leagues to rebuild; every archived league by default.
+        workers (int): Worker processes; 1 rebuilds in this process.
+
+    Returns:
+        List[Dict[str, Any]]: rebuild_league's result per league, with 'error' for failed ones.
+    """
+    if league_ids is None:
+        archive = PayloadArchive(archive_path)
+        try:
+            league_ids = archive.league_ids()
+        finally:
+            archive.close()
+    jobs = [(db_path, archive_path, league_id) for league_id in league_ids]
+    if workers <= 1 or len(jobs) <= 1:
+        return [_rebuild_league_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_rebuild_league_job, jobs))
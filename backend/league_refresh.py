@@ -0,0 +1,415 @@
+"""
+Activity-aware refresh schedule for the stored SKL leagues.
+
+Without it a league's data is only as fresh as the last login of one of its managers.
+LeagueRefreshScheduler gives every SKL league a cadence from its state:
+
+- LeagueMetadata.status 'complete': never refreshed again;
+- 'drafting': a full sync every 15 minutes, so auction picks become contracts;
+- NFL offseason (season_curr.IsOffSeason) or 'pre_draft': a full sync once a day;
+- in season, by the US/Eastern activity window of the NFL week and day:
+  'game' (Thursday, Sunday and Monday games, Saturdays from week 15), 'waivers'
+  (Wednesday morning, when Sleeper processes claims) and 'week' (everything else).
+
+In season a league is refreshed in scopes (see SleeperService.refresh_league): 'moves'
+(rosters and the current week's transactions), 'scores' (rosters and newly completed
+weeks' matchups) and 'full'. A full sync counts as a run of the narrower scopes.
+
+Every cycle one worker claims the 'league_refresh' task in db_maintenance, fetches
+/state/nfl once, plans every (league, scope) from league_refresh_schedule and runs the
+due ones, most overdue first. due_tasks() bounds the stream to max_tasks per cycle and
+to the calls left in a budget of call_budget Sleeper calls per hour, refilled
+continuously and carried between cycles (and workers) in the task's last result; the
+calls a task actually makes are counted and charged. Whatever does not fit waits for
+the next cycle in the same order.
+"""
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from db_maintenance import claim_task, record_task_result
+from sleeper_client import get_sleeper_client
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    EASTERN = ZoneInfo('America/New_York')
+except Exception:  # Windows without the tzdata package; EST is off by an hour in September and October
+    EASTERN = timezone(timedelta(hours=-5))
+
+DEFAULT_REFRESH_INTERVAL = 60  # Seconds between scheduling cycles
+DEFAULT_CALL_BUDGET = 1800  # Sleeper calls per hour spent on scheduled refreshes
+DEFAULT_MAX_TASKS = 25  # Sync tasks run per cycle
+BURST_SECONDS = 600  # Unspent budget is carried over up to this many seconds' worth
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+SCOPE_MOVES = 'moves'
+SCOPE_SCORES = 'scores'
+SCOPE_FULL = 'full'
+REFRESH_SCOPES = (SCOPE_MOVES, SCOPE_SCORES, SCOPE_FULL)
+
+# (scope, seconds between runs) of an in-season league, per activity window
+IN_SEASON_CADENCE = {
+    'game': ((SCOPE_MOVES, 10 * MINUTE), (SCOPE_SCORES, 30 * MINUTE), (SCOPE_FULL, DAY)),
+    'waivers': ((SCOPE_MOVES, 5 * MINUTE), (SCOPE_SCORES, 6 * HOUR), (SCOPE_FULL, DAY)),
+    'week': ((SCOPE_MOVES, 2 * HOUR), (SCOPE_SCORES, 6 * HOUR), (SCOPE_FULL, DAY)),
+}
+DRAFTING_CADENCE = ((SCOPE_FULL, 15 * MINUTE),)
+OFFSEASON_CADENCE = ((SCOPE_FULL, DAY),)
+
+# (weekday, first hour, end hour) in US/Eastern time; Monday is 0. Late games run past midnight.
+GAME_WINDOWS = ((3, 19, 24), (4, 0, 1), (6, 9, 24), (0, 0, 1), (0, 19, 24), (1, 0, 1))
+LATE_SEASON_GAME_WINDOWS = ((5, 12, 24), (6, 0, 1))  # Saturday games from LATE_SEASON_WEEK
+LATE_SEASON_WEEK = 15
+WAIVER_WINDOWS = ((2, 0, 12),)
+
+LEAGUE_REFRESH_DDL = '''CREATE TABLE IF NOT EXISTS league_refresh_schedule (
+                           sleeper_league_id TEXT NOT NULL,
+                           scope TEXT NOT NULL, -- 'moves', 'scores' or 'full'
+                           last_run_at TEXT, -- UTC, when the scheduler last started this refresh
+                           calls INTEGER, -- Sleeper calls the last run made
+                           last_status TEXT, -- 'synced', 'skipped' or 'failed'
+                           last_error TEXT,
+                           PRIMARY KEY (sleeper_league_id, scope)
+                           )'''
+
+
+def create_refresh_table(cursor: sqlite3.Cursor) -> None:
+    """Create league_refresh_schedule. Does not commit."""
+    cursor.execute(LEAGUE_REFRESH_DDL)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec='seconds')
+
+
+def _in_windows(local: datetime, windows: Tuple[Tuple[int, int, int], ...]) -> bool:
+    return any(local.weekday() == weekday and start <= local.hour < end for weekday, start, end in windows)
+
+
+def activity_window(now: datetime, nfl_state: Optional[Dict[str, Any]]) -> str:
+    """
+    'game', 'waivers' or 'week': what Sleeper data is changing at a UTC time of the NFL week.
+
+    Outside the regular season every day is 'week'.
+    """
+    if not nfl_state or nfl_state.get('season_type') != 'regular':
+        return 'week'
+    local = now.replace(tzinfo=timezone.utc).astimezone(EASTERN)
+    week = int(nfl_state.get('week') or 0)
+    if _in_windows(local, GAME_WINDOWS) or (week >= LATE_SEASON_WEEK and _in_windows(local, LATE_SEASON_GAME_WINDOWS)):
+        return 'game'
+    if _in_windows(local, WAIVER_WINDOWS):
+        return 'waivers'
+    return 'week'
+
+
+def league_cadence(status: Optional[str], is_offseason: bool, nfl_state: Optional[Dict[str, Any]],
+                   now: datetime) -> Tuple[str, Tuple[Tuple[str, int], ...]]:
+    """
+    Why and how often a league is refreshed.
+
+    Args:
+        status (Optional[str]): LeagueMetadata.status ('pre_draft', 'drafting', 'in_season', 'complete').
+        is_offseason (bool): season_curr.IsOffSeason.
+        nfl_state (Optional[Dict[str, Any]]): Sleeper /state/nfl response.
+        now (datetime): Current UTC time.
+
+    Returns:
+        Tuple[str, Tuple[Tuple[str, int], ...]]: The reason ('complete', 'drafting', 'offseason',
+            'pre_draft' or the activity window) and its (scope, seconds) cadences, empty when the
+            league is not refreshed.
+    """
+    status = (status or '').lower()
+    if status == 'complete':
+        return 'complete', ()
+    if status == 'drafting':
+        return 'drafting', DRAFTING_CADENCE
+    if is_offseason:
+        return 'offseason', OFFSEASON_CADENCE
+    if status == 'pre_draft':
+        return 'pre_draft', OFFSEASON_CADENCE
+    window = activity_window(now, nfl_state)
+    return window, IN_SEASON_CADENCE[window]
+
+
+def estimate_calls(scope: str, nfl_state: Optional[Dict[str, Any]], is_offseason: bool) -> int:
+    """Sleeper calls a refresh is expected to make (see SleeperService.refresh_league)."""
+    if scope == SCOPE_MOVES:
+        return 4  # League, users, rosters, this week's transactions
+    if scope == SCOPE_SCORES:
+        return 4  # League, users, rosters, the last completed week again
+    week = int((nfl_state or {}).get('week') or 0) if not is_offseason else 1
+    # League, users, rosters, /state/nfl, a week of transactions each, a week of matchups, drafts and picks
+    return 4 + max(week, 1) + 1 + (2 if is_offseason else 0)
+
+
+def plan_refreshes(cursor: sqlite3.Cursor, nfl_state: Optional[Dict[str, Any]],
+                   now: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Next run of every scope of every SKL league.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the core database.
+        nfl_state (Optional[Dict[str, Any]]): Sleeper /state/nfl response.
+        now (Optional[datetime]): Current UTC time, for tests.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Planned refreshes (league_id, scope, reason,
+            interval_seconds, last_run_at, next_run_at, due, estimated_calls), earliest first; and the
+            leagues not refreshed (league_id, status).
+    """
+    now = now or _utcnow()
+    season = cursor.execute("SELECT IsOffSeason FROM season_curr LIMIT 1").fetchone()
+    is_offseason = bool(season[0]) if season and season[0] is not None else True
+    last_runs: Dict[Tuple[str, str], datetime] = {}
+    for league_id, scope, last_run_at in cursor.execute(
+            "SELECT sleeper_league_id, scope, last_run_at FROM league_refresh_schedule WHERE last_run_at IS NOT NULL"):
+        last_runs[(league_id, scope)] = datetime.fromisoformat(last_run_at)
+
+    planned, idle = [], []
+    for league_id, status in cursor.execute(
+            "SELECT sleeper_league_id, status FROM LeagueMetadata WHERE name LIKE 'SKL%' ORDER BY sleeper_league_id").fetchall():
+        reason, cadences = league_cadence(status, is_offseason, nfl_state, now)
+        if not cadences:
+            idle.append({'league_id': league_id, 'status': status})
+            continue
+        full_run = last_runs.get((league_id, SCOPE_FULL))
+        for scope, seconds in cadences:
+            # A full sync also covers the narrower scopes
+            runs = [run for run in (last_runs.get((league_id, scope)), full_run) if run is not None]
+            last_run = max(runs) if runs else None
+            next_run = last_run + timedelta(seconds=seconds) if last_run else now
+            planned.append({
+                'league_id': league_id,
+                'scope': scope,
+                'reason': reason,
+                'interval_seconds': seconds,
+                'last_run_at': _timestamp(last_run) if last_run else None,
+                'next_run_at': _timestamp(next_run),
+                'due': next_run <= now,
+                'estimated_calls': estimate_calls(scope, nfl_state, is_offseason),
+            })
+    planned.sort(key=lambda task: (task['next_run_at'], task['league_id'], REFRESH_SCOPES.index(task['scope'])))
+    return planned, idle
+
+
+def due_tasks(plan: List[Dict[str, Any]], calls_available: float, max_tasks: int) -> Iterator[Dict[str, Any]]:
+    """
+    The due refreshes of a plan, most overdue first, up to max_tasks and calls_available estimated calls.
+
+    Stops at the first task that does not fit rather than skipping to cheaper ones, so an
+    expensive refresh is not starved by a stream of cheap ones.
+    """
+    spent = 0
+    emitted = 0
+    for task in plan:
+        if not task['due'] or emitted >= max_tasks or spent + task['estimated_calls'] > calls_available:
+            return
+        spent += task['estimated_calls']
+        emitted += 1
+        yield task
+
+
+def _mark_started(conn: sqlite3.Connection, tasks: List[Dict[str, Any]], now: datetime) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany('''
+            INSERT INTO league_refresh_schedule (sleeper_league_id, scope, last_run_at) VALUES (?, ?, ?)
+            ON CONFLICT(sleeper_league_id, scope) DO UPDATE SET last_run_at = excluded.last_run_at
+        ''', [(task['league_id'], task['scope'], _timestamp(now)) for task in tasks])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _record_run(conn: sqlite3.Connection, task: Dict[str, Any], calls: int, status: str, error: Optional[str]) -> None:
+    conn.execute("""
+        UPDATE league_refresh_schedule SET calls = ?, last_status = ?, last_error = ?
+        WHERE sleeper_league_id = ? AND scope = ?
+    """, (calls, status, error, task['league_id'], task['scope']))
+
+
+def last_cycle(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+    """Result of the last refresh cycle of any worker, or None before the first."""
+    row = conn.execute("SELECT last_result FROM db_maintenance WHERE task = 'league_refresh'").fetchone()
+    return json.loads(row[0]) if row and row[0] else None
+
+
+def calls_available(previous: Optional[Dict[str, Any]], call_budget: float, now: datetime) -> float:
+    """Budget left for a cycle: the last cycle's remainder refilled at call_budget per hour, capped at BURST_SECONDS' worth."""
+    cap = call_budget * BURST_SECONDS / HOUR
+    if not previous or previous.get('budget_remaining') is None:
+        return cap
+    elapsed = max((now - datetime.fromisoformat(previous['finished_at'])).total_seconds(), 0.0)
+    return min(cap, previous['budget_remaining'] + elapsed * call_budget / HOUR)
+
+
+class CallCounter:
+    """Wraps a Sleeper client and counts the calls made through it."""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_json(self, path: str, cache: bool = True) -> Any:
+        with self._lock:
+            self.calls += 1
+        return self.client.get_json(path, cache=cache)
+
+
+class LeagueRefreshScheduler:
+    """
+    Plans and runs league refreshes every interval seconds on a daemon thread.
+
+    Args:
+        db_path (str): Keeper database file.
+        service_factory (Callable[[Any], Any]): Builds a SleeperService around the given HTTP client.
+        interval (float): Seconds between cycles.
+        call_budget (float): Sleeper calls per hour the refreshes may make.
+        max_tasks (int): Refreshes run per cycle.
+        busy_timeout (float): Seconds to wait on locks.
+        http_client (Optional[Any]): Sleeper client; the process-wide one by default.
+    """
+
+    def __init__(self, db_path: str, service_factory: Callable[[Any], Any], interval: float = DEFAULT_REFRESH_INTERVAL,
+                 call_budget: float = DEFAULT_CALL_BUDGET, max_tasks: int = DEFAULT_MAX_TASKS, busy_timeout: float = 30.0,
+                 http_client: Optional[Any] = None):
+        self.db_path = db_path
+        self.service_factory = service_factory
+        self.interval = interval
+        self.call_budget = call_budget
+        self.max_tasks = max_tasks
+        self.busy_timeout = busy_timeout
+        self.http_client = http_client
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'cycles': 0, 'failed_cycles': 0, 'synced': 0, 'skipped': 0, 'failed': 0, 'calls': 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, force: bool = False, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run one cycle unless another worker ran one within the interval.
+        Errors are logged and returned, never raised; a failed refresh does not stop the cycle.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cycle's summary, or None when not due.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+        try:
+            if not claim_task(conn, 'league_refresh', timedelta(0) if force else timedelta(seconds=self.interval * 0.9)):
+                return None
+            started_at = now or _utcnow()
+            available = calls_available(last_cycle(conn), self.call_budget, started_at)
+            counter = CallCounter(self.http_client or get_sleeper_client())
+            service = self.service_factory(counter)
+            nfl_state = service.get_nfl_state()
+            plan, _ = plan_refreshes(conn.cursor(), nfl_state, started_at)
+            tasks = list(due_tasks(plan, available - counter.calls, self.max_tasks))
+            if tasks:
+                _mark_started(conn, tasks, started_at)
+
+            counts = {'synced': 0, 'skipped': 0, 'failed': 0}
+            for task in tasks:
+                calls_before = counter.calls
+                error = None
+                try:
+                    status = service.refresh_league(task['league_id'], task['scope'], nfl_state)['status']
+                except Exception as e:
+                    logger.error(f"league_refresh: {task['scope']} refresh of league {task['league_id']} failed: {e}")
+                    status, error = 'failed', str(e)
+                counts[status] += 1
+                _record_run(conn, task, counter.calls - calls_before, status, error)
+
+            finished_at = started_at if now else _utcnow()  # A fixed now (tests) stands for the whole cycle
+            result = {
+                'started_at': _timestamp(started_at),
+                'finished_at': _timestamp(finished_at),
+                'nfl_state': {key: (nfl_state or {}).get(key) for key in ('season', 'season_type', 'week')},
+                'tasks': len(tasks),
+                **counts,
+                'deferred': sum(1 for task in plan if task['due']) - len(tasks),
+                'calls': counter.calls,
+                'budget_remaining': round(available - counter.calls, 1),
+            }
+            record_task_result(conn, 'league_refresh', result)
+            with self._stats_lock:
+                self._stats['cycles'] += 1
+                self._stats['calls'] += counter.calls
+                for status, count in counts.items():
+                    self._stats[status] += count
+        except Exception as e:
+            logger.error(f"league_refresh: Cycle failed: {e}")
+            result = {'status': 'failed', 'error': str(e)}
+            with self._stats_lock:
+                self._stats['failed_cycles'] += 1
+        finally:
+            conn.close()
+        self.last_result = result
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters of this process's cycles and refreshes, and the last cycle."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['last_result'] = self.last_result
+        return stats
+
+    def start(self) -> None:
+        """Start refreshing in the background (first cycle immediately)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='league-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current refresh cycle."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+
+def refresh_plan(conn: sqlite3.Connection, call_budget: float, limit: int = 100,
+                 now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Next-run plan for the admin screen, from the stored schedule and the last cycle's NFL state. Reads only.
+
+    Returns:
+        Dict[str, Any]: generated_at, window, last_cycle, budget (calls_per_hour, available_now),
+            due_now, estimated_calls_due, the first limit planned refreshes and the idle leagues.
+    """
+    now = now or _utcnow()
+    previous = last_cycle(conn)
+    nfl_state = previous.get('nfl_state') if previous else None
+    plan, idle = plan_refreshes(conn.cursor(), nfl_state, now)
+    due = [task for task in plan if task['due']]
+    return {
+        'generated_at': _timestamp(now),
+        'window': activity_window(now, nfl_state),
+        'last_cycle': previous,
+        'budget': {'calls_per_hour': call_budget, 'available_now': round(calls_available(previous, call_budget, now), 1)},
+        'due_now': len(due),
+        'estimated_calls_due': sum(task['estimated_calls'] for task in due),
+        'planned': plan[:limit],
+        'idle_leagues': idle,
+    }
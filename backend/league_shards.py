@@ -0,0 +1,381 @@
+"""
+League-sharded layout of the keeper database.
+
+SQLite allows one writer per file, so syncs of different leagues queue behind each other
+in a single keeper.db. scripts/split_database.py moves the league-scoped tables (rosters,
+contracts, penalties, transactions, drafts, trades, matchups, playoff placements, team
+snapshots) into N shard files chosen by a hash of the Sleeper league ID; Users, sessions,
+players, LeagueMetadata, fees and every other cross-league table stay in the core file.
+The layout is recorded in the core file (db_shard_layout); without it the database is a
+single file and every helper here falls back to it.
+
+In the core file the league tables stay behind as empty templates: init_db keeps creating
+and migrating them, ensure_shard_schema copies new columns and indexes to the shards, and
+guard triggers reject any row that reaches a template instead of a shard.
+
+Connections:
+- connect_league_db(): the league's shard as main with the core attached as 'core', so
+  unqualified SQL finds league tables in the shard and everything else in the core.
+- attach_shards() / connect_core(): the core as main with every shard attached read-only
+  and TEMP views named like the league tables (UNION ALL over the shards) for reads.
+
+A read-only attachment takes no lock in BEGIN IMMEDIATE, which is what lets a shard's
+writer commit while other shards (and the core) are written. Commits touching the core
+and a shard are atomic per file only.
+
+Shards get disjoint AUTOINCREMENT ranges (SHARD_ID_SPAN apart), so trade, contract and
+penalty IDs stay unique across files. Foreign keys to core tables are dropped from the
+shard copies (SQLite cannot check them across files); keys between league tables are kept.
+"""
+import logging
+import os
+import re
+import sqlite3
+import zlib
+from typing import Any, Dict, List, Optional
+from urllib.request import pathname2url
+
+from db_maintenance import create_maintenance_table
+
+logger = logging.getLogger(__name__)
+
+MAX_SHARDS = 8  # SQLite attaches at most 10 databases; the core connection attaches every shard
+SHARD_ID_SPAN = 10 ** 12  # AUTOINCREMENT IDs of shard i start above (i + 1) * SHARD_ID_SPAN
+CORE_SCHEMA = 'core'
+
+# League tables and the column holding their Sleeper league ID, parents first
+SHARD_KEYS = {
+    'rosters': 'sleeper_league_id',
+    'contracts': 'sleeper_league_id',
+    'transactions': 'league_id',
+    'drafts': 'league_id',
+    'draft_picks': 'league_id',
+    'matchups': 'league_id',
+    'trades': 'sleeper_league_id',
+    'trade_items': 'sleeper_league_id',
+    'team_page_snapshots': 'sleeper_league_id',
+    'PlayoffBrackets': 'sleeper_league_id',  # Migration 002
+    'PlayoffMatchups': 'sleeper_league_id',  # Migration 002
+    'LeaguePlacements': 'sleeper_league_id',  # Migration 002
+}
+
+# League tables without a league column: (column, parent table, parent column)
+SHARD_CHILDREN = {
+    'penalties': ('contract_id', 'contracts', 'rowid'),
+    'transaction_players': ('sleeper_transaction_id', 'transactions', 'sleeper_transaction_id'),
+    'transaction_rosters': ('sleeper_transaction_id', 'transactions', 'sleeper_transaction_id'),
+    'trade_approvals': ('trade_id', 'trades', 'trade_id'),
+}
+
+SHARDED_TABLES = tuple(SHARD_KEYS) + tuple(SHARD_CHILDREN)
+
+# Views over league tables; recreated as TEMP views so they read the shards
+SHARDED_VIEWS = ('vw_contractByYear',)
+
+SHARD_LAYOUT_DDL = '''
+    CREATE TABLE IF NOT EXISTS db_shard_layout (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        shard_count INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+_FOREIGN_KEY = re.compile(
+    r',\s*(?:--[^\n]*\n\s*)*FOREIGN KEY\s*\([^)]*\)\s*REFERENCES\s+"?(\w+)"?\s*\([^)]*\)'
+    r'(?:\s+ON\s+(?:DELETE|UPDATE)\s+(?:SET NULL|SET DEFAULT|CASCADE|RESTRICT|NO ACTION))*',
+    re.IGNORECASE)
+_SHARDED_LOWER = {table.lower() for table in SHARDED_TABLES}
+
+
+def shard_index(league_id: Any, shard_count: int) -> int:
+    """
+    Shard holding a league: CRC-32 of the league ID modulo the shard count.
+
+    IDs stored in INTEGER columns (transactions.league_id) hash like their text form.
+    """
+    if shard_count <= 1 or league_id is None:
+        return 0
+    if isinstance(league_id, float) and league_id.is_integer():
+        league_id = int(league_id)
+    return zlib.crc32(str(league_id).encode()) % shard_count
+
+
+def shard_path(db_path: str, index: int) -> str:
+    """Shard file next to the core database: keeper.db -> keeper_shard0.db."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_shard{index}{ext or '.db'}"
+
+
+def _read_only_uri(path: str) -> str:
+    return f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+
+
+def _table_exists(conn: sqlite3.Connection, schema: str, name: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def get_shard_count(conn: sqlite3.Connection, schema: str = 'main') -> int:
+    """Number of shards recorded in the core file on this connection, 0 for a single-file database."""
+    if not _table_exists(conn, schema, 'db_shard_layout'):
+        return 0
+    row = conn.execute(f"SELECT shard_count FROM {schema}.db_shard_layout WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def read_shard_count(db_path: str) -> int:
+    """get_shard_count for a database file, read without taking a write lock."""
+    if db_path == ':memory:' or not os.path.exists(db_path):
+        return 0
+    conn = sqlite3.connect(_read_only_uri(db_path), uri=True)
+    try:
+        return get_shard_count(conn)
+    finally:
+        conn.close()
+
+
+def strip_core_foreign_keys(sql: str) -> str:
+    """Drop the FOREIGN KEY clauses of a CREATE TABLE that reference tables outside the shards."""
+    return _FOREIGN_KEY.sub(lambda match: match.group(0) if match.group(1).lower() in _SHARDED_LOWER else '', sql)
+
+
+def ensure_shard_schema(core: sqlite3.Connection, shard: sqlite3.Connection, index: int) -> None:
+    """
+    Bring one shard's schema up to the core file's league table templates.
+
+    Creates missing tables (without foreign keys to core tables) and indexes, adds columns
+    that init_db added to a template since, creates the shard's db_maintenance table and
+    moves its AUTOINCREMENT counters into the shard's ID range. Commits on the shard.
+
+    Args:
+        core (sqlite3.Connection): Connection with the core file as main.
+        shard (sqlite3.Connection): Connection with the shard file as main.
+        index (int): Shard number.
+    """
+    templates = core.execute(f"""
+        SELECT type, name, tbl_name, sql FROM main.sqlite_master
+        WHERE type IN ('table', 'index') AND sql IS NOT NULL
+          AND tbl_name IN ({', '.join('?' * len(SHARDED_TABLES))})
+        ORDER BY type DESC
+    """, SHARDED_TABLES).fetchall()
+    shard_objects = {row[0] for row in shard.execute("SELECT name FROM sqlite_master")}
+    for object_type, name, table, sql in templates:
+        if object_type == 'table' and name in shard_objects:
+            shard_columns = _columns(shard, 'main', name)
+            for column in core.execute(f"PRAGMA main.table_info({name})").fetchall():
+                if column[1] not in shard_columns:
+                    default = f" DEFAULT {column[4]}" if column[4] is not None else ''
+                    shard.execute(f"ALTER TABLE {name} ADD COLUMN {column[1]} {column[2]}{default}")
+        elif object_type == 'table':
+            shard.execute(strip_core_foreign_keys(sql))
+        elif name not in shard_objects:
+            shard.execute(sql)
+    create_maintenance_table(shard.cursor())
+
+    floor = (index + 1) * SHARD_ID_SPAN
+    for object_type, name, _, sql in templates:
+        if object_type != 'table' or 'AUTOINCREMENT' not in sql.upper():
+            continue
+        row = shard.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            shard.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (name, floor))
+        elif row[0] < floor:
+            shard.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (floor, name))
+    shard.commit()
+
+
+def ensure_shard_schemas(core: sqlite3.Connection, db_path: str, shard_count: int) -> None:
+    """ensure_shard_schema for every shard of the core file (run after init_db at startup)."""
+    for index in range(shard_count):
+        shard = sqlite3.connect(shard_path(db_path, index), timeout=30)
+        try:
+            shard.execute("BEGIN IMMEDIATE")  # One worker at a time adds columns
+            ensure_shard_schema(core, shard, index)
+        finally:
+            shard.close()
+
+
+def _create_temp_views(conn: sqlite3.Connection, schema: str) -> None:
+    """TEMP copies of the league views, so they read the league tables this connection resolves."""
+    for name, sql in conn.execute(f"""
+        SELECT name, sql FROM {schema}.sqlite_master
+        WHERE type = 'view' AND name IN ({', '.join('?' * len(SHARDED_VIEWS))})
+    """, SHARDED_VIEWS).fetchall():
+        conn.execute(f"DROP VIEW IF EXISTS temp.{name}")
+        conn.execute(re.sub(r'^CREATE VIEW', 'CREATE TEMP VIEW', sql, flags=re.IGNORECASE))
+
+
+def attach_shards(conn: sqlite3.Connection, db_path: str, shard_count: int) -> None:
+    """
+    Attach every shard read-only to a core connection and shadow the league tables with
+    TEMP views (UNION ALL over the shards), so existing queries read all leagues.
+
+    A league's rows live in one shard, so queries filtered by league read one shard's
+    index. Writes to league tables must go through connect_league_db. Must be called
+    outside a transaction.
+    """
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    for index in range(shard_count):
+        if f'shard{index}' not in attached:
+            conn.execute(f"ATTACH DATABASE ? AS shard{index}", (_read_only_uri(shard_path(db_path, index)),))
+    for table in SHARDED_TABLES:
+        columns = ', '.join(f'"{column}"' for column in _columns(conn, 'main', table))
+        if not columns:
+            continue
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}")
+        conn.execute(f"CREATE TEMP VIEW {table} AS " + ' UNION ALL '.join(
+            f"SELECT {columns} FROM shard{index}.{table}" for index in range(shard_count)))
+    _create_temp_views(conn, 'main')
+    conn.commit()
+
+
+def attach_core(conn: sqlite3.Connection, db_path: str, read_only: bool = False) -> None:
+    """
+    Attach the core file to a shard connection as 'core'.
+
+    read_only keeps BEGIN IMMEDIATE from locking the core, for a shard writer that only
+    reads core tables.
+    """
+    if read_only:
+        conn.execute(f"ATTACH DATABASE ? AS {CORE_SCHEMA}", (_read_only_uri(db_path),))
+    else:
+        conn.execute(f"ATTACH DATABASE ? AS {CORE_SCHEMA}", (db_path,))
+    _create_temp_views(conn, CORE_SCHEMA)
+    conn.commit()
+
+
+def connect_core(db_path: str, timeout: float = 5.0, **kwargs: Any) -> sqlite3.Connection:
+    """sqlite3.connect to the core file, with the shards attached when the database is sharded."""
+    conn = sqlite3.connect(db_path, timeout=timeout, **kwargs)
+    shard_count = get_shard_count(conn) if db_path != ':memory:' else 0
+    if shard_count:
+        attach_shards(conn, db_path, shard_count)
+    return conn
+
+
+def connect_league_db(db_path: str, league_id: Any, timeout: float = 30.0, shard_count: Optional[int] = None,
+                      core_read_only: bool = False, **kwargs: Any) -> sqlite3.Connection:
+    """
+    Connection for reading and writing one league's rows.
+
+    For a single-file database this is a plain connection to db_path. Otherwise it opens
+    the league's shard with the core attached, with foreign keys on.
+
+    Args:
+        db_path (str): Core database file.
+        league_id (Any): Sleeper league ID.
+        timeout (float): Seconds to wait for a lock.
+        shard_count (Optional[int]): Known shard count; read from the core file when None.
+        core_read_only (bool): Attach the core read-only.
+        **kwargs: Passed to sqlite3.connect.
+    """
+    if shard_count is None:
+        shard_count = read_shard_count(db_path)
+    if not shard_count:
+        return sqlite3.connect(db_path, timeout=timeout, **kwargs)
+    conn = sqlite3.connect(shard_path(db_path, shard_index(league_id, shard_count)), timeout=timeout, **kwargs)
+    try:
+        conn.execute("PRAGMA foreign_keys = ON")
+        attach_core(conn, db_path, read_only=core_read_only)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def install_shard_guards(conn: sqlite3.Connection) -> None:
+    """Triggers on the core file's league table templates that abort any row written there. Does not commit."""
+    for table in SHARDED_TABLES:
+        if not _table_exists(conn, 'main', table):
+            continue
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS shard_guard_{table}_{operation.lower()} BEFORE {operation} ON {table}
+                BEGIN SELECT RAISE(ABORT, '{table} is stored in the league shards'); END
+            """)
+
+
+def split_database(db_path: str, shard_count: int) -> Dict[str, Any]:
+    """
+    Move the league tables of a single-file database into shard_count shard files.
+
+    Offline operation: stop the app first. Rows are copied and the shards committed
+    before the core file is emptied, so an interrupted split leaves the core file intact
+    (delete the shard files and run it again).
+
+    Args:
+        db_path (str): Core database file.
+        shard_count (int): Number of shards, 1 to MAX_SHARDS.
+
+    Returns:
+        Dict[str, Any]: shard paths and, per table, the rows moved into each shard.
+
+    Raises:
+        ValueError: If the shard count is out of range or the database is already sharded.
+        FileExistsError: If a shard file already exists.
+    """
+    if not 1 <= shard_count <= MAX_SHARDS:
+        raise ValueError(f"shard_count must be between 1 and {MAX_SHARDS}")
+    if read_shard_count(db_path):
+        raise ValueError(f"{db_path} is already sharded")
+    paths = [shard_path(db_path, index) for index in range(shard_count)]
+    for path in paths:
+        if os.path.exists(path):
+            raise FileExistsError(f"{path} already exists")
+
+    core = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        tables = [table for table in SHARDED_TABLES if _table_exists(core, 'main', table)]
+        for index, path in enumerate(paths):
+            shard = sqlite3.connect(path)
+            try:
+                shard.execute("PRAGMA journal_mode=WAL")
+                ensure_shard_schema(core, shard, index)
+            finally:
+                shard.close()
+
+        core.create_function('shard_of', 1, lambda league_id: shard_index(league_id, shard_count), deterministic=True)
+        moved: Dict[str, List[int]] = {table: [] for table in tables}
+        core.execute("BEGIN IMMEDIATE")  # Nothing writes the core while rows are copied
+        try:
+            for index, path in enumerate(paths):
+                core.execute(f"ATTACH DATABASE ? AS shard{index}", (path,))
+                schema = f'shard{index}'
+                for table in tables:
+                    columns = ', '.join(f'"{column}"' for column in _columns(core, 'main', table))
+                    if table in SHARD_KEYS:
+                        where = f"shard_of(src.{SHARD_KEYS[table]}) = {index}"
+                    else:
+                        column, parent, parent_column = SHARD_CHILDREN[table]
+                        where = f"EXISTS (SELECT 1 FROM {schema}.{parent} p WHERE p.{parent_column} = src.{column})"
+                        if index == 0:  # Orphans stay together in the first shard
+                            where += f" OR NOT EXISTS (SELECT 1 FROM main.{parent} p WHERE p.{parent_column} = src.{column})"
+                    core.execute(f"INSERT INTO {schema}.{table} ({columns}) SELECT {columns} FROM main.{table} src WHERE {where}")
+                    moved[table].append(core.execute("SELECT changes()").fetchone()[0])
+            for table in tables:
+                total = core.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+                if sum(moved[table]) != total:
+                    raise RuntimeError(f"{table}: {sum(moved[table])} of {total} rows copied")
+            core.execute("COMMIT")
+        except Exception:
+            core.execute("ROLLBACK")
+            raise
+        finally:
+            for index in range(shard_count):
+                core.execute(f"DETACH DATABASE shard{index}")
+
+        # The shards hold the rows now: empty the templates and record the layout
+        core.execute("BEGIN IMMEDIATE")
+        for table in reversed(tables):
+            core.execute(f"DELETE FROM main.{table}")
+        core.execute(SHARD_LAYOUT_DDL)
+        core.execute("INSERT INTO db_shard_layout (id, shard_count) VALUES (1, ?)", (shard_count,))
+        install_shard_guards(core)
+        core.execute("COMMIT")
+        logger.info(f"league_shards: Split {db_path} into {shard_count} shards")
+        return {'shards': paths, 'rows': moved}
+    finally:
+        core.close()
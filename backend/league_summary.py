@@ -0,0 +1,241 @@
+"""
+Per-league summary rows behind the admin league index.
+
+LeagueAdminSummary holds one row per SKL league with its fee settings, collection
+status, team count and payer count, so /admin/leagues reads a single indexed table
+instead of running two correlated subqueries per league. init_db creates it (and
+backfills it once) through create_summary_table(); migrations/004_add_league_admin_summary.sql
+does the same for databases managed by hand. The fee, payment and roster write paths
+call refresh_league_summary() in their own transaction to keep the row current.
+"""
+import base64
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+SUMMARY_COLUMNS = [
+    'sleeper_league_id', 'name', 'season', 'status',
+    'fee_amount', 'fee_currency', 'fee_due_date', 'collection_deadline', 'yield_vault_id', 'automated',
+    'collection_status', 'total_collected', 'total_teams', 'teams_paid',
+]
+
+# Fee columns the admin fee endpoints write, added to LeagueFees in place
+LEAGUE_FEES_SUMMARY_COLUMNS = (
+    ('fee_due_date', 'TEXT'),
+    ('collection_deadline', 'TEXT'),
+    ('yield_vault_id', 'TEXT'),
+    ('automated', 'INTEGER DEFAULT 0'),
+)
+
+LEAGUE_ADMIN_SUMMARY_DDL = '''CREATE TABLE IF NOT EXISTS LeagueAdminSummary (
+                                 sleeper_league_id TEXT PRIMARY KEY,
+                                 name TEXT NOT NULL,
+                                 season TEXT,
+                                 status TEXT,
+                                 fee_amount REAL,
+                                 fee_currency TEXT,
+                                 fee_due_date TEXT,
+                                 collection_deadline TEXT,
+                                 yield_vault_id TEXT,
+                                 automated INTEGER,
+                                 collection_status TEXT, -- From the league's newest FeeSchedules row for its season
+                                 total_collected REAL,
+                                 total_teams INTEGER DEFAULT 0,
+                                 teams_paid INTEGER DEFAULT 0,
+                                 updated_at DATETIME,
+                                 FOREIGN KEY (sleeper_league_id) REFERENCES LeagueMetadata(sleeper_league_id) ON DELETE CASCADE
+                                 )'''
+
+# Keyset pagination order, with and without the status filters
+LEAGUE_ADMIN_SUMMARY_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_league_admin_summary_order ON LeagueAdminSummary(season DESC, name, sleeper_league_id)",
+    "CREATE INDEX IF NOT EXISTS idx_league_admin_summary_status ON LeagueAdminSummary(status, season DESC, name, sleeper_league_id)",
+    "CREATE INDEX IF NOT EXISTS idx_league_admin_summary_collection "
+    "ON LeagueAdminSummary(collection_status, season DESC, name, sleeper_league_id)",
+)
+
+# Fees and the fee schedule are matched on the league's own season, so leagues with
+# fees for several seasons still produce one row. The newest schedule wins.
+FEE_SCHEDULE_JOIN = '''
+    LEFT JOIN FeeSchedules fs ON fs.schedule_id = (
+        SELECT schedule_id FROM FeeSchedules
+        WHERE sleeper_league_id = lm.sleeper_league_id AND season_year = CAST(lm.season AS INTEGER)
+        ORDER BY created_at DESC, schedule_id
+        LIMIT 1
+    )'''
+
+
+def _summary_insert(with_schedules: bool) -> str:
+    """INSERT ... SELECT of the summary rows; FeeSchedules comes with migration 001 and may be missing."""
+    collection = 'fs.collection_status, fs.total_collected' if with_schedules else 'NULL, NULL'
+    return f'''
+    INSERT INTO LeagueAdminSummary ({', '.join(SUMMARY_COLUMNS)}, updated_at)
+    SELECT
+        lm.sleeper_league_id,
+        lm.name,
+        lm.season,
+        lm.status,
+        lf.fee_amount,
+        lf.fee_currency,
+        lf.fee_due_date,
+        lf.collection_deadline,
+        lf.yield_vault_id,
+        lf.automated,
+        {collection},
+        (SELECT COUNT(DISTINCT sleeper_roster_id) FROM rosters WHERE sleeper_league_id = lm.sleeper_league_id),
+        (SELECT COUNT(DISTINCT wallet_address) FROM LeaguePayments
+         WHERE sleeper_league_id = lm.sleeper_league_id AND season_year = lm.season AND verification_status = 'verified'),
+        datetime('now')
+    FROM LeagueMetadata lm
+    LEFT JOIN LeagueFees lf
+        ON lf.sleeper_league_id = lm.sleeper_league_id AND lf.season_year = CAST(lm.season AS INTEGER)
+    {FEE_SCHEDULE_JOIN if with_schedules else ''}
+    WHERE lm.name LIKE 'SKL%'
+'''
+
+
+def _table_exists(cursor: sqlite3.Cursor, name: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def summary_table_exists(cursor: sqlite3.Cursor) -> bool:
+    """True once init_db (or migration 004) has created LeagueAdminSummary in this database."""
+    return _table_exists(cursor, 'LeagueAdminSummary')
+
+
+def create_summary_table(cursor: sqlite3.Cursor) -> int:
+    """
+    Add the summary's LeagueFees columns, create LeagueAdminSummary and its indexes, and
+    backfill it when it is new. Does not commit.
+
+    Runs after LeagueMetadata, LeagueFees, LeaguePayments and rosters exist.
+
+    Returns:
+        int: Summary rows backfilled (0 when the table already existed).
+    """
+    existing_fee_columns = {row[1] for row in cursor.execute("PRAGMA table_info(LeagueFees)").fetchall()}
+    for column, definition in LEAGUE_FEES_SUMMARY_COLUMNS:
+        if column not in existing_fee_columns:
+            cursor.execute(f"ALTER TABLE LeagueFees ADD COLUMN {column} {definition}")
+    created = not summary_table_exists(cursor)
+    cursor.execute(LEAGUE_ADMIN_SUMMARY_DDL)
+    for index_sql in LEAGUE_ADMIN_SUMMARY_INDEXES:
+        cursor.execute(index_sql)
+    return refresh_league_summary(cursor) if created else 0
+
+
+def refresh_league_summary(cursor: sqlite3.Cursor, league_id: Optional[str] = None) -> int:
+    """
+    Recompute the summary row of one league, or of every league when league_id is None.
+
+    Runs inside the caller's transaction; the caller commits. A league whose name no
+    longer starts with 'SKL' loses its row. Does nothing on a database whose schema
+    init_db has not set up.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        league_id (Optional[str]): Sleeper league ID, or None to rebuild the whole table.
+
+    Returns:
+        int: Number of summary rows written.
+    """
+    if not summary_table_exists(cursor):
+        return 0
+    insert_sql = _summary_insert(_table_exists(cursor, 'FeeSchedules'))
+    if league_id is None:
+        cursor.execute("DELETE FROM LeagueAdminSummary")
+        cursor.execute(insert_sql)
+    else:
+        cursor.execute("DELETE FROM LeagueAdminSummary WHERE sleeper_league_id = ?", (league_id,))
+        cursor.execute(insert_sql + " AND lm.sleeper_league_id = ?", (league_id,))
+    return cursor.rowcount
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque page cursor holding the sort key of the last row returned."""
+    key = [row['season'], row['name'], row['sleeper_league_id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(token: str) -> Tuple[Optional[str], str, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        season, name, league_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+    return season, name, league_id
+
+
+def list_league_summaries(cursor: sqlite3.Cursor, season: Optional[str] = None, status: Optional[str] = None,
+                          collection_status: Optional[str] = None, after: Optional[str] = None,
+                          limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of the admin league index, newest season first, then by name. Leagues
+    without a season come last.
+
+    Uses keyset pagination on (season DESC, name, sleeper_league_id), so each page is an
+    index range scan no matter how deep it is.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        season (Optional[str]): Only leagues of this season.
+        status (Optional[str]): Only leagues with this Sleeper status.
+        collection_status (Optional[str]): Only leagues whose fee schedule has this status.
+        after (Optional[str]): next_cursor from the previous page.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: The rows and the cursor of the next page (None on the last page).
+
+    Raises:
+        ValueError: If after is not a valid cursor.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    conditions, params = [], []
+    for column, value in (('season', season), ('status', status), ('collection_status', collection_status)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if not after:
+        rows = _select_summaries(cursor, conditions, params, limit + 1)
+    else:
+        last_season, last_name, last_league_id = decode_cursor(after)
+        if last_season is None:
+            # Leagues without a season sort last under DESC; the previous page ended among them
+            rows = _select_summaries(cursor, conditions + ["season IS NULL AND (name, sleeper_league_id) > (?, ?)"],
+                                     params + [last_name, last_league_id], limit + 1)
+        else:
+            # The leading season bound lets SQLite seek into the index and keep its order; an OR
+            # of ranges alone falls back to a temp B-tree sort of every remaining row. The bound
+            # also drops NULL seasons, so a short page continues with them in a second range scan.
+            rows = _select_summaries(cursor, conditions + ["season <= ? AND (season < ? OR (name, sleeper_league_id) > (?, ?))"],
+                                     params + [last_season, last_season, last_name, last_league_id], limit + 1)
+            if len(rows) <= limit and season is None:
+                rows += _select_summaries(cursor, conditions + ["season IS NULL"], params, limit + 1 - len(rows))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+
+def _select_summaries(cursor: sqlite3.Cursor, conditions: List[str], params: List[Any], limit: int) -> List[Dict[str, Any]]:
+    """Up to limit summary rows matching conditions, in index order."""
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    cursor.execute(f'''
+        SELECT {', '.join(SUMMARY_COLUMNS)} FROM LeagueAdminSummary
+        {where}
+        ORDER BY season DESC, name, sleeper_league_id
+        LIMIT ?
+    ''', params + [limit])
+    return [dict(zip(SUMMARY_COLUMNS, row)) for row in cursor.fetchall()]
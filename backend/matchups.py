@@ -0,0 +1,270 @@
+"""
+Weekly matchup storage and standings computed from it.
+
+Completed weeks are fetched from Sleeper once and stored in the matchups
+table. Standings extras that Sleeper's roster settings don't provide (points
+against, streaks, median records, head-to-head tiebreakers) are computed
+from those rows with SQL window functions and cached per league data version
+(see cache_versions.py), so standings and payout screens never call Sleeper.
+"""
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+MATCHUPS_DDL = '''CREATE TABLE IF NOT EXISTS matchups (
+                    league_id TEXT NOT NULL, -- sleeper_league_id
+                    week INTEGER NOT NULL,
+                    roster_id TEXT NOT NULL, -- sleeper_roster_id
+                    matchup_id INTEGER, -- Teams sharing a matchup_id played each other; NULL on bye
+                    points REAL,
+                    starters TEXT, -- JSON list of starting player_ids
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (league_id, week, roster_id)
+                    )'''
+
+REGULAR_SEASON_WEEKS_DEFAULT = 14  # Sleeper's default playoff_week_start is 15
+NFL_SEASON_WEEKS = 18
+
+STANDINGS_SQL = '''
+WITH games AS (
+    SELECT m.roster_id, m.week, m.points AS points_for, o.points AS points_against, o.roster_id AS opponent_id,
+           CASE WHEN m.points > o.points THEN 'W' WHEN m.points < o.points THEN 'L' ELSE 'T' END AS result
+    FROM matchups m
+    JOIN matchups o ON o.league_id = m.league_id AND o.week = m.week
+                   AND o.matchup_id = m.matchup_id AND o.roster_id != m.roster_id
+    WHERE m.league_id = :league_id AND m.week <= :last_week AND m.matchup_id IS NOT NULL
+),
+totals AS (
+    SELECT roster_id,
+           SUM(result = 'W') AS wins, SUM(result = 'L') AS losses, SUM(result = 'T') AS ties,
+           SUM(points_for) AS points_for, SUM(points_against) AS points_against, COUNT(*) AS games
+    FROM games
+    GROUP BY roster_id
+),
+weekly_rank AS (
+    -- Teams scoring strictly below / above each team in its week
+    SELECT roster_id,
+           RANK() OVER (PARTITION BY week ORDER BY points ASC) - 1 AS teams_below,
+           RANK() OVER (PARTITION BY week ORDER BY points DESC) - 1 AS teams_above,
+           COUNT(*) OVER (PARTITION BY week) AS teams_in_week
+    FROM matchups
+    WHERE league_id = :league_id AND week <= :last_week AND points IS NOT NULL
+),
+median AS (
+    SELECT roster_id,
+           SUM(2 * teams_below >= teams_in_week) AS median_wins,
+           SUM(2 * teams_above >= teams_in_week) AS median_losses,
+           SUM(2 * teams_below < teams_in_week AND 2 * teams_above < teams_in_week) AS median_ties
+    FROM weekly_rank
+    GROUP BY roster_id
+),
+runs AS (
+    -- Gaps and islands: consecutive weeks with the same result share a run_id
+    SELECT roster_id, week, result,
+           ROW_NUMBER() OVER (PARTITION BY roster_id ORDER BY week)
+         - ROW_NUMBER() OVER (PARTITION BY roster_id, result ORDER BY week) AS run_id
+    FROM games
+),
+latest_run AS (
+    SELECT roster_id, result, run_length
+    FROM (
+        SELECT roster_id, result, COUNT(*) AS run_length,
+               ROW_NUMBER() OVER (PARTITION BY roster_id ORDER BY MAX(week) DESC) AS recency
+        FROM runs
+        GROUP BY roster_id, result, run_id
+    )
+    WHERE recency = 1
+),
+head_to_head AS (
+    -- Record against teams with the identical overall record
+    SELECT g.roster_id,
+           SUM(g.result = 'W') AS h2h_wins, SUM(g.result = 'L') AS h2h_losses, SUM(g.result = 'T') AS h2h_ties
+    FROM games g
+    JOIN totals t ON t.roster_id = g.roster_id
+    JOIN totals o ON o.roster_id = g.opponent_id AND o.wins = t.wins AND o.losses = t.losses AND o.ties = t.ties
+    GROUP BY g.roster_id
+)
+SELECT r.sleeper_roster_id AS roster_id,
+       COALESCE(t.games, 0) AS games,
+       COALESCE(t.wins, 0) AS wins, COALESCE(t.losses, 0) AS losses, COALESCE(t.ties, 0) AS ties,
+       ROUND(COALESCE(t.points_for, 0), 2) AS points_for,
+       ROUND(COALESCE(t.points_against, 0), 2) AS points_against,
+       CASE WHEN lr.result IS NULL THEN NULL ELSE lr.result || lr.run_length END AS streak,
+       COALESCE(md.median_wins, 0) AS median_wins, COALESCE(md.median_losses, 0) AS median_losses,
+       COALESCE(md.median_ties, 0) AS median_ties,
+       COALESCE(h.h2h_wins, 0) AS h2h_wins, COALESCE(h.h2h_losses, 0) AS h2h_losses, COALESCE(h.h2h_ties, 0) AS h2h_ties,
+       ROW_NUMBER() OVER (
+           ORDER BY COALESCE(t.wins, 0) DESC, COALESCE(t.ties, 0) DESC,
+                    COALESCE((COALESCE(h.h2h_wins, 0) + 0.5 * COALESCE(h.h2h_ties, 0))
+                             / NULLIF(COALESCE(h.h2h_wins, 0) + COALESCE(h.h2h_losses, 0) + COALESCE(h.h2h_ties, 0), 0), 0.5) DESC,
+                    COALESCE(t.points_for, 0) DESC,
+                    r.sleeper_roster_id
+       ) AS rank
+FROM rosters r
+LEFT JOIN totals t ON t.roster_id = r.sleeper_roster_id
+LEFT JOIN median md ON md.roster_id = r.sleeper_roster_id
+LEFT JOIN latest_run lr ON lr.roster_id = r.sleeper_roster_id
+LEFT JOIN head_to_head h ON h.roster_id = r.sleeper_roster_id
+WHERE r.sleeper_league_id = :league_id
+ORDER BY rank
+'''
+
+STANDINGS_EXTRA_FIELDS = ['rank', 'points_against', 'streak', 'median_wins', 'median_losses', 'median_ties',
+                          'h2h_wins', 'h2h_losses', 'h2h_ties']
+
+
+def get_stored_weeks(cursor: sqlite3.Cursor, league_id: str) -> Set[int]:
+    """Weeks that already have matchup rows for a league."""
+    cursor.execute("SELECT DISTINCT week FROM matchups WHERE league_id = ?", (league_id,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def last_completed_week(nfl_state: Optional[Dict[str, Any]], league_season: Optional[str]) -> int:
+    """
+    Last NFL week whose games are final for a league's season.
+
+    Args:
+        nfl_state (Optional[Dict[str, Any]]): Sleeper /state/nfl response.
+        league_season (Optional[str]): The league's season, e.g. '2025'.
+
+    Returns:
+        int: 0 before the season, NFL_SEASON_WEEKS once it is over.
+    """
+    if not nfl_state or not league_season:
+        return 0
+    try:
+        league_year = int(league_season)
+        state_year = int(nfl_state.get('season'))
+    except (TypeError, ValueError):
+        return 0
+    if league_year < state_year:
+        return NFL_SEASON_WEEKS
+    if league_year > state_year:
+        return 0
+    season_type = nfl_state.get('season_type')
+    if season_type == 'regular':
+        return max(0, min(NFL_SEASON_WEEKS, int(nfl_state.get('week') or 1) - 1))
+    if season_type in ('post', 'off'):
+        return NFL_SEASON_WEEKS
+    return 0
+
+
+def regular_season_last_week(settings_json: Optional[str]) -> int:
+    """Last regular-season week from LeagueMetadata.settings (playoff_week_start - 1)."""
+    try:
+        settings = json.loads(settings_json) if settings_json else {}
+        playoff_week_start = int(settings.get('playoff_week_start') or 0)
+    except (TypeError, ValueError, json.JSONDecodeError):
+        playoff_week_start = 0
+    return playoff_week_start - 1 if playoff_week_start > 1 else REGULAR_SEASON_WEEKS_DEFAULT
+
+
+def store_week_matchups(cursor: sqlite3.Cursor, league_id: str, week: int, matchups_data: Iterable[Dict[str, Any]]) -> int:
+    """
+    Upsert one week's matchups in a single executemany. Does not commit.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        league_id (str): Sleeper league ID.
+        week (int): NFL week.
+        matchups_data (Iterable[Dict[str, Any]]): Sleeper /league/<id>/matchups/<week> response.
+
+    Returns:
+        int: Number of roster rows stored.
+    """
+    rows = [(league_id, week, str(m['roster_id']), m.get('matchup_id'), m.get('points'), json.dumps(m.get('starters') or []))
+            for m in matchups_data if m.get('roster_id') is not None]
+    cursor.executemany('''
+        INSERT INTO matchups (league_id, week, roster_id, matchup_id, points, starters, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(league_id, week, roster_id) DO UPDATE SET
+            matchup_id = excluded.matchup_id,
+            points = excluded.points,
+            starters = excluded.starters,
+            updated_at = excluded.updated_at
+    ''', rows)
+    return len(rows)
+
+
+def compute_league_standings(cursor: sqlite3.Cursor, league_id: str, last_week: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Standings for every roster in a league from stored regular-season matchups.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        league_id (str): Sleeper league ID.
+        last_week (Optional[int]): Last week counted; defaults to the league's last regular-season week.
+
+    Returns:
+        List[Dict[str, Any]]: One row per roster ordered by rank (wins, ties, head-to-head
+        among teams with the same record, points for).
+    """
+    if last_week is None:
+        cursor.execute("SELECT settings FROM LeagueMetadata WHERE sleeper_league_id = ?", (league_id,))
+        row = cursor.fetchone()
+        last_week = regular_season_last_week(row[0] if row else None)
+    cursor.execute(STANDINGS_SQL, {'league_id': league_id, 'last_week': last_week})
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def apply_standings(entries: List[Dict[str, Any]], standings: List[Dict[str, Any]], roster_key: str = 'roster_id') -> List[Dict[str, Any]]:
+    """
+    Add standings extras to roster entries and order them by standings rank.
+
+    Entries keep their own wins/losses; if no matchups are stored yet they are returned unchanged.
+
+    Args:
+        entries (List[Dict[str, Any]]): Roster rows of a standings or payout response.
+        standings (List[Dict[str, Any]]): Output of compute_league_standings.
+        roster_key (str): Key holding the sleeper_roster_id in entries.
+
+    Returns:
+        List[Dict[str, Any]]: The entries, sorted by rank when matchup data exists.
+    """
+    if not any(row['games'] for row in standings):
+        return entries
+    by_roster = {row['roster_id']: row for row in standings}
+    for entry in entries:
+        row = by_roster.get(str(entry.get(roster_key)))
+        if row:
+            entry.update({field: row[field] for field in STANDINGS_EXTRA_FIELDS})
+    entries.sort(key=lambda entry: entry.get('rank') or len(by_roster) + 1)
+    return entries
+
+
+class StandingsCache:
+    """In-process standings per league, recomputed when the league's cache version changes."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def get_standings(self, cursor: sqlite3.Cursor, league_id: str, version: int) -> List[Dict[str, Any]]:
+        """
+        Return cached standings for a league, recomputing them if the version moved.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the keeper database.
+            league_id (str): Sleeper league ID.
+            version (int): Current cache_versions value for league_cache_key(league_id).
+
+        Returns:
+            List[Dict[str, Any]]: Output of compute_league_standings (shared; do not mutate).
+        """
+        with self._lock:
+            cached = self._entries.get(league_id)
+            if cached and cached[0] == version:
+                return cached[1]
+        standings = compute_league_standings(cursor, league_id)
+        with self._lock:
+            self._entries[league_id] = (version, standings)
+        return standings
+
+    def invalidate(self, league_id: Optional[str] = None) -> None:
+        with self._lock:
+            if league_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(league_id, None)
@@ -0,0 +1,24 @@
+-- SKL Background Sync Jobs
+-- Migration: 003_add_sync_jobs
+-- Purpose: Track fleet-wide admin jobs (e.g. playoff bracket sync for every SKL league)
+--          so any worker process can report their progress
+
+CREATE TABLE IF NOT EXISTS SyncJobs (
+    job_id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL, -- 'playoff_bracket_sync'
+    status TEXT NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'completed', 'completed_with_errors', 'failed'
+    season_year INTEGER,
+    total_items INTEGER DEFAULT 0,
+    completed_items INTEGER DEFAULT 0,
+    failed_items INTEGER DEFAULT 0,
+    results TEXT, -- JSON object keyed by sleeper_league_id
+    error TEXT,
+    created_by TEXT, -- Admin wallet address
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME,
+    updated_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_type_created
+    ON SyncJobs(job_type, created_at);
@@ -0,0 +1,75 @@
+-- SKL Admin League Index
+-- Migration: 004_add_league_admin_summary
+-- Purpose: One pre-aggregated row per SKL league for the paginated /admin/leagues index.
+--          Kept current by league_summary.refresh_league_summary() on the fee, payment
+--          and roster write paths; the backfill below mirrors its SELECT. init_db applies the
+--          same schema (league_summary.create_summary_table), so this is only needed by hand.
+
+-- Fee columns the admin fee endpoints already write
+ALTER TABLE LeagueFees ADD COLUMN fee_due_date TEXT;
+ALTER TABLE LeagueFees ADD COLUMN collection_deadline TEXT;
+ALTER TABLE LeagueFees ADD COLUMN yield_vault_id TEXT;
+ALTER TABLE LeagueFees ADD COLUMN automated INTEGER DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS LeagueAdminSummary (
+    sleeper_league_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    season TEXT,
+    status TEXT,
+    fee_amount REAL,
+    fee_currency TEXT,
+    fee_due_date TEXT,
+    collection_deadline TEXT,
+    yield_vault_id TEXT,
+    automated INTEGER,
+    collection_status TEXT, -- From the league's newest FeeSchedules row for its season
+    total_collected REAL,
+    total_teams INTEGER DEFAULT 0,
+    teams_paid INTEGER DEFAULT 0,
+    updated_at DATETIME,
+    FOREIGN KEY (sleeper_league_id) REFERENCES LeagueMetadata(sleeper_league_id) ON DELETE CASCADE
+);
+
+-- Keyset pagination order, with and without the status filters
+CREATE INDEX IF NOT EXISTS idx_league_admin_summary_order
+    ON LeagueAdminSummary(season DESC, name, sleeper_league_id);
+
+CREATE INDEX IF NOT EXISTS idx_league_admin_summary_status
+    ON LeagueAdminSummary(status, season DESC, name, sleeper_league_id);
+
+CREATE INDEX IF NOT EXISTS idx_league_admin_summary_collection
+    ON LeagueAdminSummary(collection_status, season DESC, name, sleeper_league_id);
+
+-- Backfill existing leagues
+INSERT OR REPLACE INTO LeagueAdminSummary (
+    sleeper_league_id, name, season, status,
+    fee_amount, fee_currency, fee_due_date, collection_deadline, yield_vault_id, automated,
+    collection_status, total_collected, total_teams, teams_paid, updated_at
+)
+SELECT
+    lm.sleeper_league_id,
+    lm.name,
+    lm.season,
+    lm.status,
+    lf.fee_amount,
+    lf.fee_currency,
+    lf.fee_due_date,
+    lf.collection_deadline,
+    lf.yield_vault_id,
+    lf.automated,
+    fs.collection_status,
+    fs.total_collected,
+    (SELECT COUNT(DISTINCT sleeper_roster_id) FROM rosters WHERE sleeper_league_id = lm.sleeper_league_id),
+    (SELECT COUNT(DISTINCT wallet_address) FROM LeaguePayments
+     WHERE sleeper_league_id = lm.sleeper_league_id AND season_year = lm.season AND verification_status = 'verified'),
+    datetime('now')
+FROM LeagueMetadata lm
+LEFT JOIN LeagueFees lf
+    ON lf.sleeper_league_id = lm.sleeper_league_id AND lf.season_year = CAST(lm.season AS INTEGER)
+LEFT JOIN FeeSchedules fs ON fs.schedule_id = (
+    SELECT schedule_id FROM FeeSchedules
+    WHERE sleeper_league_id = lm.sleeper_league_id AND season_year = CAST(lm.season AS INTEGER)
+    ORDER BY created_at DESC, schedule_id
+    LIMIT 1
+)
+WHERE lm.name LIKE 'SKL%';
@@ -0,0 +1,21 @@
+-- SKL Vault Value History
+-- Migration: 005_add_vault_value_history
+-- Purpose: Time series of yield vault values written by the background vault poller
+--          (vault_poller.py). The newest values are also cached on YieldVaults so the
+--          admin endpoints never query the chain.
+
+CREATE TABLE IF NOT EXISTS vault_value_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vault_id TEXT NOT NULL,
+    polled_at DATETIME NOT NULL,
+    current_value REAL NOT NULL,
+    yield_earned REAL NOT NULL,
+    pool_balance REAL, -- Balance of the whole pool position the vault's share was taken from
+    FOREIGN KEY (vault_id) REFERENCES YieldVaults(vault_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_vault_value_history_vault
+    ON vault_value_history(vault_id, polled_at);
+
+CREATE INDEX IF NOT EXISTS idx_vault_value_history_polled
+    ON vault_value_history(polled_at);
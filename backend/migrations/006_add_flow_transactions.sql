@@ -0,0 +1,35 @@
+-- SKL Flow Transaction Tracker
+-- Migration: 006_add_flow_transactions
+-- Purpose: Every Flow transaction the backend submits (vault deposit, staking, vault
+--          withdrawal, prize distribution) is recorded here as 'submitted'. The background
+--          tracker (flow_tx_tracker.py) polls the access node with exponential backoff and
+--          moves the row, its AgentExecutions row and its PayoutDistributions rows to
+--          sealed/failed.
+
+CREATE TABLE IF NOT EXISTS FlowTransactions (
+    transaction_id TEXT PRIMARY KEY,
+    tx_kind TEXT NOT NULL, -- 'vault_deposit', 'staking', 'vault_withdrawal', 'prize_distribution'
+    execution_id TEXT, -- AgentExecutions row settled with this transaction
+    payout_id TEXT, -- PayoutSchedules / PayoutDistributions rows settled with this transaction
+    status TEXT NOT NULL DEFAULT 'submitted', -- 'submitted', 'sealed', 'failed'
+    flow_status TEXT, -- Last status from the access node: Pending, Finalized, Executed, Sealed, Expired
+    error_message TEXT,
+    events TEXT, -- JSON list of events emitted by the sealed transaction
+    attempts INTEGER DEFAULT 0,
+    submitted_at DATETIME NOT NULL,
+    next_check_at DATETIME NOT NULL,
+    last_checked_at DATETIME,
+    settled_at DATETIME, -- When the row reached sealed or failed
+    FOREIGN KEY (execution_id) REFERENCES AgentExecutions(execution_id),
+    FOREIGN KEY (payout_id) REFERENCES PayoutSchedules(payout_id)
+);
+
+-- The tracker's work queue: pending transactions by due time
+CREATE INDEX IF NOT EXISTS idx_flow_transactions_due
+    ON FlowTransactions(status, next_check_at);
+
+CREATE INDEX IF NOT EXISTS idx_flow_transactions_execution
+    ON FlowTransactions(execution_id);
+
+CREATE INDEX IF NOT EXISTS idx_flow_transactions_payout
+    ON FlowTransactions(payout_id);
@@ -6,36 +6,55 @@ import sqlite3
 import os
 import sys
 
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def apply_migration(conn, migration_file, log=None):
+    """
+    Execute a SQL migration file on an open connection and commit.
+
+    migration_file may be a bare name from this directory. Statements that add a column or
+    object that already exists are skipped, so a migration can be applied to a database
+    init_db (or an earlier run) already brought up to date. log, if given, is called with
+    one line per statement.
+    """
+    with open(os.path.join(MIGRATIONS_DIR, migration_file), 'r') as f:
+        migration_sql = f.read()
+
+    cursor = conn.cursor()
+    # Execute each statement separately (SQLite doesn't support multiple statements in executescript well with ALTER)
+    # Drop comment lines first; otherwise a statement preceded by a comment would be skipped below
+    migration_sql = '\n'.join(line for line in migration_sql.splitlines() if not line.strip().startswith('--'))
+    statements = migration_sql.split(';')
+    for statement in statements:
+        statement = statement.strip()
+        if statement and not statement.startswith('--'):
+            try:
+                cursor.execute(statement)
+                if log:
+                    log(f"✓ Executed: {statement[:60]}...")
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
+                    if log:
+                        log(f"⊘ Skipped (already exists): {statement[:60]}...")
+                else:
+                    if log:
+                        log(f"✗ Error: {e}")
+                        log(f"   Statement: {statement}")
+                    raise
+    conn.commit()
+
+
 def run_migration(db_path, migration_file):
     """Execute a SQL migration file"""
     print(f"Running migration: {migration_file}")
 
-    # Read migration file
-    with open(migration_file, 'r') as f:
-        migration_sql = f.read()
-
     # Connect to database
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     try:
-        # Execute each statement separately (SQLite doesn't support multiple statements in executescript well with ALTER)
-        statements = migration_sql.split(';')
-        for statement in statements:
-            statement = statement.strip()
-            if statement and not statement.startswith('--'):
-                try:
-                    cursor.execute(statement)
-                    print(f"✓ Executed: {statement[:60]}...")
-                except sqlite3.OperationalError as e:
-                    if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-                        print(f"⊘ Skipped (already exists): {statement[:60]}...")
-                    else:
-                        print(f"✗ Error: {e}")
-                        print(f"   Statement: {statement}")
-                        raise
-
-        conn.commit()
+        apply_migration(conn, migration_file, log=print)
         print(f"\n✅ Migration completed successfully!")
 
         # Verify tables were created
@@ -68,6 +87,7 @@ if __name__ == "__main__":
 
     print(f"Database: {db_path}")
 
-    # Run migration
-    migration_file = os.path.join(os.path.dirname(__file__), '001_add_admin_tables.sql')
+    # Run migration (defaults to the admin tables; pass a file name to run another one)
+    migration_name = sys.argv[1] if len(sys.argv) > 1 else '001_add_admin_tables.sql'
+    migration_file = os.path.join(os.path.dirname(__file__), migration_name)
     run_migration(db_path, migration_file)
@@ -0,0 +1,184 @@
+"""
+Content-addressed archive of raw Sleeper API responses.
+
+SleeperService records every response it fetches: the body is stored once per
+distinct content in payload_blobs, keyed by the SHA-256 of its canonical JSON
+and zlib-compressed, and every fetch adds a payload_fetches row (endpoint,
+fetch time, hash). The archive is its own SQLite file (keeper_payloads.db next
+to the keeper database by default), so it never bloats the live database.
+
+ReplayHttpClient serves archived responses as of a point in time through the
+same get_json interface as SleeperHttpClient; league_rebuild.py uses it to
+replay league syncs offline.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+import requests
+
+from payloads import canonical_json, payload_hash
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_ARCHIVE_DDL = [
+    '''CREATE TABLE IF NOT EXISTS payload_blobs (
+           payload_hash TEXT PRIMARY KEY, -- SHA-256 of the canonical JSON
+           body BLOB NOT NULL -- zlib of the canonical JSON
+       ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS payload_fetches (
+           endpoint TEXT NOT NULL, -- Sleeper API path, e.g. /league/<id>/rosters
+           fetched_at TEXT NOT NULL, -- UTC ISO timestamp with microseconds
+           payload_hash TEXT NOT NULL,
+           league_id TEXT, -- Set for /league/<id>/... endpoints
+           PRIMARY KEY (endpoint, fetched_at)
+       ) WITHOUT ROWID''',
+    "CREATE INDEX IF NOT EXISTS idx_payload_fetches_league ON payload_fetches(league_id, endpoint, fetched_at)",
+]
+
+# Responses not archived: the full player catalog is megabytes and no derived league table is built from it
+EXCLUDED_ENDPOINTS = ('/players/nfl',)
+
+_LEAGUE_ENDPOINT = re.compile(r'^/league/([^/]+)')
+
+
+def payload_archive_path_for(db_path: str) -> str:
+    """Default archive file next to the live database: keeper.db -> keeper_payloads.db."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_payloads{ext or '.db'}"
+
+
+def _utcnow_iso() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec='microseconds')
+
+
+def league_of_endpoint(endpoint: str) -> Optional[str]:
+    """League ID of a /league/<id>/... endpoint, else None."""
+    match = _LEAGUE_ENDPOINT.match(endpoint)
+    return match.group(1) if match else None
+
+
+class PayloadArchive:
+    """
+    Thread-safe writer and reader of one payload archive file.
+
+    Args:
+        path (str): Archive SQLite file, created on first use.
+        busy_timeout (float): Seconds to wait for the archive's write lock.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 30.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in PAYLOAD_ARCHIVE_DDL:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def record(self, endpoint: str, payload: Any, fetched_at: Optional[str] = None) -> str:
+        """
+        Archive one response. The body is written only if this content was never seen before.
+
+        Returns:
+            str: The payload's content hash.
+        """
+        digest = payload_hash(payload)
+        body = zlib.compress(canonical_json(payload).encode('utf-8'))
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO payload_blobs (payload_hash, body) VALUES (?, ?)", (digest, body))
+                conn.execute("""
+                    INSERT OR IGNORE INTO payload_fetches (endpoint, fetched_at, payload_hash, league_id)
+                    VALUES (?, ?, ?, ?)
+                """, (endpoint, fetched_at or _utcnow_iso(), digest, league_of_endpoint(endpoint)))
+        return digest
+
+    def latest(self, endpoint: str, before: Optional[str] = None) -> Any:
+        """
+        The most recent archived response of an endpoint fetched before a time (exclusive), or None.
+
+        Args:
+            endpoint (str): Sleeper API path.
+            before (Optional[str]): UTC ISO timestamp; None for the latest fetch.
+        """
+        with self._lock:
+            row = self._connection().execute("""
+                SELECT b.body FROM payload_fetches f
+                JOIN payload_blobs b ON b.payload_hash = f.payload_hash
+                WHERE f.endpoint = ? AND (? IS NULL OR f.fetched_at < ?)
+                ORDER BY f.fetched_at DESC LIMIT 1
+            """, (endpoint, before, before)).fetchone()
+        return json.loads(zlib.decompress(row[0]).decode('utf-8')) if row else None
+
+    def league_ids(self) -> List[str]:
+        """Leagues whose details (/league/<id>) were ever fetched."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT DISTINCT league_id FROM payload_fetches WHERE league_id IS NOT NULL AND endpoint = '/league/' || league_id"
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def sync_points(self, league_id: str) -> List[str]:
+        """Fetch times of a league's details, in order; each starts one league sync."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT fetched_at FROM payload_fetches WHERE league_id = ? AND endpoint = ? ORDER BY fetched_at",
+                (league_id, f'/league/{league_id}')).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> dict:
+        """Fetch and distinct-payload counts and the compressed size of the stored bodies."""
+        with self._lock:
+            conn = self._connection()
+            fetches = conn.execute("SELECT COUNT(*) FROM payload_fetches").fetchone()[0]
+            blobs, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM payload_blobs").fetchone()
+        return {'fetches': fetches, 'payloads': blobs, 'compressed_bytes': size}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ReplayHttpClient:
+    """
+    Serves archived Sleeper responses in place of SleeperHttpClient; never touches the network.
+
+    Args:
+        archive (PayloadArchive): Archive to read.
+        before (Optional[str]): Serve each endpoint's last response fetched before this UTC ISO
+            time; None for the latest.
+    """
+
+    def __init__(self, archive: PayloadArchive, before: Optional[str] = None):
+        self.archive = archive
+        self.before = before
+
+    def get_json(self, path: str, cache: bool = True) -> Any:
+        """
+        Archived response of a Sleeper API path.
+
+        Raises:
+            requests.exceptions.HTTPError: If the path was never archived before the replay time,
+                so SleeperService handles it like a failed request.
+        """
+        payload = self.archive.latest('/' + path.lstrip('/'), self.before)
+        if payload is None:
+            raise requests.exceptions.HTTPError(f"No archived response for {path}")
+        return payload
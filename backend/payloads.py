@@ -0,0 +1,19 @@
+"""
+Canonical JSON and content hashes for upstream (Sleeper) payloads.
+
+The league sync stores payload_hash next to rows built from Sleeper objects and
+skips the write when the freshly fetched object hashes the same.
+"""
+import hashlib
+import json
+from typing import Any
+
+
+def canonical_json(payload: Any) -> str:
+    """JSON with sorted keys and no whitespace, so equal payloads serialize identically."""
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def payload_hash(payload: Any) -> str:
+    """SHA-256 hex digest of a payload's canonical JSON."""
+    return hashlib.sha256(canonical_json(payload).encode('utf-8')).hexdigest()
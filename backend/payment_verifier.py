@@ -0,0 +1,396 @@
+"""
+Background on-chain verification of recorded league fee payments.
+
+The record-payment route stores each payment in LeaguePayments as 'pending' and
+returns without touching the chain. The PaymentVerifier thread claims due
+pending payments in batches, fetches their transaction results concurrently
+through one reused FlowAccessClient and checks the token events: the payer
+must have withdrawn, and the SKL payment wallet received, at least the claimed
+amount of the claimed currency, which must be the league's LeagueFees.fee_currency.
+Each batch is settled in one write transaction:
+payments move to 'verified' or 'rejected', and UserLeagueLinks.fee_paid_amount,
+fee_payment_status and FeeSchedules.total_collected are recomputed from the
+verified payments only.
+
+Point FLOW_NETWORK at 'emulator' (or FLOW_ACCESS_API at any access node) to
+verify against a local Flow emulator.
+"""
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from flow_tx_tracker import CLAIM_LEASE_SECONDS, next_check_delay
+from league_shards import connect_core
+from league_summary import refresh_league_summary
+from vault_poller import DEFAULT_ACCOUNT_ADDRESS
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_PENDING = 'pending'
+PAYMENT_VERIFIED = 'verified'
+PAYMENT_REJECTED = 'rejected'
+
+DEFAULT_INTERVAL = 10.0  # Seconds the verifier sleeps when nothing is due
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FETCH_WORKERS = 8
+DEFAULT_RECIPIENT_ADDRESS = DEFAULT_ACCOUNT_ADDRESS  # SKL_PAYMENT_WALLET_ADDRESS in the frontend config
+VERIFY_TIMEOUT = timedelta(hours=1)  # Flow expires unsealed transactions long before this
+AMOUNT_TOLERANCE = 1e-8  # UFix64 precision
+
+# Contract that defines each fee currency's vault, as it appears in event type IDs (A.<address>.<contract>.<event>)
+CURRENCY_CONTRACTS = {
+    'FLOW': 'FlowToken',
+    'USDF': 'EVMVMBridgedToken_2aabea2058b5ac2d339b163c6ab6f2b6d53aabed',
+}
+
+
+def fee_payment_status(paid_amount: float, required_fee: float) -> str:
+    """'paid', 'partially_paid' or 'unpaid' for a paid amount against the league fee (a fee of 0 is always paid)."""
+    if required_fee <= 0 or paid_amount >= required_fee:
+        return 'paid'
+    if paid_amount > 0:
+        return 'partially_paid'
+    return 'unpaid'
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _normalize_address(address: Any) -> Optional[str]:
+    if not address:
+        return None
+    address = str(address).lower()
+    return address if address.startswith('0x') else f"0x{address}"
+
+
+def token_transfers(events: List[Dict[str, Any]], currency: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Amounts of one currency withdrawn from and deposited to each address in a transaction.
+
+    Reads the token contract's own TokensWithdrawn/TokensDeposited events and the standard
+    FungibleToken.Withdrawn/Deposited events, whose 'type' field names the vault type. A transfer
+    reported by both is counted once.
+
+    Returns:
+        Tuple[Dict[str, float], Dict[str, float]]: Withdrawn amounts by 'from' address and
+            deposited amounts by 'to' address.
+    """
+    contract = CURRENCY_CONTRACTS.get(currency, currency)
+    token_events = {'withdrawn': {}, 'deposited': {}}
+    standard_events = {'withdrawn': {}, 'deposited': {}}
+    for event in events:
+        event_type, payload = event.get('type') or '', event.get('payload')
+        if not isinstance(payload, dict):
+            continue
+        if event_type.endswith(f'.{contract}.TokensWithdrawn'):
+            totals, address = token_events['withdrawn'], payload.get('from')
+        elif event_type.endswith(f'.{contract}.TokensDeposited'):
+            totals, address = token_events['deposited'], payload.get('to')
+        elif event_type.endswith('.FungibleToken.Withdrawn') and f'.{contract}.' in str(payload.get('type')):
+            totals, address = standard_events['withdrawn'], payload.get('from')
+        elif event_type.endswith('.FungibleToken.Deposited') and f'.{contract}.' in str(payload.get('type')):
+            totals, address = standard_events['deposited'], payload.get('to')
+        else:
+            continue
+        address = _normalize_address(address)
+        if address:
+            totals[address] = totals.get(address, 0.0) + float(payload.get('amount') or 0.0)
+    # FlowToken emits its own events and the FungibleToken ones for the same transfer: count one set
+    return (token_events['withdrawn'] or standard_events['withdrawn'],
+            token_events['deposited'] or standard_events['deposited'])
+
+
+def evaluate_payment(payment: Dict[str, Any], result: Optional[Dict[str, Any]], error: Optional[str],
+                     recipient_address: str, now: datetime) -> Dict[str, Any]:
+    """
+    Next state of one pending payment given its transaction result (or fetch error).
+
+    now is UTC, like the created_at SQLite stores with datetime('now').
+
+    Returns:
+        Dict[str, Any]: transaction_id, status ('pending', 'verified' or 'rejected') and reason.
+    """
+    outcome = {'transaction_id': payment['transaction_id'], 'status': PAYMENT_PENDING, 'reason': error}
+    fee_currency = payment.get('fee_currency')
+    if fee_currency and payment['currency'] != fee_currency:
+        outcome.update(status=PAYMENT_REJECTED, reason=f"Paid in {payment['currency']}, league fee is in {fee_currency}")
+        return outcome
+    if result and result.get('status') == 'Sealed':
+        if result['status_code'] != 0 or result['error_message']:
+            outcome.update(status=PAYMENT_REJECTED, reason=f"Transaction failed: {result['error_message'] or result['status_code']}")
+            return outcome
+        withdrawn, deposited = token_transfers(result['events'], payment['currency'])
+        amount = float(payment['amount'])
+        payer, recipient = _normalize_address(payment['wallet_address']), _normalize_address(recipient_address)
+        if withdrawn.get(payer, 0.0) + AMOUNT_TOLERANCE < amount:
+            outcome.update(status=PAYMENT_REJECTED,
+                           reason=f"Payer {payer} sent {withdrawn.get(payer, 0.0)} {payment['currency']}, expected {amount}")
+        elif deposited.get(recipient, 0.0) + AMOUNT_TOLERANCE < amount:
+            outcome.update(status=PAYMENT_REJECTED,
+                           reason=f"Recipient {recipient} received {deposited.get(recipient, 0.0)} {payment['currency']}, expected {amount}")
+        else:
+            outcome.update(status=PAYMENT_VERIFIED, reason=None)
+    elif result and result.get('status') == 'Expired':
+        outcome.update(status=PAYMENT_REJECTED, reason='Transaction expired before it was sealed')
+    elif now - datetime.fromisoformat(payment['created_at']) > VERIFY_TIMEOUT:
+        outcome.update(status=PAYMENT_REJECTED, reason=f"Not sealed within {VERIFY_TIMEOUT}")
+    return outcome
+
+
+def claim_due_payments(conn: sqlite3.Connection, limit: int = DEFAULT_BATCH_SIZE,
+                       now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Take up to limit pending payments whose check is due, and lease them.
+
+    The lease moves next_verification_at out in the same write transaction as the select,
+    so verifiers in other worker processes skip these payments.
+    """
+    now = now or datetime.now()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT p.transaction_id, p.sleeper_league_id, p.season_year, p.wallet_address, p.amount, p.currency,
+                   p.verification_attempts, p.created_at, f.fee_currency
+            FROM LeaguePayments p
+            LEFT JOIN LeagueFees f ON f.sleeper_league_id = p.sleeper_league_id AND f.season_year = p.season_year
+            WHERE p.verification_status = ? AND (p.next_verification_at IS NULL OR p.next_verification_at <= ?)
+            ORDER BY p.next_verification_at, p.created_at
+            LIMIT ?
+        """, (PAYMENT_PENDING, now.isoformat(), limit))
+        columns = [d[0] for d in cursor.description]
+        due = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.executemany("UPDATE LeaguePayments SET next_verification_at = ? WHERE transaction_id = ?",
+                           [((now + timedelta(seconds=CLAIM_LEASE_SECONDS)).isoformat(), p['transaction_id']) for p in due])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return due
+
+
+def recompute_league_fees(cursor: sqlite3.Cursor, league_seasons: Set[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """
+    Rebuild paid amounts and statuses of the given league seasons from their verified payments. Does not commit.
+
+    Updates UserLeagueLinks.fee_paid_amount and fee_payment_status of every payer, the
+    season's FeeSchedules.total_collected and the league summary row. Payments in another
+    currency than the season's LeagueFees.fee_currency are not counted.
+
+    Returns:
+        List[Tuple[str, int]]: League seasons in which every linked team has now paid.
+    """
+    fully_paid = []
+    for league_id, season_year in sorted(league_seasons):
+        cursor.execute("SELECT fee_amount, fee_currency FROM LeagueFees WHERE sleeper_league_id = ? AND season_year = ?",
+                       (league_id, season_year))
+        row = cursor.fetchone()
+        required_fee = float(row[0]) if row and row[0] is not None else 0.0
+        fee_currency = row[1] if row else None
+
+        cursor.execute("""
+            SELECT wallet_address, SUM(amount) FROM LeaguePayments
+            WHERE sleeper_league_id = ? AND season_year = ? AND verification_status = ?
+              AND (? IS NULL OR currency = ?)
+            GROUP BY wallet_address
+        """, (league_id, season_year, PAYMENT_VERIFIED, fee_currency, fee_currency))
+        paid_by_wallet = cursor.fetchall()
+        cursor.executemany("""
+            UPDATE UserLeagueLinks SET fee_paid_amount = ?, fee_payment_status = ?, updated_at = datetime('now')
+            WHERE wallet_address = ? AND sleeper_league_id = ?
+        """, [(paid, fee_payment_status(paid, required_fee), wallet, league_id) for wallet, paid in paid_by_wallet])
+        cursor.execute("""
+            UPDATE FeeSchedules SET total_collected = ?, updated_at = datetime('now')
+            WHERE sleeper_league_id = ? AND season_year = ?
+        """, (sum(paid for _, paid in paid_by_wallet), league_id, season_year))
+        refresh_league_summary(cursor, league_id)
+
+        cursor.execute("""
+            SELECT COUNT(*), SUM(CASE WHEN fee_payment_status = 'paid' THEN 1 ELSE 0 END)
+            FROM UserLeagueLinks WHERE sleeper_league_id = ?
+        """, (league_id,))
+        total_teams, paid_teams = cursor.fetchone()
+        if total_teams and paid_teams == total_teams:
+            fully_paid.append((league_id, season_year))
+    return fully_paid
+
+
+def settle_payments(cursor: sqlite3.Cursor, claimed: List[Dict[str, Any]], outcomes: List[Dict[str, Any]],
+                    now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Store the outcome of one batch of checks. Does not commit.
+
+    Pending payments get their next check scheduled with backoff. Verified and rejected ones
+    are updated in bulk, then the league seasons with a newly verified payment are recomputed.
+
+    Returns:
+        Dict[str, Any]: Counts of verified, rejected and still pending payments, and
+            'fully_paid', the league seasons in which every team has now paid.
+    """
+    now = now or datetime.now()
+    now_iso = now.isoformat()
+    by_id = {p['transaction_id']: p for p in claimed}
+    counts = {PAYMENT_VERIFIED: 0, PAYMENT_REJECTED: 0, PAYMENT_PENDING: 0}
+    pending_rows, settled_rows = [], []
+    changed: Set[Tuple[str, int]] = set()
+
+    for outcome in outcomes:
+        payment = by_id[outcome['transaction_id']]
+        counts[outcome['status']] += 1
+        attempts = payment['verification_attempts'] + 1
+        if outcome['status'] == PAYMENT_PENDING:
+            pending_rows.append((attempts, outcome['reason'], (now + timedelta(seconds=next_check_delay(attempts))).isoformat(),
+                                 payment['transaction_id']))
+            continue
+        settled_rows.append((outcome['status'], outcome['reason'], attempts, now_iso, payment['transaction_id']))
+        if outcome['status'] == PAYMENT_VERIFIED:
+            changed.add((payment['sleeper_league_id'], payment['season_year']))
+
+    cursor.executemany("""
+        UPDATE LeaguePayments
+        SET verification_attempts = ?, rejection_reason = ?, next_verification_at = ?
+        WHERE transaction_id = ? AND verification_status = 'pending'
+    """, pending_rows)
+    cursor.executemany("""
+        UPDATE LeaguePayments
+        SET verification_status = ?, rejection_reason = ?, verification_attempts = ?, verified_at = ?,
+            next_verification_at = NULL, updated_at = datetime('now')
+        WHERE transaction_id = ? AND verification_status = 'pending'
+    """, settled_rows)
+    return {**counts, 'fully_paid': recompute_league_fees(cursor, changed)}
+
+
+def run_verifier_cycle(conn: sqlite3.Connection, client: Any, recipient_address: str = DEFAULT_RECIPIENT_ADDRESS,
+                       batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = DEFAULT_FETCH_WORKERS) -> Dict[str, Any]:
+    """
+    Verify one batch of due payments and settle the results in one write transaction.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        client (Any): Object with get_transaction_result(transaction_id), e.g. FlowAccessClient.
+        recipient_address (str): Wallet the league fees are paid to.
+        batch_size (int): Most payments checked per cycle.
+        max_workers (int): Concurrent access node requests.
+
+    Returns:
+        Dict[str, Any]: 'checked', plus the counts and 'fully_paid' list of settle_payments.
+    """
+    claimed = claim_due_payments(conn, batch_size)
+    if not claimed:
+        return {'checked': 0, 'fully_paid': []}
+
+    def check(payment: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = client.get_transaction_result(payment['transaction_id'])
+            return evaluate_payment(payment, result, None, recipient_address, _utcnow())
+        except Exception as e:
+            return evaluate_payment(payment, None, f"Status check failed: {e}", recipient_address, _utcnow())
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(claimed)))) as executor:
+        outcomes = list(executor.map(check, claimed))
+
+    with conn:
+        result = settle_payments(conn.cursor(), claimed, outcomes)
+    if result[PAYMENT_VERIFIED] or result[PAYMENT_REJECTED]:
+        logger.info(f"payment_verifier: {result[PAYMENT_VERIFIED]} verified, {result[PAYMENT_REJECTED]} rejected, "
+                    f"{result[PAYMENT_PENDING]} pending")
+    return {'checked': len(claimed), **result}
+
+
+def seconds_until_next_verification(conn: sqlite3.Connection) -> Optional[float]:
+    """Seconds until the earliest pending payment is due (0 if overdue), or None when nothing is pending."""
+    row = conn.execute("""
+        SELECT COUNT(*), MIN(COALESCE(next_verification_at, '')) FROM LeaguePayments WHERE verification_status = ?
+    """, (PAYMENT_PENDING,)).fetchone()
+    if not row[0]:
+        return None
+    if not row[1]:
+        return 0.0
+    return max(0.0, (datetime.fromisoformat(row[1]) - datetime.now()).total_seconds())
+
+
+class PaymentVerifier:
+    """
+    Runs run_verifier_cycle on a daemon thread until stopped.
+
+    Sleeps until the earliest pending payment is due, at most interval seconds, so payments
+    recorded by any process are picked up within one interval.
+
+    Args:
+        db_path (str): Keeper database file.
+        client (Any): Access node client, see run_verifier_cycle.
+        recipient_address (str): Wallet the league fees are paid to.
+        interval (float): Longest sleep between cycles.
+        batch_size (int): Most payments checked per cycle.
+        busy_timeout (float): Seconds to wait for the database write lock.
+        on_fees_collected (Optional[Callable[[str, int], Any]]): Called with (league_id, season_year)
+            after the commit that made every team of a league paid. Errors are logged.
+    """
+
+    def __init__(self, db_path: str, client: Any, recipient_address: str = DEFAULT_RECIPIENT_ADDRESS,
+                 interval: float = DEFAULT_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE, busy_timeout: float = 30.0,
+                 on_fees_collected: Optional[Callable[[str, int], Any]] = None):
+        self.db_path = db_path
+        self.client = client
+        self.recipient_address = recipient_address
+        self.interval = interval
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self.on_fees_collected = on_fees_collected
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def wake(self) -> None:
+        """Check due payments now instead of after the current sleep."""
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start verifying in the background."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='payment-verifier', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current cycle."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        # Fee summaries count rosters, which may live in league shards
+        conn = connect_core(self.db_path, timeout=self.busy_timeout)
+        try:
+            while not self._stopping:
+                delay = self.interval
+                try:
+                    result = run_verifier_cycle(conn, self.client, self.recipient_address, self.batch_size)
+                    for league_id, season_year in result['fully_paid']:
+                        self._fees_collected(league_id, season_year)
+                    if result['checked'] >= self.batch_size:
+                        delay = 0  # More due right away
+                    else:
+                        next_due = seconds_until_next_verification(conn)
+                        if next_due is not None:
+                            delay = min(delay, next_due)
+                except Exception as e:
+                    logger.error(f"payment_verifier: Cycle failed: {e}")
+                self._wake.wait(delay)
+                self._wake.clear()
+        finally:
+            conn.close()
+
+    def _fees_collected(self, league_id: str, season_year: int) -> None:
+        if self.on_fees_collected is None:
+            return
+        try:
+            self.on_fees_collected(league_id, season_year)
+        except Exception as e:
+            logger.error(f"payment_verifier: Fees-collected hook failed for league {league_id}: {e}")
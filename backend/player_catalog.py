@@ -0,0 +1,151 @@
+"""
+Player catalog snapshots for the /players endpoint.
+
+The players table is refreshed from Sleeper at most weekly, so the full
+id -> name mapping is serialized and compressed once per catalog version and
+served from memory until the next refresh bumps the version.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import brotli  # Optional: only used when installed
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_catalog_version(cursor: sqlite3.Cursor) -> int:
+    """
+    Return the current player catalog version.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+
+    Returns:
+        int: Highest catalog_version stamped on any player, 0 if the table is empty.
+    """
+    cursor.execute("SELECT COALESCE(MAX(catalog_version), 0) FROM players")
+    row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+def get_players_since(cursor: sqlite3.Cursor, since_version: int) -> Dict[str, str]:
+    """
+    Return the players added or changed after a given catalog version.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        since_version (int): Catalog version the client already holds.
+
+    Returns:
+        Dict[str, str]: Mapping of sleeper_player_id to name for changed players.
+    """
+    cursor.execute(
+        "SELECT sleeper_player_id, name FROM players WHERE catalog_version > ?",
+        (since_version,)
+    )
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+class PlayerCatalogSnapshot:
+    """Full /players payload for one catalog version, pre-encoded for every supported encoding."""
+
+    def __init__(self, version: int, players: Dict[str, str]):
+        self.version = version
+        self.player_count = len(players)
+        self.body = json.dumps(
+            {'success': True, 'version': version, 'players': players},
+            separators=(',', ':')
+        ).encode('utf-8')
+        # Hash the body too: after a DB restore the same version can carry different bytes
+        digest = hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"players-v{version}-{digest}"'
+        self.encoded = {'gzip': gzip.compress(self.body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body)
+
+    def select_encoding(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Pick the best precompressed encoding the client accepts.
+
+        Args:
+            accept_encoding (Optional[str]): Raw Accept-Encoding request header.
+
+        Returns:
+            Optional[str]: 'br', 'gzip', or None for the identity body.
+        """
+        if not accept_encoding:
+            return None
+        accepted = set()
+        for part in accept_encoding.split(','):
+            token, _, params = part.strip().partition(';')
+            params = params.replace(' ', '')
+            if params.startswith('q='):
+                try:
+                    if float(params[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(token.strip().lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and (encoding in accepted or '*' in accepted):
+                return encoding
+        return None
+
+
+class PlayerCatalogCache:
+    """Holder of the latest PlayerCatalogSnapshot (one per app, see AppResources)."""
+
+    def __init__(self):
+        self._snapshot: Optional[PlayerCatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get_snapshot(self, cursor: sqlite3.Cursor) -> PlayerCatalogSnapshot:
+        """
+        Return the snapshot for the current catalog version, rebuilding it if the catalog moved.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor on the keeper database.
+
+        Returns:
+            PlayerCatalogSnapshot: Snapshot matching the current catalog version.
+        """
+        version = get_catalog_version(cursor)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                cursor.execute("SELECT sleeper_player_id, name FROM players")
+                players = {row[0]: row[1] for row in cursor.fetchall()}
+                snapshot = PlayerCatalogSnapshot(version, players)
+                self._snapshot = snapshot
+                logger.info(f"PlayerCatalogCache: Built snapshot v{version} ({snapshot.player_count} players, "
+                            f"{len(snapshot.body)} bytes raw, {len(snapshot.encoded['gzip'])} bytes gzip)")
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot so the next request rebuilds it."""
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return basic information about the cached snapshot for diagnostics."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'cached': False}
+        return {
+            'cached': True,
+            'version': snapshot.version,
+            'player_count': snapshot.player_count,
+            'etag': snapshot.etag,
+            'sizes': {'identity': len(snapshot.body), **{k: len(v) for k, v in snapshot.encoded.items()}}
+        }
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Move closed seasons out of the live tables into the archive database.
+
+Run after season_curr.current_year advances (see update_season.py). Each closed season is
+moved with one set-based copy into the archive and one delete from the live tables.
+
+Usage:
+    python scripts/archive_seasons.py [--db /var/data/keeper.db] [--archive PATH] [--current-season 2026]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from season_archive import archive_path_for, run_season_rollover  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive closed seasons of the keeper database')
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', '/var/data/keeper.db'), help='Keeper database file')
+    parser.add_argument('--archive', default=os.getenv('ARCHIVE_DATABASE_URL'), help='Archive file (default: next to --db)')
+    parser.add_argument('--current-season', type=int, help='Override season_curr.current_year')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        result = run_season_rollover(conn, args.archive or archive_path_for(args.db), args.current_season)
+    finally:
+        conn.close()
+    if result['current_season'] is None:
+        print("No current season set; nothing archived.")
+        sys.exit(1)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Take, verify or list online backups of the keeper database.
+
+The app takes backups on its own every BACKUP_INTERVAL seconds; this is for taking one
+now (e.g. before a migration) and for checking the generations. See db_backup.py.
+
+Usage:
+    python scripts/backup_db.py backup [--db /var/data/keeper.db] [--dir PATH] [--generations 7]
+    python scripts/backup_db.py verify [--db ...] [--dir PATH]
+    python scripts/backup_db.py list [--db ...] [--dir PATH]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_backup import (DEFAULT_BACKUP_GENERATIONS, DEFAULT_BACKUP_PAGES, DEFAULT_BACKUP_PAUSE,  # noqa: E402
+                       backup_dir_for, create_backup, list_backups, read_manifest, rotate_backups, verify_backup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Online backups of the keeper database')
+    parser.add_argument('command', choices=('backup', 'verify', 'list'))
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', '/var/data/keeper.db'), help='Keeper database file')
+    parser.add_argument('--dir', default=os.getenv('BACKUP_DIR'), help='Backup directory (default: backups/ next to --db)')
+    parser.add_argument('--generations', type=int, default=int(os.getenv('BACKUP_GENERATIONS', str(DEFAULT_BACKUP_GENERATIONS))))
+    parser.add_argument('--pages', type=int, default=DEFAULT_BACKUP_PAGES, help='Pages copied per step')
+    parser.add_argument('--pause', type=float, default=DEFAULT_BACKUP_PAUSE, help='Seconds between steps')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Database not found at: {args.db}")
+        sys.exit(1)
+    backup_dir = args.dir or backup_dir_for(args.db)
+
+    if args.command == 'backup':
+        manifest = create_backup(args.db, backup_dir, pages=args.pages, pause=args.pause)
+        print(f"{manifest['path']}: {manifest['bytes']:,} bytes in {manifest['seconds']}s, "
+              f"{manifest['steps']} steps (longest {manifest['max_step_ms']} ms)")
+        verification = verify_backup(manifest['path'])
+        if not verification['ok']:
+            print(f"Verification FAILED: {'; '.join(verification['errors'])}")
+            sys.exit(1)
+        print("Verified: checksum, integrity_check and row counts")
+        for removed in rotate_backups(backup_dir, args.db, args.generations):
+            print(f"Rotated out {removed}")
+    elif args.command == 'verify':
+        failed = 0
+        for backup_path in list_backups(backup_dir, args.db):
+            verification = verify_backup(backup_path)
+            failed += not verification['ok']
+            print(f"{backup_path}: {'ok' if verification['ok'] else 'FAILED - ' + '; '.join(verification['errors'])}")
+        sys.exit(1 if failed else 0)
+    else:
+        for backup_path in list_backups(backup_dir, args.db):
+            manifest = read_manifest(backup_path)
+            print(f"{backup_path}  {manifest['created_at']}  {manifest['bytes']:,} bytes  sha256 {manifest['sha256'][:16]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark an online backup's duration and its effect on write latency.
+
+Seeds a temporary WAL database of about --mb megabytes, then times small commits from a
+writer thread (a stand-in for request writes) for --seconds without a backup, and again
+while a paced backup runs, and reports p50/p99/max commit latency for both.
+
+Usage:
+    python scripts/benchmark_backup.py [--mb 200] [--seconds 5] [--pages 256] [--pause 0.02]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from db_backup import create_backup  # noqa: E402
+
+
+def seed(db_path: str, megabytes: int) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE filler (id INTEGER PRIMARY KEY, data BLOB)")
+    conn.execute("CREATE TABLE requests (id INTEGER PRIMARY KEY, at REAL)")
+    conn.executemany("INSERT INTO filler (data) VALUES (?)", ((os.urandom(1000),) for _ in range(megabytes * 1000)))
+    conn.commit()
+    conn.close()
+
+
+def commit_latencies(db_path: str, stop: threading.Event) -> list:
+    conn = sqlite3.connect(db_path, timeout=30)
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn.execute("INSERT INTO requests (at) VALUES (?)", (started,))
+        conn.commit()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.002)
+    conn.close()
+    return latencies
+
+
+def summary(latencies: list) -> str:
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99)]
+    return (f"{len(ordered)} commits, p50 {statistics.median(ordered) * 1000:.2f} ms, "
+            f"p99 {p99 * 1000:.2f} ms, max {ordered[-1] * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark online backups against write latency')
+    parser.add_argument('--mb', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--pages', type=int, default=256)
+    parser.add_argument('--pause', type=float, default=0.02)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmpdir, 'keeper.db')
+        seed(db_path, args.mb)
+        print(f"Database: {os.path.getsize(db_path):,} bytes")
+
+        for label in ('without backup', 'during backup'):
+            stop = threading.Event()
+            results = {}
+            thread = threading.Thread(target=lambda: results.update(latencies=commit_latencies(db_path, stop)))
+            thread.start()
+            if label == 'during backup':
+                manifest = create_backup(db_path, os.path.join(tmpdir, 'backups'), pages=args.pages, pause=args.pause)
+                print(f"Backup: {manifest['seconds']}s, {manifest['steps']} steps, longest step {manifest['max_step_ms']} ms")
+            else:
+                time.sleep(args.seconds)
+            stop.set()
+            thread.join()
+            print(f"Commits {label}: {summary(results['latencies'])}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark /league/local for users linked to more and more leagues.
+
+Seeds a temporary database with one wallet linked to N leagues of --teams teams each,
+then calls the endpoint through the Flask test client and counts the SQL statements it
+runs. The query count should not grow with the number of leagues.
+
+Usage:
+    python scripts/benchmark_league_local.py [--leagues 1 5 20 50] [--teams 12] [--runs 20]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+import app as app_module  # noqa: E402
+
+WALLET = '0xbenchmark'
+
+
+def seed(conn, leagues: int, teams: int) -> None:
+    """One wallet in every league; each league has its own managers."""
+    conn.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username) VALUES (?, 'u0', 'bench')", (WALLET,))
+    for league in range(leagues):
+        league_id = f'L{league}'
+        conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season, settings, total_rosters) VALUES (?, ?, '2025', ?, ?)",
+                     (league_id, f'SKL Bench {league}', json.dumps({'total_rosters': teams}), teams))
+        conn.execute("INSERT INTO UserLeagueLinks (wallet_address, sleeper_league_id) VALUES (?, ?)", (WALLET, league_id))
+        conn.executemany("INSERT OR IGNORE INTO Users (wallet_address, sleeper_user_id, username) VALUES (?, ?, ?)",
+                         [(f'0xw{league}_{t}', f'u{league}_{t}', f'manager{t}') for t in range(1, teams)])
+        conn.executemany("""
+            INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, owner_id, team_name, wins, losses, ties)
+            VALUES (?, ?, ?, ?, 3, 2, 0)
+        """, [(str(t), league_id, 'u0' if t == 0 else f'u{league}_{t}', f'Team {t}') for t in range(teams)])
+    conn.commit()
+
+
+def measure(leagues: int, teams: int, runs: int) -> dict:
+    """Median latency and statement count of one /league/local call."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with contextlib.redirect_stdout(io.StringIO()):  # create_app and the route print debug lines
+            flask_app = app_module.create_app({'DATABASE_URL': os.path.join(tmpdir, 'keeper.db'), 'TESTING': True,
+                                               'DB_WRITER': False})
+            with flask_app.app_context():
+                conn = app_module.get_global_db_connection()
+                seed(conn, leagues, teams)
+            client = flask_app.test_client()
+            with client.session_transaction() as sess:
+                sess['wallet_address'] = WALLET
+
+            statements = []
+            conn.set_trace_callback(statements.append)
+            response = client.get('/league/local')
+            conn.set_trace_callback(None)
+            assert response.status_code == 200 and len(response.get_json()['leagues']) == leagues
+
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                client.get('/league/local')
+                timings.append((time.perf_counter() - start) * 1000)
+            flask_app.extensions['skl_resources'].close()
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+    return {'queries': len(selects), 'median_ms': statistics.median(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /league/local against the number of linked leagues')
+    parser.add_argument('--leagues', type=int, nargs='+', default=[1, 5, 20, 50], help='League counts to measure')
+    parser.add_argument('--teams', type=int, default=12, help='Teams per league')
+    parser.add_argument('--runs', type=int, default=20, help='Timed requests per league count')
+    args = parser.parse_args()
+
+    print(f"/league/local benchmark ({args.teams} teams per league, {args.runs} runs)")
+    results = []
+    for leagues in args.leagues:
+        result = measure(leagues, args.teams, args.runs)
+        results.append(result)
+        print(f"  {leagues:>4} leagues   {result['queries']:3d} queries   median {result['median_ms']:8.2f} ms")
+    if len({r['queries'] for r in results}) != 1:
+        print("FAIL: query count grows with the number of leagues")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offline rebuild of derived league tables from the payload archive.
+
+Seeds a temporary keeper database and payload archive with --leagues synthetic leagues, each
+with --syncs archived syncs of --teams rosters, --weeks weeks of --transactions transactions
+and a completed auction draft (every sync drops one drafted player, so penalties are replayed
+too), then rebuilds all leagues with 1 and with --workers processes and reports the time per
+100 leagues.
+
+Usage:
+    python scripts/benchmark_rebuild.py [--leagues 100] [--syncs 3] [--teams 12] [--players 20] [--weeks 4] [--transactions 10] [--workers 4]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import init_db  # noqa: E402
+from league_rebuild import rebuild_leagues  # noqa: E402
+from payload_archive import PayloadArchive  # noqa: E402
+
+SEASON = '2025'
+FIRST_SYNC = datetime(2025, 7, 1)
+
+
+def league_payloads(league_id: str, sync: int, teams: int, players: int, weeks: int, transactions: int) -> dict:
+    """Responses of one league sync; sync n has dropped the first n drafted players of team 1."""
+    rosters = []
+    for team in range(1, teams + 1):
+        team_players = [f'{league_id}_p{team}_{n}' for n in range(players)]
+        if team == 1:
+            team_players = team_players[sync:]
+        rosters.append({'roster_id': team, 'owner_id': f'{league_id}_u{team}', 'players': team_players,
+                        'settings': {'wins': sync, 'fpts': 100 + team}})
+    payloads = {
+        f'/league/{league_id}': {'league_id': league_id, 'name': f'SKL Bench {league_id}', 'season': SEASON,
+                                 'status': 'pre_draft', 'settings': {'total_rosters': teams}},
+        f'/league/{league_id}/users': [{'user_id': f'{league_id}_u{team}', 'username': f'user{team}',
+                                        'display_name': f'Team {team}', 'is_owner': team == 1}
+                                       for team in range(1, teams + 1)],
+        f'/league/{league_id}/rosters': rosters,
+        f'/league/{league_id}/drafts': [{'draft_id': f'{league_id}_d', 'type': 'auction', 'status': 'complete', 'season': SEASON}],
+        f'/draft/{league_id}_d/picks': [{'player_id': f'{league_id}_p{team}_{n}', 'roster_id': team, 'pick_no': team * players + n,
+                                         'metadata': {'amount': str(1 + n)}}
+                                        for team in range(1, teams + 1) for n in range(players)],
+    }
+    for week in range(1, weeks + 1):
+        payloads[f'/league/{league_id}/transactions/{week}'] = [
+            {'transaction_id': f'{league_id}_t{week}_{n}', 'type': 'free_agent', 'status': 'complete', 'leg': week,
+             'creator': f'{league_id}_u1', 'roster_ids': [1 + n % teams], 'adds': {f'fa{week}_{n}': 1 + n % teams}}
+            for n in range(transactions)]
+    return payloads
+
+
+def seed(db_path: str, archive_path: str, args) -> None:
+    conn = sqlite3.connect(db_path)
+    init_db(conn)
+    archive = PayloadArchive(archive_path)
+    archive.record('/state/nfl', {'season': SEASON, 'week': args.weeks, 'season_type': 'pre',
+                                  'season_start_date': '2099-09-04'}, fetched_at=FIRST_SYNC.isoformat(timespec='microseconds'))
+    for index in range(args.leagues):
+        league_id = str(900000 + index)
+        conn.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username) VALUES (?, ?, 'user1')",
+                     (f'0xbench{index}', f'{league_id}_u1'))
+        conn.execute("INSERT INTO UserLeagueLinks (wallet_address, sleeper_league_id) VALUES (?, ?)", (f'0xbench{index}', league_id))
+        for sync in range(args.syncs):
+            fetched_at = FIRST_SYNC + timedelta(days=sync, microseconds=index + 1)
+            # The league details come first: their fetch time starts the sync
+            for offset, (endpoint, payload) in enumerate(league_payloads(league_id, sync, args.teams, args.players,
+                                                                         args.weeks, args.transactions).items()):
+                archive.record(endpoint, payload, fetched_at=(fetched_at + timedelta(seconds=offset)).isoformat(timespec='microseconds'))
+    conn.commit()
+    conn.close()
+    archive.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rebuild from archived Sleeper payloads')
+    parser.add_argument('--leagues', type=int, default=100)
+    parser.add_argument('--syncs', type=int, default=3)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--players', type=int, default=20)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--transactions', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmpdir, 'keeper.db')
+        archive_path = os.path.join(tmpdir, 'keeper_payloads.db')
+        seed(db_path, archive_path, args)
+        stats = PayloadArchive(archive_path).stats()
+        print(f"Archive: {stats['fetches']:,} fetches, {stats['payloads']:,} distinct payloads, "
+              f"{stats['compressed_bytes']:,} bytes compressed ({os.path.getsize(archive_path):,} bytes on disk)")
+
+        for workers in sorted({1, args.workers}):
+            started = time.perf_counter()
+            results = rebuild_leagues(db_path, archive_path, workers=workers)
+            elapsed = time.perf_counter() - started
+            failed = [result for result in results if 'rows' not in result]
+            if failed:
+                print(f"{len(failed)} leagues not rebuilt, e.g. {failed[0]}")
+            penalties = sum(result['rows']['penalties'] for result in results if 'rows' in result)
+            print(f"{workers} worker(s): {len(results)} leagues in {elapsed:.2f}s "
+                  f"({elapsed * 100 / max(len(results), 1):.2f}s per 100 leagues), {penalties} penalties rebuilt")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot-path queries before and after archiving closed seasons.
+
+Seeds a temporary database with --seasons past seasons plus the current one, each a league of
+--teams teams with --contracts contracts and --transactions transactions per team, then times
+the current league's cap query over vw_contractByYear and its recent-transactions listing,
+runs the season rollover and times them again.
+
+Usage:
+    python scripts/benchmark_season_archive.py [--seasons 8] [--teams 12] [--contracts 25] [--transactions 40] [--runs 50]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import init_db  # noqa: E402
+from season_archive import history_source, run_season_rollover  # noqa: E402
+
+CURRENT_SEASON = 2026
+
+CAP_QUERY = """
+    SELECT COALESCE(SUM(cost_for_season), 0)
+    FROM vw_contractByYear
+    WHERE team_id = ? AND sleeper_league_id = ? AND (contract_start_season + year_number_in_contract - 1) = ?
+"""
+
+RECENT_TRANSACTIONS_QUERY = """
+    SELECT sleeper_transaction_id, type, status, data, created_at
+    FROM {source}
+    WHERE league_id = ?
+    ORDER BY created_at DESC
+    LIMIT 15
+"""
+
+
+def seed(conn, seasons: int, teams: int, contracts: int, transactions: int) -> str:
+    """One league per season; returns the current season's league id."""
+    conn.execute("DELETE FROM season_curr")
+    conn.execute("INSERT INTO season_curr (current_year, IsOffSeason) VALUES (?, 0)", (CURRENT_SEASON,))
+    conn.executemany("INSERT INTO players (sleeper_player_id, name) VALUES (?, ?)",
+                     [(f'p{n}', f'Player {n}') for n in range(teams * contracts)])
+    for season in range(CURRENT_SEASON - seasons, CURRENT_SEASON + 1):
+        league_id = str(100000 + season)
+        conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES (?, 'SKL Bench', ?)", (league_id, str(season)))
+        conn.executemany("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id) VALUES (?, ?)",
+                         [(str(team), league_id) for team in range(teams)])
+        conn.executemany("""
+            INSERT INTO contracts (player_id, team_id, sleeper_league_id, draft_amount, contract_year, duration)
+            VALUES (?, ?, ?, ?, ?, 1)
+        """, [(f'p{team * contracts + n}', str(team), league_id, 5 + n, season)
+              for team in range(teams) for n in range(contracts)])
+        conn.executemany("""
+            INSERT INTO transactions (sleeper_transaction_id, league_id, type, status, data, created_at)
+            VALUES (?, ?, 'free_agent', 'complete', '{}', ?)
+        """, [(f'{season}-{n}', league_id, f'{season}-09-01 {n % 24:02d}:00:00') for n in range(teams * transactions)])
+    conn.commit()
+    return str(100000 + CURRENT_SEASON)
+
+
+def time_queries(conn, league_id: str, runs: int) -> dict:
+    """Median milliseconds of the cap query (every team) and the recent-transactions listing."""
+    cursor = conn.cursor()
+    teams = [row[0] for row in cursor.execute("SELECT sleeper_roster_id FROM rosters WHERE sleeper_league_id = ?", (league_id,))]
+    transactions_sql = RECENT_TRANSACTIONS_QUERY.format(source=history_source(cursor, 'transactions'))
+    cap, listing = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for team in teams:
+            cursor.execute(CAP_QUERY, (team, league_id, CURRENT_SEASON)).fetchone()
+        cap.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        cursor.execute(transactions_sql, (league_id,)).fetchall()
+        listing.append((time.perf_counter() - start) * 1000)
+    return {'cap_ms': statistics.median(cap), 'transactions_ms': statistics.median(listing)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hot-path queries before and after the season rollover')
+    parser.add_argument('--seasons', type=int, default=8, help='Past seasons to seed')
+    parser.add_argument('--teams', type=int, default=12, help='Teams per league')
+    parser.add_argument('--contracts', type=int, default=25, help='Contracts per team per season')
+    parser.add_argument('--transactions', type=int, default=40, help='Transactions per team per season')
+    parser.add_argument('--runs', type=int, default=50, help='Timed runs per query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        conn = sqlite3.connect(os.path.join(tmpdir, 'keeper.db'))
+        conn.execute("PRAGMA journal_mode=WAL")
+        init_db(conn)
+        league_id = seed(conn, args.seasons, args.teams, args.contracts, args.transactions)
+
+        before = time_queries(conn, league_id, args.runs)
+        live_before = conn.execute("SELECT COUNT(*) FROM contracts").fetchone()[0]
+        start = time.perf_counter()
+        result = run_season_rollover(conn, os.path.join(tmpdir, 'keeper_archive.db'))
+        rollover_ms = (time.perf_counter() - start) * 1000
+        after = time_queries(conn, league_id, args.runs)
+        live_after = conn.execute("SELECT COUNT(*) FROM contracts").fetchone()[0]
+        conn.close()
+
+    print(f"Season archive benchmark ({args.seasons} past seasons, {args.teams} teams, {args.runs} runs)")
+    print(f"  rollover: {len(result['seasons'])} seasons in {rollover_ms:.1f} ms; live contracts {live_before} -> {live_after}")
+    print(f"  {'':24}{'before':>12}{'after':>12}")
+    print(f"  {'cap query (all teams)':24}{before['cap_ms']:10.2f}ms{after['cap_ms']:10.2f}ms")
+    print(f"  {'recent transactions':24}{before['transactions_ms']:10.2f}ms{after['transactions_ms']:10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
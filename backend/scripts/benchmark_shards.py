@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark league sync commits on one database file against league shard files.
+
+Seeds --leagues leagues of --teams rosters, then --workers processes (like the app's
+worker processes) with --threads threads each commit --syncs league-sized units per league:
+roster upserts and --weeks weeks of matchups. With one file every worker's writer competes
+for the file's write lock; split into --shards files each league's unit goes through its
+shard's writer, so units of leagues on different shards commit in parallel. Reports the
+elapsed time and commit latencies of both.
+
+Usage:
+    python scripts/benchmark_shards.py [--leagues 64] [--teams 12] [--weeks 17] [--syncs 5] [--threads 4] [--workers 4] [--shards 4]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import init_db  # noqa: E402
+from db_writer import DatabaseWriter  # noqa: E402
+from league_shards import attach_core, shard_index, shard_path, split_database  # noqa: E402
+
+
+def seed(db_path: str, leagues: int, teams: int) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    init_db(conn)
+    for index in range(leagues):
+        league_id = str(1100000000000000000 + index)
+        conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES (?, ?, '2025')",
+                     (league_id, f'SKL Bench {index}'))
+        conn.executemany("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, players) VALUES (?, ?, '[]')",
+                         [(str(team), league_id) for team in range(1, teams + 1)])
+    conn.commit()
+    conn.close()
+
+
+def league_unit(league_id: str, sync: int, teams: int, weeks: int):
+    """Write unit shaped like a league sync: changed rosters and the season's matchups."""
+    def unit(cursor: sqlite3.Cursor) -> None:
+        cursor.executemany("""
+            UPDATE rosters SET wins = ?, points_for = ?, players = ?, updated_at = datetime('now')
+            WHERE sleeper_roster_id = ? AND sleeper_league_id = ?
+        """, [(sync, 100.0 * sync + team, '["p%d"]' % sync, str(team), league_id) for team in range(1, teams + 1)])
+        cursor.executemany("""
+            INSERT OR REPLACE INTO matchups (league_id, week, roster_id, matchup_id, points, starters)
+            VALUES (?, ?, ?, ?, ?, '[]')
+        """, [(league_id, week, str(team), (team + 1) // 2, 90.0 + sync) for week in range(1, weeks + 1)
+              for team in range(1, teams + 1)])
+    return unit
+
+
+def sync_leagues(db_path: str, shard_count: int, league_ids, args) -> list:
+    """One worker process: its own writers (one, or one per shard) syncing its share of the leagues."""
+    if shard_count:
+        writers = [DatabaseWriter(shard_path(db_path, index), name=f'db-writer-shard{index}',
+                                  on_connect=lambda conn: attach_core(conn, db_path, read_only=True))
+                   for index in range(shard_count)]
+    else:
+        writers = [DatabaseWriter(db_path)]
+    latencies = []
+
+    def sync_league(league_id: str) -> None:
+        writer = writers[shard_index(league_id, shard_count)]
+        for sync in range(args.syncs):
+            started = time.perf_counter()
+            writer.execute(league_unit(league_id, sync, args.teams, args.weeks))
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(sync_league, league_ids))
+    finally:
+        for writer in writers:
+            writer.close()
+    return latencies
+
+
+def run(db_path: str, shard_count: int, league_ids, args) -> dict:
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(sync_leagues, db_path, shard_count, league_ids[worker::args.workers], args)
+                   for worker in range(args.workers)]
+        latencies = sorted(latency for future in futures for latency in future.result())
+    elapsed = time.perf_counter() - started
+    return {'elapsed': elapsed, 'p50_ms': statistics.median(latencies) * 1000,
+            'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark league sync commits on one file against shard files')
+    parser.add_argument('--leagues', type=int, default=64)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=17)
+    parser.add_argument('--syncs', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=4, help='Syncing threads per worker process')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes, each with its own writers')
+    parser.add_argument('--shards', type=int, default=4)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        league_ids = [str(1100000000000000000 + index) for index in range(args.leagues)]
+        single_path = os.path.join(tmpdir, 'single', 'keeper.db')
+        sharded_path = os.path.join(tmpdir, 'sharded', 'keeper.db')
+        os.makedirs(os.path.dirname(single_path))
+        os.makedirs(os.path.dirname(sharded_path))
+        seed(single_path, args.leagues, args.teams)
+        seed(sharded_path, args.leagues, args.teams)
+        split_database(sharded_path, args.shards)
+
+        single = run(single_path, 0, league_ids, args)
+        sharded = run(sharded_path, args.shards, league_ids, args)
+
+        units = args.leagues * args.syncs
+        for label, result in (('1 file', single), (f'{args.shards} shards', sharded)):
+            print(f"{label}: {units} league units in {result['elapsed']:.2f}s ({units / result['elapsed']:.0f}/s), "
+                  f"commit p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
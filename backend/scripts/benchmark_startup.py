@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark backend startup: module import, create_app() and the first DB-backed request.
+
+Each sample runs in a fresh interpreter so module caches do not hide import cost.
+
+Usage:
+    python scripts/benchmark_startup.py [--runs 5] [--database-url :memory:]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SAMPLE_CODE = r'''
+import json, sys, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+flask_app = app_module.create_app({'DATABASE_URL': sys.argv[1], 'TESTING': True})
+created = time.perf_counter()
+with flask_app.app_context():
+    app_module.get_global_db_connection()
+first_db_use = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_db_use_ms': (first_db_use - created) * 1000,
+}))
+'''
+
+
+def run_sample(database_url: str) -> dict:
+    """Run one cold-start sample in a subprocess and return its timings."""
+    result = subprocess.run(
+        [sys.executable, '-c', SAMPLE_CODE, database_url],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    # Route prints go to stdout as well; the timings are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark backend startup time')
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold-start samples')
+    parser.add_argument('--database-url', default=':memory:', help='Database used for the first-use step')
+    args = parser.parse_args()
+
+    samples = [run_sample(args.database_url) for _ in range(args.runs)]
+    print(f"Startup benchmark ({args.runs} runs, database={args.database_url})")
+    for key in ('import_ms', 'create_app_ms', 'first_db_use_ms'):
+        values = [sample[key] for sample in samples]
+        print(f"  {key:<16} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
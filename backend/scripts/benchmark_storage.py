@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SQLAlchemy Core data-access layer (storage.py) on SQLite and PostgreSQL.
+
+For each --url, recreates the keeper schema and runs league-sync shaped workloads through
+KeeperStore: roster upserts, weekly matchup upserts, cache version bumps and
+vw_contractByYear reads. Each workload runs twice, with SQLAlchemy's compiled-statement
+cache on and off (query_cache_size=0), to show what the cache saves. On SQLite the
+roster upserts are also timed through raw sqlite3 with the same SQL, which gives the
+cost of the layer itself.
+
+Without --url a temporary SQLite file is used. Other URLs must point at a scratch
+database and need --reset, because the keeper tables there are dropped first.
+
+Usage:
+    python scripts/benchmark_storage.py [--url sqlite:///... --url postgresql://...] [--reset]
+        [--leagues 20] [--teams 12] [--weeks 17] [--syncs 5]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from storage import KeeperStore, contracts, create_schema, create_storage_engine, drop_schema, storage_url_for  # noqa: E402
+
+
+def roster_rows(sync: int, teams: int) -> list:
+    return [{'sleeper_roster_id': str(team), 'owner_id': f'u{team}', 'team_name': f'Team {team}',
+             'players': '["p%d"]' % sync, 'metadata': '{}', 'reserve': '[]', 'wins': sync, 'losses': 0, 'ties': 0,
+             'points_for': 100.0 * sync + team, 'payload_hash': f'{sync}-{team}'} for team in range(1, teams + 1)]
+
+
+def seed(store: KeeperStore, leagues: int, teams: int) -> list:
+    league_ids = [str(1100000000000000000 + index) for index in range(leagues)]
+    with store.begin() as conn:
+        store.upsert_players(conn, [{'sleeper_player_id': f'p{team}', 'name': f'Player {team}', 'position': 'WR',
+                                     'team': 'DET'} for team in range(1, teams + 1)])
+        for league_id in league_ids:
+            store.upsert_league(conn, {'league_id': league_id, 'name': 'SKL Bench', 'season': '2025',
+                                       'settings': {'total_rosters': teams}})
+            conn.execute(contracts.insert(), [
+                {'player_id': f'p{team}', 'team_id': str(team), 'sleeper_league_id': league_id,
+                 'draft_amount': 10.0 + team, 'contract_year': 2025, 'duration': 1 + team % 4}
+                for team in range(1, teams + 1)])
+    return league_ids
+
+
+def timed(label: str, results: dict, fn, repeats: int) -> None:
+    samples = []
+    for repeat in range(repeats):
+        started = time.perf_counter()
+        fn(repeat)
+        samples.append(time.perf_counter() - started)
+    results[label] = statistics.median(samples) * 1000
+
+
+def run_workloads(url: str, args, query_cache_size: int) -> dict:
+    engine = create_storage_engine(url, query_cache_size=query_cache_size)
+    try:
+        drop_schema(engine)
+        create_schema(engine)
+        store = KeeperStore(engine)
+        league_ids = seed(store, args.leagues, args.teams)
+        results = {}
+
+        def rosters(sync):
+            with store.begin() as conn:
+                for league_id in league_ids:
+                    store.upsert_rosters(conn, league_id, roster_rows(sync + 1, args.teams))
+
+        def matchups(sync):
+            with store.begin() as conn:
+                for league_id in league_ids:
+                    for week in range(1, args.weeks + 1):
+                        store.upsert_matchups(conn, league_id, week, [
+                            {'roster_id': team, 'matchup_id': (team + 1) // 2, 'points': 90.0 + sync, 'starters': []}
+                            for team in range(1, args.teams + 1)])
+
+        def bumps(sync):
+            for league_id in league_ids:
+                with store.begin() as conn:
+                    store.bump_cache_version(conn, f'league:{league_id}')
+
+        def contract_reads(sync):
+            with engine.connect() as conn:
+                for league_id in league_ids:
+                    store.contracts_by_year(conn, league_id, season=2026)
+
+        timed('roster upserts', results, rosters, args.syncs)
+        timed('matchup upserts', results, matchups, args.syncs)
+        timed('cache bumps (1 txn each)', results, bumps, args.syncs)
+        timed('vw_contractByYear reads', results, contract_reads, args.syncs)
+        drop_schema(engine)
+        return results
+    finally:
+        engine.dispose()
+
+
+def run_raw_sqlite(db_path: str, args) -> float:
+    """Roster upserts through sqlite3 with the SQL sleeper_service runs, for comparison."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    try:
+        league_ids = [str(1100000000000000000 + index) for index in range(args.leagues)]
+        samples = []
+        for sync in range(args.syncs):
+            started = time.perf_counter()
+            for league_id in league_ids:
+                stored = dict(conn.execute("SELECT sleeper_roster_id, payload_hash FROM rosters WHERE sleeper_league_id = ?",
+                                           (league_id,)).fetchall())
+                rows = [(r['sleeper_roster_id'], league_id, r['owner_id'], r['team_name'], r['players'], r['metadata'],
+                         r['reserve'], r['wins'], r['losses'], r['ties'], r['points_for'], r['payload_hash'])
+                        for r in roster_rows(sync + 1, args.teams) if stored.get(r['sleeper_roster_id']) != r['payload_hash']]
+                conn.executemany('''
+                    INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, owner_id, team_name, players, metadata,
+                                         reserve, wins, losses, ties, points_for, payload_hash, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
+                    ON CONFLICT(sleeper_roster_id, sleeper_league_id) DO UPDATE SET
+                        owner_id = excluded.owner_id, team_name = excluded.team_name, players = excluded.players,
+                        metadata = excluded.metadata, reserve = excluded.reserve, wins = excluded.wins,
+                        losses = excluded.losses, ties = excluded.ties, points_for = excluded.points_for,
+                        payload_hash = excluded.payload_hash, updated_at = datetime('now')
+                ''', rows)
+            conn.commit()
+            samples.append(time.perf_counter() - started)
+        return statistics.median(samples) * 1000
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark storage.py on SQLite and PostgreSQL')
+    parser.add_argument('--url', action='append', help='SQLAlchemy URL; repeat for several backends')
+    parser.add_argument('--reset', action='store_true', help='Allow dropping the keeper tables of non-SQLite URLs')
+    parser.add_argument('--leagues', type=int, default=20)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=17)
+    parser.add_argument('--syncs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        urls = args.url or [storage_url_for(os.path.join(tmpdir, 'keeper.db'))]
+        for url in urls:
+            parsed = make_url(url)
+            if parsed.get_backend_name() != 'sqlite' and not args.reset:
+                parser.error(f"{parsed.render_as_string(hide_password=True)} is not SQLite: pass --reset to drop its keeper tables")
+            cached = run_workloads(url, args, query_cache_size=500)
+            uncached = run_workloads(url, args, query_cache_size=0)
+            print(f"{parsed.render_as_string(hide_password=True)} ({args.leagues} leagues x {args.teams} teams, "
+                  f"median of {args.syncs}):")
+            for label, ms in cached.items():
+                print(f"  {label}: {ms:.1f} ms cached, {uncached[label]:.1f} ms with the cache off")
+            if parsed.get_backend_name() == 'sqlite' and parsed.database not in (None, '', ':memory:'):
+                engine = create_storage_engine(url)
+                try:
+                    create_schema(engine)
+                    seed(KeeperStore(engine), args.leagues, args.teams)
+                finally:
+                    engine.dispose()
+                print(f"  roster upserts, raw sqlite3: {run_raw_sqlite(parsed.database, args):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+One-time migration of transactions.data into typed columns and compressed payloads.
+
+init_db converts these rows on startup as well; this script also converts the season
+archive (if present), then VACUUMs so the freed pages are returned, and reports the
+space saved.
+
+Usage:
+    python scripts/compact_transactions.py [--db /var/data/keeper.db] [--archive PATH] [--no-vacuum]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from season_archive import ARCHIVE_SCHEMA, archive_path_for  # noqa: E402
+from sleeper_transactions import compact_transactions, create_transaction_tables  # noqa: E402
+
+
+def file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact stored Sleeper transaction JSON')
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', '/var/data/keeper.db'), help='Keeper database file')
+    parser.add_argument('--archive', default=os.getenv('ARCHIVE_DATABASE_URL'), help='Season archive file (default: next to --db)')
+    parser.add_argument('--no-vacuum', action='store_true', help='Skip VACUUM; freed pages stay in the files for reuse')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Database not found at: {args.db}")
+        sys.exit(1)
+    archive_path = args.archive or archive_path_for(args.db)
+    paths = {'main': args.db}
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        cursor = conn.cursor()
+        create_transaction_tables(cursor)
+        conn.commit()
+        if os.path.exists(archive_path):
+            cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_path,))
+            paths[ARCHIVE_SCHEMA] = archive_path
+        sizes_before = {schema: file_size(path) for schema, path in paths.items()}
+
+        for schema in paths:
+            tables = {row[0] for row in cursor.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")}
+            if 'transactions' not in tables or 'transaction_players' not in tables:
+                print(f"{schema}: no transaction tables yet, skipped (they are created on the next rollover)")
+                continue
+            stats = compact_transactions(cursor, schema)
+            conn.commit()
+            saved = stats['json_bytes'] - stats['compressed_bytes']
+            print(f"{schema}: {stats['rows']} rows converted, {stats['skipped']} unparsable left as JSON; "
+                  f"payloads {stats['json_bytes']:,} -> {stats['compressed_bytes']:,} bytes ({saved:,} saved)")
+
+        if not args.no_vacuum:
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            for schema in paths:
+                cursor.execute(f"VACUUM {schema}")
+        for schema, path in paths.items():
+            after = file_size(path)
+            print(f"{schema} file: {sizes_before[schema]:,} -> {after:,} bytes ({sizes_before[schema] - after:,} saved)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
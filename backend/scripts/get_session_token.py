@@ -7,17 +7,16 @@ def get_session_token():
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            # Get the most recent session token
-            cursor.execute('SELECT wallet_address, session_token FROM sessions LIMIT 1')
+            # Only token hashes are stored, so a usable token has to come from /auth/login
+            cursor.execute('SELECT wallet_address, issued_at, expires_at FROM sessions ORDER BY last_seen_at DESC LIMIT 1')
             session = cursor.fetchone()
             
             if not session:
                 print("No sessions found in the database.")
                 return
             
-            print(f"Found session token for wallet: {session['wallet_address']}")
-            print(f"Session token: {session['session_token']}")
-            print("\nYou can use this token for testing the API endpoints.")
+            print(f"Most recent session is for wallet: {session['wallet_address']} (issued {session['issued_at']}, expires {session['expires_at']})")
+            print("Session tokens are stored hashed; log in via /auth/login to get a token for testing the API endpoints.")
     
     except Exception as e:
         print(f"Error retrieving session token: {str(e)}")
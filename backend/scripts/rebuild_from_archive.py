@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rebuild leagues' derived tables (rosters, transactions, drafts, contracts, penalties) from
+the raw Sleeper payload archive, without calling Sleeper.
+
+Each league is replayed in one transaction, leagues in parallel worker processes; see
+league_rebuild.py. Manager-chosen contract durations are kept.
+
+Usage:
+    python scripts/rebuild_from_archive.py [--db /var/data/keeper.db] [--archive PATH] [--league ID ...] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from league_rebuild import rebuild_leagues  # noqa: E402
+from payload_archive import payload_archive_path_for  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild derived league tables from archived Sleeper payloads')
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', '/var/data/keeper.db'), help='Keeper database file')
+    parser.add_argument('--archive', default=os.getenv('SLEEPER_PAYLOAD_ARCHIVE'), help='Payload archive file (default: next to --db)')
+    parser.add_argument('--league', action='append', dest='leagues', help='League to rebuild (repeatable; default: every archived league)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    args = parser.parse_args()
+
+    archive_path = args.archive or payload_archive_path_for(args.db)
+    for path in (args.db, archive_path):
+        if not os.path.exists(path):
+            print(f"File not found: {path}")
+            sys.exit(1)
+
+    started = time.perf_counter()
+    results = rebuild_leagues(args.db, archive_path, args.leagues, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    failed = 0
+    for result in results:
+        if 'error' in result:
+            failed += 1
+            print(f"{result['league_id']}: FAILED - {result['error']}")
+        elif 'skipped' in result:
+            print(f"{result['league_id']}: skipped - {result['skipped']}")
+        else:
+            rows = ', '.join(f"{count} {table}" for table, count in result['rows'].items())
+            print(f"{result['league_id']}: {result['syncs']} syncs replayed; {rows}")
+    print(f"{len(results)} leagues in {elapsed:.1f}s, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Split the league tables of the keeper database into league shard files.
+
+Rosters, contracts, penalties, transactions, drafts, trades, matchups, playoff placements
+and team snapshots move to keeper_shard<N>.db files next to --db, by a hash of the Sleeper
+league ID; users, sessions, players, league metadata and fees stay in --db. Stop the app
+first and take a backup (scripts/backup_db.py). The app picks the layout up on its next
+start. See league_shards.py.
+
+Usage:
+    python scripts/split_database.py --shards 4 [--db /var/data/keeper.db]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from league_shards import MAX_SHARDS, split_database  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split the keeper database into league shard files')
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', '/var/data/keeper.db'), help='Keeper database file')
+    parser.add_argument('--shards', type=int, required=True, help=f'Number of shard files (1-{MAX_SHARDS})')
+    args = parser.parse_args()
+
+    try:
+        result = split_database(args.db, args.shards)
+    except (ValueError, FileExistsError) as e:
+        print(f"Not split: {e}")
+        sys.exit(1)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,29 +2,142 @@
 """
 Production startup script for Supreme Keeper League Flask App
 Uses Waitress WSGI server for production deployment
+
+Settings come from waitress.conf.py with HOST / PORT / WAITRESS_THREADS /
+WEB_CONCURRENCY environment overrides (see server_config.py). With more than
+one worker the parent binds the listening socket, initializes the database
+once, then forks workers that each serve the shared socket with their own
+SQLite connection to the WAL-mode database file.
 """
 
 import os
+import signal
+import socket
 import sys
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Make backend modules importable when run as scripts/start_production.py
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from server_config import load_server_config, waitress_kwargs
+
+# Workers that die within this many seconds of starting are not restarted in a tight loop
+MIN_WORKER_LIFETIME_SECONDS = 5
+
+
+def prepare_database():
+    """Open the database once in the parent so schema setup runs before any worker starts."""
+    from app import create_app
+    setup_app = create_app()
+    with setup_app.app_context():
+        setup_app.extensions['skl_resources'].get_db()
+    # SQLite connections must not cross fork(); every worker opens its own
+    setup_app.extensions['skl_resources'].close()
+
+
+def bind_socket(host, port):
+    """Create the listening socket shared by all worker processes."""
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock, config):
+    """Serve requests on the shared socket in this process. Never returns."""
+    import waitress
+    from app import create_app
+
+    # Schema setup already ran in the parent
+    app = create_app({'INIT_DB': False})
+    app.extensions['skl_resources'].start_background_jobs()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        waitress.serve(app, sockets=[sock], **waitress_kwargs(config))
+    finally:
+        # os._exit skips atexit, so flush the writer queue and stop the jobs first
+        try:
+            app.extensions['skl_resources'].close()
+        finally:
+            os._exit(0)
+
+
+def spawn_worker(sock, config):
+    """Fork one worker and return its pid."""
+    pid = os.fork()
+    if pid == 0:
+        run_worker(sock, config)
+    return pid
+
+
+def run_multiprocess(config):
+    """Supervise config['workers'] forked Waitress workers sharing one socket."""
+    prepare_database()
+    sock = bind_socket(config['host'], config['port'])
+
+    workers = {}
+    for _ in range(config['workers']):
+        pid = spawn_worker(sock, config)
+        workers[pid] = time.monotonic()
+    print(f"Started {len(workers)} workers: {', '.join(str(pid) for pid in workers)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started_at = workers.pop(pid, None)
+        if stopping or started_at is None:
+            continue
+        print(f"⚠️ Worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started_at < MIN_WORKER_LIFETIME_SECONDS:
+            time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+        new_pid = spawn_worker(sock, config)
+        workers[new_pid] = time.monotonic()
+
+    sock.close()
+    print("All workers stopped")
+
+
 def start_production_server():
     """Start the production server using Waitress"""
-    
-    # Import app after environment is loaded
-    from app import app
-    
+
+    config = load_server_config()
+
     try:
         import waitress
-        
-        # Get configuration from environment or use defaults
-        host = os.getenv('HOST', '0.0.0.0')
-        port = int(os.getenv('PORT', 5000))
-        threads = int(os.getenv('WAITRESS_THREADS', '4'))
-        
+
+        host = config['host']
+        port = config['port']
+        threads = config['threads']
+        workers = config['workers']
+        if workers > 1 and not hasattr(os, 'fork'):
+            print("⚠️ Multiple workers need os.fork(); falling back to a single process")
+            workers = 1
+
         print("=" * 60)
         print("🚀 SUPREME KEEPER LEAGUE - PRODUCTION SERVER")
         print("=" * 60)
@@ -33,24 +146,27 @@ def start_production_server():
         print(f"Server: Waitress WSGI Server")
         print(f"Host: {host}")
         print(f"Port: {port}")
-        print(f"Threads: {threads}")
+        print(f"Workers: {workers}")
+        print(f"Threads per worker: {threads}")
         print(f"Database: {os.getenv('DATABASE_URL', 'keeper.db')}")
         print("=" * 60)
         print("Starting production server...")
         print("Press Ctrl+C to stop the server")
         print("=" * 60)
-        
-        # Start Waitress server
-        waitress.serve(
-            app, 
-            host=host, 
-            port=port, 
-            threads=threads,
-            connection_limit=1000,
-            cleanup_interval=30,
-            channel_timeout=120
-        )
-        
+
+        if workers > 1:
+            run_multiprocess(dict(config, workers=workers))
+        else:
+            # Import app after environment is loaded
+            from app import create_app
+            app = create_app()
+            app.extensions['skl_resources'].start_background_jobs()
+            # Start Waitress server
+            try:
+                waitress.serve(app, host=host, port=port, **waitress_kwargs(config))
+            finally:
+                app.extensions['skl_resources'].close()
+
     except ImportError:
         print("❌ Waitress not installed. Install with: pip install waitress")
         sys.exit(1)
@@ -0,0 +1,234 @@
+"""
+Hot/cold partitioning of closed seasons into an attached archive database.
+
+Contracts, penalties, transactions (with their player and roster rows), drafts,
+draft picks and trades of seasons before season_curr.current_year are moved
+from the live tables into the same tables of an archive SQLite file ATTACHed
+as 'archive'. Live queries (the recursive vw_contractByYear, cap math, current
+transaction lists) keep reading the main tables, which now only hold active
+and future seasons. Historical reads go through TEMP views named all_<table>
+that UNION ALL the live and archived rows; history_source() picks the view
+when the archive is attached.
+
+A row belongs to a season by its own data: a contract to the last season it
+covers (and only once none of its penalties fall in the current season or
+later), transactions and trades to their league's season, drafts and picks to
+their season column. Pending trades and trades with budget for the current or
+a future season stay live.
+"""
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from league_shards import get_shard_count
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = 'archive'
+
+_LEAGUES_OF_SEASON = "(SELECT sleeper_league_id FROM main.LeagueMetadata WHERE CAST(season AS INTEGER) = :season)"
+_TRANSACTION_OF_SEASON = ("sleeper_transaction_id IN (SELECT sleeper_transaction_id FROM main.transactions "
+                          "WHERE league_id IN " + _LEAGUES_OF_SEASON + ")")
+_CLOSED_CONTRACT = ("{c}.contract_year + COALESCE({c}.duration, 1) - 1 = :season AND NOT EXISTS ("
+                    "SELECT 1 FROM main.penalties pen WHERE pen.contract_id = {c}.rowid AND pen.penalty_year >= :current)")
+_CLOSED_TRADE = ("{t}.sleeper_league_id IN " + _LEAGUES_OF_SEASON + " AND {t}.trade_status != 'pending' AND NOT EXISTS ("
+                 "SELECT 1 FROM main.trade_items ti WHERE ti.trade_id = {t}.trade_id AND ti.season_year >= :current)")
+
+# (table, key columns, predicate selecting the season's closed rows), parents before children.
+# Keyless tables are replaced wholesale per season in the archive.
+ARCHIVED_TABLES = [
+    ('contracts', ['rowid'], _CLOSED_CONTRACT.format(c='contracts')),
+    ('penalties', ['id'], "contract_id IN (SELECT c.rowid FROM main.contracts c WHERE " + _CLOSED_CONTRACT.format(c='c') + ")"),
+    ('transactions', ['sleeper_transaction_id'], "league_id IN " + _LEAGUES_OF_SEASON),
+    ('transaction_players', [], _TRANSACTION_OF_SEASON),
+    ('transaction_rosters', [], _TRANSACTION_OF_SEASON),
+    ('drafts', ['sleeper_draft_id'], "CAST(season AS INTEGER) = :season"),
+    ('draft_picks', [], "CAST(season AS INTEGER) = :season"),
+    ('trades', ['trade_id'], _CLOSED_TRADE.format(t='trades')),
+    ('trade_items', ['item_id'], "trade_id IN (SELECT t.trade_id FROM main.trades t WHERE " + _CLOSED_TRADE.format(t='t') + ")"),
+    ('trade_approvals', ['approval_id'], "trade_id IN (SELECT t.trade_id FROM main.trades t WHERE " + _CLOSED_TRADE.format(t='t') + ")"),
+]
+
+# Lookup indexes of the archive copies; the live tables keep their own
+ARCHIVE_INDEXES = {
+    'contracts': ['sleeper_league_id, team_id'],
+    'penalties': ['contract_id'],
+    'transactions': ['league_id'],
+    'transaction_players': ['sleeper_transaction_id'],
+    'transaction_rosters': ['sleeper_transaction_id'],
+    'drafts': ['league_id'],
+    'draft_picks': ['league_id, season, roster_id', 'draft_id'],
+    'trades': ['sleeper_league_id'],
+    'trade_items': ['trade_id'],
+    'trade_approvals': ['trade_id'],
+}
+
+
+def archive_path_for(db_path: str) -> str:
+    """Default archive file next to the live database: keeper.db -> keeper_archive.db."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def is_archive_attached(conn: sqlite3.Connection) -> bool:
+    """True when this connection has the archive database attached."""
+    return any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def attach_archive(conn: sqlite3.Connection, archive_path: str) -> None:
+    """
+    Attach the archive file (created on first use) and prepare its tables and the all_<table> views.
+
+    Archive tables copy the live columns without constraints, so rows can leave the live
+    tables' foreign keys behind; columns added to a live table later are added here too.
+    Must be called outside a transaction. The views are TEMP, so they exist only on this connection.
+    """
+    if not is_archive_attached(conn):
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_path,))
+    for table, keys, _ in ARCHIVED_TABLES:
+        live_columns = _columns(conn, 'main', table)
+        if not live_columns:
+            continue
+        archived_columns = _columns(conn, ARCHIVE_SCHEMA, table)
+        if not archived_columns:
+            conn.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} AS SELECT * FROM main.{table} WHERE 0")
+        else:
+            for column in live_columns:
+                if column not in archived_columns:
+                    conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {column}")
+        if keys:
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.uq_{table}_key ON {table}({', '.join(keys)})")
+        for position, index_columns in enumerate(ARCHIVE_INDEXES.get(table, [])):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_{table}_{position} ON {table}({index_columns})")
+        column_list = ', '.join(live_columns)
+        conn.execute(f"DROP VIEW IF EXISTS temp.all_{table}")
+        conn.execute(f"""
+            CREATE TEMP VIEW all_{table} AS
+            SELECT {column_list} FROM main.{table}
+            UNION ALL
+            SELECT {column_list} FROM {ARCHIVE_SCHEMA}.{table}
+        """)
+    conn.commit()
+
+
+def history_source(cursor: sqlite3.Cursor, table: str) -> str:
+    """Name to read a table's full history from: all_<table> when the archive is attached, else the live table."""
+    cursor.execute("SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = ?", (f'all_{table}',))
+    return f'all_{table}' if cursor.fetchone() else table
+
+
+def get_current_season(cursor: sqlite3.Cursor) -> Optional[int]:
+    """season_curr.current_year as an int, or None when it is not set."""
+    cursor.execute("SELECT current_year FROM season_curr LIMIT 1")
+    row = cursor.fetchone()
+    try:
+        return int(row[0]) if row and row[0] is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def closed_seasons(cursor: sqlite3.Cursor, current_season: int) -> List[int]:
+    """Seasons before current_season that still have league or contract rows in the live tables."""
+    cursor.execute("""
+        SELECT DISTINCT CAST(season AS INTEGER) FROM LeagueMetadata WHERE CAST(season AS INTEGER) < :current
+        UNION
+        SELECT DISTINCT contract_year + COALESCE(duration, 1) - 1 FROM contracts
+        WHERE contract_year + COALESCE(duration, 1) - 1 < :current
+        UNION
+        SELECT DISTINCT CAST(season AS INTEGER) FROM drafts WHERE CAST(season AS INTEGER) < :current
+    """, {'current': current_season})
+    return sorted(row[0] for row in cursor.fetchall() if row[0] is not None)
+
+
+def archive_season(conn: sqlite3.Connection, season: int, current_season: int) -> Dict[str, int]:
+    """
+    Move one closed season's rows from the live tables into the attached archive.
+
+    Each step is one set-based statement per table. The copy into the archive commits first;
+    the live rows are then deleted in one transaction, and only where the archive holds them.
+
+    In WAL mode a transaction over two attached files is atomic per file, not across them;
+    deleting only what the archive holds keeps a crash from losing rows, and re-running
+    after a crash finishes the move.
+
+    Returns:
+        Dict[str, int]: Rows moved per table.
+
+    Raises:
+        ValueError: If season is not before current_season, or the archive is not attached.
+    """
+    if season >= current_season:
+        raise ValueError(f"Season {season} is not closed (current season is {current_season})")
+    if not is_archive_attached(conn):
+        raise ValueError("Archive database is not attached")
+    params = {'season': season, 'current': current_season}
+    tables = [spec for spec in ARCHIVED_TABLES if _columns(conn, 'main', spec[0])]
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table, keys, predicate in tables:
+            columns = ', '.join(_columns(conn, 'main', table))
+            if keys:
+                cursor.execute(f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({columns}) "
+                               f"SELECT {columns} FROM main.{table} WHERE {predicate}", params)
+            else:
+                cursor.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.{table} WHERE {predicate}", params)
+                cursor.execute(f"INSERT INTO {ARCHIVE_SCHEMA}.{table} ({columns}) "
+                               f"SELECT {columns} FROM main.{table} WHERE {predicate}", params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    moved: Dict[str, int] = {}
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Children first, while the parent rows their predicates look at are still live
+        for table, keys, predicate in reversed(tables):
+            if keys:
+                key_list = ', '.join(keys)
+                cursor.execute(f"DELETE FROM main.{table} WHERE {predicate} "
+                               f"AND ({key_list}) IN (SELECT {key_list} FROM {ARCHIVE_SCHEMA}.{table})", params)
+            else:
+                cursor.execute(f"DELETE FROM main.{table} WHERE {predicate}", params)
+            moved[table] = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return moved
+
+
+def run_season_rollover(conn: sqlite3.Connection, archive_path: str,
+                        current_season: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Archive every closed season still in the live tables.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection; the archive is attached if it is not yet.
+        archive_path (str): Archive database file.
+        current_season (Optional[int]): Defaults to season_curr.current_year.
+
+    Returns:
+        Dict[str, Any]: 'current_season' and 'seasons', the rows moved per table for each archived season.
+
+    Raises:
+        ValueError: If the league tables are split into shard files (see league_shards.py).
+    """
+    if get_shard_count(conn):
+        raise ValueError("Season rollover is not supported for a league-sharded database")
+    current_season = current_season or get_current_season(conn.cursor())
+    if current_season is None:
+        return {'current_season': None, 'seasons': {}}
+    attach_archive(conn, archive_path)
+    results = {}
+    for season in closed_seasons(conn.cursor(), current_season):
+        results[season] = archive_season(conn, season, current_season)
+        logger.info(f"season_archive: Archived season {season}: {results[season]}")
+    return {'current_season': current_season, 'seasons': results}
@@ -0,0 +1,67 @@
+"""
+Single source of server settings for app.py and scripts/start_production.py.
+
+Defaults come from waitress.conf.py; HOST, PORT, WAITRESS_THREADS and
+WEB_CONCURRENCY environment variables override them.
+"""
+import os
+import runpy
+from typing import Any, Dict
+
+WAITRESS_CONF_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'waitress.conf.py')
+
+# Settings from waitress.conf.py that are passed straight through to waitress.serve()
+WAITRESS_ADJUSTMENTS = (
+    'threads',
+    'connection_limit',
+    'cleanup_interval',
+    'channel_timeout',
+    'max_request_body_size',
+    'url_scheme',
+)
+
+DEFAULTS = {
+    'host': '0.0.0.0',
+    'port': 5000,
+    'threads': 4,
+    'workers': 1,
+    'connection_limit': 1000,
+    'cleanup_interval': 30,
+    'channel_timeout': 120,
+}
+
+ENV_OVERRIDES = {
+    'HOST': ('host', str),
+    'PORT': ('port', int),
+    'WAITRESS_THREADS': ('threads', int),
+    'WEB_CONCURRENCY': ('workers', int),
+}
+
+
+def load_server_config(conf_path: str = WAITRESS_CONF_PATH) -> Dict[str, Any]:
+    """
+    Load the server configuration.
+
+    Args:
+        conf_path (str): Path to the waitress config file (plain Python assignments).
+
+    Returns:
+        Dict[str, Any]: Settings with environment overrides applied. 'workers' is at least 1.
+    """
+    config = dict(DEFAULTS)
+    if os.path.exists(conf_path):
+        values = runpy.run_path(conf_path)
+        config.update({k: v for k, v in values.items() if not k.startswith('_')})
+
+    for env_name, (key, cast) in ENV_OVERRIDES.items():
+        raw_value = os.getenv(env_name)
+        if raw_value not in (None, ''):
+            config[key] = cast(raw_value)
+
+    config['workers'] = max(1, int(config['workers']))
+    return config
+
+
+def waitress_kwargs(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the subset of the config that waitress.serve() accepts as adjustments."""
+    return {key: config[key] for key in WAITRESS_ADJUSTMENTS if key in config}
@@ -0,0 +1,258 @@
+"""
+Login session store with hashed tokens and sliding expiration.
+
+sessions is keyed by the SHA-256 of the session token, so every authenticated
+request is one primary-key lookup and a leaked database holds no usable tokens.
+Each row has issued_at, expires_at and last_seen_at (UTC ISO timestamps). A
+lookup that finds a session last seen more than touch_interval ago queues a
+touch instead of writing; SessionStore flushes queued touches in one
+transaction, extending expires_at by the TTL from the last-seen time, and its
+sweeper thread purges expired rows.
+"""
+import hashlib
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = timedelta(days=30)
+DEFAULT_TOUCH_INTERVAL = timedelta(minutes=5)  # last_seen_at is written at most this often per session
+DEFAULT_FLUSH_INTERVAL = 60.0  # Seconds between writes of queued touches
+DEFAULT_SWEEP_INTERVAL = 3600.0  # Seconds between purges of expired sessions
+
+SESSIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY, -- SHA-256 hex of the session token; raw tokens are never stored
+        wallet_address TEXT NOT NULL,
+        issued_at TEXT NOT NULL,
+        expires_at TEXT NOT NULL,
+        last_seen_at TEXT NOT NULL
+    )
+'''
+
+SESSIONS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_sessions_wallet ON sessions(wallet_address)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)",
+]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec='seconds')
+
+
+def hash_token(token: str) -> str:
+    """SHA-256 hex digest of a session token, the key it is stored under."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def create_sessions_table(cursor: sqlite3.Cursor, ttl: timedelta = DEFAULT_TTL) -> None:
+    """
+    Create sessions and its indexes, converting the old (wallet_address, session_token) table. Does not commit.
+
+    Raw tokens from the old table are re-keyed by their hash and given a fresh TTL, so
+    existing logins keep working.
+    """
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(sessions)").fetchall()}
+    if 'session_token' in columns:
+        legacy = cursor.execute("SELECT wallet_address, session_token FROM sessions WHERE session_token IS NOT NULL").fetchall()
+        cursor.execute("DROP TABLE sessions")
+        cursor.execute(SESSIONS_DDL)
+        now = _utcnow()
+        cursor.executemany("""
+            INSERT OR IGNORE INTO sessions (token_hash, wallet_address, issued_at, expires_at, last_seen_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(hash_token(token), wallet, _timestamp(now), _timestamp(now + ttl), _timestamp(now)) for wallet, token in legacy])
+    else:
+        cursor.execute(SESSIONS_DDL)
+    for statement in SESSIONS_INDEXES:
+        cursor.execute(statement)
+
+
+def create_session(cursor: sqlite3.Cursor, wallet_address: str, ttl: timedelta = DEFAULT_TTL) -> str:
+    """
+    Issue a new session token for a wallet, replacing its previous session. Does not commit.
+
+    Returns:
+        str: The raw token to hand to the client. Only its hash is stored.
+    """
+    token = secrets.token_urlsafe(32)
+    now = _utcnow()
+    cursor.execute("DELETE FROM sessions WHERE wallet_address = ?", (wallet_address,))
+    cursor.execute("""
+        INSERT INTO sessions (token_hash, wallet_address, issued_at, expires_at, last_seen_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (hash_token(token), wallet_address, _timestamp(now), _timestamp(now + ttl), _timestamp(now)))
+    return token
+
+
+def lookup_session(cursor: sqlite3.Cursor, token: Optional[str], now: Optional[datetime] = None) -> Optional[sqlite3.Row]:
+    """
+    The unexpired session for a token, or None.
+
+    The row's first column is wallet_address, followed by token_hash, expires_at and
+    last_seen_at, so callers can read row[0] or (with sqlite3.Row) row['wallet_address'].
+    """
+    if not token:
+        return None
+    cursor.execute("""
+        SELECT wallet_address, token_hash, expires_at, last_seen_at
+        FROM sessions
+        WHERE token_hash = ? AND expires_at > ?
+    """, (hash_token(token), _timestamp(now or _utcnow())))
+    return cursor.fetchone()
+
+
+def touch_sessions(cursor: sqlite3.Cursor, touches: Dict[str, datetime], ttl: timedelta = DEFAULT_TTL) -> int:
+    """
+    Write last-seen times and slide expiry for many sessions at once. Does not commit.
+
+    Sessions that expired in the meantime are left alone.
+
+    Returns:
+        int: Number of sessions extended.
+    """
+    now = _timestamp(_utcnow())
+    cursor.executemany("""
+        UPDATE sessions SET last_seen_at = ?, expires_at = ?
+        WHERE token_hash = ? AND expires_at > ? AND last_seen_at < ?
+    """, [(_timestamp(seen), _timestamp(seen + ttl), token_hash, now, _timestamp(seen))
+          for token_hash, seen in touches.items()])
+    return cursor.rowcount
+
+
+def delete_session(cursor: sqlite3.Cursor, token: str) -> None:
+    """End one session. Does not commit."""
+    cursor.execute("DELETE FROM sessions WHERE token_hash = ?", (hash_token(token),))
+
+
+def purge_expired_sessions(cursor: sqlite3.Cursor, now: Optional[datetime] = None) -> int:
+    """Delete every expired session. Does not commit. Returns the number removed."""
+    cursor.execute("DELETE FROM sessions WHERE expires_at <= ?", (_timestamp(now or _utcnow()),))
+    return cursor.rowcount
+
+
+class SessionStore:
+    """
+    Session lookups for request handlers, with last-seen writes coalesced off the request path.
+
+    Args:
+        db_path (str): Keeper database file the flushes and sweeps write to.
+        ttl (timedelta): Idle time after which a session expires.
+        touch_interval (timedelta): Lookups within this long of the last write queue no touch.
+        flush_interval (float): Seconds between writes of queued touches.
+        sweep_interval (float): Seconds between purges of expired sessions.
+        busy_timeout (float): Seconds to wait for the database write lock.
+    """
+
+    def __init__(self, db_path: str, ttl: timedelta = DEFAULT_TTL, touch_interval: timedelta = DEFAULT_TOUCH_INTERVAL,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+                 busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        self._pending: Dict[str, datetime] = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get_session(self, cursor: sqlite3.Cursor, token: Optional[str]) -> Optional[sqlite3.Row]:
+        """Like lookup_session, and queues a touch when the session was last seen touch_interval ago or more."""
+        now = _utcnow()
+        row = lookup_session(cursor, token, now)
+        if row is not None and datetime.fromisoformat(row[3]) <= now - self.touch_interval:
+            with self._pending_lock:
+                self._pending[row[1]] = now
+        return row
+
+    def get_wallet(self, cursor: sqlite3.Cursor, token: Optional[str]) -> Optional[str]:
+        """Wallet address of an unexpired session, or None."""
+        row = self.get_session(cursor, token)
+        return row[0] if row is not None else None
+
+    def pending_touches(self) -> int:
+        """Number of sessions waiting for their last-seen write."""
+        with self._pending_lock:
+            return len(self._pending)
+
+    def flush(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Write queued touches in one transaction.
+
+        Args:
+            conn (Optional[sqlite3.Connection]): Connection to write on; a short-lived one to db_path by default.
+
+        Returns:
+            int: Number of sessions extended.
+        """
+        with self._pending_lock:
+            touches, self._pending = self._pending, {}
+        if not touches:
+            return 0
+        own_conn = conn is None
+        conn = conn or sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            with conn:
+                return touch_sessions(conn.cursor(), touches, self.ttl)
+        except sqlite3.Error:
+            with self._pending_lock:  # Retry on the next flush
+                for token_hash, seen in touches.items():
+                    self._pending.setdefault(token_hash, seen)
+            raise
+        finally:
+            if own_conn:
+                conn.close()
+
+    def sweep(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Purge expired sessions in one transaction. Returns the number removed."""
+        own_conn = conn is None
+        conn = conn or sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            with conn:
+                return purge_expired_sessions(conn.cursor())
+        finally:
+            if own_conn:
+                conn.close()
+
+    def start(self) -> None:
+        """Start flushing touches and sweeping expired sessions in the background."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None, conn: Optional[sqlite3.Connection] = None) -> None:
+        """Stop the background thread, then write any queued touches (on conn when given, see flush)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush(conn)
+        except sqlite3.Error as e:
+            logger.error(f"session_store: Final flush failed: {e}")
+
+    def _run(self) -> None:
+        next_sweep = 0.0
+        while not self._stop.is_set():
+            try:
+                self.flush()
+                if time.monotonic() >= next_sweep:
+                    removed = self.sweep()
+                    next_sweep = time.monotonic() + self.sweep_interval
+                    if removed:
+                        logger.info(f"session_store: Purged {removed} expired sessions")
+            except Exception as e:
+                logger.error(f"session_store: Flush or sweep failed: {e}")
+            self._stop.wait(self.flush_interval)
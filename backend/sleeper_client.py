@@ -0,0 +1,314 @@
+"""
+Shared outbound HTTP client for the Sleeper API.
+
+Every Sleeper call in the process goes through one SleeperHttpClient so that:
+- every request has connect/read timeouts and cannot hang a Waitress thread,
+- a process-wide token bucket keeps us under Sleeper's per-minute limit no
+  matter how many syncs run concurrently,
+- 429/5xx responses and connection errors are retried with exponential
+  backoff and full jitter (Retry-After is honoured),
+- a circuit breaker fails fast while Sleeper is degraded and the last good
+  response for the same URL is served instead when one is cached.
+
+Errors are raised as requests.exceptions.RequestException subclasses, so
+callers keep their existing `except requests.exceptions.RequestException`
+handling.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from server_config import load_server_config
+
+logger = logging.getLogger(__name__)
+
+SLEEPER_BASE_URL = "https://api.sleeper.app/v1"
+
+# Sleeper asks clients to stay under 1000 calls per minute; keep headroom for other processes
+DEFAULT_RATE_PER_MINUTE = 600
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 15.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class SleeperUnavailableError(requests.exceptions.RequestException):
+    """Raised when the circuit breaker is open and no cached response exists."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_minute // 6)))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.waits = 0
+
+    def acquire(self) -> float:
+        """Take one token, sleeping if the bucket is empty. Returns the time waited in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+            # Reserve the token now (tokens may go negative) so waiting threads queue fairly
+            self._tokens -= 1
+            wait_seconds = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+            if wait_seconds > 0:
+                self.waits += 1
+                self.total_wait_seconds += wait_seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'rate_per_minute': self.rate_per_second * 60,
+                'burst': self.capacity,
+                'waits': self.waits,
+                'total_wait_seconds': round(self.total_wait_seconds, 3),
+                'max_wait_seconds': round(self.max_wait_seconds, 3),
+            }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after failure_threshold failures in a row; open -> half_open once
+    reset_timeout seconds have passed, letting one trial request through; the trial's
+    outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"SleeperHttpClient: Circuit opened after {self.consecutive_failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected_requests': self.rejected,
+                'seconds_until_half_open': (max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+                                            if self.state == self.OPEN else None),
+            }
+
+
+class SleeperHttpClient:
+    """Timeouts, rate limiting, retries, circuit breaking and a last-good-response cache for Sleeper GETs."""
+
+    def __init__(self, base_url: str = SLEEPER_BASE_URL,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeout: Tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 8.0,
+                 cache_size: int = 512,
+                 session: Optional[requests.Session] = None,
+                 sleep=time.sleep):
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter or TokenBucket(DEFAULT_RATE_PER_MINUTE)
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache_size = cache_size
+        self.session = session or requests.Session()
+        self._sleep = sleep
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._counters = {'requests': 0, 'retries': 0, 'failures': 0, 'stale_responses_served': 0}
+        self._counters_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._counters_lock:
+            self._counters[name] += 1
+
+    def _backoff_seconds(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _cache_get(self, url: str) -> Tuple[bool, Any]:
+        with self._cache_lock:
+            if url in self._cache:
+                self._cache.move_to_end(url)
+                return True, self._cache[url]
+            return False, None
+
+    def _cache_put(self, url: str, data: Any) -> None:
+        with self._cache_lock:
+            self._cache[url] = data
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _serve_stale(self, url: str, error: requests.exceptions.RequestException) -> Any:
+        found, data = self._cache_get(url)
+        if not found:
+            raise error
+        self._count('stale_responses_served')
+        logger.warning(f"SleeperHttpClient: Serving cached response for {url} ({error})")
+        return data
+
+    def get_json(self, path: str, cache: bool = True) -> Any:
+        """
+        GET a Sleeper API path and return the decoded JSON body.
+
+        Args:
+            path (str): Path below the base URL, e.g. '/league/<id>/rosters'.
+            cache (bool): Keep the response as the fallback for this URL while Sleeper is degraded.
+                Large payloads such as /players/nfl should pass False.
+
+        Returns:
+            Any: Decoded JSON, possibly a cached copy if Sleeper is unavailable.
+
+        Raises:
+            requests.exceptions.RequestException: On client errors (e.g. 404), or when Sleeper is
+                unavailable and no cached response exists.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if not self.breaker.allow_request():
+            return self._serve_stale(url, SleeperUnavailableError(f"Sleeper circuit open; not calling {url}"))
+
+        last_error: Optional[requests.exceptions.RequestException] = None
+        settled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                self.rate_limiter.acquire()
+                self._count('requests')
+                response = None
+                try:
+                    response = self.session.get(url, timeout=self.timeout)
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        # 4xx other than 429 means the request itself is wrong, not that Sleeper is down
+                        response.raise_for_status()
+                        data = response.json()
+                        settled = True
+                        self.breaker.record_success()
+                        if cache:
+                            self._cache_put(url, data)
+                        return data
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} from {url}", response=response)
+                except requests.exceptions.HTTPError:
+                    settled = True
+                    self.breaker.record_success()
+                    raise
+                except requests.exceptions.RequestException as e:
+                    # Connection errors, timeouts, broken chunked bodies and (requests >= 2.27) undecodable JSON
+                    last_error = e
+                except ValueError as e:
+                    # An HTML error page served with a 200, on older requests versions
+                    last_error = requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}", response=response)
+                if attempt < self.max_retries:
+                    self._count('retries')
+                    self._sleep(self._backoff_seconds(attempt, response))
+        finally:
+            # Every outcome reaches the breaker, or a half-open trial would never be released
+            if not settled:
+                self._count('failures')
+                self.breaker.record_failure()
+        return self._serve_stale(url, last_error)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters, breaker state and limiter wait times for monitoring."""
+        with self._counters_lock:
+            counters = dict(self._counters)
+        with self._cache_lock:
+            counters['cached_urls'] = len(self._cache)
+        return {'client': counters, 'circuit_breaker': self.breaker.metrics(), 'rate_limiter': self.rate_limiter.metrics()}
+
+
+_client: Optional[SleeperHttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_sleeper_client() -> SleeperHttpClient:
+    """
+    Return the process-wide Sleeper client, creating it from the environment on first use.
+
+    Environment:
+        SLEEPER_RATE_PER_MINUTE, SLEEPER_CONNECT_TIMEOUT, SLEEPER_READ_TIMEOUT,
+        SLEEPER_MAX_RETRIES, SLEEPER_BREAKER_THRESHOLD, SLEEPER_BREAKER_RESET_SECONDS
+
+    The per-minute rate is split across the worker processes from load_server_config().
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                workers = load_server_config()['workers']
+                # The limit is per process; split the budget across worker processes
+                rate = float(os.getenv('SLEEPER_RATE_PER_MINUTE', DEFAULT_RATE_PER_MINUTE)) / workers
+                _client = SleeperHttpClient(
+                    rate_limiter=TokenBucket(rate),
+                    breaker=CircuitBreaker(
+                        failure_threshold=int(os.getenv('SLEEPER_BREAKER_THRESHOLD', '5')),
+                        reset_timeout=float(os.getenv('SLEEPER_BREAKER_RESET_SECONDS', '30')),
+                    ),
+                    timeout=(float(os.getenv('SLEEPER_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+                             float(os.getenv('SLEEPER_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))),
+                    max_retries=int(os.getenv('SLEEPER_MAX_RETRIES', '3')),
+                )
+    return _client
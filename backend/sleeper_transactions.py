@@ -0,0 +1,271 @@
+"""
+Typed storage for Sleeper league transactions.
+
+Ingest extracts the fields the transaction endpoints serve into columns of
+transactions (week, creator, status_updated, waiver_bid) and child rows:
+transaction_players for adds and drops and transaction_rosters for roster_ids.
+The original Sleeper object is kept only as zlib-compressed canonical JSON in
+transactions.raw_payload (see PAYLOAD_FORMAT), for audit and rebuilds;
+transactions.data is left NULL. Rows stored before these columns existed keep
+their JSON in data until compact_transactions() converts them.
+"""
+import json
+import logging
+import sqlite3
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from payloads import canonical_json, payload_hash
+
+logger = logging.getLogger(__name__)
+
+# Columns added to transactions; (name, type)
+TRANSACTION_COLUMNS = [
+    ('week', 'INTEGER'),  # Sleeper's leg
+    ('creator', 'TEXT'),  # sleeper_user_id that created the transaction
+    ('status_updated', 'INTEGER'),  # Epoch milliseconds
+    ('waiver_bid', 'INTEGER'),  # settings.waiver_bid of FAAB claims
+    ('raw_payload', 'BLOB'),  # zlib of the canonical JSON Sleeper sent
+]
+
+TRANSACTION_PLAYERS_DDL = '''CREATE TABLE IF NOT EXISTS transaction_players (
+                                sleeper_transaction_id TEXT NOT NULL,
+                                action TEXT NOT NULL, -- 'add' or 'drop'
+                                player_id TEXT NOT NULL,
+                                roster_id INTEGER, -- Roster the player joined (add) or left (drop)
+                                PRIMARY KEY (sleeper_transaction_id, action, player_id)
+                                ) WITHOUT ROWID'''
+
+TRANSACTION_ROSTERS_DDL = '''CREATE TABLE IF NOT EXISTS transaction_rosters (
+                                sleeper_transaction_id TEXT NOT NULL,
+                                roster_id INTEGER NOT NULL,
+                                PRIMARY KEY (sleeper_transaction_id, roster_id)
+                                ) WITHOUT ROWID'''
+
+PARSE_ERROR_DETAILS = {"error": "Could not parse transaction data"}
+
+# raw_payload is one format byte followed by a zlib stream compressed against that format's
+# preset dictionary. A single Sleeper transaction is a few hundred bytes, mostly the same keys,
+# which plain zlib barely shrinks; a dictionary of them cuts it to about a quarter.
+# Stored blobs need their dictionary forever: add a new format rather than editing one.
+PAYLOAD_FORMAT = 1
+_PAYLOAD_DICTIONARIES = {
+    1: (b'{"adds":null,"consenter_ids":[],"created":1700000000000,"creator":"","draft_picks":[],"drops":null,'
+        b'"leg":1,"metadata":null,"roster_ids":[],"settings":{"waiver_bid":0},"status":"complete",'
+        b'"status_updated":1700000000000,"transaction_id":"","type":"waiver","waiver_budget":[]}'
+        b'"free_agent""trade""failed""commissioner""season""round""owner_id""previous_owner_id""sender""receiver""amount"'),
+}
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_IN_CHUNK = 500
+
+
+def create_transaction_tables(cursor: sqlite3.Cursor) -> None:
+    """Add the typed columns to transactions and create the child tables. Does not commit."""
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(transactions)").fetchall()}
+    for column, column_type in TRANSACTION_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE transactions ADD COLUMN {column} {column_type}")
+    cursor.execute(TRANSACTION_PLAYERS_DDL)
+    cursor.execute(TRANSACTION_ROSTERS_DDL)
+
+
+def compress_payload(payload: Any) -> bytes:
+    """Canonical JSON of a payload, zlib-compressed against the current preset dictionary."""
+    compressor = zlib.compressobj(9, zdict=_PAYLOAD_DICTIONARIES[PAYLOAD_FORMAT])
+    return bytes([PAYLOAD_FORMAT]) + compressor.compress(canonical_json(payload).encode('utf-8')) + compressor.flush()
+
+
+def decompress_payload(blob: Optional[bytes]) -> Any:
+    """Inverse of compress_payload; None for a missing payload."""
+    if blob is None:
+        return None
+    decompressor = zlib.decompressobj(zdict=_PAYLOAD_DICTIONARIES[blob[0]])
+    return json.loads((decompressor.decompress(blob[1:]) + decompressor.flush()).decode('utf-8'))
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def transaction_rows(league_id: str, tx: Dict[str, Any]) -> Tuple[Tuple, List[Tuple], List[Tuple]]:
+    """
+    Split one Sleeper transaction object into its transactions row and child rows.
+
+    Returns:
+        Tuple: (transactions row, transaction_players rows, transaction_rosters rows). The
+        transactions row is (id, league_id, type, status, week, creator, status_updated,
+        waiver_bid, raw_payload, payload_hash).
+    """
+    tx_id = tx.get('transaction_id')
+    settings = tx.get('settings') or {}
+    row = (tx_id, league_id, tx.get('type'), tx.get('status'), _int_or_none(tx.get('leg')), tx.get('creator'),
+           _int_or_none(tx.get('status_updated')), _int_or_none(settings.get('waiver_bid')),
+           compress_payload(tx), payload_hash(tx))
+    players = [(tx_id, action, str(player_id), _int_or_none(roster_id))
+               for action, moves in (('add', tx.get('adds')), ('drop', tx.get('drops')))
+               for player_id, roster_id in (moves or {}).items()]
+    rosters = [(tx_id, roster_id) for roster_id in {_int_or_none(r) for r in tx.get('roster_ids') or []} if roster_id is not None]
+    return row, players, rosters
+
+
+def _replace_children(cursor: sqlite3.Cursor, tx_ids: List[str], players: List[Tuple], rosters: List[Tuple],
+                      schema: str = 'main') -> None:
+    cursor.executemany(f"DELETE FROM {schema}.transaction_players WHERE sleeper_transaction_id = ?", [(t,) for t in tx_ids])
+    cursor.executemany(f"DELETE FROM {schema}.transaction_rosters WHERE sleeper_transaction_id = ?", [(t,) for t in tx_ids])
+    cursor.executemany(f"INSERT OR IGNORE INTO {schema}.transaction_players (sleeper_transaction_id, action, player_id, roster_id) "
+                       f"VALUES (?, ?, ?, ?)", players)
+    cursor.executemany(f"INSERT OR IGNORE INTO {schema}.transaction_rosters (sleeper_transaction_id, roster_id) VALUES (?, ?)", rosters)
+
+
+def store_transactions(cursor: sqlite3.Cursor, league_id: str, transactions: Iterable[Dict[str, Any]]) -> int:
+    """
+    Upsert Sleeper transaction objects as typed rows and replace their child rows. Does not commit.
+
+    Objects without a transaction_id are skipped.
+
+    Returns:
+        int: Number of transactions written.
+    """
+    rows, players, rosters = [], [], []
+    for tx in transactions:
+        if not tx.get('transaction_id'):
+            continue
+        row, tx_players, tx_rosters = transaction_rows(league_id, tx)
+        rows.append(row)
+        players.extend(tx_players)
+        rosters.extend(tx_rosters)
+    cursor.executemany('''
+        INSERT INTO transactions (sleeper_transaction_id, league_id, type, status, week, creator, status_updated,
+                                  waiver_bid, raw_payload, payload_hash, data, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, datetime('now'), datetime('now'))
+        ON CONFLICT(sleeper_transaction_id) DO UPDATE SET
+            league_id = excluded.league_id,
+            type = excluded.type,
+            status = excluded.status,
+            week = excluded.week,
+            creator = excluded.creator,
+            status_updated = excluded.status_updated,
+            waiver_bid = excluded.waiver_bid,
+            raw_payload = excluded.raw_payload,
+            payload_hash = excluded.payload_hash,
+            data = NULL,
+            updated_at = datetime('now')
+    ''', rows)
+    _replace_children(cursor, [row[0] for row in rows], players, rosters)
+    return len(rows)
+
+
+def compact_transactions(cursor: sqlite3.Cursor, schema: str = 'main', batch_size: int = 500) -> Dict[str, int]:
+    """
+    Convert rows still holding their JSON in data to typed columns, child rows and raw_payload. Does not commit.
+
+    Rows whose data does not parse are left as they are, so the endpoints keep reporting them.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        schema (str): 'main', or 'archive' for an attached season archive.
+        batch_size (int): Rows read per batch.
+
+    Returns:
+        Dict[str, int]: 'rows' converted, 'skipped' unparsable rows, and 'json_bytes' /
+        'compressed_bytes', the size of the converted payloads before and after.
+    """
+    stats = {'rows': 0, 'skipped': 0, 'json_bytes': 0, 'compressed_bytes': 0}
+    last_rowid = 0
+    while True:
+        batch = cursor.execute(f"""
+            SELECT rowid, sleeper_transaction_id, data FROM {schema}.transactions
+            WHERE data IS NOT NULL AND rowid > ? ORDER BY rowid LIMIT ?
+        """, (last_rowid, batch_size)).fetchall()
+        if not batch:
+            return stats
+        last_rowid = batch[-1][0]
+        updates, players, rosters = [], [], []
+        for _, tx_id, data in batch:
+            try:
+                tx = json.loads(data)
+                if not isinstance(tx, dict):
+                    raise ValueError('not an object')
+            except ValueError:
+                stats['skipped'] += 1
+                continue
+            tx.setdefault('transaction_id', tx_id)
+            (_, _, _, _, week, creator, status_updated, waiver_bid, raw, digest), tx_players, tx_rosters = transaction_rows(None, tx)
+            updates.append((week, creator, status_updated, waiver_bid, raw, digest, tx_id))
+            players.extend(tx_players)
+            rosters.extend(tx_rosters)
+            stats['json_bytes'] += len(data.encode('utf-8'))
+            stats['compressed_bytes'] += len(raw)
+        cursor.executemany(f"""
+            UPDATE {schema}.transactions
+            SET week = ?, creator = ?, status_updated = ?, waiver_bid = ?, raw_payload = ?,
+                payload_hash = COALESCE(payload_hash, ?), data = NULL
+            WHERE sleeper_transaction_id = ?
+        """, updates)
+        _replace_children(cursor, [update[-1] for update in updates], players, rosters, schema)
+        stats['rows'] += len(updates)
+
+
+def transaction_details(cursor: sqlite3.Cursor, rows: List[Any], players_table: str = 'transaction_players',
+                        rosters_table: str = 'transaction_rosters') -> Dict[str, Dict[str, Any]]:
+    """
+    The details object the transaction endpoints serve, per transaction id.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        rows (List[Any]): transactions rows with sleeper_transaction_id, type, status, week,
+            creator, status_updated, waiver_bid and data columns.
+        players_table (str): Table or view holding transaction_players rows.
+        rosters_table (str): Table or view holding transaction_rosters rows.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Sleeper's fields (type, status, leg, creator, status_updated,
+        settings, adds, drops, roster_ids). Rows not yet compacted are read from their JSON;
+        unparsable ones get PARSE_ERROR_DETAILS.
+    """
+    details: Dict[str, Dict[str, Any]] = {}
+    typed_ids = []
+    for row in rows:
+        tx_id = row['sleeper_transaction_id']
+        if row['data'] is not None:
+            try:
+                details[tx_id] = json.loads(row['data'])
+            except json.JSONDecodeError:
+                details[tx_id] = dict(PARSE_ERROR_DETAILS)
+            continue
+        details[tx_id] = {
+            'transaction_id': tx_id,
+            'type': row['type'],
+            'status': row['status'],
+            'leg': row['week'],
+            'creator': row['creator'],
+            'status_updated': row['status_updated'],
+            'settings': {'waiver_bid': row['waiver_bid']} if row['waiver_bid'] is not None else None,
+            'adds': None,
+            'drops': None,
+            'roster_ids': [],
+        }
+        typed_ids.append(tx_id)
+
+    for start in range(0, len(typed_ids), _IN_CHUNK):
+        chunk = typed_ids[start:start + _IN_CHUNK]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f"""
+            SELECT sleeper_transaction_id, action, player_id, roster_id FROM {players_table}
+            WHERE sleeper_transaction_id IN ({placeholders})
+        """, chunk)
+        for tx_id, action, player_id, roster_id in cursor.fetchall():
+            key = 'adds' if action == 'add' else 'drops'
+            details[tx_id][key] = details[tx_id][key] or {}
+            details[tx_id][key][player_id] = roster_id
+        cursor.execute(f"""
+            SELECT sleeper_transaction_id, roster_id FROM {rosters_table}
+            WHERE sleeper_transaction_id IN ({placeholders}) ORDER BY roster_id
+        """, chunk)
+        for tx_id, roster_id in cursor.fetchall():
+            details[tx_id]['roster_ids'].append(roster_id)
+    return details
@@ -0,0 +1,531 @@
+"""
+Precomputed payloads for the /team/<team_id> page.
+
+All teams of a league are built in one pass so the league-wide work (auction
+acquisitions, current-year costs, position spending ranks, future budget ranks,
+penalty and trade totals) is done once instead of once per page view. Payloads
+are stored in team_page_snapshots keyed by the league's data version (see
+cache_versions.py), the player catalog version and the current season, so a
+sync, a player refresh or a season rollover makes them stale automatically.
+"""
+import json
+import logging
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cache_versions import get_cache_version, league_cache_key
+from draft_picks import get_auction_acquisitions
+from utils import get_escalated_contract_costs
+
+logger = logging.getLogger(__name__)
+
+TEAM_PAGE_SNAPSHOTS_DDL = '''CREATE TABLE IF NOT EXISTS team_page_snapshots (
+                                sleeper_league_id TEXT NOT NULL,
+                                team_id TEXT NOT NULL, -- sleeper_roster_id
+                                snapshot_key TEXT NOT NULL, -- '<league version>:<players version>:<season>:<offseason>'
+                                payload TEXT NOT NULL, -- JSON body of /team/<team_id> without 'success'
+                                built_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                                PRIMARY KEY (sleeper_league_id, team_id)
+                                )'''
+
+POSITION_GROUPS = ['QB', 'RB', 'WR', 'TE', 'K', 'DEF', 'Unknown']
+TEAM_BUDGET = 200  # Auction budget per team per season
+FUTURE_YEARS_RANKED = 3  # Future seasons included in future_yearly_total_ranks
+
+
+def compute_snapshot_key(cursor: sqlite3.Cursor, league_id: str, current_processing_year: int, is_offseason: bool) -> str:
+    """
+    Build the key a stored snapshot must match to still be valid.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the keeper database.
+        league_id (str): Sleeper league ID.
+        current_processing_year (int): Season from season_curr.
+        is_offseason (bool): Off-season flag from season_curr.
+
+    Returns:
+        str: Snapshot key.
+    """
+    league_version = get_cache_version(cursor, league_cache_key(league_id))
+    players_version = get_cache_version(cursor, 'players')
+    return f"{league_version}:{players_version}:{current_processing_year}:{int(bool(is_offseason))}"
+
+
+def _rank_of(sorted_entries: List[Dict[str, Any]], team_id: str) -> Optional[Dict[str, int]]:
+    for i, entry in enumerate(sorted_entries):
+        if entry['team_id'] == team_id:
+            return {'rank': i + 1, 'total_teams': len(sorted_entries)}
+    return None
+
+
+class LeagueTeamSnapshotBuilder:
+    """Computes /team page payloads for every roster in one league, sharing league-wide intermediates."""
+
+    def __init__(self, conn: sqlite3.Connection, league_id: str, current_processing_year: int, is_offseason: bool):
+        self.conn = conn
+        self.league_id = league_id
+        self.current_processing_year = current_processing_year
+        self.is_offseason = is_offseason
+        self._load()
+
+    def _load(self) -> None:
+        cursor = self.conn.cursor()
+        year = self.current_processing_year
+
+        cursor.execute("SELECT name FROM LeagueMetadata WHERE sleeper_league_id = ?", (self.league_id,))
+        league_row = cursor.fetchone()
+        self.league_name = league_row['name'] if league_row else 'Unknown League'
+
+        cursor.execute("""
+            SELECT r.sleeper_roster_id, r.players, r.reserve, r.team_name,
+                   COALESCE(u.display_name, u.username) as manager_name, u.username as sleeper_username
+            FROM rosters r
+            LEFT JOIN Users u ON r.owner_id = u.sleeper_user_id
+            WHERE r.sleeper_league_id = ?
+            ORDER BY r.rowid
+        """, (self.league_id,))
+        self.rosters = []
+        for row in cursor.fetchall():
+            self.rosters.append({
+                'team_id': row['sleeper_roster_id'],
+                'player_ids': json.loads(row['players']) if row['players'] else [],
+                'reserve_ids': json.loads(row['reserve']) if row['reserve'] else [],
+                'team_name': row['team_name'],
+                'manager_name': row['manager_name'],
+                'sleeper_username': row['sleeper_username'],
+            })
+        self.rosters_by_id = {roster['team_id']: roster for roster in self.rosters}
+
+        # Auction acquisitions from the latest complete draft's rows in draft_picks
+        self.is_contract_setting_period_active = False
+        self.auction_acquisitions: Dict[str, int] = {}
+        if self.is_offseason and year > 0:
+            self.is_contract_setting_period_active, self.auction_acquisitions = get_auction_acquisitions(
+                cursor, self.league_id, year)
+
+        # Player details for everyone rostered in the league
+        all_player_ids = {p_id for roster in self.rosters for p_id in roster['player_ids']}
+        self.players: Dict[str, Dict[str, Any]] = {}
+        if all_player_ids:
+            placeholders = ', '.join('?' * len(all_player_ids))
+            cursor.execute(f"SELECT sleeper_player_id, name, position, team FROM players WHERE sleeper_player_id IN ({placeholders})",
+                           tuple(all_player_ids))
+            self.players = {row['sleeper_player_id']: dict(row) for row in cursor.fetchall()}
+
+        # Contracts keyed by (team, player); later rowids win, as in the per-team query this replaces
+        cursor.execute("""
+            SELECT player_id, team_id, draft_amount, contract_year, duration, is_active, rowid as contract_rowid
+            FROM contracts
+            WHERE sleeper_league_id = ?
+            ORDER BY rowid
+        """, (self.league_id,))
+        self.contracts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for row in cursor.fetchall():
+            contract = dict(row)
+            self.contracts[(contract['team_id'], contract['player_id'])] = contract
+
+        self.current_year_costs = self._load_current_year_costs(cursor) if year > 0 else {}
+        self.position_spending = self._compute_position_spending() if year > 0 else {}
+        self.future_spending = self._compute_future_spending(cursor) if year > 0 else {}
+
+        cursor.execute("""
+            SELECT c.team_id, p.penalty_year, SUM(p.penalty_amount) as total_penalty_for_year
+            FROM penalties p
+            JOIN contracts c ON p.contract_id = c.rowid
+            WHERE c.sleeper_league_id = ?
+            GROUP BY c.team_id, p.penalty_year
+        """, (self.league_id,))
+        self.penalty_totals: Dict[str, Dict[str, Any]] = {}
+        for row in cursor.fetchall():
+            self.penalty_totals.setdefault(row['team_id'], {})[str(row['penalty_year'])] = row['total_penalty_for_year']
+
+        cursor.execute("""
+            SELECT t.initiator_team_id, t.recipient_team_id, ti.season_year, ti.budget_amount
+            FROM trade_items ti
+            JOIN trades t ON ti.trade_id = t.trade_id
+            WHERE t.trade_status = 'completed'
+            AND t.sleeper_league_id = ?
+            AND ti.season_year >= ?
+        """, (self.league_id, year))
+        self.trade_amounts: Dict[str, Dict[str, Any]] = {}
+        for row in cursor.fetchall():
+            season_key = str(row['season_year'])
+            # Sending money out is positive, receiving money in is negative
+            if row['initiator_team_id']:
+                totals = self.trade_amounts.setdefault(row['initiator_team_id'], {})
+                totals[season_key] = totals.get(season_key, 0) + row['budget_amount']
+            if row['recipient_team_id'] and row['recipient_team_id'] != row['initiator_team_id']:
+                totals = self.trade_amounts.setdefault(row['recipient_team_id'], {})
+                totals[season_key] = totals.get(season_key, 0) - row['budget_amount']
+
+    def _load_current_year_costs(self, cursor: sqlite3.Cursor) -> Dict[Tuple[str, str], float]:
+        """Current-season cost per (team, player): vw_contractByYear first, then active contracts for the year."""
+        year = self.current_processing_year
+        costs: Dict[Tuple[str, str], float] = {}
+        # vw_contractByYear is re-evaluated in full per query: read the whole league once
+        cursor.execute("""
+            SELECT team_id, player_id, cost_for_season
+            FROM vw_contractByYear
+            WHERE sleeper_league_id = ?
+              AND (contract_start_season + year_number_in_contract - 1) = ?
+        """, (self.league_id, year))
+        seen = set()
+        for row in cursor.fetchall():
+            key = (row['team_id'], row['player_id'])
+            if key in seen:
+                continue  # The per-player lookup only looked at the first row
+            seen.add(key)
+            if row['cost_for_season'] is not None:
+                costs[key] = float(row['cost_for_season'])
+
+        cursor.execute("""
+            SELECT team_id, player_id, draft_amount
+            FROM contracts
+            WHERE sleeper_league_id = ? AND contract_year = ? AND is_active = 1
+            ORDER BY rowid
+        """, (self.league_id, year))
+        for row in cursor.fetchall():
+            key = (row['team_id'], row['player_id'])
+            if key not in costs and row['draft_amount'] is not None:
+                costs[key] = float(row['draft_amount'])
+        return costs
+
+    def _compute_position_spending(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Current-season spending per position for every team, sorted for ranking."""
+        spending_by_position: Dict[str, List[Dict[str, Any]]] = {}
+        for roster in self.rosters:
+            team_spending: Dict[str, float] = {}
+            for p_id in roster['player_ids']:
+                position = (self.players.get(p_id) or {}).get('position')
+                if not position:
+                    continue
+                team_spending.setdefault(position, 0.0)
+                cost = self.current_year_costs.get((roster['team_id'], p_id), 0.0)
+                if cost > 0:
+                    team_spending[position] += cost
+            for position, total_amount in team_spending.items():
+                spending_by_position.setdefault(position, []).append({'team_id': roster['team_id'], 'amount': total_amount})
+        return {position: sorted(entries, key=lambda x: x['amount'], reverse=True)
+                for position, entries in spending_by_position.items()}
+
+    def _compute_future_spending(self, cursor: sqlite3.Cursor) -> Dict[int, List[Dict[str, Any]]]:
+        """Remaining budget per team for the next seasons, sorted for ranking."""
+        seasons_to_rank = [self.current_processing_year + i for i in range(1, FUTURE_YEARS_RANKED + 1)]
+        placeholders = ', '.join('?' * len(seasons_to_rank))
+
+        cursor.execute(f"""
+            SELECT v.team_id, (v.contract_start_season + v.year_number_in_contract - 1) as season,
+                   SUM(v.cost_for_season) as total_future_cost
+            FROM vw_contractByYear v
+            JOIN contracts c ON v.original_contract_rowid = c.rowid
+            WHERE v.sleeper_league_id = ? AND c.is_active = 1
+              AND (v.contract_start_season + v.year_number_in_contract - 1) IN ({placeholders})
+            GROUP BY v.team_id, season
+        """, (self.league_id, *seasons_to_rank))
+        contract_costs = {(row['team_id'], int(row['season'])): row['total_future_cost'] or 0.0 for row in cursor.fetchall()}
+
+        cursor.execute(f"""
+            SELECT c.team_id, p.penalty_year, COALESCE(SUM(p.penalty_amount), 0) as total_penalty
+            FROM penalties p
+            JOIN contracts c ON p.contract_id = c.rowid
+            WHERE c.sleeper_league_id = ? AND p.penalty_year IN ({placeholders})
+            GROUP BY c.team_id, p.penalty_year
+        """, (self.league_id, *seasons_to_rank))
+        penalty_costs = {(row['team_id'], int(row['penalty_year'])): row['total_penalty'] or 0.0 for row in cursor.fetchall()}
+
+        cursor.execute(f"""
+            SELECT t.initiator_team_id, t.recipient_team_id, ti.season_year, SUM(ti.budget_amount) as amount
+            FROM trade_items ti
+            JOIN trades t ON ti.trade_id = t.trade_id
+            WHERE t.sleeper_league_id = ? AND t.trade_status = 'completed' AND ti.season_year IN ({placeholders})
+            GROUP BY t.initiator_team_id, t.recipient_team_id, ti.season_year
+        """, (self.league_id, *seasons_to_rank))
+        # Positive value means money SENT (reduces remaining budget)
+        trade_impact: Dict[Tuple[str, int], float] = {}
+        for row in cursor.fetchall():
+            season = int(row['season_year'])
+            amount = row['amount'] or 0.0
+            sent_key = (row['initiator_team_id'], season)
+            received_key = (row['recipient_team_id'], season)
+            trade_impact[sent_key] = trade_impact.get(sent_key, 0.0) + amount
+            trade_impact[received_key] = trade_impact.get(received_key, 0.0) - amount
+
+        future_spending: Dict[int, List[Dict[str, Any]]] = {}
+        for season in seasons_to_rank:
+            entries = []
+            for roster in self.rosters:
+                key = (roster['team_id'], season)
+                total_cost = contract_costs.get(key, 0.0) + penalty_costs.get(key, 0.0) + trade_impact.get(key, 0.0)
+                entries.append({'team_id': roster['team_id'], 'total_cost': total_cost, 'remaining_budget': TEAM_BUDGET - total_cost})
+            future_spending[season] = sorted(entries, key=lambda x: x['remaining_budget'], reverse=True)
+        return future_spending
+
+    def team_ids(self) -> List[str]:
+        """Roster IDs in this league."""
+        return [roster['team_id'] for roster in self.rosters]
+
+    def build_ranks(self, team_id: str) -> Dict[str, Any]:
+        """League-relative rank fields for one team."""
+        position_ranks = {}
+        for position, sorted_spending in self.position_spending.items():
+            rank = _rank_of(sorted_spending, team_id)
+            if rank:
+                position_ranks[position] = rank
+        future_ranks = {}
+        for season, sorted_teams in self.future_spending.items():
+            rank = _rank_of(sorted_teams, team_id)
+            if rank:
+                future_ranks[str(season)] = rank
+        return {'team_position_spending_ranks': position_ranks, 'future_yearly_total_ranks': future_ranks}
+
+    def build_team(self, team_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Build the full /team page payload for one roster.
+
+        Args:
+            team_id (str): sleeper_roster_id in this league.
+
+        Returns:
+            Optional[Dict[str, Any]]: Payload without 'success', or None if the roster is not in the league.
+        """
+        roster = self.rosters_by_id.get(team_id)
+        if roster is None:
+            return None
+        year = self.current_processing_year
+        player_ids = roster['player_ids']
+        reserve_ids = roster['reserve_ids']
+
+        grouped_players = {pos: [] for pos in POSITION_GROUPS}
+        team_yearly_totals = {y: 0.0 for y in range(year, year + 4)}
+
+        for p_id in player_ids:
+            p_data = self.players.get(p_id)
+            if not p_data:
+                logger.warning(f"LeagueTeamSnapshotBuilder: Player data for ID {p_id} not found. Skipping player.")
+                continue
+            player_contract_info = self.contracts.get((team_id, p_id))
+
+            draft_amount_for_calc = 0
+            contract_duration_for_calc = 0
+            contract_start_year_for_calc = 0
+            is_active_for_calc = False
+            contract_status = "Free Agent"
+            years_remaining_display = "N/A"
+            projected_costs = []
+
+            if player_contract_info:
+                draft_amount_for_calc = player_contract_info.get('draft_amount', 0)
+                db_duration = player_contract_info.get('duration')
+                contract_duration_for_calc = int(db_duration) if db_duration is not None else 0
+                db_contract_year = player_contract_info.get('contract_year')
+                contract_start_year_for_calc = int(db_contract_year) if db_contract_year is not None else 0
+                is_active_for_calc = bool(player_contract_info.get('is_active', False))
+
+                if is_active_for_calc:
+                    contract_status = "Active Contract"
+                    if contract_duration_for_calc > 0 and contract_start_year_for_calc > 0:
+                        contract_end_year = contract_start_year_for_calc + contract_duration_for_calc - 1
+                        years_left = contract_end_year - year + 1
+                        if years_left <= 0:
+                            years_remaining_display = "Expires " + str(contract_end_year) if contract_end_year >= year else "Expired"
+                        else:
+                            years_remaining_display = str(years_left)
+
+                        projected_costs = get_escalated_contract_costs(
+                            draft_amount=float(draft_amount_for_calc if draft_amount_for_calc is not None else 0.0),
+                            duration=int(contract_duration_for_calc),
+                            contract_start_year=int(contract_start_year_for_calc)
+                        )
+                        for cost_info in projected_costs:
+                            if year <= cost_info['year'] < year + 4:
+                                team_yearly_totals[cost_info['year']] += cost_info['cost']
+                    else:
+                        logger.warning(f"LeagueTeamSnapshotBuilder: Player {p_id} has active contract but duration ({contract_duration_for_calc}) or start_year ({contract_start_year_for_calc}) is invalid.")
+                        years_remaining_display = "Error"
+                        projected_costs = []
+                else:
+                    contract_status = "Inactive Contract"
+
+            # Auction acquisitions still on the default 1-year placeholder are pending contract setting
+            is_auction_acquisition = p_id in self.auction_acquisitions
+            if is_auction_acquisition and self.is_contract_setting_period_active:
+                is_default_placeholder = bool(player_contract_info) and contract_duration_for_calc == 1 and contract_start_year_for_calc == year
+                if not player_contract_info or is_default_placeholder:
+                    contract_status = "Pending Contract Setting"
+                    if player_contract_info and is_active_for_calc:
+                        draft_amount_for_calc = self.auction_acquisitions.get(p_id, 0)
+                    else:
+                        draft_amount_for_calc = 0  # Free agents show $0 regardless of auction history
+                    years_remaining_display = "Set Duration"
+                    projected_costs = []
+
+            # Ensure free agents always show $0 regardless of auction history
+            if not player_contract_info:
+                draft_amount_for_calc = 0
+                contract_status = "Free Agent"
+
+            # During the contract setting period auction players stay editable in the UI
+            if self.is_contract_setting_period_active and is_auction_acquisition:
+                contract_status_for_frontend = "Pending Contract Setting"
+                years_remaining_display_for_frontend = "Set Duration"
+            else:
+                contract_status_for_frontend = contract_status
+                years_remaining_display_for_frontend = years_remaining_display
+
+            player_data_for_frontend = {
+                'id': p_id,
+                'name': p_data.get('name', 'N/A'),
+                'position': p_data.get('position', 'N/A'),
+                'team_nfl': p_data.get('team', 'N/A'),
+                'draft_amount': draft_amount_for_calc,
+                'contract_status': contract_status_for_frontend,
+                'years_remaining': years_remaining_display_for_frontend,
+                'projected_costs': projected_costs,
+                'is_on_reserve': p_id in reserve_ids,
+                'contract_rowid': player_contract_info.get('contract_rowid') if player_contract_info else None,
+                'contract_duration_db': int(contract_duration_for_calc) if player_contract_info and contract_duration_for_calc else None,
+                'contract_start_year_db': int(contract_start_year_for_calc) if player_contract_info and contract_start_year_for_calc else None,
+            }
+            position_group = p_data.get('position', 'Unknown')
+            if position_group not in grouped_players:
+                position_group = 'Unknown'
+            grouped_players[position_group].append(player_data_for_frontend)
+
+        for position in grouped_players:
+            grouped_players[position].sort(key=lambda x: (-x.get('draft_amount', 0), x.get('name', '')))
+
+        payload = {
+            'team_id': team_id,
+            'team_name': roster['team_name'] if roster['team_name'] else roster['manager_name'],
+            'manager_name': roster['manager_name'],
+            'sleeper_username': roster['sleeper_username'],
+            'league_id': self.league_id,
+            'league_name': self.league_name,
+            'players_by_position': grouped_players,
+            'is_contract_setting_period_active': self.is_contract_setting_period_active,
+            'is_offseason': self.is_offseason,
+            'current_processing_year': year,
+            'auction_acquisitions_for_team': {p: a for p, a in self.auction_acquisitions.items() if p in player_ids},
+            'team_yearly_totals': team_yearly_totals,
+            'team_yearly_penalty_totals': self.penalty_totals.get(team_id, {}),
+            'team_yearly_trade_amounts': self.trade_amounts.get(team_id, {}),
+        }
+        payload.update(self.build_ranks(team_id))
+        return payload
+
+
+def _store_snapshots(cursor: sqlite3.Cursor, league_id: str, snapshot_key: str, payloads: Dict[str, Dict[str, Any]]) -> None:
+    cursor.executemany('''
+        INSERT INTO team_page_snapshots (sleeper_league_id, team_id, snapshot_key, payload, built_at)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(sleeper_league_id, team_id) DO UPDATE SET
+            snapshot_key = excluded.snapshot_key,
+            payload = excluded.payload,
+            built_at = excluded.built_at
+    ''', [(league_id, team_id, snapshot_key, json.dumps(payload)) for team_id, payload in payloads.items()])
+
+
+def rebuild_league_snapshots(conn: sqlite3.Connection, league_id: str, current_processing_year: int, is_offseason: bool) -> Dict[str, Dict[str, Any]]:
+    """
+    Build and store snapshots for every team in a league. Does not commit.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        league_id (str): Sleeper league ID.
+        current_processing_year (int): Season from season_curr.
+        is_offseason (bool): Off-season flag from season_curr.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Payloads keyed by team_id.
+    """
+    cursor = conn.cursor()
+    builder = LeagueTeamSnapshotBuilder(conn, league_id, current_processing_year, is_offseason)
+    payloads = {team_id: builder.build_team(team_id) for team_id in builder.team_ids()}
+    snapshot_key = compute_snapshot_key(cursor, league_id, current_processing_year, is_offseason)
+    cursor.execute("DELETE FROM team_page_snapshots WHERE sleeper_league_id = ?", (league_id,))
+    _store_snapshots(cursor, league_id, snapshot_key, payloads)
+    logger.info(f"team_snapshots: Built {len(payloads)} team snapshots for league {league_id} (key {snapshot_key})")
+    return payloads
+
+
+def rebuild_team_snapshots(conn: sqlite3.Connection, league_id: str, team_ids: Iterable[str],
+                           current_processing_year: int, is_offseason: bool) -> None:
+    """
+    Targeted rebuild after a change to specific teams. Does not commit.
+
+    The changed teams get a full rebuild. Every other team's stored payload keeps
+    its player section and only has its league-relative rank fields refreshed.
+    If any stored snapshot is missing or was built for a different season or
+    player catalog, the whole league is rebuilt instead.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        league_id (str): Sleeper league ID.
+        team_ids (Iterable[str]): Rosters whose own data changed.
+        current_processing_year (int): Season from season_curr.
+        is_offseason (bool): Off-season flag from season_curr.
+    """
+    cursor = conn.cursor()
+    changed = set(team_ids)
+    snapshot_key = compute_snapshot_key(cursor, league_id, current_processing_year, is_offseason)
+    key_suffix = snapshot_key.split(':', 1)[1]
+
+    cursor.execute("SELECT team_id, snapshot_key, payload FROM team_page_snapshots WHERE sleeper_league_id = ?", (league_id,))
+    stored = {row['team_id']: row for row in cursor.fetchall()}
+
+    builder = LeagueTeamSnapshotBuilder(conn, league_id, current_processing_year, is_offseason)
+    league_team_ids = builder.team_ids()
+    if any(team_id not in stored or stored[team_id]['snapshot_key'].split(':', 1)[1] != key_suffix
+           for team_id in league_team_ids if team_id not in changed):
+        rebuild_league_snapshots(conn, league_id, current_processing_year, is_offseason)
+        return
+
+    payloads = {}
+    for team_id in league_team_ids:
+        if team_id in changed:
+            payloads[team_id] = builder.build_team(team_id)
+        else:
+            payload = json.loads(stored[team_id]['payload'])
+            payload.update(builder.build_ranks(team_id))
+            payloads[team_id] = payload
+    _store_snapshots(cursor, league_id, snapshot_key, payloads)
+    logger.info(f"team_snapshots: Rebuilt teams {sorted(changed)} in league {league_id}; refreshed ranks for {len(payloads) - len(changed)} others")
+
+
+def get_team_snapshot(conn: sqlite3.Connection, league_id: str, team_id: str,
+                      current_processing_year: int, is_offseason: bool,
+                      write: Optional[Callable[[Callable[[sqlite3.Cursor], Any]], Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return a team's page payload, rebuilding the league's snapshots if they are stale.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        league_id (str): Sleeper league ID.
+        team_id (str): sleeper_roster_id.
+        current_processing_year (int): Season from season_curr.
+        is_offseason (bool): Off-season flag from season_curr.
+        write (Optional[Callable]): Runs the rebuild unit (which takes a cursor) and commits it,
+            such as app.run_write. By default the rebuild runs on conn, which is committed.
+
+    Returns:
+        Optional[Dict[str, Any]]: Payload without 'success', or None if the team is not in the league.
+    """
+    cursor = conn.cursor()
+    snapshot_key = compute_snapshot_key(cursor, league_id, current_processing_year, is_offseason)
+    cursor.execute("""
+        SELECT payload FROM team_page_snapshots
+        WHERE sleeper_league_id = ? AND team_id = ? AND snapshot_key = ?
+    """, (league_id, team_id, snapshot_key))
+    row = cursor.fetchone()
+    if row:
+        return json.loads(row['payload'])
+
+    def rebuild(write_cursor: sqlite3.Cursor) -> Dict[str, Dict[str, Any]]:
+        return rebuild_league_snapshots(write_cursor.connection, league_id, current_processing_year, is_offseason)
+
+    if write is None:
+        payloads = rebuild(cursor)
+        conn.commit()
+    else:
+        payloads = write(rebuild)
+    return payloads.get(team_id)
@@ -0,0 +1,297 @@
+"""
+Background poller for yield vault positions.
+
+Every cycle reads the active YieldVaults rows, queries the supplied balance of
+every pool they deposited into with one batched Cadence script call
+(scripts/check_incrementfi_balances.cdc), splits each pool balance across its
+vaults by principal, then appends the values to vault_value_history
+(migrations/005_add_vault_value_history.sql) and updates YieldVaults in bulk,
+all in one transaction. Admin endpoints read those cached values.
+"""
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 300  # Seconds
+DEFAULT_ACCOUNT_ADDRESS = '0xdf978465ee6dcf32'  # testnet-account in flow.json, which signs the vault deposits
+BALANCES_SCRIPT = os.path.join(os.path.dirname(__file__), 'scripts', 'check_incrementfi_balances.cdc')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Where flow.json is
+
+
+class FlowScriptError(RuntimeError):
+    """Raised when a Cadence script fails or returns output that cannot be decoded."""
+
+
+def decode_cadence_value(value: Any) -> Any:
+    """
+    Convert a JSON-Cadence value (as printed by `flow scripts execute --output json`) to Python.
+
+    Fixed-point and integer types become float and int, arrays become lists,
+    dictionaries become dicts and composites (events, structs) become a dict of their
+    fields. Unknown types are returned as their raw value.
+    """
+    if not isinstance(value, dict) or 'type' not in value:
+        return value
+    cadence_type, raw = value['type'], value.get('value')
+    if cadence_type == 'Optional':
+        return decode_cadence_value(raw) if raw is not None else None
+    if cadence_type == 'Array':
+        return [decode_cadence_value(item) for item in raw]
+    if cadence_type == 'Dictionary':
+        return {decode_cadence_value(item['key']): decode_cadence_value(item['value']) for item in raw}
+    if isinstance(raw, dict) and 'fields' in raw:
+        return {field['name']: decode_cadence_value(field['value']) for field in raw['fields']}
+    if cadence_type in ('UFix64', 'Fix64'):
+        return float(raw)
+    if cadence_type.startswith(('Int', 'UInt', 'Word')):
+        return int(raw)
+    return raw
+
+
+class FlowCliScriptRunner:
+    """
+    Runs read-only Cadence scripts with the Flow CLI.
+
+    Args:
+        network (str): Network from flow.json ('testnet', 'mainnet' or 'emulator').
+        timeout (float): Seconds before the CLI call is abandoned.
+        project_dir (str): Directory holding flow.json.
+    """
+
+    def __init__(self, network: str = 'testnet', timeout: float = 60, project_dir: str = PROJECT_DIR):
+        self.network = network
+        self.timeout = timeout
+        self.project_dir = project_dir
+
+    def run(self, script_path: str, args: List[Dict[str, Any]]) -> Any:
+        """
+        Execute a script and return its decoded result.
+
+        Args:
+            script_path (str): Path to the .cdc script.
+            args (List[Dict[str, Any]]): Script arguments as JSON-Cadence values.
+
+        Raises:
+            FlowScriptError: If the CLI fails, times out or prints something that is not JSON-Cadence.
+        """
+        cmd = ['flow', 'scripts', 'execute', script_path, '--args-json', json.dumps(args),
+               '--network', self.network, '--output', 'json']
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout, cwd=self.project_dir)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise FlowScriptError(f"Flow CLI call failed: {e}") from e
+        if result.returncode != 0:
+            raise FlowScriptError(result.stderr.strip() or result.stdout.strip())
+        try:
+            return decode_cadence_value(json.loads(result.stdout))
+        except (ValueError, KeyError, TypeError) as e:
+            raise FlowScriptError(f"Unexpected script output: {result.stdout[:200]}") from e
+
+
+def history_table_exists(cursor: sqlite3.Cursor) -> bool:
+    """True once migration 005 has been applied to this database."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vault_value_history'")
+    return cursor.fetchone() is not None
+
+
+def get_active_positions(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Active vaults with the pool (vault_address) they deposited into and their principal."""
+    cursor.execute("""
+        SELECT vault_id, vault_address, principal_amount
+        FROM YieldVaults
+        WHERE status = 'active'
+        ORDER BY vault_address, vault_id
+    """)
+    return [{'vault_id': row[0], 'vault_address': row[1], 'principal_amount': row[2] or 0.0} for row in cursor.fetchall()]
+
+
+def allocate_pool_balances(positions: List[Dict[str, Any]], pool_balances: Dict[str, float]) -> List[Dict[str, Any]]:
+    """
+    Split each pool's balance across the vaults that deposited into it, pro rata by principal.
+
+    Every league deposits from the same SKL account, so the chain only knows one supplied
+    balance per pool; a vault's share of the interest follows its share of the principal.
+
+    Args:
+        positions (List[Dict[str, Any]]): Rows from get_active_positions.
+        pool_balances (Dict[str, float]): Supplied balance by pool address.
+
+    Returns:
+        List[Dict[str, Any]]: vault_id, current_value, yield_earned and pool_balance per vault.
+            Vaults whose pool has no balance reading are left out.
+    """
+    principal_by_pool: Dict[str, float] = {}
+    for position in positions:
+        principal_by_pool[position['vault_address']] = principal_by_pool.get(position['vault_address'], 0.0) + position['principal_amount']
+
+    valuations = []
+    for position in positions:
+        pool = position['vault_address']
+        if pool not in pool_balances:
+            continue
+        pool_principal = principal_by_pool[pool]
+        share = position['principal_amount'] / pool_principal if pool_principal else 0.0
+        current_value = round(pool_balances[pool] * share, 8)  # UFix64 precision
+        valuations.append({
+            'vault_id': position['vault_id'],
+            'current_value': current_value,
+            'yield_earned': round(current_value - position['principal_amount'], 8),
+            'pool_balance': pool_balances[pool],
+        })
+    return valuations
+
+
+def record_vault_values(cursor: sqlite3.Cursor, valuations: List[Dict[str, Any]], polled_at: str) -> int:
+    """
+    Append one history row per vault and cache the values on YieldVaults. Does not commit.
+
+    Returns:
+        int: Number of vaults recorded.
+    """
+    cursor.executemany("""
+        INSERT INTO vault_value_history (vault_id, polled_at, current_value, yield_earned, pool_balance)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(v['vault_id'], polled_at, v['current_value'], v['yield_earned'], v['pool_balance']) for v in valuations])
+    cursor.executemany("""
+        UPDATE YieldVaults SET current_value = ?, yield_earned = ?, last_updated = ?
+        WHERE vault_id = ? AND status = 'active'
+    """, [(v['current_value'], v['yield_earned'], polled_at, v['vault_id']) for v in valuations])
+    return len(valuations)
+
+
+def get_last_poll_time(cursor: sqlite3.Cursor) -> Optional[str]:
+    """polled_at of the newest history row, or None before the first poll (or migration 005)."""
+    if not history_table_exists(cursor):
+        return None
+    cursor.execute("SELECT MAX(polled_at) FROM vault_value_history")
+    return cursor.fetchone()[0]
+
+
+def poll_vault_positions(conn: sqlite3.Connection, runner: Any, account_address: str = DEFAULT_ACCOUNT_ADDRESS,
+                         min_interval: float = 0) -> Dict[str, Any]:
+    """
+    Run one poll cycle: one batched balance script call, then one write transaction.
+
+    Args:
+        conn (sqlite3.Connection): Keeper database connection.
+        runner (Any): Object with run(script_path, args) -> decoded result, e.g. FlowCliScriptRunner.
+        account_address (str): Account holding the pool positions.
+        min_interval (float): Skip the cycle when another process polled less than this many seconds ago.
+
+    Returns:
+        Dict[str, Any]: 'status' ('polled' or 'skipped'), with 'vaults', 'pools' and 'polled_at'
+            after a poll or 'reason' when skipped.
+
+    Raises:
+        FlowScriptError: If the balance script fails.
+    """
+    cursor = conn.cursor()
+    if not history_table_exists(cursor):
+        return {'status': 'skipped', 'reason': 'migration 005 not applied'}
+
+    # Another worker's poller may have just run; its history rows say when
+    last_polled_at = get_last_poll_time(cursor)
+    if min_interval and last_polled_at:
+        if datetime.fromisoformat(last_polled_at) > datetime.now() - timedelta(seconds=min_interval):
+            return {'status': 'skipped', 'reason': 'polled recently', 'last_polled_at': last_polled_at}
+
+    positions = get_active_positions(cursor)
+    if not positions:
+        return {'status': 'skipped', 'reason': 'no active vaults'}
+
+    pools = sorted({p['vault_address'] for p in positions})
+    balances = runner.run(BALANCES_SCRIPT, [
+        {'type': 'Address', 'value': account_address},
+        {'type': 'Array', 'value': [{'type': 'Address', 'value': pool} for pool in pools]},
+    ])
+    if not isinstance(balances, list) or len(balances) != len(pools):
+        raise FlowScriptError(f"Expected {len(pools)} pool balances, got {balances!r}")
+
+    valuations = allocate_pool_balances(positions, dict(zip(pools, balances)))
+    polled_at = datetime.now().isoformat()
+    with conn:
+        recorded = record_vault_values(cursor, valuations, polled_at)
+    logger.info(f"vault_poller: Recorded {recorded} vault values from {len(pools)} pools")
+    return {'status': 'polled', 'vaults': recorded, 'pools': len(pools), 'polled_at': polled_at}
+
+
+def get_vault_history(cursor: sqlite3.Cursor, vault_id: str, since: Optional[str] = None,
+                      limit: int = 500) -> List[Dict[str, Any]]:
+    """Newest-first history of one vault, optionally only rows polled at or after since."""
+    params: List[Any] = [vault_id]
+    since_clause = ''
+    if since:
+        since_clause = 'AND polled_at >= ?'
+        params.append(since)
+    cursor.execute(f"""
+        SELECT polled_at, current_value, yield_earned, pool_balance
+        FROM vault_value_history
+        WHERE vault_id = ? {since_clause}
+        ORDER BY polled_at DESC
+        LIMIT ?
+    """, params + [limit])
+    return [{'polled_at': row[0], 'current_value': row[1], 'yield_earned': row[2], 'pool_balance': row[3]}
+            for row in cursor.fetchall()]
+
+
+class VaultPoller:
+    """
+    Runs poll_vault_positions every interval seconds on a daemon thread.
+
+    Args:
+        db_path (str): Keeper database file.
+        runner (Any): Script runner, see poll_vault_positions.
+        interval (float): Seconds between cycles.
+        account_address (str): Account holding the pool positions.
+        busy_timeout (float): Seconds to wait for the database write lock.
+    """
+
+    def __init__(self, db_path: str, runner: Any, interval: float = DEFAULT_POLL_INTERVAL,
+                 account_address: str = DEFAULT_ACCOUNT_ADDRESS, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.runner = runner
+        self.interval = interval
+        self.account_address = account_address
+        self.busy_timeout = busy_timeout
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll_once(self) -> Dict[str, Any]:
+        """Run one cycle on a fresh connection. Errors are logged and returned, never raised."""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            # Half an interval, so a cycle that started a little early in another process still counts
+            self.last_result = poll_vault_positions(conn, self.runner, self.account_address, min_interval=self.interval / 2)
+        except Exception as e:
+            logger.error(f"vault_poller: Poll failed: {e}")
+            self.last_result = {'status': 'failed', 'error': str(e)}
+        finally:
+            conn.close()
+        return self.last_result
+
+    def start(self) -> None:
+        """Start polling in the background (first cycle immediately)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='vault-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop after the current cycle."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.interval)
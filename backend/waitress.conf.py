@@ -6,7 +6,8 @@ host = "0.0.0.0"  # Listen on all interfaces
 port = 5000        # Port to listen on
 
 # Performance settings
-threads = 4        # Number of worker threads
+workers = 1        # Number of worker processes sharing the listening socket (WEB_CONCURRENCY overrides)
+threads = 4        # Number of worker threads per process (WAITRESS_THREADS overrides)
 connection_limit = 1000  # Maximum concurrent connections
 cleanup_interval = 30    # Cleanup interval in seconds
 channel_timeout = 120    # Channel timeout in seconds
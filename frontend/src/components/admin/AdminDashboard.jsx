@@ -63,14 +63,25 @@ const AdminDashboard = ({ user }) => {
         setStats(statsData.stats);
       }
 
-      // Fetch leagues
-      const leaguesRes = await fetch(`${API_BASE_URL}/admin/leagues`, {
-        headers: { 'Authorization': sessionToken || '' }
-      });
-      const leaguesData = await leaguesRes.json();
-      if (leaguesData.success) {
-        setLeagues(leaguesData.leagues);
-      }
+      // Fetch leagues, following next_cursor until the last page (the payout picker needs all of them)
+      const allLeagues = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ limit: '200' });
+        if (cursor) {
+          params.set('cursor', cursor);
+        }
+        const leaguesRes = await fetch(`${API_BASE_URL}/admin/leagues?${params}`, {
+          headers: { 'Authorization': sessionToken || '' }
+        });
+        const leaguesData = await leaguesRes.json();
+        if (!leaguesData.success) {
+          break;
+        }
+        allLeagues.push(...leaguesData.leagues);
+        cursor = leaguesData.next_cursor;
+      } while (cursor);
+      setLeagues(allLeagues);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
     }
@@ -0,0 +1,94 @@
+"""
+Test cases for the analytics replica, its staleness fallback and scheduled refreshes.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from analytics_replica import ReplicaScheduler, connect_analytics, refresh_replica, replica_path_for
+from app import init_db
+
+
+class TestAnalyticsReplica:
+    """Test cases for snapshot reads from the replica and falling back to the live database."""
+
+    def setup_method(self):
+        """Set up a keeper database file in WAL mode with two SKL leagues."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.replica_path = replica_path_for(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        init_db(self.conn)
+        self._add_league('L1')
+        self._add_league('L2')
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _add_league(self, league_id):
+        self.conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES (?, ?, '2025')",
+                          (league_id, f'SKL {league_id}'))
+        self.conn.commit()
+
+    def _league_count(self, conn):
+        return conn.execute("SELECT COUNT(*) FROM LeagueMetadata WHERE name LIKE 'SKL%'").fetchone()[0]
+
+    def test_replica_serves_its_snapshot_until_too_stale(self):
+        """Reads within the declared staleness see the snapshot, read-only; older replicas fall back to live."""
+        assert self.replica_path == os.path.join(self.tmpdir, 'keeper_analytics.db')
+        refreshed_at = datetime(2025, 10, 5, 12, 0, 0)
+        result = refresh_replica(self.db_path, self.replica_path, pages=4, pause=0, now=refreshed_at)
+        assert result['refreshed_at'] == '2025-10-05T12:00:00' and not os.path.exists(self.replica_path + '.partial')
+        self._add_league('L3')
+
+        conn, freshness = connect_analytics(self.db_path, self.replica_path, 300, now=refreshed_at + timedelta(seconds=90))
+        try:
+            assert freshness == {'source': 'replica', 'as_of': '2025-10-05T12:00:00', 'staleness_seconds': 90.0}
+            assert self._league_count(conn) == 2
+            with pytest.raises(sqlite3.OperationalError, match='readonly'):
+                conn.execute("DELETE FROM LeagueMetadata")
+        finally:
+            conn.close()
+
+        conn, freshness = connect_analytics(self.db_path, self.replica_path, 300, now=refreshed_at + timedelta(seconds=301))
+        try:
+            assert freshness['source'] == 'live' and self._league_count(conn) == 3
+        finally:
+            conn.close()
+
+        conn, freshness = connect_analytics(self.db_path, os.path.join(self.tmpdir, 'missing.db'), 300)
+        conn.close()
+        assert freshness['source'] == 'live'
+
+    def test_refresh_keeps_open_readers_on_their_snapshot(self):
+        """A reader opened before a refresh keeps its snapshot; the next reader sees the new one; one refresh per interval."""
+        first = ReplicaScheduler(self.db_path, self.replica_path, interval=3600, pause=0)
+        second = ReplicaScheduler(self.db_path, self.replica_path, interval=3600, pause=0)
+        assert first.run_once()['path'] == self.replica_path
+        assert second.run_once() is None  # Claimed by the first worker within the interval
+        reader, _ = connect_analytics(self.db_path, self.replica_path, 300)
+
+        self._add_league('L3')
+        assert second.run_once(force=True)['path'] == self.replica_path
+        try:
+            assert self._league_count(reader) == 2
+            new_reader, freshness = connect_analytics(self.db_path, self.replica_path, 300)
+            assert freshness['source'] == 'replica' and self._league_count(new_reader) == 3
+            new_reader.close()
+        finally:
+            reader.close()
+
+        assert (first.metrics()['refreshes'], second.metrics()['refreshes'], second.metrics()['failed']) == (1, 1, 0)
+        last = self.conn.execute("SELECT last_result FROM db_maintenance WHERE task = 'replica'").fetchone()[0]
+        assert '"refreshed_at"' in last
@@ -0,0 +1,75 @@
+"""
+Test cases for the create_app() factory and lazy resource initialization.
+"""
+import os
+import subprocess
+import sys
+
+# Add the backend directory to the path
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+import app as app_module
+from app import create_app
+
+
+class TestAppFactory:
+    """Test cases for the application factory."""
+
+    def test_in_memory_app_initializes_database_on_first_use(self):
+        """The DB is only opened (and the schema created) when something needs it."""
+        test_app = create_app({'DATABASE_URL': ':memory:', 'TESTING': True})
+        resources = test_app.extensions['skl_resources']
+        assert resources._db_conn is None
+
+        response = test_app.test_client().get('/')
+        assert response.status_code == 200
+        assert resources._db_conn is None
+
+        with test_app.app_context():
+            conn = app_module.get_global_db_connection()
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+            assert app_module.get_global_db_connection() is conn
+        assert {'players', 'sessions', 'vw_contractByYear'} <= tables
+        resources.close()
+
+    def test_apps_do_not_share_resources(self):
+        """Two apps built by the factory get separate connections."""
+        first = create_app({'DATABASE_URL': ':memory:', 'TESTING': True})
+        second = create_app({'DATABASE_URL': ':memory:', 'TESTING': True})
+        with first.app_context():
+            first_conn = app_module.get_global_db_connection()
+            first_conn.execute("INSERT INTO players (sleeper_player_id, name) VALUES ('1', 'Only In First')")
+        with second.app_context():
+            second_conn = app_module.get_global_db_connection()
+            count = second_conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+        assert first_conn is not second_conn
+        assert count == 0
+        first.extensions['skl_resources'].close()
+        second.extensions['skl_resources'].close()
+
+    def test_import_does_not_touch_the_database(self, tmp_path):
+        """Importing the module must not create the configured database file."""
+        db_path = tmp_path / 'missing_dir' / 'keeper.db'
+        env = dict(os.environ, DATABASE_URL=str(db_path))
+        result = subprocess.run(
+            [sys.executable, '-c', 'import app'],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        assert not db_path.exists()
+
+    def test_background_jobs_start_from_one_entry_point(self, tmp_path):
+        """app.py and start_production.py start the same jobs; a job whose interval is 0 stays off."""
+        test_app = create_app({'DATABASE_URL': str(tmp_path / 'keeper.db'), 'TESTING': True, 'VAULT_POLL_INTERVAL': 0,
+                               'MAINTENANCE_INTERVAL': 0, 'BACKUP_INTERVAL': 0, 'ANALYTICS_REPLICA_INTERVAL': 0,
+                               'LEAGUE_REFRESH_INTERVAL': 0})
+        resources = test_app.extensions['skl_resources']
+        try:
+            resources.start_background_jobs()
+            assert resources._payment_verifier is not None and resources._transaction_tracker is not None
+            assert resources._session_store is not None and resources._session_store._thread is not None
+            assert resources._vault_poller is None and resources._backup_scheduler is None
+        finally:
+            resources.close()
+        assert resources._payment_verifier is None
@@ -0,0 +1,98 @@
+"""
+Test cases for single-league and fleet-wide playoff bracket sync.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from bracket_sync import (JOB_TYPE_BRACKET_SYNC, compute_placements, create_sync_job, get_sync_job,
+                          run_bracket_sync_job, write_league_brackets)
+from migrations.run_migration import apply_migration
+
+
+WINNERS = [
+    {'r': 1, 'm': 1, 't1': 3, 't2': 6, 'w': 3, 'l': 6},
+    {'r': 1, 'm': 2, 't1': 4, 't2': 5, 'w': 5, 'l': 4},
+    {'r': 2, 'm': 3, 't1': 1, 't2': 3, 'w': 1, 'l': 3},
+    {'r': 2, 'm': 4, 't1': 2, 't2': 5, 'w': 2, 'l': 5},
+    {'r': 3, 'm': 6, 't1': 3, 't2': 5, 'w': 5, 'l': 3, 'p': 3},
+    {'r': 3, 'm': 5, 't1': 1, 't2': 2, 'w': 2, 'l': 1, 'p': 1},
+]
+LOSERS = [
+    {'r': 1, 'm': 1, 't1': 6, 't2': 4, 'w': 6, 'l': 4},
+    {'r': 2, 'm': 2, 't1': 6, 't2': 4, 'w': None, 'l': None},
+]
+
+
+class FakeSleeperClient:
+    """Serves brackets for known leagues and fails like an unreachable Sleeper for the rest."""
+
+    def get_json(self, path, cache=True):
+        league_id, bracket = path.split('/')[2:4]
+        if league_id == 'BROKEN':
+            raise requests.exceptions.ConnectionError('Sleeper unreachable')
+        return WINNERS if bracket == 'winners_bracket' else LOSERS
+
+
+class TestBracketSync:
+    """Test cases for in-memory placements, bulk writes and job progress."""
+
+    def setup_method(self):
+        """Create a keeper database file with the admin and playoff migrations applied."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.conn = sqlite3.connect(self.db_path)
+        init_db(self.conn)
+        for name in ('002_add_playoff_tracking.sql', '003_add_sync_jobs.sql'):
+            apply_migration(self.conn, name)
+        for league_id in ('L1', 'L2', 'BROKEN'):
+            self.conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES (?, ?, '2025')",
+                              (league_id, f'SKL {league_id}'))
+            self.conn.executemany("""
+                INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, wins, points_for) VALUES (?, ?, ?, ?)
+            """, [(str(r), league_id, 12 if r == 4 else 10 - r, 1000.0 - r) for r in range(1, 7)])
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_placements_come_from_bracket_structure(self):
+        """The p == 1 final decides 1st/2nd; 3rd comes from the last decided losers match."""
+        placements = {p['placement_type']: p['roster_id'] for p in compute_placements(WINNERS, LOSERS, '1')}
+        assert placements == {'1st_place': '2', '2nd_place': '1', '3rd_place': '6', 'regular_season_winner': '1'}
+        assert compute_placements([], [], None) == []
+
+    def test_write_is_idempotent_single_transaction(self):
+        """Re-syncing a league replaces its rows instead of duplicating them."""
+        for _ in range(2):
+            summary = write_league_brackets(self.conn, 'L1', 2025, WINNERS, LOSERS)
+        assert summary['winners_bracket_matches'] == 6
+        # Roster 4 won the regular season but missed the final, so it gets its own placement row
+        counts = [self.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE sleeper_league_id = 'L1'").fetchone()[0]
+                  for table in ('PlayoffBrackets', 'PlayoffMatchups', 'LeaguePlacements')]
+        assert counts == [2, 8, 4]
+
+    def test_fleet_job_reports_progress_and_isolates_failures(self):
+        """Every league is attempted; a failing league is recorded without stopping the others."""
+        job_id = create_sync_job(self.conn, JOB_TYPE_BRACKET_SYNC, 2025, 3, '0xadmin')
+        assert get_sync_job(self.conn, job_id)['status'] == 'queued'
+
+        run_bracket_sync_job(self.db_path, job_id, ['L1', 'L2', 'BROKEN'], 2025, client=FakeSleeperClient(), max_workers=3)
+
+        job = get_sync_job(self.conn, job_id)
+        assert job['status'] == 'completed_with_errors'
+        assert (job['completed_items'], job['failed_items'], job['total_items']) == (2, 1, 3)
+        assert job['results']['L2']['success'] and not job['results']['BROKEN']['success']
+        assert job['finished_at'] is not None
+        assert self.conn.execute("SELECT COUNT(*) FROM LeaguePlacements WHERE sleeper_league_id = 'L2'").fetchone()[0] == 4
+        assert get_sync_job(self.conn, 'missing') is None
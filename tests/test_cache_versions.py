@@ -0,0 +1,100 @@
+"""
+Test cases for cross-process cache invalidation and the shared server config.
+"""
+import sqlite3
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from cache_versions import CACHE_VERSIONS_DDL, CacheVersionTracker, bump_cache_version, get_cache_version, league_cache_key
+from server_config import load_server_config, waitress_kwargs
+
+
+class TestCacheVersions:
+    """Test cases for version rows shared between worker connections."""
+
+    def setup_method(self):
+        """Create a WAL database file with two connections, as two workers would have."""
+        import tempfile
+        self.tmpdir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.writer = sqlite3.connect(db_path)
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute(CACHE_VERSIONS_DDL)
+        self.writer.commit()
+        self.reader = sqlite3.connect(db_path)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        self.writer.close()
+        self.reader.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_bump_in_one_connection_is_seen_by_another_tracker(self):
+        """A committed bump from another connection moves the tracked version."""
+        tracker = CacheVersionTracker(self.reader)
+        key = league_cache_key('123')
+        assert tracker.get(key) == 0
+
+        bump_cache_version(self.writer.cursor(), key)
+        bump_cache_version(self.writer.cursor(), key)
+        self.writer.commit()
+
+        assert tracker.get(key) == 2
+        assert get_cache_version(self.reader.cursor(), key) == 2
+
+    def test_tracker_sees_bumps_made_on_its_own_connection(self):
+        """Writes through the tracker's own connection don't move data_version but are still picked up."""
+        tracker = CacheVersionTracker(self.writer)
+        key = league_cache_key('123')
+        assert tracker.get(key) == 0
+        bump_cache_version(self.writer.cursor(), key)
+        self.writer.commit()
+        assert tracker.get(key) == 1
+
+    def test_uncommitted_bump_is_not_visible_to_other_workers(self):
+        """Other workers only see a version once the writer's transaction commits."""
+        tracker = CacheVersionTracker(self.reader)
+        bump_cache_version(self.writer.cursor(), 'players')
+        assert tracker.get('players') == 0
+        self.writer.rollback()
+        assert tracker.get('players') == 0
+
+    def test_own_bump_is_seen_without_data_version_change(self):
+        """Bumps made through the tracker's own connection are picked up immediately."""
+        tracker = CacheVersionTracker(self.writer)
+        assert tracker.get('players') == 0
+        tracker.bump('players')
+        assert tracker.get('players') == 1
+
+
+class TestServerConfig:
+    """Test cases for the single server configuration source."""
+
+    def test_env_overrides_config_file(self, tmp_path, monkeypatch):
+        """Environment variables win over waitress.conf.py values."""
+        conf = tmp_path / 'waitress.conf.py'
+        conf.write_text("host = '127.0.0.1'\nport = 6000\nthreads = 8\nworkers = 2\nlog_file = 'x.log'\n")
+        monkeypatch.setenv('PORT', '7000')
+        monkeypatch.delenv('HOST', raising=False)
+        monkeypatch.delenv('WAITRESS_THREADS', raising=False)
+        monkeypatch.setenv('WEB_CONCURRENCY', '4')
+
+        config = load_server_config(str(conf))
+        assert config['host'] == '127.0.0.1'
+        assert config['port'] == 7000
+        assert config['workers'] == 4
+        assert waitress_kwargs(config)['threads'] == 8
+        assert 'log_file' not in waitress_kwargs(config)
+
+    def test_missing_file_and_invalid_worker_count(self, tmp_path, monkeypatch):
+        """Defaults apply without a config file and workers never drop below one."""
+        monkeypatch.setenv('WEB_CONCURRENCY', '0')
+        for name in ('HOST', 'PORT', 'WAITRESS_THREADS'):
+            monkeypatch.delenv(name, raising=False)
+        config = load_server_config(str(tmp_path / 'missing.conf.py'))
+        assert config['workers'] == 1
+        assert config['port'] == 5000
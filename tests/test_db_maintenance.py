@@ -0,0 +1,86 @@
+"""
+Test cases for the scheduled checkpoint, ANALYZE and VACUUM of the keeper database.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from db_maintenance import in_quiet_hours, note_changes, parse_quiet_hours, run_maintenance, storage_report
+
+QUIET = datetime(2026, 1, 5, 3, 30)
+BUSY = datetime(2026, 1, 5, 19, 0)
+
+
+class TestDbMaintenance:
+    """Test cases for claiming tasks across workers and reporting storage read-only."""
+
+    def setup_method(self):
+        """Set up a keeper database file in WAL mode and a maintenance connection."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        init_db(self.conn)
+        self.maintenance = sqlite3.connect(self.db_path, isolation_level=None)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.maintenance.close()
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _run(self, now=BUSY, **settings):
+        return run_maintenance(self.maintenance, self.db_path, now=now, **settings)
+
+    def test_checkpoint_and_optimize_are_claimed_once(self):
+        """A second worker within the interval skips the checkpoint; ANALYZE waits for enough sync changes."""
+        first = self._run()
+        assert first['checkpoint']['mode'] == 'PASSIVE' and 'optimize' in first  # Never analyzed yet
+        assert 'checkpoint' not in self._run()
+
+        note_changes(self.conn.cursor(), 10)
+        self.conn.commit()
+        assert 'optimize' not in self._run(interval=0, analyze_changes=50)
+        note_changes(self.conn.cursor(), 40)
+        self.conn.commit()
+        assert 'optimize' in self._run(interval=0, analyze_changes=50)
+        assert self.conn.execute("SELECT pending_changes FROM db_maintenance WHERE task = 'optimize'").fetchone()[0] == 0
+
+        truncated = self._run(interval=0, wal_truncate_bytes=0)['checkpoint']
+        assert truncated['mode'] == 'TRUNCATE' and (truncated['busy'], truncated['log']) == (0, 0)
+
+    def test_vacuum_only_in_quiet_hours_with_free_pages(self):
+        """Free pages are reclaimed in the quiet window, at most once per window."""
+        self.conn.execute("CREATE TABLE filler (data BLOB)")
+        self.conn.executemany("INSERT INTO filler VALUES (?)", [(b'x' * 4000,) for _ in range(500)])
+        self.conn.commit()
+        self.conn.execute("DROP TABLE filler")
+        self.conn.commit()
+
+        assert 'vacuum' not in self._run(now=BUSY)
+        vacuumed = self._run(now=QUIET)['vacuum']
+        assert vacuumed['bytes_after'] < vacuumed['bytes_before']
+        assert self.conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        assert 'vacuum' not in self._run(now=QUIET, vacuum_free_ratio=0)
+
+        assert parse_quiet_hours('23-2') == (23, 2) and parse_quiet_hours('') is None
+        assert in_quiet_hours(datetime(2026, 1, 5, 1), (23, 2)) and not in_quiet_hours(datetime(2026, 1, 5, 2), (23, 2))
+
+    def test_storage_report_is_read_only(self):
+        """The report works on a read-only connection and shows the last checkpoint."""
+        self._run()
+        read_only = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        try:
+            report = storage_report(read_only, self.db_path)
+        finally:
+            read_only.close()
+        assert report['page_count'] > 0 and report['row_counts']['db_maintenance'] == 6
+        assert report['checkpoint_lag_frames'] == 0
+        assert report['maintenance']['checkpoint']['last_result']['mode'] == 'PASSIVE'
@@ -0,0 +1,137 @@
+"""
+Test cases for the single-writer unit of work with group commit.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import create_app, init_db
+from cache_versions import league_cache_key
+from db_writer import DatabaseWriter, WriterClosedError
+from sleeper_service import SleeperService
+
+
+class FakeSleeperClient:
+    def get_json(self, path, cache=True):
+        week = int(path.rsplit('/', 1)[1])
+        return [{'roster_id': r, 'matchup_id': 1, 'points': 100.0 + week + r, 'starters': []} for r in (1, 2)]
+
+
+class TestDatabaseWriter:
+    """Test cases for ordering, group commit, savepoint isolation and SleeperService integration."""
+
+    def setup_method(self):
+        """Create a keeper database file, a reader connection and a writer."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.conn = sqlite3.connect(self.db_path)
+        init_db(self.conn)
+        self.conn.execute("CREATE TABLE log (value TEXT)")
+        self.conn.commit()
+        self.writer = DatabaseWriter(self.db_path, busy_timeout=5)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.writer.close()
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _values(self):
+        return [row[0] for row in self.conn.execute("SELECT value FROM log ORDER BY rowid")]
+
+    def test_queued_units_share_a_commit_and_failures_stay_isolated(self):
+        """Units queued behind a running one commit together; the failing unit's writes are rolled back alone."""
+        started, release = threading.Event(), threading.Event()
+
+        def blocker(cursor):
+            cursor.execute("INSERT INTO log VALUES ('first')")
+            started.set()
+            release.wait(5)
+            return 'first'
+
+        def failing(cursor):
+            cursor.execute("INSERT INTO log VALUES ('lost')")
+            raise ValueError('bad payload')
+
+        futures = [self.writer.submit(blocker)]
+        assert started.wait(5)
+        futures.append(self.writer.submit(lambda cursor: cursor.execute("INSERT INTO log VALUES ('a')").rowcount))
+        futures.append(self.writer.submit(failing))
+        futures.append(self.writer.submit(lambda cursor: cursor.execute("INSERT INTO log VALUES ('b')").rowcount))
+        release.set()
+
+        assert futures[0].result(5) == 'first'
+        assert futures[1].result(5) == 1 and futures[3].result(5) == 1
+        with pytest.raises(ValueError):
+            futures[2].result(5)
+        assert self._values() == ['first', 'a', 'b']
+
+        metrics = self.writer.metrics()
+        assert (metrics['transactions'], metrics['units_committed'], metrics['units_failed']) == (2, 3, 1)
+        assert metrics['max_batch_size'] == 3
+
+    def test_nested_execute_runs_inline_and_closed_writer_rejects_units(self):
+        """A unit may call execute() again without deadlocking; close() drains, then refuses new work."""
+        def outer(cursor):
+            cursor.execute("INSERT INTO log VALUES ('outer')")
+            return self.writer.execute(lambda inner: inner.execute("INSERT INTO log VALUES ('inner')").rowcount)
+
+        assert self.writer.execute(outer, timeout=5) == 1
+        pending = self.writer.submit(lambda cursor: cursor.execute("INSERT INTO log VALUES ('drained')"))
+        self.writer.close()
+        assert pending.done()
+        assert self._values() == ['outer', 'inner', 'drained']
+        with pytest.raises(WriterClosedError):
+            self.writer.submit(lambda cursor: None)
+
+    def test_sleeper_service_writes_through_the_writer(self):
+        """Service writes are committed by the writer and visible to the service's reader connection."""
+        service = SleeperService(self.conn, http_client=FakeSleeperClient(), writer=self.writer)
+        nfl_state = {'season': '2025', 'season_type': 'regular', 'week': 3}
+        assert service.sync_league_matchups('L1', '2025', nfl_state) == 2
+        assert not self.conn.in_transaction
+        assert self.conn.execute("SELECT COUNT(*) FROM matchups WHERE league_id = 'L1'").fetchone()[0] == 4
+        assert self.writer.metrics()['units_committed'] == 1
+
+    def test_trade_routes_write_through_the_app_writer(self):
+        """Trade proposals and approvals are committed by the app's writer; a second decision on a trade is refused."""
+        self.conn.execute("INSERT INTO season_curr (current_year, IsOffSeason) VALUES (2025, 0)")
+        self.conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L1', 'SKL Test', '2025')")
+        self.conn.execute("INSERT INTO UserLeagueLinks (wallet_address, sleeper_league_id, is_commissioner) VALUES ('0xabc', 'L1', 1)")
+        self.conn.executemany("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, owner_id, team_name) VALUES (?, 'L1', ?, ?)",
+                              [('1', 'u1', 'One'), ('2', 'u2', 'Two')])
+        self.conn.commit()
+        test_app = create_app({'DATABASE_URL': self.db_path, 'TESTING': True, 'INIT_DB': False})
+        resources = test_app.extensions['skl_resources']
+        try:
+            client = test_app.test_client()
+            token = client.post('/auth/login', json={'walletAddress': '0xabc'}).get_json()['sessionToken']
+            headers = {'Authorization': token}
+            created = client.post('/api/trades/budget/create', headers=headers, json={
+                'initiator_team_id': '1', 'recipient_team_id': '2', 'league_id': 'L1',
+                'budget_items': [{'year': 2026, 'amount': 5}, {'year': 2027, 'amount': 0}]}).get_json()
+            assert created['success']
+
+            assert client.post(f"/api/trades/{created['trade_id']}/approve", headers=headers).status_code == 200
+            refused = client.post(f"/api/trades/{created['trade_id']}/reject", headers=headers, json={'notes': 'late'})
+            assert refused.status_code == 400 and refused.get_json()['error'] == 'Trade is not pending'
+
+            assert self.conn.execute("SELECT trade_status FROM trades").fetchone()[0] == 'completed'
+            assert self.conn.execute("SELECT COUNT(*) FROM trade_items").fetchone()[0] == 1
+            assert self.conn.execute("SELECT approval_status FROM trade_approvals").fetchall() == [('approved',)]
+            assert resources.get_db_writer().metrics()['units_committed'] == 3  # Login, proposal, approval
+            # The approval rebuilt the snapshots under the league version it bumped, so page views hit them
+            league_version = self.conn.execute("SELECT version FROM cache_versions WHERE cache_key = ?",
+                                               (league_cache_key('L1'),)).fetchone()[0]
+            keys = {row[0].split(':', 1)[0] for row in self.conn.execute("SELECT snapshot_key FROM team_page_snapshots")}
+            assert keys == {str(league_version)}
+        finally:
+            resources.close()
@@ -0,0 +1,83 @@
+"""
+Test cases for the normalized draft_picks table.
+"""
+import json
+import sqlite3
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from draft_picks import (backfill_draft_picks, create_default_contracts, get_auction_acquisitions,
+                         get_auction_spend_by_team, store_draft_picks)
+
+
+PICKS = [
+    {'player_id': 'p1', 'roster_id': 1, 'pick_no': 1, 'metadata': {'amount': '45'}},
+    {'player_id': 'p2', 'roster_id': 2, 'pick_no': 2, 'metadata': {'amount': '12'}},
+    {'player_id': 'p3', 'roster_id': 1, 'pick_no': 3, 'metadata': {'amount': '3'}},
+    {'player_id': 'p4', 'roster_id': 2, 'pick_no': 4, 'metadata': {'amount': 'n/a'}},
+]
+
+
+class TestDraftPicks:
+    """Test cases for pick ingestion, contract creation and auction lookups."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database with one completed auction draft."""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        init_db(self.conn)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L1', 'SKL Test', '2025')")
+        self.cursor.execute("""
+            INSERT INTO drafts (sleeper_draft_id, league_id, season, status, start_time, data)
+            VALUES ('D1', 'L1', '2025', 'complete', '2025-08-01T12:00:00', ?)
+        """, (json.dumps(PICKS),))
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def test_ingest_creates_contracts_for_unsigned_picks(self):
+        """Picks are stored once per draft and only players without an active contract get one."""
+        self.cursor.execute("""
+            INSERT INTO contracts (player_id, team_id, sleeper_league_id, draft_amount, contract_year, duration, is_active)
+            VALUES ('p3', '1', 'L1', 3, 2024, 3, 1)
+        """)
+        assert store_draft_picks(self.cursor, 'D1', 'L1', '2025', PICKS) == 4
+        assert store_draft_picks(self.cursor, 'D1', 'L1', '2025', PICKS) == 4
+        assert create_default_contracts(self.cursor, 'D1') == 2
+
+        self.cursor.execute("SELECT player_id, team_id, draft_amount, contract_year, duration FROM contracts ORDER BY player_id")
+        assert [tuple(row) for row in self.cursor.fetchall()] == [
+            ('p1', '1', 45, 2025, 1), ('p2', '2', 12, 2025, 1), ('p3', '1', 3, 2024, 3)]
+
+    def test_acquisitions_and_spend_summary(self):
+        """The latest completed draft drives acquisitions; spend is summed per roster."""
+        store_draft_picks(self.cursor, 'D1', 'L1', '2025', PICKS)
+        is_active, acquisitions = get_auction_acquisitions(self.cursor, 'L1', 2025)
+        assert is_active
+        assert acquisitions == {'p1': 45, 'p2': 12, 'p3': 3}
+
+        assert get_auction_spend_by_team(self.cursor, 'L1', 2025) == {
+            '1': {'players': 2, 'total_spent': 48, 'max_price': 45},
+            '2': {'players': 2, 'total_spent': 12, 'max_price': 12},
+        }
+
+        # A later completed draft without stored picks (e.g. a snake draft) closes the period
+        self.cursor.execute("""
+            INSERT INTO drafts (sleeper_draft_id, league_id, season, status, start_time, data)
+            VALUES ('D2', 'L1', '2025', 'complete', '2025-09-01T12:00:00', '{}')
+        """)
+        assert get_auction_acquisitions(self.cursor, 'L1', 2025) == (False, {})
+
+    def test_backfill_reads_existing_draft_json_once(self):
+        """Drafts ingested before the table existed are backfilled from drafts.data."""
+        assert get_auction_acquisitions(self.cursor, 'L1', 2025) == (False, {})
+        assert backfill_draft_picks(self.cursor) == 1
+        assert backfill_draft_picks(self.cursor) == 0
+        assert get_auction_acquisitions(self.cursor, 'L1', 2025)[1] == {'p1': 45, 'p2': 12, 'p3': 3}
+        assert get_auction_acquisitions(self.cursor, 'L1', 2026) == (False, {})
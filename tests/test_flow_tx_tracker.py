@@ -0,0 +1,147 @@
+"""
+Test cases for the background Flow transaction sealing tracker.
+"""
+import base64
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from flow_tx_tracker import (FlowAccessClient, list_flow_transactions, next_check_delay, parse_transaction_id,
+                             record_submission, run_tracker_cycle)
+from migrations.run_migration import apply_migration
+
+TX_DEPOSIT, TX_PAYOUT, TX_PENDING = 'a' * 64, 'b' * 64, 'c' * 64
+
+
+def event_payload(fields):
+    event = {'type': 'Event', 'value': {'id': 'A.1.SKL.Deposited', 'fields': fields}}
+    return base64.b64encode(json.dumps(event).encode()).decode()
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+
+class FakeAccessSession:
+    """Access node REST API: sealed deposit, reverted payout, and a transaction it does not know yet."""
+
+    def __init__(self):
+        self.checked = []
+
+    def get(self, url, timeout=None):
+        transaction_id = url.rsplit('/', 1)[1]
+        self.checked.append(transaction_id)
+        if transaction_id == TX_DEPOSIT:
+            events = [{'type': 'A.1.SKL.Deposited', 'event_index': '0',
+                       'payload': event_payload([{'name': 'amount', 'value': {'type': 'UFix64', 'value': '40.00000000'}}])}]
+            return FakeResponse(200, {'status': 'Sealed', 'status_code': 0, 'error_message': '', 'events': events})
+        if transaction_id == TX_PAYOUT:
+            return FakeResponse(200, {'status': 'Sealed', 'status_code': 1, 'error_message': 'insufficient balance', 'events': []})
+        return FakeResponse(404, {'code': 404, 'message': 'not found'})
+
+
+def fake_client():
+    client = FlowAccessClient(network='emulator')
+    client.session = FakeAccessSession()
+    return client
+
+
+class TestFlowTransactionTracker:
+    """Test cases for submission, batched status checks and settling of linked rows."""
+
+    def setup_method(self):
+        """Set up a keeper database file with a submitted deposit, payout and withdrawal."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.conn = sqlite3.connect(os.path.join(self.tmpdir, 'keeper.db'))
+        init_db(self.conn)
+        apply_migration(self.conn, '001_add_admin_tables.sql')
+        apply_migration(self.conn, '006_add_flow_transactions.sql')
+        self.conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L1', 'SKL One', '2025')")
+        self.conn.executemany("""
+            INSERT INTO AgentExecutions (execution_id, agent_type, sleeper_league_id, status, result_data)
+            VALUES (?, ?, 'L1', 'submitted', ?)
+        """, [('dep1', 'vault_deposit', json.dumps({'amount': 40.0})), ('wd1', 'vault_withdrawal', '{}')])
+        self.conn.execute("""
+            INSERT INTO PayoutSchedules (payout_id, sleeper_league_id, season_year, payout_date, payout_status)
+            VALUES ('p1', 'L1', 2025, '2025-12-31', 'submitted')
+        """)
+        self.conn.execute("""
+            INSERT INTO PayoutDistributions (distribution_id, payout_id, wallet_address, payout_type, amount, transaction_id, status)
+            VALUES ('d1', 'p1', '0xwinner', '1st_place', 20.0, ?, 'submitted')
+        """, (TX_PAYOUT,))
+        cursor = self.conn.cursor()
+        assert record_submission(cursor, TX_DEPOSIT, 'vault_deposit', execution_id='dep1') == 'submitted'
+        record_submission(cursor, TX_PAYOUT, 'prize_distribution', payout_id='p1')
+        record_submission(cursor, TX_PENDING, 'vault_withdrawal', execution_id='wd1')
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _make_due(self):
+        self.conn.execute("UPDATE FlowTransactions SET next_check_at = '2000-01-01T00:00:00' WHERE status = 'submitted'")
+        self.conn.commit()
+
+    def test_cycle_settles_sealed_and_failed_transactions(self):
+        """One cycle checks every due ID and moves execution and payout rows to their final state."""
+        client = fake_client()
+        assert run_tracker_cycle(self.conn, client)['checked'] == 0  # First check is not due yet
+
+        self._make_due()
+        result = run_tracker_cycle(self.conn, client)
+        assert (result['checked'], result['sealed'], result['failed'], result['submitted']) == (3, 1, 1, 1)
+        assert sorted(client.session.checked) == [TX_DEPOSIT, TX_PAYOUT, TX_PENDING]
+
+        status, result_data = self.conn.execute("SELECT status, result_data FROM AgentExecutions WHERE execution_id = 'dep1'").fetchone()
+        deposit = json.loads(result_data)
+        assert status == 'completed' and deposit['amount'] == 40.0 and deposit['transaction_status'] == 'sealed'
+        assert deposit['events'][0]['payload'] == {'amount': 40.0}
+
+        assert self.conn.execute("SELECT payout_status FROM PayoutSchedules WHERE payout_id = 'p1'").fetchone()[0] == 'failed'
+        assert self.conn.execute("SELECT status, error_message FROM PayoutDistributions").fetchone() == ('failed', 'insufficient balance')
+        assert self.conn.execute("SELECT status FROM AgentExecutions WHERE execution_id = 'wd1'").fetchone()[0] == 'submitted'
+
+        pending = list_flow_transactions(self.conn.cursor(), status='submitted')
+        assert [(tx['transaction_id'], tx['attempts'], tx['flow_status']) for tx in pending] == [(TX_PENDING, 1, 'Pending')]
+        sealed = list_flow_transactions(self.conn.cursor(), status='sealed')
+        assert sealed[0]['settled_at'] is not None
+
+    def test_backoff_and_leases_keep_pending_checks_apart(self):
+        """A pending transaction is not checked again until its backoff elapses."""
+        self._make_due()
+        client = fake_client()
+        run_tracker_cycle(self.conn, client)
+        assert run_tracker_cycle(self.conn, client)['checked'] == 0
+        assert [next_check_delay(n) for n in (1, 2, 3, 10)] == [4.0, 8.0, 16.0, 120.0]
+
+    def test_parse_id_and_untracked_submissions(self):
+        """Only a 64-hex-digit ID is recorded; without one (or migration 006) callers keep the old status."""
+        output = "Block ID\t5f3e...\nTransaction ID: " + TX_DEPOSIT.upper() + "\nStatus\t✅ SEALED"
+        assert parse_transaction_id(output) == TX_DEPOSIT
+        assert parse_transaction_id("ID: not-an-id") is None
+
+        conn = sqlite3.connect(':memory:')
+        init_db(conn)
+        assert record_submission(conn.cursor(), TX_DEPOSIT, 'vault_deposit') == 'completed'
+        assert record_submission(self.conn.cursor(), None, 'vault_deposit') == 'completed'
+        conn.close()
@@ -0,0 +1,59 @@
+"""
+Test cases for the single-query league home view behind /league/local.
+"""
+import json
+import os
+import sqlite3
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from league_home import get_user_leagues_with_teams
+
+
+class TestLeagueHome:
+    """Test cases for grouping leagues and teams from one query."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database with a wallet in two leagues and one league it is not in."""
+        self.conn = sqlite3.connect(':memory:')
+        init_db(self.conn)
+        self.conn.executemany("INSERT INTO Users (wallet_address, sleeper_user_id, username, display_name) VALUES (?, ?, ?, ?)",
+                              [('w1', 'u1', 'me', 'Me'), ('w2', 'u2', 'rival', None)])
+        self.conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name, season, total_rosters) VALUES (?, ?, '2025', ?)",
+                              [('L1', 'SKL One', 2), ('L2', 'SKL Two', 10), ('L3', 'SKL Three', 12)])
+        self.conn.executemany("INSERT INTO UserLeagueLinks (wallet_address, sleeper_league_id) VALUES ('w1', ?)", [('L1',), ('L2',)])
+        self.conn.executemany("""
+            INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, owner_id, team_name, wins, losses, ties)
+            VALUES (?, ?, ?, ?, ?, 1, 0)
+        """, [('1', 'L1', 'u2', 'Alphas', 4), ('2', 'L1', 'u1', 'Zetas', 2), ('1', 'L3', 'u1', 'Elsewhere', 0)])
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def test_one_query_returns_every_league_with_its_teams(self):
+        """Leagues come back grouped, the user's team first, in a single SELECT."""
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        leagues = get_user_leagues_with_teams(self.conn.cursor(), 'w1', 'u1')
+        self.conn.set_trace_callback(None)
+
+        assert len(statements) == 1
+        assert [(l['league_id'], l['total_rosters']) for l in leagues] == [('L1', 2), ('L2', 10)]
+        assert [(t['team_name'], t['manager_name'], t['record']) for t in leagues[0]['teams']] == [
+            ('Zetas', 'Me', '2-1-0'), ('Alphas', 'rival', '4-1-0')]
+        assert leagues[1]['teams'] == []
+
+    def test_total_rosters_is_backfilled_from_settings(self):
+        """Databases created before the column get it filled from the stored settings JSON."""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE LeagueMetadata (sleeper_league_id TEXT PRIMARY KEY, name TEXT, season TEXT, status TEXT, settings TEXT)")
+        conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name, season, settings) VALUES (?, 'SKL', '2025', ?)",
+                         [('L1', json.dumps({'total_rosters': 12})), ('L2', None)])
+        init_db(conn)
+        assert dict(conn.execute("SELECT sleeper_league_id, total_rosters FROM LeagueMetadata")) == {'L1': 12, 'L2': None}
+        conn.close()
@@ -0,0 +1,124 @@
+"""
+Test cases for the raw-payload archive and the offline rebuild of derived league tables.
+"""
+import copy
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from league_rebuild import rebuild_league, season_details_from_nfl_state
+from payload_archive import PayloadArchive
+from sleeper_service import SleeperService
+
+NFL_STATE = {'season': '2025', 'week': 1, 'season_type': 'pre', 'season_start_date': '2099-09-04'}
+RESPONSES = {
+    '/state/nfl': NFL_STATE,
+    '/league/L1': {'league_id': 'L1', 'name': 'SKL Test', 'season': '2025', 'status': 'pre_draft',
+                   'settings': {'total_rosters': 2}},
+    '/league/L1/users': [{'user_id': 'u1', 'username': 'user1', 'display_name': 'One', 'is_owner': True},
+                         {'user_id': 'u2', 'username': 'user2', 'display_name': 'Two', 'metadata': {'team_name': 'Twos'}}],
+    '/league/L1/rosters': [{'roster_id': 1, 'owner_id': 'u1', 'players': ['p1', 'p2'], 'settings': {'wins': 0}},
+                           {'roster_id': 2, 'owner_id': 'u2', 'players': ['p3'], 'settings': {'wins': 0}}],
+    '/league/L1/transactions/1': [{'transaction_id': 'T1', 'type': 'free_agent', 'status': 'complete', 'leg': 1,
+                                   'roster_ids': [1], 'adds': {'p2': 1}}],
+    '/league/L1/drafts': [{'draft_id': 'D1', 'type': 'auction', 'status': 'complete', 'season': '2025'}],
+    '/draft/D1/picks': [{'player_id': 'p1', 'roster_id': 1, 'pick_no': 1, 'metadata': {'amount': '40'}},
+                        {'player_id': 'p3', 'roster_id': 2, 'pick_no': 2, 'metadata': {'amount': '20'}}],
+}
+
+
+class FakeHttpClient:
+    """Serves canned Sleeper responses by path."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def get_json(self, path, cache=True):
+        if path not in self.responses:
+            raise requests.exceptions.HTTPError(f"404 for {path}")
+        return copy.deepcopy(self.responses[path])
+
+
+class TestLeagueRebuild:
+    """Test cases for archiving responses and replaying them into the derived tables."""
+
+    def setup_method(self):
+        """Set up a keeper database with a linked wallet and an empty payload archive."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.archive_path = os.path.join(self.tmpdir, 'keeper_payloads.db')
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        init_db(self.conn)
+        self.conn.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username) VALUES ('w', 'u1', 'user1')")
+        self.conn.commit()
+        self.archive = PayloadArchive(self.archive_path)
+        self.responses = copy.deepcopy(RESPONSES)
+        self.service = SleeperService(self.conn, http_client=FakeHttpClient(self.responses), payload_archive=self.archive)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.archive.close()
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _live_sync(self):
+        details = self.service.get_league('L1')
+        season_details = season_details_from_nfl_state(self.service.get_nfl_state(), date.today())
+        league_sync = self.service._fetch_league_sync_data('L1', details, '2025', season_details)
+        self.service._store_league_sync_data(self.conn.cursor(), 'w', 'L1', details, league_sync, season_details)
+        self.conn.commit()
+
+    def _derived_rows(self):
+        queries = {
+            'rosters': "SELECT sleeper_roster_id, owner_id, players FROM rosters ORDER BY sleeper_roster_id",
+            'transactions': "SELECT sleeper_transaction_id, type, week, raw_payload FROM transactions",
+            'drafts': "SELECT sleeper_draft_id, season, status FROM drafts",
+            'contracts': "SELECT player_id, team_id, draft_amount, contract_year, duration, is_active FROM contracts ORDER BY player_id",
+            'penalties': """SELECT c.player_id, p.penalty_year, p.penalty_amount FROM penalties p
+                            JOIN contracts c ON c.rowid = p.contract_id ORDER BY c.player_id, p.penalty_year""",
+        }
+        return {table: [tuple(row) for row in self.conn.execute(sql)] for table, sql in queries.items()}
+
+    def test_archive_stores_each_payload_once_and_serves_by_time(self):
+        """Identical responses share one body; latest() honours the before bound; the player catalog is skipped."""
+        self.archive.record('/state/nfl', {'week': 1}, fetched_at='2025-09-01T00:00:00.000000')
+        self.archive.record('/state/nfl', {'week': 1}, fetched_at='2025-09-02T00:00:00.000000')
+        self.archive.record('/state/nfl', {'week': 2}, fetched_at='2025-09-09T00:00:00.000000')
+        self.responses['/players/nfl'] = {'p1': {}}
+        self.service.get_players()
+
+        assert self.archive.stats()['fetches'] == 3 and self.archive.stats()['payloads'] == 2
+        assert self.archive.latest('/state/nfl') == {'week': 2}
+        assert self.archive.latest('/state/nfl', before='2025-09-09T00:00:00.000000') == {'week': 1}
+        assert self.archive.latest('/state/nfl', before='2025-09-01T00:00:00.000000') is None
+
+    def test_rebuild_reproduces_live_syncs(self):
+        """Wiped or corrupted derived rows come back exactly as two live syncs left them, without the network."""
+        self._live_sync()
+        self.conn.execute("UPDATE contracts SET duration = 3 WHERE player_id = 'p1'")  # Chosen by the manager
+        self.conn.commit()
+        self.responses['/league/L1/rosters'][0]['players'] = ['p2']  # p1 dropped: penalties on the 3-year contract
+        self._live_sync()
+        expected = self._derived_rows()
+        assert [row[0] for row in expected['penalties']] == ['p1'] * 3
+
+        self.conn.execute("DELETE FROM penalties")
+        self.conn.execute("DELETE FROM draft_picks")
+        self.conn.execute("UPDATE rosters SET players = '[]'")
+        self.conn.execute("UPDATE transactions SET type = 'corrupt'")
+        self.conn.commit()
+
+        result = rebuild_league(self.db_path, self.archive_path, 'L1')
+        assert result['syncs'] == 2 and result['rows']['penalties'] == 3
+        assert self._derived_rows() == expected
+        assert rebuild_league(self.db_path, self.archive_path, 'L2') == {'league_id': 'L2', 'skipped': 'no archived syncs'}
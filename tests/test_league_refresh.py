@@ -0,0 +1,139 @@
+"""
+Test cases for the activity-aware league refresh schedule, its call budget and scoped refreshes.
+"""
+import copy
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from league_refresh import LeagueRefreshScheduler, activity_window, due_tasks, league_cadence, plan_refreshes, refresh_plan
+from sleeper_service import SleeperService
+
+REGULAR_WEEK_5 = {'season': '2025', 'week': 5, 'season_type': 'regular', 'season_start_date': '2025-09-04'}
+TUESDAY_NOON_ET = datetime(2025, 10, 7, 16, 0, 0)  # UTC; a 'week' window
+
+RESPONSES = {
+    '/state/nfl': REGULAR_WEEK_5,
+    '/league/L1': {'league_id': 'L1', 'name': 'SKL Test', 'season': '2025', 'status': 'in_season',
+                   'settings': {'total_rosters': 2}},
+    '/league/L1/users': [{'user_id': 'u1', 'username': 'user1', 'display_name': 'One', 'is_owner': True},
+                         {'user_id': 'u2', 'username': 'user2', 'display_name': 'Two'}],
+    '/league/L1/rosters': [{'roster_id': 1, 'owner_id': 'u1', 'players': ['p1', 'p2'], 'settings': {'wins': 3}},
+                           {'roster_id': 2, 'owner_id': 'u2', 'players': ['p3'], 'settings': {'wins': 1}}],
+    '/league/L1/transactions/5': [{'transaction_id': 'T5', 'type': 'free_agent', 'status': 'complete', 'leg': 5,
+                                   'roster_ids': [2], 'adds': {'p3': 2}, 'drops': None}],
+}
+
+
+class FakeHttpClient:
+    """Serves canned Sleeper responses by path and records the paths requested."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.paths = []
+
+    def get_json(self, path, cache=True):
+        self.paths.append(path)
+        if path not in self.responses:
+            raise requests.exceptions.HTTPError(f"404 for {path}")
+        return copy.deepcopy(self.responses[path])
+
+
+class TestLeagueRefresh:
+    """Test cases for cadences by league state and time, the bounded task stream and refresh cycles."""
+
+    def setup_method(self):
+        """Set up an in-season NFL week with SKL leagues in season (L1, linked), complete (L2) and drafting (L3)."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        init_db(self.conn)
+        self.conn.execute("INSERT INTO season_curr (current_year, IsOffSeason) VALUES (2025, 0)")
+        self.conn.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username) VALUES ('w', 'u1', 'user1')")
+        self.conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name, season, status) VALUES (?, ?, '2025', ?)",
+                              [('L1', 'SKL Test', 'in_season'), ('L2', 'SKL Done', 'complete'),
+                               ('L3', 'SKL Late', 'drafting'), ('L4', 'Other League', 'in_season')])
+        self.conn.execute("INSERT INTO UserLeagueLinks (wallet_address, sleeper_league_id) VALUES ('w', 'L1')")
+        self.conn.commit()
+        self.http = FakeHttpClient(RESPONSES)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_cadence_follows_league_state_and_nfl_week(self):
+        """Game days and waiver mornings refresh in-season leagues more often; complete leagues never."""
+        sunday_afternoon = datetime(2025, 10, 5, 18, 0, 0)  # 14:00 EDT
+        wednesday_morning = datetime(2025, 10, 8, 10, 0, 0)  # 06:00 EDT
+        saturday_afternoon = datetime(2025, 12, 20, 20, 0, 0)  # 15:00 EST
+        assert activity_window(sunday_afternoon, REGULAR_WEEK_5) == 'game'
+        assert activity_window(wednesday_morning, REGULAR_WEEK_5) == 'waivers'
+        assert activity_window(TUESDAY_NOON_ET, REGULAR_WEEK_5) == 'week'
+        assert activity_window(saturday_afternoon, REGULAR_WEEK_5) == 'week'
+        assert activity_window(saturday_afternoon, dict(REGULAR_WEEK_5, week=16)) == 'game'
+        assert activity_window(sunday_afternoon, dict(REGULAR_WEEK_5, season_type='post')) == 'week'
+
+        assert league_cadence('complete', False, REGULAR_WEEK_5, sunday_afternoon) == ('complete', ())
+        assert league_cadence('drafting', True, None, sunday_afternoon) == ('drafting', (('full', 900),))
+        assert league_cadence('in_season', True, None, sunday_afternoon) == ('offseason', (('full', 86400),))
+        reason, cadences = league_cadence('in_season', False, REGULAR_WEEK_5, wednesday_morning)
+        assert reason == 'waivers' and dict(cadences) == {'moves': 300, 'scores': 21600, 'full': 86400}
+
+    def test_due_tasks_are_bounded_by_calls_and_count(self):
+        """The plan covers every SKL league's scopes; the stream stops at the first task over the budget."""
+        self.conn.execute("INSERT INTO league_refresh_schedule (sleeper_league_id, scope, last_run_at) VALUES ('L1', 'full', ?)",
+                          ((TUESDAY_NOON_ET - timedelta(hours=3)).isoformat(),))
+        self.conn.commit()
+        plan, idle = plan_refreshes(self.conn.cursor(), REGULAR_WEEK_5, TUESDAY_NOON_ET)
+
+        assert idle == [{'league_id': 'L2', 'status': 'complete'}]
+        # The full sync 3 hours ago covers moves (every 2 hours) but not yet scores (every 6)
+        assert [(task['league_id'], task['scope'], task['due']) for task in plan] == [
+            ('L1', 'moves', True), ('L3', 'full', True), ('L1', 'scores', False), ('L1', 'full', False)]
+        assert plan[0]['next_run_at'] == '2025-10-07T15:00:00'
+        assert [task['scope'] for task in due_tasks(plan, 100, max_tasks=1)] == ['moves']
+        assert [task['scope'] for task in due_tasks(plan, 4 + 3, max_tasks=10)] == ['moves']
+        assert [task['league_id'] for task in due_tasks(plan, 100, max_tasks=10)] == ['L1', 'L3']
+
+    def test_cycle_runs_scoped_refreshes_within_budget(self):
+        """A cycle spends at most the carried budget, counts real calls and stores what scoped refreshes fetch."""
+        reader = sqlite3.connect(self.db_path)
+        reader.row_factory = sqlite3.Row
+        scheduler = LeagueRefreshScheduler(self.db_path, lambda http: SleeperService(reader, http_client=http),
+                                           interval=60, call_budget=108, http_client=self.http)
+        try:
+            # 108 calls/hour carries at most 18: /state/nfl, then L1 moves and scores fit and its full sync does not
+            result = scheduler.run_once(now=TUESDAY_NOON_ET)
+            assert (result['tasks'], result['synced'], result['deferred']) == (2, 2, 2)
+            assert result['calls'] == len(self.http.paths) and result['budget_remaining'] == 18 - result['calls']
+            assert '/league/L1/transactions/5' in self.http.paths and '/league/L1/matchups/4' in self.http.paths
+            assert scheduler.run_once() is None  # Another cycle within the interval
+
+            rows = self.conn.execute("SELECT scope, calls, last_status FROM league_refresh_schedule ORDER BY scope").fetchall()
+            assert [(scope, status) for scope, _, status in rows] == [('moves', 'synced'), ('scores', 'synced')]
+            assert sum(calls for _, calls, _ in rows) == result['calls'] - 1
+            assert self.conn.execute("SELECT COUNT(*) FROM rosters WHERE sleeper_league_id = 'L1'").fetchone()[0] == 2
+            assert self.conn.execute("SELECT COUNT(*) FROM transactions WHERE league_id = 'L1'").fetchone()[0] == 1
+
+            plan = refresh_plan(self.conn, 108, now=TUESDAY_NOON_ET + timedelta(minutes=10))
+            assert plan['window'] == 'week' and plan['last_cycle']['nfl_state']['week'] == 5
+            assert [(task['league_id'], task['scope']) for task in plan['planned'] if task['due']] == [('L1', 'full'), ('L3', 'full')]
+
+            self.http.paths.clear()
+            scheduler.call_budget = 216  # Room for both full syncs (10 calls each) after ten minutes
+            result = scheduler.run_once(force=True, now=TUESDAY_NOON_ET + timedelta(minutes=10))
+            assert (result['tasks'], result['synced'], result['skipped']) == (2, 1, 1)  # L3 has no linked wallet
+            assert '/league/L1/transactions/1' in self.http.paths and '/league/L3' not in self.http.paths
+        finally:
+            reader.close()
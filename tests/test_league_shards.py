@@ -0,0 +1,144 @@
+"""
+Test cases for splitting the league tables into shard files and writing leagues per shard.
+"""
+import copy
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from cache_versions import get_cache_version, league_cache_key
+from db_writer import DatabaseWriter
+from league_rebuild import season_details_from_nfl_state
+from league_shards import (SHARD_ID_SPAN, attach_core, attach_shards, connect_core, connect_league_db,
+                           shard_index, shard_path, split_database)
+from sleeper_service import SleeperService
+
+RESPONSES = {
+    '/state/nfl': {'season': '2025', 'week': 1, 'season_type': 'pre', 'season_start_date': '2099-09-04'},
+    '/league/L1': {'league_id': 'L1', 'name': 'SKL Test', 'season': '2025', 'status': 'pre_draft',
+                   'settings': {'total_rosters': 2}},
+    '/league/L1/users': [{'user_id': 'u1', 'username': 'user1', 'display_name': 'One', 'is_owner': True},
+                         {'user_id': 'u2', 'username': 'user2', 'display_name': 'Two'}],
+    '/league/L1/rosters': [{'roster_id': 1, 'owner_id': 'u1', 'players': ['p1', 'p2'], 'settings': {'wins': 0}},
+                           {'roster_id': 2, 'owner_id': 'u2', 'players': ['p3'], 'settings': {'wins': 0}}],
+    '/league/L1/drafts': [{'draft_id': 'D1', 'type': 'auction', 'status': 'complete', 'season': '2025'}],
+    '/draft/D1/picks': [{'player_id': 'p1', 'roster_id': 1, 'pick_no': 1, 'metadata': {'amount': '40'}},
+                        {'player_id': 'p3', 'roster_id': 2, 'pick_no': 2, 'metadata': {'amount': '20'}}],
+}
+
+
+class FakeHttpClient:
+    """Serves canned Sleeper responses by path."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def get_json(self, path, cache=True):
+        if path not in self.responses:
+            raise requests.exceptions.HTTPError(f"404 for {path}")
+        return copy.deepcopy(self.responses[path])
+
+
+class TestLeagueShards:
+    """Test cases for the split, the routing of league rows and parallel shard commits."""
+
+    def setup_method(self):
+        """Sync league L1 (shard 0 of 2) into a single-file database and add league L4 (shard 1)."""
+        assert (shard_index('L1', 2), shard_index('L4', 2)) == (0, 1)
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        init_db(conn)
+        conn.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username) VALUES ('w', 'u1', 'user1')")
+        conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L4', 'SKL Other', '2025')")
+        conn.execute("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id) VALUES ('1', 'L4'), ('2', 'L4')")
+        self.responses = copy.deepcopy(RESPONSES)
+        self.http = FakeHttpClient(self.responses)
+        self._sync(SleeperService(conn, http_client=self.http), lambda service, *args: service._store_league_sync_data(conn.cursor(), *args))
+        conn.commit()
+        conn.close()
+        self.writers = []
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        for writer in self.writers:
+            writer.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _sync(self, service, store):
+        details = service.get_league('L1')
+        season_details = season_details_from_nfl_state(service.get_nfl_state(), date.today())
+        league_sync = service._fetch_league_sync_data('L1', details, '2025', season_details)
+        store(service, 'w', 'L1', details, league_sync, season_details)
+
+    def _count(self, path, sql):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute(sql).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_split_routes_rows_by_league(self):
+        """Rows move to their league's shard, reads see every shard, and new IDs stay unique."""
+        result = split_database(self.db_path, 2)
+        assert result['rows']['rosters'] == [2, 2] and result['rows']['contracts'] == [2, 0]
+        assert self._count(self.db_path, "SELECT COUNT(*) FROM rosters") == 0
+        assert self._count(shard_path(self.db_path, 1), "SELECT COUNT(*) FROM rosters WHERE sleeper_league_id = 'L4'") == 2
+
+        core = connect_core(self.db_path)
+        try:
+            assert core.execute("SELECT COUNT(*) FROM rosters").fetchone()[0] == 4
+            assert core.execute("SELECT COUNT(*) FROM rosters r JOIN LeagueMetadata lm USING (sleeper_league_id)").fetchone()[0] == 4
+            with pytest.raises(sqlite3.IntegrityError, match='stored in the league shards'):
+                core.execute("INSERT INTO main.rosters (sleeper_roster_id, sleeper_league_id) VALUES ('3', 'L4')")
+        finally:
+            core.close()
+
+        trade_ids = []
+        for league_id in ('L1', 'L4'):
+            conn = connect_league_db(self.db_path, league_id)
+            conn.execute("INSERT INTO trades (sleeper_league_id, initiator_team_id, recipient_team_id) VALUES (?, '1', '2')", (league_id,))
+            trade_ids.append(conn.execute("SELECT MAX(trade_id) FROM trades").fetchone()[0])
+            conn.commit()
+            conn.close()
+        assert trade_ids == [SHARD_ID_SPAN + 1, 2 * SHARD_ID_SPAN + 1]
+        with pytest.raises(ValueError, match='already sharded'):
+            split_database(self.db_path, 2)
+
+    def test_sharded_sync_commits_while_other_shard_is_locked(self):
+        """A league sync writes its shard and the core while another shard holds its write lock."""
+        split_database(self.db_path, 2)
+        core_writer = DatabaseWriter(self.db_path, on_connect=lambda conn: attach_shards(conn, self.db_path, 2))
+        league_writer = DatabaseWriter(shard_path(self.db_path, 0),
+                                       on_connect=lambda conn: attach_core(conn, self.db_path, read_only=True))
+        self.writers += [core_writer, league_writer]
+        reader = connect_core(self.db_path)
+        reader.row_factory = sqlite3.Row
+        service = SleeperService(reader, http_client=self.http, writer=core_writer, league_writer=lambda league_id: league_writer)
+
+        blocker = sqlite3.connect(shard_path(self.db_path, 1), isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        try:
+            self.responses['/league/L1/rosters'][0]['players'] = ['p2']  # p1 dropped: penalty on its contract
+            self._sync(service, lambda svc, *args: svc._store_sharded_league_sync(league_writer, *args))
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+
+        assert self._count(shard_path(self.db_path, 0), "SELECT COUNT(*) FROM penalties") == 1
+        assert reader.execute("SELECT players FROM rosters WHERE sleeper_league_id = 'L1' AND sleeper_roster_id = '1'").fetchone()[0] == '["p2"]'
+        assert get_cache_version(reader.cursor(), league_cache_key('L1')) == 2  # Initial sync and this one
+        assert reader.execute("SELECT COUNT(*) FROM vw_contractByYear").fetchone()[0] == 0  # No players rows
+        reader.close()
@@ -0,0 +1,114 @@
+"""
+Test cases for the pre-aggregated, keyset-paginated admin league index.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from league_summary import list_league_summaries, refresh_league_summary
+from migrations.run_migration import apply_migration
+
+
+
+class TestLeagueSummary:
+    """Test cases for summary maintenance and admin league paging."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database with SKL leagues over two seasons."""
+        self.conn = sqlite3.connect(':memory:')
+        init_db(self.conn)
+        apply_migration(self.conn, '001_add_admin_tables.sql')
+        leagues = [(f'L{i}', f'SKL League {i % 4}', '2025' if i < 6 else '2024', 'in_season' if i % 2 else 'complete')
+                   for i in range(10)]
+        leagues.append(('OTHER', 'Friends League', '2025', 'in_season'))
+        self.conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name, season, status) VALUES (?, ?, ?, ?)", leagues)
+        self.conn.executemany("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id) VALUES (?, 'L1')",
+                              [(str(r),) for r in range(1, 11)])
+        # Fees for two seasons used to duplicate the league in the index
+        self.conn.executemany("INSERT INTO LeagueFees (sleeper_league_id, season_year, fee_amount) VALUES ('L1', ?, ?)",
+                              [(2024, 5.0), (2025, 10.0)])
+        self.conn.execute("""
+            INSERT INTO FeeSchedules (schedule_id, sleeper_league_id, season_year, due_date, collection_status)
+            VALUES ('S1', 'L1', 2025, '2025-09-01', 'collecting')
+        """)
+        # Not counted as paid until the payment verifier confirms it
+        self.conn.execute("""
+            INSERT INTO LeaguePayments (sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id, verification_status)
+            VALUES ('L1', 2025, '0xpending', 10.0, 'FLOW', 'tx0', 'pending')
+        """)
+        self.conn.commit()
+        apply_migration(self.conn, '004_add_league_admin_summary.sql')
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def test_backfill_and_refresh_keep_one_row_per_league(self):
+        """The migration backfills SKL leagues; a payment refresh updates the payer count."""
+        cursor = self.conn.cursor()
+        rows, _ = list_league_summaries(cursor, season='2025', collection_status='collecting')
+        assert [(r['sleeper_league_id'], r['fee_amount'], r['total_teams'], r['teams_paid']) for r in rows] == [('L1', 10.0, 10, 0)]
+        assert self.conn.execute("SELECT COUNT(*) FROM LeagueAdminSummary").fetchone()[0] == 10
+
+        self.conn.execute("""
+            INSERT INTO LeaguePayments (sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id)
+            VALUES ('L1', 2025, '0xabc', 10.0, 'FLOW', 'tx1')
+        """)
+        assert refresh_league_summary(cursor, 'L1') == 1
+        assert refresh_league_summary(cursor, 'OTHER') == 0
+        rows, _ = list_league_summaries(cursor, season='2025', status='in_season', limit=1)
+        assert (rows[0]['sleeper_league_id'], rows[0]['teams_paid']) == ('L1', 1)
+
+    def test_keyset_pages_cover_every_league_once_in_order(self):
+        """Following next_cursor walks the index newest season first, then by name and id."""
+        cursor = self.conn.cursor()
+        seen, after = [], None
+        while True:
+            rows, after = list_league_summaries(cursor, after=after, limit=3)
+            seen.extend((r['season'], r['name'], r['sleeper_league_id']) for r in rows)
+            if after is None:
+                break
+        assert len(seen) == 10 and len(set(seen)) == 10
+        assert seen == sorted(seen, key=lambda k: (-int(k[0]), k[1], k[2]))
+
+        with pytest.raises(ValueError):
+            list_league_summaries(cursor, after='not-a-cursor')
+
+    def test_keyset_pages_reach_leagues_without_a_season(self):
+        """Leagues with a NULL season sort last and are reached whether or not a page ends on the last season."""
+        self.conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name) VALUES (?, ?)",
+                              [('N1', 'SKL Unscheduled B'), ('N2', 'SKL Unscheduled A')])
+        cursor = self.conn.cursor()
+        refresh_league_summary(cursor)
+        for limit in (3, 5):
+            seen, after = [], None
+            while True:
+                rows, after = list_league_summaries(cursor, after=after, limit=limit)
+                seen.extend(r['sleeper_league_id'] for r in rows)
+                if after is None:
+                    break
+            assert len(seen) == 12 and len(set(seen)) == 12
+            assert seen[-2:] == ['N2', 'N1']
+
+    def test_init_db_creates_and_backfills_the_summary(self):
+        """init_db sets up the summary on its own, before migration 001 adds the fee schedules."""
+        conn = sqlite3.connect(':memory:')
+        init_db(conn)
+        conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L1', 'SKL One', '2025')")
+        conn.execute("INSERT INTO LeagueFees (sleeper_league_id, season_year, fee_amount, automated) VALUES ('L1', 2025, 10.0, 1)")
+        assert refresh_league_summary(conn.cursor(), 'L1') == 1
+        conn.commit()
+        rows, _ = list_league_summaries(conn.cursor())
+        assert [(r['sleeper_league_id'], r['fee_amount'], r['automated'], r['collection_status']) for r in rows] == [('L1', 10.0, 1, None)]
+
+        # A database from before the summary table is backfilled on the next start
+        conn.execute("DROP TABLE LeagueAdminSummary")
+        init_db(conn)
+        assert [r['sleeper_league_id'] for r in list_league_summaries(conn.cursor())[0]] == ['L1']
+        conn.close()
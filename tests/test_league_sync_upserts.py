@@ -0,0 +1,92 @@
+"""
+Test cases for the payload-hash skipping, batched upserts of the league sync.
+"""
+import copy
+import os
+import sqlite3
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from payloads import payload_hash
+from sleeper_service import SleeperService
+
+LEAGUE = {'league_id': 'L1', 'name': 'SKL Test', 'season': '2025', 'status': 'in_season', 'settings': {'total_rosters': 2}}
+SEASON_DETAILS = {'current_year': 2025, 'is_offseason': False}
+STALE = '2000-01-01 00:00:00'
+
+
+class TestLeagueSyncUpserts:
+    """Test cases for skipping unchanged rosters, transactions and participants."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database with a linked wallet and one league sync payload."""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        init_db(self.conn)
+        self.conn.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username) VALUES ('w', 'u1', 'user1')")
+        self.conn.commit()
+        self.service = SleeperService(self.conn)
+        self.league_sync = {
+            'season': '2025',
+            'users': [{'user_id': 'u1', 'username': 'user1', 'display_name': 'One', 'is_owner': True},
+                      {'user_id': 'u2', 'username': 'user2', 'display_name': 'Two', 'metadata': {'team_name': 'Twos'}}],
+            'rosters': [{'roster_id': r, 'owner_id': f'u{r}', 'players': [str(r)], 'settings': {'wins': r, 'fpts': 90.5}}
+                        for r in (1, 2)],
+            'transactions': [{'transaction_id': f'T{i}', 'type': 'free_agent', 'status': 'complete', 'adds': {str(i): 1}}
+                             for i in (1, 2)],
+            'matchups': {},
+            'draft_skip_reason': 'in season',
+            'drafts': [],
+            'draft_picks': {},
+        }
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def _sync(self, league_sync):
+        self.service._store_league_sync_data(self.conn.cursor(), 'w', 'L1', LEAGUE, league_sync, SEASON_DETAILS)
+        self.conn.commit()
+
+    def _age_rows(self):
+        for table in ('rosters', 'transactions', 'Users', 'UserLeagueLinks'):
+            self.conn.execute(f"UPDATE {table} SET updated_at = ?", (STALE,))
+        self.conn.commit()
+
+    def _fresh(self, table, key):
+        return sorted(row[0] for row in self.conn.execute(f"SELECT {key} FROM {table} WHERE updated_at != ?", (STALE,)))
+
+    def test_unchanged_payloads_are_not_rewritten(self):
+        """A second sync of the same payloads leaves every row untouched and stores hashes."""
+        self._sync(self.league_sync)
+        assert self.conn.execute("SELECT is_commissioner FROM UserLeagueLinks WHERE wallet_address = 'w'").fetchone()[0] == 1
+        stored = self.conn.execute("SELECT payload_hash FROM transactions WHERE sleeper_transaction_id = 'T1'").fetchone()[0]
+        assert stored == payload_hash(self.league_sync['transactions'][0])
+        assert self.conn.execute("SELECT COUNT(*) FROM rosters WHERE payload_hash IS NULL").fetchone()[0] == 0
+
+        self._age_rows()
+        self._sync(copy.deepcopy(self.league_sync))
+        for table, key in (('rosters', 'sleeper_roster_id'), ('transactions', 'sleeper_transaction_id'),
+                           ('Users', 'sleeper_user_id'), ('UserLeagueLinks', 'wallet_address')):
+            assert self._fresh(table, key) == []
+
+    def test_only_changed_objects_are_written(self):
+        """Changed rosters, transactions and profiles are upserted; the rest keep their rows."""
+        self._sync(self.league_sync)
+        self._age_rows()
+
+        changed = copy.deepcopy(self.league_sync)
+        changed['rosters'][1]['settings']['wins'] = 9
+        changed['transactions'][0]['status'] = 'failed'
+        changed['transactions'].append({'transaction_id': 'T3', 'type': 'trade', 'status': 'complete'})
+        changed['users'][1]['display_name'] = 'Two Renamed'
+        self._sync(changed)
+
+        assert self._fresh('rosters', 'sleeper_roster_id') == ['2']
+        assert self._fresh('transactions', 'sleeper_transaction_id') == ['T1', 'T3']
+        assert self._fresh('Users', 'sleeper_user_id') == ['u2']
+        assert self.conn.execute("SELECT wins FROM rosters WHERE sleeper_roster_id = '2'").fetchone()[0] == 9
+        assert self.conn.execute("SELECT status FROM transactions WHERE sleeper_transaction_id = 'T1'").fetchone()[0] == 'failed'
@@ -0,0 +1,101 @@
+"""
+Test cases for matchup ingestion and SQL-computed standings.
+"""
+import json
+import sqlite3
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from matchups import StandingsCache, apply_standings, compute_league_standings, last_completed_week, store_week_matchups
+from sleeper_service import SleeperService
+
+# Week -> [(roster_id, matchup_id, points)]
+WEEKS = {
+    1: [(1, 1, 120.0), (2, 1, 100.0), (3, 2, 90.0), (4, 2, 80.0)],
+    2: [(1, 1, 95.0), (3, 1, 110.0), (2, 2, 130.0), (4, 2, 70.0)],
+    3: [(1, 1, 105.0), (2, 1, 88.0), (3, 2, 85.0), (4, 2, 99.0)],
+}
+
+
+def sleeper_week(week):
+    return [{'roster_id': r, 'matchup_id': m, 'points': p, 'starters': [f'p{r}']} for r, m, p in WEEKS[week]]
+
+
+class FakeSleeperClient:
+    def __init__(self):
+        self.paths = []
+
+    def get_json(self, path, cache=True):
+        self.paths.append(path)
+        return sleeper_week(int(path.rsplit('/', 1)[1]))
+
+
+class TestMatchups:
+    """Test cases for incremental matchup sync and standings extras."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database with a four-team league."""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        init_db(self.conn)
+        self.conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season, settings) VALUES ('L1', 'SKL Test', '2025', ?)",
+                          (json.dumps({'playoff_week_start': 15}),))
+        self.conn.executemany("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, team_name) VALUES (?, 'L1', ?)",
+                              [(str(r), f'Team {r}') for r in range(1, 5)])
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def test_sync_fetches_only_missing_and_latest_weeks(self):
+        """Completed weeks are fetched once; the latest completed week is re-fetched for stat corrections."""
+        client = FakeSleeperClient()
+        service = SleeperService(self.conn, http_client=client)
+        nfl_state = {'season': '2025', 'season_type': 'regular', 'week': 3}
+        assert service.sync_league_matchups('L1', '2025', nfl_state) == 2
+
+        nfl_state['week'] = 4
+        assert service.sync_league_matchups('L1', '2025', nfl_state) == 1
+        assert client.paths == ['/league/L1/matchups/1', '/league/L1/matchups/2', '/league/L1/matchups/3']
+        assert self.conn.execute("SELECT COUNT(*) FROM matchups").fetchone()[0] == 12
+
+        assert last_completed_week({'season': '2025', 'season_type': 'pre', 'week': 1}, '2025') == 0
+        assert last_completed_week({'season': '2026', 'season_type': 'regular', 'week': 2}, '2025') == 18
+        assert last_completed_week(None, '2025') == 0
+
+    def test_standings_extras_and_head_to_head_tiebreak(self):
+        """Points against, streaks, median records and head-to-head ordering come from SQL."""
+        cursor = self.conn.cursor()
+        for week in WEEKS:
+            store_week_matchups(cursor, 'L1', week, sleeper_week(week))
+        standings = {row['roster_id']: row for row in compute_league_standings(cursor, 'L1')}
+
+        # Rosters 1 and 3 are both 2-1; roster 3 beat roster 1 in week 2, so it ranks first despite fewer points
+        assert standings['3']['rank'] == 1 and standings['1']['rank'] == 2
+        assert (standings['3']['h2h_wins'], standings['1']['h2h_losses']) == (1, 1)
+        assert standings['1']['points_against'] == 298.0
+        assert standings['1']['streak'] == 'W1'
+        assert standings['3']['streak'] == 'L1'
+        assert standings['4']['streak'] == 'W1'
+        # Week scores: roster 1 is in the top half in weeks 1 and 3
+        assert (standings['1']['median_wins'], standings['1']['median_losses']) == (2, 1)
+
+        entries = [{'roster_id': str(r), 'wins': 0} for r in range(1, 5)]
+        assert [e['roster_id'] for e in apply_standings(entries, list(standings.values()))] == ['3', '1', '2', '4']
+
+    def test_cache_follows_league_version_and_empty_league_keeps_order(self):
+        """Standings are reused within a version; with no matchups stored, entries are left alone."""
+        cursor = self.conn.cursor()
+        cache = StandingsCache()
+        empty = cache.get_standings(cursor, 'L1', 1)
+        entries = [{'roster_id': '4'}, {'roster_id': '1'}]
+        assert apply_standings(entries, empty) == [{'roster_id': '4'}, {'roster_id': '1'}]
+
+        store_week_matchups(cursor, 'L1', 1, sleeper_week(1))
+        assert cache.get_standings(cursor, 'L1', 1) is empty
+        assert cache.get_standings(cursor, 'L1', 2)[0]['roster_id'] == '1'
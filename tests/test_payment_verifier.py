@@ -0,0 +1,198 @@
+"""
+Test cases for the batched on-chain verification of league fee payments.
+"""
+import base64
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import create_app, init_db
+from flow_tx_tracker import FlowAccessClient
+from migrations.run_migration import apply_migration
+from payment_verifier import fee_payment_status, recompute_league_fees, run_verifier_cycle, token_transfers
+
+RECIPIENT = '0xdf978465ee6dcf32'
+TX_GOOD, TX_WRONG_RECIPIENT, TX_PENDING, TX_REVERTED = 'a' * 64, 'b' * 64, 'c' * 64, 'd' * 64
+
+
+def address(value):
+    return {'type': 'Optional', 'value': {'type': 'Address', 'value': value}}
+
+
+def flow_event(name, amount, field, account):
+    fields = [{'name': 'amount', 'value': {'type': 'UFix64', 'value': f'{amount:.8f}'}},
+              {'name': field, 'value': address(account)}]
+    event = {'type': 'Event', 'value': {'id': f'A.0ae53cb6e3f42a79.FlowToken.{name}', 'fields': fields}}
+    return {'type': f'A.0ae53cb6e3f42a79.FlowToken.{name}', 'event_index': '0',
+            'payload': base64.b64encode(json.dumps(event).encode()).decode()}
+
+
+def transfer(payer, recipient, amount):
+    return [flow_event('TokensWithdrawn', amount, 'from', payer), flow_event('TokensDeposited', amount, 'to', recipient),
+            flow_event('TokensWithdrawn', 0.001, 'from', payer), flow_event('TokensDeposited', 0.001, 'to', '0xf919ee77447b7497')]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeAccessSession:
+    """Emulator access node: two sealed transfers, one reverted transaction and one it does not know yet."""
+
+    def __init__(self):
+        self.checked = []
+
+    def get(self, url, timeout=None):
+        transaction_id = url.rsplit('/', 1)[1]
+        self.checked.append(transaction_id)
+        if transaction_id == TX_GOOD:
+            events = transfer('0xaaa', RECIPIENT, 10.0)
+        elif transaction_id == TX_WRONG_RECIPIENT:
+            events = transfer('0xbbb', '0x0000000000000001', 10.0)
+        elif transaction_id == TX_REVERTED:
+            return FakeResponse(200, {'status': 'Sealed', 'status_code': 1, 'error_message': 'panic', 'events': []})
+        else:
+            return FakeResponse(404, {'code': 404, 'message': 'not found'})
+        return FakeResponse(200, {'status': 'Sealed', 'status_code': 0, 'error_message': '', 'events': events})
+
+
+class TestPaymentVerifier:
+    """Test cases for batched verification and fee totals built from verified payments only."""
+
+    def setup_method(self):
+        """Set up a keeper database file with a 10 FLOW league fee and four recorded payments."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.conn = sqlite3.connect(os.path.join(self.tmpdir, 'keeper.db'))
+        init_db(self.conn)
+        apply_migration(self.conn, '001_add_admin_tables.sql')
+        self.conn.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L1', 'SKL One', '2025')")
+        self.conn.execute("INSERT INTO LeagueFees (sleeper_league_id, season_year, fee_amount, fee_currency) VALUES ('L1', 2025, 10.0, 'FLOW')")
+        self.conn.execute("""
+            INSERT INTO FeeSchedules (schedule_id, sleeper_league_id, season_year, due_date, collection_status)
+            VALUES ('S1', 'L1', 2025, '2025-09-01', 'collecting')
+        """)
+        wallets = ['0xaaa', '0xbbb', '0xccc']
+        self.conn.executemany("INSERT INTO Users (wallet_address) VALUES (?)", [(w,) for w in wallets])
+        self.conn.executemany("INSERT INTO UserLeagueLinks (wallet_address, sleeper_league_id) VALUES (?, 'L1')", [(w,) for w in wallets])
+        self.conn.executemany("""
+            INSERT INTO LeaguePayments (sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id, verification_status)
+            VALUES ('L1', 2025, ?, 10.0, 'FLOW', ?, 'pending')
+        """, [('0xaaa', TX_GOOD), ('0xbbb', TX_WRONG_RECIPIENT), ('0xccc', TX_PENDING), ('0xccc', TX_REVERTED)])
+        self.conn.commit()
+        self.client = FlowAccessClient(network='emulator')
+        self.client.session = FakeAccessSession()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _payments(self):
+        return dict(self.conn.execute("SELECT transaction_id, verification_status FROM LeaguePayments"))
+
+    def test_cycle_verifies_in_bulk_and_counts_only_verified_payments(self):
+        """One cycle checks every pending payment; only the matching transfer counts toward the fee."""
+        result = run_verifier_cycle(self.conn, self.client, RECIPIENT)
+        assert (result['checked'], result['verified'], result['rejected'], result['pending']) == (4, 1, 2, 1)
+        assert sorted(self.client.session.checked) == [TX_GOOD, TX_WRONG_RECIPIENT, TX_PENDING, TX_REVERTED]
+        assert self._payments() == {TX_GOOD: 'verified', TX_WRONG_RECIPIENT: 'rejected',
+                                    TX_PENDING: 'pending', TX_REVERTED: 'rejected'}
+        reason = self.conn.execute("SELECT rejection_reason FROM LeaguePayments WHERE transaction_id = ?",
+                                   (TX_WRONG_RECIPIENT,)).fetchone()[0]
+        assert reason.startswith(f'Recipient {RECIPIENT} received 0.0')
+
+        links = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT wallet_address, fee_paid_amount, fee_payment_status FROM UserLeagueLinks")}
+        assert links == {'0xaaa': (10.0, 'paid'), '0xbbb': (0.0, 'unpaid'), '0xccc': (0.0, 'unpaid')}
+        assert self.conn.execute("SELECT total_collected FROM FeeSchedules WHERE schedule_id = 'S1'").fetchone()[0] == 10.0
+        assert result['fully_paid'] == []
+
+        # The pending payment backs off; nothing else is due
+        assert run_verifier_cycle(self.conn, self.client, RECIPIENT)['checked'] == 0
+
+    def test_last_verified_payment_reports_league_fully_paid(self):
+        """The cycle that verifies the final team's fee names the league for the staking trigger."""
+        self.conn.execute("UPDATE LeaguePayments SET verification_status = 'verified' WHERE wallet_address IN ('0xbbb', '0xccc') AND transaction_id != ?",
+                          (TX_REVERTED,))
+        self.conn.execute("DELETE FROM LeaguePayments WHERE transaction_id = ?", (TX_REVERTED,))
+        self.conn.commit()
+        result = run_verifier_cycle(self.conn, self.client, RECIPIENT)
+        assert result['fully_paid'] == [('L1', 2025)]
+        assert self.conn.execute("SELECT total_collected FROM FeeSchedules").fetchone()[0] == 30.0
+
+    def test_payments_in_another_currency_never_count(self):
+        """A payment claimed in another currency than the league fee is rejected unchecked and left out of the sums."""
+        self.conn.execute("DELETE FROM LeaguePayments WHERE transaction_id != ?", (TX_GOOD,))
+        self.conn.execute("UPDATE LeaguePayments SET currency = 'USDF' WHERE transaction_id = ?", (TX_GOOD,))
+        self.conn.execute("""
+            INSERT INTO LeaguePayments (sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id)
+            VALUES ('L1', 2025, '0xbbb', 10.0, 'USDF', 'legacy')
+        """)
+        self.conn.commit()
+        result = run_verifier_cycle(self.conn, self.client, RECIPIENT)
+        assert (result['checked'], result['verified'], result['rejected']) == (1, 0, 1)
+        assert self.conn.execute("SELECT rejection_reason FROM LeaguePayments WHERE transaction_id = ?",
+                                 (TX_GOOD,)).fetchone()[0] == 'Paid in USDF, league fee is in FLOW'
+
+        self.conn.execute("INSERT INTO LeaguePayments (sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id) "
+                          "VALUES ('L1', 2025, '0xbbb', 4.0, 'FLOW', 'legacy2')")
+        recompute_league_fees(self.conn.cursor(), {('L1', 2025)})
+        assert self.conn.execute("SELECT fee_paid_amount FROM UserLeagueLinks WHERE wallet_address = '0xbbb'").fetchone()[0] == 4.0
+        assert self.conn.execute("SELECT total_collected FROM FeeSchedules").fetchone()[0] == 4.0
+
+    def test_legacy_rows_and_event_parsing(self):
+        """Rows inserted without a verification status count as verified; fee events are counted once."""
+        self.conn.execute("""
+            INSERT INTO LeaguePayments (sleeper_league_id, season_year, wallet_address, amount, currency, transaction_id)
+            VALUES ('L1', 2025, '0xaaa', 5.0, 'FLOW', 'legacy')
+        """)
+        assert self._payments()['legacy'] == 'verified'
+
+        events = [{'type': 'A.1.FlowToken.TokensDeposited', 'payload': {'amount': 2.0, 'to': RECIPIENT}},
+                  {'type': 'A.2.FungibleToken.Deposited', 'payload': {'amount': 2.0, 'to': RECIPIENT, 'type': 'A.1.FlowToken.Vault'}},
+                  {'type': 'A.2.FungibleToken.Deposited', 'payload': {'amount': 7.0, 'to': RECIPIENT, 'type': 'A.3.Other.Vault'}}]
+        assert token_transfers(events, 'FLOW') == ({}, {RECIPIENT: 2.0})
+        assert [fee_payment_status(p, 10.0) for p in (0.0, 4.0, 10.0)] == ['unpaid', 'partially_paid', 'paid']
+        assert fee_payment_status(0.0, 0.0) == 'paid'
+
+    def test_staking_runs_the_flow_cli_with_no_write_transaction_open(self, monkeypatch):
+        """The execution record commits before `flow transactions send` and the outcome after it."""
+        self.conn.execute("UPDATE UserLeagueLinks SET fee_payment_status = 'paid', fee_paid_amount = 10.0")
+        self.conn.commit()
+        db_path = os.path.join(self.tmpdir, 'keeper.db')
+        seen = []
+
+        def fake_run(args, **kwargs):
+            other = sqlite3.connect(db_path, timeout=0)
+            try:
+                other.execute("BEGIN IMMEDIATE")  # Fails if anything holds the write lock
+                seen.append(other.execute("SELECT status FROM AgentExecutions").fetchall())
+                other.rollback()
+            finally:
+                other.close()
+            return subprocess.CompletedProcess(args, 0, stdout=f"Transaction ID: {TX_GOOD}\n", stderr='')
+
+        monkeypatch.setattr(subprocess, 'run', fake_run)
+        test_app = create_app({'DATABASE_URL': db_path, 'TESTING': True})
+        resources = test_app.extensions['skl_resources']
+        try:
+            resources._stake_collected_fees('L1', 2025)
+        finally:
+            resources.close()
+        assert seen == [[('executing',)]]
+        assert self.conn.execute("SELECT status FROM AgentExecutions").fetchall() == [('completed',)]
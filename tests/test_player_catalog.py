@@ -0,0 +1,110 @@
+"""
+Test cases for player catalog versioning and the /players snapshot cache.
+"""
+import gzip
+import json
+import sqlite3
+import sys
+import os
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sleeper_service import SleeperService
+from player_catalog import PlayerCatalogCache, get_catalog_version, get_players_since
+from cache_versions import CACHE_VERSIONS_DDL
+
+
+SLEEPER_PLAYERS = {
+    '4046': {'full_name': 'Patrick Mahomes', 'position': 'QB', 'team': 'KC'},
+    '6794': {'full_name': 'Justin Jefferson', 'position': 'WR', 'team': 'MIN'},
+    '9999': {'full_name': 'Some Kicker', 'position': 'K', 'team': 'DAL'},
+}
+
+
+class TestPlayerCatalog:
+    """Test cases for catalog versions, deltas and precompressed snapshots."""
+
+    def setup_method(self):
+        """Set up an in-memory database with the players schema."""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('''
+            CREATE TABLE season_curr (
+                rowid INTEGER PRIMARY KEY,
+                current_year TEXT,
+                IsOffSeason INTEGER,
+                updated_at TEXT,
+                players_updated_at TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE players (
+                sleeper_player_id TEXT UNIQUE,
+                name TEXT,
+                position TEXT,
+                team TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                catalog_version INTEGER DEFAULT 0
+            )
+        ''')
+        self.conn.execute(CACHE_VERSIONS_DDL)
+        self.conn.commit()
+        self.sleeper_service = SleeperService(self.conn)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def _refresh(self, players):
+        with patch.object(self.sleeper_service, 'get_players', return_value=players):
+            self.conn.execute("UPDATE season_curr SET players_updated_at = NULL")
+            return self.sleeper_service.update_all_sleeper_players()
+
+    def test_refresh_only_stamps_changed_players(self):
+        """Unchanged players keep their version; changed and new players get the new one."""
+        first = self._refresh(SLEEPER_PLAYERS)
+        assert first['catalog_version'] == 1
+
+        changed = dict(SLEEPER_PLAYERS)
+        changed['6794'] = {'full_name': 'Justin Jefferson', 'position': 'WR', 'team': 'NYJ'}
+        changed['8000'] = {'full_name': 'New Rookie', 'position': 'RB', 'team': 'DET'}
+        second = self._refresh(changed)
+        assert second['catalog_version'] == 2
+
+        cursor = self.conn.cursor()
+        assert get_catalog_version(cursor) == 2
+        assert get_players_since(cursor, 1) == {'6794': 'Justin Jefferson', '8000': 'New Rookie'}
+        assert set(get_players_since(cursor, 0)) == {'4046', '6794', '8000'}
+
+    def test_snapshot_is_reused_until_catalog_changes(self):
+        """The snapshot and ETag stay fixed within a version and change after a refresh."""
+        self._refresh(SLEEPER_PLAYERS)
+        cache = PlayerCatalogCache()
+        snapshot = cache.get_snapshot(self.conn.cursor())
+        assert cache.get_snapshot(self.conn.cursor()) is snapshot
+
+        payload = json.loads(gzip.decompress(snapshot.encoded['gzip']))
+        assert payload == {'success': True, 'version': 1,
+                           'players': {'4046': 'Patrick Mahomes', '6794': 'Justin Jefferson'}}
+
+        changed = dict(SLEEPER_PLAYERS)
+        changed['4046'] = {'full_name': 'Patrick Mahomes II', 'position': 'QB', 'team': 'KC'}
+        self._refresh(changed)
+        rebuilt = cache.get_snapshot(self.conn.cursor())
+        assert rebuilt.version == 2
+        assert rebuilt.etag != snapshot.etag
+
+    def test_empty_catalog_and_encoding_negotiation(self):
+        """An empty catalog is version 0 and refused encodings fall back to identity."""
+        cursor = self.conn.cursor()
+        assert get_catalog_version(cursor) == 0
+        assert get_players_since(cursor, 5) == {}
+
+        snapshot = PlayerCatalogCache().get_snapshot(cursor)
+        assert snapshot.player_count == 0
+        assert snapshot.select_encoding(None) is None
+        assert snapshot.select_encoding('gzip;q=0, identity') is None
+        assert snapshot.select_encoding('deflate, gzip;q=0.5') == 'gzip'
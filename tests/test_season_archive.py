@@ -0,0 +1,102 @@
+"""
+Test cases for moving closed seasons into the attached archive database.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from season_archive import archive_season, attach_archive, closed_seasons, history_source, run_season_rollover
+
+
+class TestSeasonArchive:
+    """Test cases for the closed-season rules, the rollover and the all_<table> views."""
+
+    def setup_method(self):
+        """Set up a keeper database with a closed 2024 league and a live 2026 league."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.archive_path = os.path.join(self.tmpdir, 'keeper_archive.db')
+        self.conn = sqlite3.connect(os.path.join(self.tmpdir, 'keeper.db'))
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        init_db(self.conn)
+        self.conn.execute("DELETE FROM season_curr")
+        self.conn.execute("INSERT INTO season_curr (current_year, IsOffSeason) VALUES (2026, 0)")
+        self.conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES (?, 'SKL', ?)",
+                              [('1001', '2024'), ('1002', '2026')])
+        self.conn.executemany("INSERT INTO rosters (sleeper_roster_id, sleeper_league_id) VALUES (?, ?)",
+                              [('1', '1001'), ('2', '1001'), ('1', '1002'), ('2', '1002')])
+        self.conn.executemany("""
+            INSERT INTO contracts (rowid, player_id, team_id, sleeper_league_id, draft_amount, contract_year, duration)
+            VALUES (?, ?, '1', ?, 10, ?, ?)
+        """, [
+            (1, 'p_old', '1001', 2023, 2),       # Ended 2024: archived
+            (2, 'p_penalized', '1001', 2024, 1),  # Ended 2024, but a penalty still hits 2026
+            (3, 'p_running', '1001', 2024, 3),    # Runs through 2026
+            (4, 'p_new', '1002', 2026, 1),
+        ])
+        self.conn.executemany("INSERT INTO penalties (contract_id, penalty_year, penalty_amount) VALUES (?, ?, 5)",
+                              [(1, 2024), (2, 2026)])
+        self.conn.executemany("INSERT INTO transactions (sleeper_transaction_id, league_id, type, created_at) VALUES (?, ?, 'trade', ?)",
+                              [('t_old', '1001', '2024-10-01'), ('t_new', '1002', '2026-09-01')])
+        self.conn.executemany("INSERT INTO drafts (sleeper_draft_id, league_id, season) VALUES (?, ?, ?)",
+                              [('d_old', '1001', '2024'), ('d_new', '1002', '2026')])
+        self.conn.executemany("""
+            INSERT INTO trades (trade_id, sleeper_league_id, initiator_team_id, recipient_team_id, trade_status)
+            VALUES (?, '1001', '1', '2', ?)
+        """, [(1, 'completed'), (2, 'completed'), (3, 'pending')])
+        self.conn.executemany("""
+            INSERT INTO trade_items (trade_id, from_team_id, to_team_id, budget_amount, season_year, sleeper_league_id)
+            VALUES (?, '1', '2', 5, ?, '1001')
+        """, [(1, 2025), (2, 2027), (3, 2025)])
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _ids(self, sql):
+        return sorted(row[0] for row in self.conn.execute(sql))
+
+    def test_rollover_moves_only_closed_rows(self):
+        """Rows still affecting the current season stay live; the rest move and reappear in all_<table>."""
+        result = run_season_rollover(self.conn, self.archive_path)
+
+        assert result['current_season'] == 2026 and list(result['seasons']) == [2024]
+        assert self._ids("SELECT rowid FROM main.contracts") == [2, 3, 4]
+        assert self._ids("SELECT rowid FROM archive.contracts") == [1]
+        assert self._ids("SELECT contract_id FROM main.penalties") == [2]
+        assert self._ids("SELECT sleeper_transaction_id FROM main.transactions") == ['t_new']
+        assert self._ids("SELECT sleeper_draft_id FROM archive.drafts") == ['d_old']
+        assert self._ids("SELECT trade_id FROM main.trades") == [2, 3]  # Future budget and pending trades stay
+        assert self._ids("SELECT trade_id FROM archive.trade_items") == [1]
+
+        cursor = self.conn.cursor()
+        assert history_source(cursor, 'transactions') == 'all_transactions'
+        assert self._ids("SELECT sleeper_transaction_id FROM all_transactions") == ['t_new', 't_old']
+        assert self._ids("SELECT rowid FROM all_contracts") == [1, 2, 3, 4]
+
+        # Re-running finds the same closed season and moves nothing more
+        again = run_season_rollover(self.conn, self.archive_path)
+        assert set(again['seasons'][2024].values()) == {0}
+        assert self._ids("SELECT rowid FROM archive.contracts") == [1]
+
+    def test_copied_but_not_deleted_rows_are_finished_on_rerun(self):
+        """A season already copied into the archive is deleted from the live tables without duplicates."""
+        attach_archive(self.conn, self.archive_path)
+        self.conn.execute("INSERT INTO archive.transactions SELECT * FROM main.transactions WHERE sleeper_transaction_id = 't_old'")
+        self.conn.commit()
+
+        moved = archive_season(self.conn, 2024, 2026)
+        assert moved['transactions'] == 1
+        assert self._ids("SELECT sleeper_transaction_id FROM archive.transactions") == ['t_old']
+
+    def test_live_tables_only_without_archive(self):
+        """Without an attached archive, history reads fall back to the live table."""
+        assert history_source(self.conn.cursor(), 'transactions') == 'transactions'
+        assert closed_seasons(self.conn.cursor(), 2026) == [2024]
@@ -0,0 +1,130 @@
+"""
+Test cases for the hashed, expiring login session store.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import create_app, init_db
+from migrations.run_migration import apply_migration
+from session_store import SessionStore, create_session, hash_token, lookup_session, purge_expired_sessions
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TestSessionStore:
+    """Test cases for token hashing, sliding expiry, coalesced touches and the sweeper."""
+
+    def setup_method(self):
+        """Set up a keeper database file."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.conn = sqlite3.connect(self.db_path)
+        init_db(self.conn)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _set_session(self, token, **columns):
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        self.conn.execute(f"UPDATE sessions SET {assignments} WHERE token_hash = ?", (*columns.values(), hash_token(token)))
+        self.conn.commit()
+
+    def test_tokens_are_stored_hashed_and_replace_the_previous_login(self):
+        """A new login invalidates the wallet's old token; only hashes reach the table."""
+        cursor = self.conn.cursor()
+        first = create_session(cursor, '0xabc')
+        second = create_session(cursor, '0xabc')
+        self.conn.commit()
+
+        assert lookup_session(cursor, first) is None
+        assert lookup_session(cursor, second)[0] == '0xabc'
+        assert lookup_session(cursor, None) is None
+        stored = [row[0] for row in self.conn.execute("SELECT token_hash FROM sessions")]
+        assert stored == [hash_token(second)] and second not in stored
+
+        plan = ' '.join(row[3] for row in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT wallet_address FROM sessions WHERE token_hash = ?", ('x',)))
+        assert 'USING INDEX' in plan or 'PRIMARY KEY' in plan
+
+    def test_touches_are_coalesced_and_slide_expiry(self):
+        """Repeated lookups queue one touch per stale session; one flush writes them all."""
+        token = create_session(self.conn.cursor(), '0xabc', ttl=timedelta(days=1))
+        self.conn.commit()
+        store = SessionStore(self.db_path, ttl=timedelta(days=1))
+
+        assert store.get_wallet(self.conn.cursor(), token) == '0xabc'
+        assert store.pending_touches() == 0  # Just issued
+
+        stale = (utcnow() - timedelta(hours=2)).isoformat(timespec='seconds')
+        self._set_session(token, last_seen_at=stale, expires_at=(utcnow() + timedelta(hours=22)).isoformat(timespec='seconds'))
+        for _ in range(5):
+            assert store.get_wallet(self.conn.cursor(), token) == '0xabc'
+        assert store.pending_touches() == 1
+
+        assert store.flush() == 1
+        assert store.pending_touches() == 0
+        last_seen, expires = self.conn.execute("SELECT last_seen_at, expires_at FROM sessions").fetchone()
+        assert last_seen > stale
+        assert datetime.fromisoformat(expires) - datetime.fromisoformat(last_seen) == timedelta(days=1)
+
+    def test_expired_sessions_are_rejected_and_swept(self):
+        """Expired tokens stop working at once and the sweeper deletes their rows."""
+        cursor = self.conn.cursor()
+        live, dead = create_session(cursor, '0xlive'), create_session(cursor, '0xdead')
+        self.conn.commit()
+        self._set_session(dead, expires_at='2000-01-01T00:00:00')
+
+        assert lookup_session(cursor, dead) is None
+        assert SessionStore(self.db_path).sweep() == 1
+        assert lookup_session(cursor, live)[0] == '0xlive'
+        assert purge_expired_sessions(cursor) == 0
+
+    def test_legacy_table_is_converted_in_place(self):
+        """Raw tokens from the old wallet-keyed table keep working after init_db re-keys them."""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE sessions (wallet_address TEXT PRIMARY KEY, session_token TEXT)")
+        conn.execute("INSERT INTO sessions VALUES ('0xold', 'legacy-token')")
+        init_db(conn)
+        assert lookup_session(conn.cursor(), 'legacy-token')[0] == '0xold'
+        assert 'session_token' not in {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        conn.close()
+
+    def test_login_and_verify_round_trip(self):
+        """/auth/login returns a token that /auth/verify accepts; an unknown token is refused."""
+        test_app = create_app({'DATABASE_URL': self.db_path, 'TESTING': True, 'INIT_DB': False, 'DB_WRITER': False})
+        client = test_app.test_client()
+        token = client.post('/auth/login', json={'walletAddress': '0xabc'}).get_json()['sessionToken']
+
+        assert client.get('/auth/verify', headers={'Authorization': token}).get_json()['walletAddress'] == '0xabc'
+        assert client.get('/auth/verify', headers={'Authorization': 'nope'}).status_code == 401
+        test_app.extensions['skl_resources'].close()
+
+    def test_admin_routes_read_sessions_from_the_configured_database_and_slide_them(self):
+        """Admin auth finds sessions in DATABASE_URL and, like other routes, queues their last-seen touch."""
+        apply_migration(self.conn, '001_add_admin_tables.sql')
+        self.conn.execute("INSERT INTO Users (wallet_address) VALUES ('0xadmin')")
+        self.conn.execute("INSERT INTO AdminUsers (wallet_address, role) VALUES ('0xadmin', 'super_admin')")
+        self.conn.commit()
+        test_app = create_app({'DATABASE_URL': self.db_path, 'TESTING': True, 'INIT_DB': False, 'DB_WRITER': False})
+        resources = test_app.extensions['skl_resources']
+        try:
+            client = test_app.test_client()
+            token = client.post('/auth/login', json={'walletAddress': '0xadmin'}).get_json()['sessionToken']
+            self._set_session(token, last_seen_at=(utcnow() - timedelta(days=1)).isoformat())
+
+            assert client.get('/admin/verify', headers={'Authorization': token}).get_json()['is_admin'] is True
+            assert resources.get_session_store().pending_touches() == 1
+            assert client.get('/admin/dashboard/stats', headers={'Authorization': f'Bearer {token}'}).status_code not in (401, 403)
+        finally:
+            resources.close()
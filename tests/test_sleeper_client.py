@@ -0,0 +1,133 @@
+"""
+Test cases for the shared Sleeper HTTP client.
+"""
+import sys
+import os
+
+import pytest
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import sleeper_client
+from sleeper_client import CircuitBreaker, SleeperHttpClient, SleeperUnavailableError, TokenBucket
+from sleeper_service import SleeperService
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Returns queued responses (or raises queued exceptions) and records each call."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        self.calls.append((url, timeout))
+        result = self.responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestSleeperHttpClient:
+    """Test cases for retries, circuit breaking, stale fallback and rate limiting."""
+
+    def _client(self, session, **kwargs):
+        self.sleeps = []
+        return SleeperHttpClient(rate_limiter=TokenBucket(60000), session=session,
+                                 sleep=self.sleeps.append, **kwargs)
+
+    def test_retries_transient_errors_with_timeouts(self):
+        """429/5xx and connection errors are retried; Retry-After is honoured; every call has a timeout."""
+        session = FakeSession(FakeResponse(429, headers={'Retry-After': '2'}),
+                              requests.exceptions.ConnectTimeout('slow'),
+                              FakeResponse(200, {'season': '2025'}))
+        client = self._client(session, timeout=(1.0, 5.0))
+        assert client.get_json('/state/nfl') == {'season': '2025'}
+        assert [call[1] for call in session.calls] == [(1.0, 5.0)] * 3
+        assert session.calls[0][0] == 'https://api.sleeper.app/v1/state/nfl'
+        assert self.sleeps[0] == 2.0
+        assert client.metrics()['client']['retries'] == 2
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    def test_breaker_opens_and_serves_cached_data(self):
+        """Exhausted retries trip the breaker; while open, cached URLs are served and others fail fast."""
+        session = FakeSession(FakeResponse(200, [{'roster_id': 1}]),
+                              FakeResponse(503), FakeResponse(503))
+        client = self._client(session, max_retries=1, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        assert client.get_json('/league/L1/rosters') == [{'roster_id': 1}]
+        # Sleeper degrades: the last good copy is served and the circuit opens
+        assert client.get_json('/league/L1/rosters') == [{'roster_id': 1}]
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+        # No network call while open
+        assert client.get_json('/league/L1/rosters') == [{'roster_id': 1}]
+        with pytest.raises(SleeperUnavailableError):
+            client.get_json('/league/L1/users')
+        assert len(session.calls) == 3
+
+        metrics = client.metrics()
+        assert metrics['circuit_breaker']['times_opened'] == 1
+        assert metrics['circuit_breaker']['rejected_requests'] == 2
+        assert metrics['client']['stale_responses_served'] == 2
+
+    def test_half_open_trial_is_released_by_any_failure(self):
+        """An HTML page served with a 200 or a broken body fails the trial instead of blocking the circuit for good."""
+        class HtmlResponse(FakeResponse):
+            def json(self):
+                raise ValueError('Expecting value: line 1 column 1 (char 0)')
+
+        session = FakeSession(HtmlResponse(200), requests.exceptions.ChunkedEncodingError('truncated'),
+                              FakeResponse(200, {'season': '2025'}))
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client = self._client(session, max_retries=0, breaker=breaker)
+        with pytest.raises(requests.exceptions.InvalidJSONError):
+            client.get_json('/state/nfl')
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            client.get_json('/state/nfl')  # The half-open trial
+        assert client.get_json('/state/nfl') == {'season': '2025'}  # A new trial is allowed and closes the circuit
+        assert breaker.state == CircuitBreaker.CLOSED and len(session.calls) == 3
+
+    def test_client_errors_are_not_retried_and_service_handles_them(self):
+        """A 404 raises at once without counting against the breaker; SleeperService returns its fallback."""
+        session = FakeSession(FakeResponse(404))
+        client = self._client(session, breaker=CircuitBreaker(failure_threshold=1))
+        service = SleeperService(http_client=client)
+        assert service.get_league_drafts('missing') == []
+        assert len(session.calls) == 1
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    def test_token_bucket_records_waits(self):
+        """Requests beyond the burst wait for a token and the wait is reported."""
+        bucket = TokenBucket(rate_per_minute=6000, burst=2)
+        assert bucket.acquire() == 0.0
+        assert bucket.acquire() == 0.0
+        waited = bucket.acquire()
+        assert 0 < waited <= 0.011
+        metrics = bucket.metrics()
+        assert metrics['waits'] == 1
+        assert metrics['max_wait_seconds'] == round(waited, 3)
+
+    def test_shared_client_splits_the_rate_across_configured_workers(self, monkeypatch):
+        """The process-wide client divides the per-minute budget by the worker count from the server config."""
+        monkeypatch.setattr(sleeper_client, '_client', None)
+        monkeypatch.setattr(sleeper_client, 'load_server_config', lambda: {'workers': 3})
+        monkeypatch.setenv('SLEEPER_RATE_PER_MINUTE', '900')
+        client = sleeper_client.get_sleeper_client()
+        assert client.rate_limiter.rate_per_second == pytest.approx(900 / 3 / 60.0)
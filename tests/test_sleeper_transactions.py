@@ -0,0 +1,77 @@
+"""
+Test cases for typed transaction columns, child rows and compressed payloads.
+"""
+import json
+import os
+import sqlite3
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from sleeper_transactions import (PARSE_ERROR_DETAILS, compact_transactions, decompress_payload, store_transactions,
+                                  transaction_details)
+
+WAIVER = {
+    'transaction_id': 'T1', 'type': 'waiver', 'status': 'complete', 'leg': 3, 'creator': 'u1',
+    'status_updated': 1700000000000, 'settings': {'waiver_bid': 12}, 'roster_ids': [4],
+    'adds': {'p1': 4}, 'drops': {'p2': 4}, 'draft_picks': [], 'waiver_budget': [], 'metadata': {'notes': 'x' * 200},
+}
+TRADE = {
+    'transaction_id': 'T2', 'type': 'trade', 'status': 'complete', 'leg': 5, 'creator': 'u2',
+    'roster_ids': [1, 2], 'adds': {'p3': 1, 'p4': 2}, 'drops': {'p3': 2, 'p4': 1}, 'settings': None,
+}
+
+
+class TestSleeperTransactions:
+    """Test cases for storing, compacting and serving transactions."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database."""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        init_db(self.conn)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def _details(self):
+        rows = self.conn.execute("""
+            SELECT sleeper_transaction_id, type, status, week, creator, status_updated, waiver_bid, data
+            FROM transactions ORDER BY sleeper_transaction_id
+        """).fetchall()
+        return transaction_details(self.conn.cursor(), rows)
+
+    def test_ingest_stores_typed_rows_and_compressed_payload(self):
+        """The served fields come from columns and child rows; the raw object survives compressed."""
+        assert store_transactions(self.conn.cursor(), 'L1', [WAIVER, TRADE, {'type': 'no id'}]) == 2
+        row = self.conn.execute("SELECT week, waiver_bid, data, raw_payload FROM transactions WHERE sleeper_transaction_id = 'T1'").fetchone()
+        assert (row['week'], row['waiver_bid'], row['data']) == (3, 12, None)
+        assert decompress_payload(row['raw_payload']) == WAIVER
+        assert len(row['raw_payload']) < len(json.dumps(WAIVER))
+
+        details = self._details()
+        assert details['T1']['adds'] == {'p1': 4} and details['T1']['drops'] == {'p2': 4}
+        assert details['T1']['leg'] == 3 and details['T1']['settings'] == {'waiver_bid': 12}
+        assert details['T2']['roster_ids'] == [1, 2] and details['T2']['adds'] == {'p3': 1, 'p4': 2}
+
+        # A changed payload replaces the child rows
+        store_transactions(self.conn.cursor(), 'L1', [dict(WAIVER, adds=None, drops={'p9': 4})])
+        assert self._details()['T1']['adds'] is None and self._details()['T1']['drops'] == {'p9': 4}
+
+    def test_legacy_json_rows_are_compacted(self):
+        """Rows with JSON in data are converted in place; unparsable ones stay readable as an error."""
+        self.conn.executemany("INSERT INTO transactions (sleeper_transaction_id, league_id, type, status, data) VALUES (?, 'L1', ?, 'complete', ?)",
+                              [('T1', 'waiver', json.dumps(WAIVER)), ('T3', 'trade', 'not json')])
+        assert self._details()['T1']['metadata'] == WAIVER['metadata']  # Served from JSON until compacted
+
+        stats = compact_transactions(self.conn.cursor())
+        assert (stats['rows'], stats['skipped']) == (1, 1)
+        assert stats['compressed_bytes'] < stats['json_bytes']
+
+        details = self._details()
+        assert details['T1']['adds'] == {'p1': 4} and details['T1']['creator'] == 'u1'
+        assert details['T3'] == PARSE_ERROR_DETAILS
+        assert compact_transactions(self.conn.cursor())['rows'] == 0
@@ -0,0 +1,107 @@
+"""
+Test cases for precomputed /team/<team_id> page snapshots.
+"""
+import json
+import sqlite3
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from cache_versions import bump_cache_version, league_cache_key
+from team_snapshots import get_team_snapshot, rebuild_league_snapshots, rebuild_team_snapshots
+
+
+class TestTeamSnapshots:
+    """Test cases for league-wide snapshot builds and targeted rebuilds."""
+
+    def setup_method(self):
+        """Set up an in-memory keeper database with one three-team league."""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.row_factory = sqlite3.Row
+        init_db(self.conn)
+        cursor = self.conn.cursor()
+        cursor.execute("INSERT INTO season_curr (current_year, IsOffSeason) VALUES ('2025', 1)")
+        cursor.execute("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES ('L1', 'SKL Test', '2025')")
+        cursor.execute("INSERT INTO Users (wallet_address, sleeper_user_id, username, display_name) VALUES ('0xabc', 'u1', 'user1', 'Manager One')")
+        cursor.executemany("INSERT INTO players (sleeper_player_id, name, position, team) VALUES (?, ?, ?, ?)", [
+            ('p1', 'Quarterback One', 'QB', 'KC'),
+            ('p2', 'Receiver Two', 'WR', 'MIN'),
+            ('p3', 'Back Three', 'RB', 'DET'),
+        ])
+        cursor.executemany("""
+            INSERT INTO rosters (sleeper_roster_id, sleeper_league_id, owner_id, team_name, players, reserve)
+            VALUES (?, 'L1', ?, ?, ?, '[]')
+        """, [
+            ('1', 'u1', 'Team One', json.dumps(['p1'])),
+            ('2', None, 'Team Two', json.dumps(['p2'])),
+            ('3', None, 'Team Three', json.dumps(['p3'])),
+        ])
+        cursor.executemany("""
+            INSERT INTO contracts (player_id, team_id, sleeper_league_id, draft_amount, contract_year, duration, is_active)
+            VALUES (?, ?, 'L1', ?, 2025, ?, 1)
+        """, [('p1', '1', 30, 2), ('p2', '2', 50, 3), ('p3', '3', 10, 1)])
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+
+    def test_league_build_ranks_every_team(self):
+        """One pass builds every team with league-relative spending ranks."""
+        payloads = rebuild_league_snapshots(self.conn, 'L1', 2025, True)
+        assert set(payloads) == {'1', '2', '3'}
+
+        team_one = payloads['1']
+        assert team_one['team_name'] == 'Team One'
+        assert team_one['manager_name'] == 'Manager One'
+        assert [p['name'] for p in team_one['players_by_position']['QB']] == ['Quarterback One']
+        assert team_one['team_position_spending_ranks']['QB'] == {'rank': 1, 'total_teams': 1}
+        # Ranked by 2026 remaining budget: team 3 has nothing committed, team 2 the most
+        assert payloads['3']['future_yearly_total_ranks']['2026']['rank'] == 1
+        assert team_one['future_yearly_total_ranks']['2026']['rank'] == 2
+        assert payloads['2']['future_yearly_total_ranks']['2026']['rank'] == 3
+
+        # Served from the stored row until the league version moves
+        self.conn.execute("UPDATE rosters SET team_name = 'Renamed' WHERE sleeper_roster_id = '1'")
+        assert get_team_snapshot(self.conn, 'L1', '1', 2025, True)['team_name'] == 'Team One'
+        bump_cache_version(self.conn.cursor(), league_cache_key('L1'))
+        assert get_team_snapshot(self.conn, 'L1', '1', 2025, True)['team_name'] == 'Renamed'
+
+    def test_stale_snapshot_is_rebuilt_through_the_given_writer(self):
+        """A miss hands the rebuild to write instead of committing the read connection; a hit writes nothing."""
+        units = []
+
+        def write(unit):
+            units.append(unit)
+            result = unit(self.conn.cursor())
+            self.conn.commit()
+            return result
+
+        assert get_team_snapshot(self.conn, 'L1', '1', 2025, True, write=write)['team_name'] == 'Team One'
+        assert get_team_snapshot(self.conn, 'L1', '2', 2025, True, write=write)['team_name'] == 'Team Two'
+        assert len(units) == 1
+
+    def test_targeted_rebuild_refreshes_other_teams_ranks(self):
+        """A change to one team rebuilds it and re-ranks the rest without a full rebuild."""
+        rebuild_league_snapshots(self.conn, 'L1', 2025, True)
+        self.conn.commit()
+
+        self.conn.execute("UPDATE contracts SET duration = 4 WHERE player_id = 'p1'")
+        bump_cache_version(self.conn.cursor(), league_cache_key('L1'))
+        rebuild_team_snapshots(self.conn, 'L1', ['1'], 2025, True)
+        self.conn.commit()
+
+        team_one = get_team_snapshot(self.conn, 'L1', '1', 2025, True)
+        team_two = get_team_snapshot(self.conn, 'L1', '2', 2025, True)
+        assert team_one['players_by_position']['QB'][0]['contract_duration_db'] == 4
+        # Team 1 is now the only team with 2028 money committed
+        assert team_one['future_yearly_total_ranks']['2028']['rank'] == 3
+        assert team_two['future_yearly_total_ranks']['2028']['rank'] == 1
+
+    def test_unknown_team_returns_none(self):
+        """A team that is not in the league has no snapshot."""
+        assert get_team_snapshot(self.conn, 'L1', '99', 2025, True) is None
+        assert get_team_snapshot(self.conn, 'missing-league', '1', 2025, True) is None
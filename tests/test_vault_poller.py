@@ -0,0 +1,96 @@
+"""
+Test cases for the batched yield vault poller and its value history.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app import init_db
+from migrations.run_migration import apply_migration
+from vault_poller import (FlowScriptError, VaultPoller, decode_cadence_value, get_vault_history,
+                          poll_vault_positions)
+
+
+class FakeScriptRunner:
+    """Returns fixed balances per pool and records every script call."""
+
+    def __init__(self, balances):
+        self.balances = balances
+        self.calls = []
+
+    def run(self, script_path, args):
+        self.calls.append((os.path.basename(script_path), args))
+        if self.balances is None:
+            raise FlowScriptError('access node unreachable')
+        return [self.balances[pool['value']] for pool in args[1]['value']]
+
+
+class TestVaultPoller:
+    """Test cases for one-call polling, pro-rata allocation and cached values."""
+
+    def setup_method(self):
+        """Set up a keeper database file with vaults in two pools and one withdrawn vault."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'keeper.db')
+        self.conn = sqlite3.connect(self.db_path)
+        init_db(self.conn)
+        apply_migration(self.conn, '001_add_admin_tables.sql')
+        apply_migration(self.conn, '005_add_vault_value_history.sql')
+        self.conn.executemany("INSERT INTO LeagueMetadata (sleeper_league_id, name, season) VALUES (?, ?, '2025')",
+                              [('L1', 'SKL One'), ('L2', 'SKL Two'), ('L3', 'SKL Three')])
+        self.conn.executemany("""
+            INSERT INTO YieldVaults (vault_id, sleeper_league_id, season_year, vault_address, principal_amount, current_value, status)
+            VALUES (?, ?, 2025, ?, ?, ?, ?)
+        """, [('v1', 'L1', '0xpool', 30.0, 30.0, 'active'),
+              ('v2', 'L2', '0xpool', 10.0, 10.0, 'active'),
+              ('v3', 'L3', '0xother', 5.0, 5.0, 'active'),
+              ('v4', 'L3', '0xpool', 50.0, 0.0, 'withdrawn')])
+        self.conn.commit()
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.conn.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_one_script_call_updates_history_and_cached_values(self):
+        """Both pools are read in one call; each pool balance is split by principal."""
+        runner = FakeScriptRunner({'0xpool': 44.0, '0xother': 5.5})
+        result = poll_vault_positions(self.conn, runner, '0xadmin')
+
+        assert (result['status'], result['vaults'], result['pools']) == ('polled', 3, 2)
+        assert len(runner.calls) == 1
+        assert runner.calls[0][0] == 'check_incrementfi_balances.cdc'
+        assert runner.calls[0][1][0] == {'type': 'Address', 'value': '0xadmin'}
+
+        vaults = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT vault_id, current_value, yield_earned, last_updated FROM YieldVaults")}
+        assert vaults['v1'][:2] == (33.0, 3.0)
+        assert vaults['v2'][:2] == (11.0, 1.0)
+        assert vaults['v3'][:2] == (5.5, 0.5)
+        assert vaults['v4'][:2] == (0.0, 0.0) and vaults['v4'][2] is None
+
+        history = get_vault_history(self.conn.cursor(), 'v1')
+        assert [(h['current_value'], h['pool_balance']) for h in history] == [(33.0, 44.0)]
+
+    def test_recent_poll_is_skipped_and_failures_are_reported(self):
+        """Another process's recent cycle suppresses this one; chain errors do not raise from the poller."""
+        runner = FakeScriptRunner({'0xpool': 40.0, '0xother': 5.0})
+        poll_vault_positions(self.conn, runner)
+        assert poll_vault_positions(self.conn, runner, min_interval=60)['status'] == 'skipped'
+        assert len(runner.calls) == 1
+
+        poller = VaultPoller(self.db_path, FakeScriptRunner(None), interval=0)
+        assert poller.poll_once() == {'status': 'failed', 'error': 'access node unreachable'}
+        assert self.conn.execute("SELECT COUNT(*) FROM vault_value_history").fetchone()[0] == 3
+
+    def test_decode_cadence_value(self):
+        """JSON-Cadence output of the Flow CLI decodes to plain Python values."""
+        value = {'type': 'Array', 'value': [{'type': 'UFix64', 'value': '12.50000000'},
+                                            {'type': 'Optional', 'value': {'type': 'UInt64', 'value': '7'}},
+                                            {'type': 'Optional', 'value': None}]}
+        assert decode_cadence_value(value) == [12.5, 7, None]